@@ -1,3 +1,57 @@
+import datetime
+
 from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Asistencia, Ciudad, HogarComunitario, MadreComunitaria, Nino, Padre, Regional, Rol, Usuario
+
+
+class AsistenciaFormTests(TestCase):
+    """La asistencia del día se guarda con un upsert: un registro por niño y fecha."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        regional = Regional.objects.create(nombre='Regional Prueba')
+        ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=regional)
+        cls.madre = Usuario.objects.create(documento=1, nombres='Marta', apellidos='Madre', correo='madre@prueba.co', rol=rol_madre)
+        hogar = HogarComunitario.objects.create(
+            regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro',
+            madre=MadreComunitaria.objects.create(usuario=cls.madre, nivel_escolaridad='Bachiller'),
+        )
+        cls.ninos = []
+        for i in range(3):
+            usuario_padre = Usuario.objects.create(
+                documento=10 + i, nombres=f'Pedro{i}', apellidos='Padre', correo=f'padre{i}@prueba.co', rol=rol_padre,
+            )
+            cls.ninos.append(Nino.objects.create(
+                nombres=f'Niño{i}', apellidos='Prueba', fecha_nacimiento=datetime.date(2021, 1, 1),
+                hogar=hogar, padre=Padre.objects.create(usuario=usuario_padre),
+            ))
+
+    def _enviar(self, fecha, estados):
+        datos = {'fecha': fecha.isoformat()}
+        datos.update({f'nino_{nino.id}': estado for nino, estado in zip(self.ninos, estados)})
+        respuesta = self.client.post(reverse('asistencia_form'), datos)
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_reenviar_el_mismo_dia_actualiza(self):
+        self.client.force_login(self.madre)
+        fecha = datetime.date(2025, 10, 6)
+
+        self._enviar(fecha, ['Presente', 'Presente', 'Ausente'])
+        self._enviar(fecha, ['Ausente', 'Presente', 'Justificado'])
+
+        self.assertEqual(Asistencia.objects.count(), len(self.ninos))
+        self.assertEqual(
+            list(Asistencia.objects.filter(fecha=fecha).order_by('nino_id').values_list('estado', flat=True)),
+            ['Ausente', 'Presente', 'Justificado'],
+        )
+
+    def test_otro_dia_agrega_registros(self):
+        self.client.force_login(self.madre)
+        self._enviar(datetime.date(2025, 10, 6), ['Presente'] * 3)
+        self._enviar(datetime.date(2025, 10, 7), ['Presente'] * 3)
 
-# Create your tests here.
+        self.assertEqual(Asistencia.objects.count(), 2 * len(self.ninos))
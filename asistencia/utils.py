@@ -1,24 +1,114 @@
 from core.models import Asistencia
-from notifications.models import Notification
-from django.contrib.contenttypes.models import ContentType
+from notifications import services as notificaciones
+from django.db.models import Count
+
+
+def _titulo_ausencias(nino):
+    return f"Ausencias críticas: {nino}"
 
-def verificar_ausencias(nino, usuario, umbral=3):
-    ausencias = Asistencia.objects.filter(nino=nino, estado="Ausente").count()
 
-    if ausencias > umbral:
-        ya_notificado = Notification.objects.filter(
-            title__icontains=f"Ausencias críticas: {nino}",
+def verificar_ausencias_lote(ninos, usuario, umbral=3):
+    """
+    Revisa las ausencias de varios niños con una sola consulta agrupada y crea
+    las notificaciones de los que superan el umbral. El servicio de
+    notificaciones descarta las de niños que ya tienen una sin leer
+    (clave ``ausencias-nino-<id>``).
+    """
+    ninos = {nino.id: nino for nino in ninos}
+    if not ninos:
+        return []
+
+    ausencias = dict(
+        Asistencia.objects.filter(nino_id__in=list(ninos), estado="Ausente")
+        .values('nino_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=umbral)
+        .values_list('nino_id', 'total')
+    )
+    if not ausencias:
+        return []
+
+    return notificaciones.notificar_lote([
+        notificaciones.construir(
+            usuario,  # 🔔 ahora sí se asigna
+            title=_titulo_ausencias(ninos[nino_id]),
+            message=f"{ninos[nino_id]} ha faltado {total} veces.",
             level="grave",
-            read=False,
-            recipient=usuario
-        ).exists()
-
-        if not ya_notificado:
-            Notification.objects.create(
-                title=f"Ausencias críticas: {nino}",
-                message=f"{nino} ha faltado {ausencias} veces.",
-                level="grave",
-                recipient=usuario,  # 🔔 ahora sí se asigna
-                content_type=ContentType.objects.get_for_model(nino),
-                object_id=nino.id
-            )
+            relacionado=ninos[nino_id],
+            dedup_key=notificaciones.clave_ausencias(nino_id),
+        )
+        for nino_id, total in ausencias.items()
+    ])
+
+
+def verificar_ausencias(nino, usuario, umbral=3):
+    return verificar_ausencias_lote([nino], usuario, umbral)
+
+
+# ----------------------------------------------------
+# 📊 Estadísticas de asistencia
+# ----------------------------------------------------
+ESTADOS_ASISTENCIA = (('presentes', 'Presente'), ('ausentes', 'Ausente'), ('justificados', 'Justificado'))
+
+
+def _porcentaje(valor, total):
+    return round((valor / total) * 100) if total > 0 else 0
+
+
+def _conteo_vacio():
+    return {'total': 0, 'presentes': 0, 'ausentes': 0, 'justificados': 0}
+
+
+def estadisticas_asistencia(asistencias):
+    """
+    Calcula las estadísticas de un queryset de Asistencia con UNA sola consulta
+    de agregación condicional (agrupada por niño y semana).
+
+    Devuelve un diccionario con:
+      - total, presentes, ausentes, justificados y sus porcentajes (porc_*)
+      - por_nino: {nino_id: {total, presentes, ausentes, justificados}}
+      - por_semana: [{semana (lunes), total, presentes, ausentes, justificados}] ordenado por fecha
+    """
+    from django.db.models import Count, Q
+    from django.db.models.functions import TruncWeek
+
+    filas = (
+        asistencias.order_by()
+        .annotate(semana=TruncWeek('fecha'))
+        .values('nino_id', 'semana')
+        .annotate(
+            total=Count('id'),
+            **{clave: Count('id', filter=Q(estado=estado)) for clave, estado in ESTADOS_ASISTENCIA}
+        )
+    )
+
+    totales = _conteo_vacio()
+    por_nino = {}
+    por_semana = {}
+    for fila in filas:
+        semana = fila['semana'].date() if hasattr(fila['semana'], 'date') else fila['semana']
+        destinos = (totales, por_nino.setdefault(fila['nino_id'], _conteo_vacio()), por_semana.setdefault(semana, _conteo_vacio()))
+        for destino in destinos:
+            for clave in totales:
+                destino[clave] += fila[clave]
+
+    return {
+        **totales,
+        'porc_presentes': _porcentaje(totales['presentes'], totales['total']),
+        'porc_ausentes': _porcentaje(totales['ausentes'], totales['total']),
+        'porc_justificados': _porcentaje(totales['justificados'], totales['total']),
+        'por_nino': por_nino,
+        'por_semana': [{'semana': semana, **conteo} for semana, conteo in sorted(por_semana.items())],
+    }
+
+
+def con_novedad_vinculada(asistencias):
+    """
+    Anota en cada asistencia el id de la novedad del mismo niño y fecha
+    (``novedad_id``) con una subconsulta, en la misma consulta del listado.
+    """
+    from django.db.models import OuterRef, Subquery
+    from novedades.models import Novedad
+
+    novedades = Novedad.objects.filter(nino=OuterRef('nino'), fecha=OuterRef('fecha')).order_by('id').values('id')[:1]
+    return asistencias.annotate(novedad_id=Subquery(novedades))
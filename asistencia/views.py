@@ -5,60 +5,70 @@ from novedades.models import Novedad
 from django.http import JsonResponse
 from django.core.serializers.json import DjangoJSONEncoder
 import json
-from notifications.models import Notification  # importa el modelo
+from notifications import services as notificaciones
 from django.contrib.auth.decorators import login_required
 from core.views import rol_requerido  # si lo tienes definido ahí
-from core.models import HogarComunitario
-from asistencia.utils import verificar_ausencias
-from django.template.loader import get_template
-from django.http import HttpResponse
-from xhtml2pdf import pisa
+from asistencia.utils import verificar_ausencias_lote, estadisticas_asistencia, con_novedad_vinculada
+from core import dashboard_padre, pdf, snapshots
 
 
 
 
+def _contexto_notificaciones(usuario):
+    """🔔 Primera página de la campana; las nuevas llegan por SSE y las anteriores por cursor."""
+    notifications, siguiente = notificaciones.pagina(usuario)
+    return {
+        'notifications': notifications,
+        'notif_count': notificaciones.contar_no_leidas(usuario),
+        'notif_siguiente': siguiente,
+        'notif_ultimo_id': notifications[0].id if notifications else 0,
+    }
+
+
 @login_required
 @rol_requerido('madre_comunitaria')
 def asistencia_form(request):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     ninos = Nino.objects.filter(hogar=hogar_madre)
 
     if request.method == 'POST':
         fecha_str = request.POST.get('fecha')
         fecha_hoy = date.fromisoformat(fecha_str) if fecha_str else date.today()
 
+        registros = []
         for nino in ninos:
             estado = request.POST.get(f'nino_{nino.id}')
             if estado:
-                Asistencia.objects.update_or_create(
-                    nino=nino,
-                    fecha=fecha_hoy,
-                    defaults={'estado': estado}
-                )
-                verificar_ausencias(nino, request.user)  # Verifica ausencias después de guardar
-
-        # 🔔 Notificaciones del usuario
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-        notif_count = notifications.filter(read=False).count()
+                registros.append(Asistencia(nino=nino, fecha=fecha_hoy, estado=estado))
+
+        if registros:
+            # Un solo INSERT ... ON CONFLICT (nino, fecha) DO UPDATE para todo el día
+            Asistencia.objects.bulk_create(
+                registros,
+                update_conflicts=True,
+                unique_fields=['nino', 'fecha'],
+                update_fields=['estado'],
+            )
+            ninos_registrados = [a.nino for a in registros]
+            verificar_ausencias_lote(ninos_registrados, request.user)  # Verifica ausencias después de guardar
+            # bulk_create no dispara señales: refrescamos el dashboard de la madre
+            # y borramos el de los padres
+            snapshots.actualizar_ninos([n.id for n in ninos_registrados])
+            dashboard_padre.invalidar_ninos([n.id for n in ninos_registrados])
 
         return render(request, 'asistencia/asistencia_form.html', {
             'ninos': ninos,
             'fecha_hoy': fecha_hoy.strftime('%Y-%m-%d'),
             'mensaje': 'Asistencia registrada exitosamente ✅',
-            'notifications': notifications,
-            'notif_count': notif_count,
+            **_contexto_notificaciones(request.user),
         })
 
     fecha_hoy = date.today().strftime('%Y-%m-%d')
-    notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-    notif_count = notifications.filter(read=False).count()
 
     return render(request, 'asistencia/asistencia_form.html', {
         'ninos': ninos,
         'fecha_hoy': fecha_hoy,
-        'notifications': notifications,
-        'notif_count': notif_count,
+        **_contexto_notificaciones(request.user),
     })
 
 
@@ -67,8 +77,7 @@ def asistencia_form(request):
 @login_required
 @rol_requerido('madre_comunitaria')
 def historial_asistencia(request, nino_id):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     nino = get_object_or_404(Nino, id=nino_id, hogar=hogar_madre)
     historial = Asistencia.objects.filter(nino=nino).order_by('-fecha')
 
@@ -78,10 +87,11 @@ def historial_asistencia(request, nino_id):
     if start_date and end_date:
         historial = historial.filter(fecha__range=[start_date, end_date])
 
-    # Vincular novedad por fecha y niño
-    for asistencia in historial:
-        novedad = Novedad.objects.filter(nino=nino, fecha=asistencia.fecha).first()
-        asistencia.novedad_id = novedad.id if novedad else None
+    # Estadísticas en una sola consulta (antes de anotar la novedad)
+    estadisticas = estadisticas_asistencia(historial)
+
+    # Vincular novedad por fecha y niño (subconsulta en el mismo listado)
+    historial = list(con_novedad_vinculada(historial))
 
     # Datos para calendario
     eventos = [
@@ -97,23 +107,16 @@ def historial_asistencia(request, nino_id):
         for a in historial
     ]
 
-    total = historial.count()
-    presentes = historial.filter(estado="Presente").count()
-    ausentes = historial.filter(estado="Ausente").count()
-    justificados = historial.filter(estado="Justificado").count()
-
-    def porcentaje(valor):
-        return round((valor / total) * 100) if total > 0 else 0
-
     return render(request, 'asistencia/historial.html', {
         'nino': nino,
         'historial': historial,
-        'presentes': presentes,
-        'ausentes': ausentes,
-        'justificados': justificados,
-        'porc_presentes': porcentaje(presentes),
-        'porc_ausentes': porcentaje(ausentes),
-        'porc_justificados': porcentaje(justificados),
+        'presentes': estadisticas['presentes'],
+        'ausentes': estadisticas['ausentes'],
+        'justificados': estadisticas['justificados'],
+        'porc_presentes': estadisticas['porc_presentes'],
+        'porc_ausentes': estadisticas['porc_ausentes'],
+        'porc_justificados': estadisticas['porc_justificados'],
+        'por_semana': estadisticas['por_semana'],
         'eventos_json': json.dumps(eventos, cls=DjangoJSONEncoder),
         'start_date': start_date,
         'end_date': end_date,
@@ -141,6 +144,8 @@ def crear_novedad_desde_asistencia(request):
         updated = Asistencia.objects.filter(nino_id=nino_id, fecha=fecha).update(estado="Justificado")
         if not updated:
             Asistencia.objects.create(nino_id=nino_id, fecha=fecha, estado="Justificado")
+        else:
+            snapshots.actualizar_nino(nino_id)  # update() no dispara señales
 
         return JsonResponse({"success": True})
     return JsonResponse({"success": False})
@@ -149,25 +154,18 @@ def crear_novedad_desde_asistencia(request):
 @login_required
 @rol_requerido('madre_comunitaria')
 def historial_asistencia_pdf(request, nino_id):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     nino = get_object_or_404(Nino, id=nino_id, hogar=hogar_madre)
     historial = Asistencia.objects.filter(nino=nino).order_by('-fecha')
 
     # Contexto igual al HTML
+    estadisticas = estadisticas_asistencia(historial)
     context = {
         'nino': nino,
         'historial': historial,
-        'presentes': historial.filter(estado="Presente").count(),
-        'ausentes': historial.filter(estado="Ausente").count(),
-        'justificados': historial.filter(estado="Justificado").count(),
+        'presentes': estadisticas['presentes'],
+        'ausentes': estadisticas['ausentes'],
+        'justificados': estadisticas['justificados'],
     }
 
-    template = get_template("asistencia/historial_pdf.html")  # nuevo template para PDF
-    html = template.render(context)
-
-    response = HttpResponse(content_type="application/pdf")
-    response['Content-Disposition'] = f'attachment; filename="historial_{nino.nombres}.pdf"'
-
-    pisa.CreatePDF(html, dest=response)
-    return response
\ No newline at end of file
+    return pdf.respuesta_pdf(request, "asistencia/historial_pdf.html", context, f"historial_{nino.nombres}.pdf")
\ No newline at end of file
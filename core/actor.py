@@ -0,0 +1,149 @@
+"""
+Quién hace la petición: usuario, rol, perfil de madre o padre y hogar.
+
+``ActorMiddleware`` (después de ``AuthenticationMiddleware``) deja en
+``request.actor`` un ``Actor`` perezoso: se resuelve la primera vez que una
+vista, el decorador ``rol_requerido`` o el context processor lo usan.
+
+- El rol, el perfil y el hogar se guardan en la caché compartida (ver
+  ``CACHES``), una entrada por usuario (la comparten todas sus sesiones). Con
+  la entrada en caché resolver el actor no consulta las tablas de la
+  aplicación; sin ella son dos consultas (usuario con ``select_related`` y
+  hogar de la madre). Con el respaldo DatabaseCache las dos lecturas de la
+  caché son a su vez consultas a la tabla de la caché.
+- La entrada va bajo una versión por usuario (``actor:v:<id>``). Invalidar
+  borra la versión, así que una petición que leyó datos viejos justo antes
+  del cambio los guarda bajo una versión que ya nadie consulta.
+- Al resolverse también se precargan ``request.user.rol``,
+  ``request.user.madre_profile`` y ``request.user.padre_profile``: el código que
+  aún los lee directamente tampoco consulta.
+- Las señales de Usuario, Rol, MadreComunitaria, Padre y HogarComunitario
+  llaman a ``invalidar_usuarios`` (un perfil que pasa a otro usuario invalida
+  a los dos). Si el rol del usuario cambió sin señales
+  (``update()``), la entrada se descarta al no coincidir ``rol_id``; también
+  si el perfil guardado no es del usuario.
+
+Configuración (settings, opcional):
+    ACTOR_CACHE_SEGUNDOS  vigencia de la entrada en caché (def. 3600)
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .models import HogarComunitario, Usuario
+
+PREFIJO = 'actor:'
+
+
+def _segundos():
+    return getattr(settings, 'ACTOR_CACHE_SEGUNDOS', 3600)
+
+
+def clave_version(usuario_id):
+    return f"{PREFIJO}v:{usuario_id}"
+
+
+def clave(usuario_id, version):
+    return f"{PREFIJO}{usuario_id}:{version}"
+
+
+class Actor:
+    def __init__(self, usuario, rol=None, madre=None, padre=None, hogar=None):
+        self.usuario = usuario
+        self.rol = rol
+        self.madre = madre
+        self.padre = padre
+        self.hogar = hogar  # hogar de la madre (el primero si tiene varios)
+
+    @property
+    def nombre_rol(self):
+        return self.rol.nombre_rol if self.rol else None
+
+    @property
+    def es_madre(self):
+        return self.nombre_rol == 'madre_comunitaria'
+
+    @property
+    def es_padre(self):
+        return self.nombre_rol == 'padre'
+
+    @property
+    def es_administrador(self):
+        return self.nombre_rol == 'administrador'
+
+    @property
+    def foto_url(self):
+        return self.madre.foto_madre.url if self.madre and self.madre.foto_madre else ''
+
+
+def _cargar(usuario):
+    """(rol, madre, padre, hogar) desde la base de datos, sin el usuario (no se guarda en la caché)."""
+    usuario = Usuario.objects.select_related('rol', 'madre_profile', 'padre_profile').get(pk=usuario.pk)
+    madre = getattr(usuario, 'madre_profile', None)
+    padre = getattr(usuario, 'padre_profile', None)
+    hogar = None
+    for perfil in (madre, padre):
+        if perfil is not None:
+            type(perfil).usuario.field.delete_cached_value(perfil)
+    if madre is not None:
+        hogar = HogarComunitario.objects.filter(madre=madre).order_by('id').first()
+        if hogar is not None:
+            HogarComunitario.madre.field.set_cached_value(hogar, madre)
+    return usuario.rol, madre, padre, hogar
+
+
+def _precargar(usuario, rol, madre, padre):
+    """Enlaza el rol y los perfiles con ``usuario`` en ambos sentidos: leerlos no consulta."""
+    Usuario.rol.field.set_cached_value(usuario, rol)
+    Usuario.madre_profile.related.set_cached_value(usuario, madre)
+    Usuario.padre_profile.related.set_cached_value(usuario, padre)
+    for perfil in (madre, padre):
+        if perfil is not None:
+            type(perfil).usuario.field.set_cached_value(perfil, usuario)
+
+
+def _vigente(datos, usuario):
+    """La entrada corresponde al rol actual del usuario y sus perfiles son suyos."""
+    rol, madre, padre, _ = datos
+    if (rol.id if rol else None) != usuario.rol_id:
+        return False
+    return all(perfil.usuario_id == usuario.pk for perfil in (madre, padre) if perfil is not None)
+
+
+def obtener_actor(request):
+    usuario = request.user
+    if not usuario.is_authenticated:
+        return Actor(usuario)
+
+    version = cache.get(clave_version(usuario.pk))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(clave_version(usuario.pk), version, _segundos())
+    datos = cache.get(clave(usuario.pk, version))
+    if datos is None or not _vigente(datos, usuario):
+        datos = _cargar(usuario)
+        cache.set(clave(usuario.pk, version), datos, _segundos())
+    rol, madre, padre, hogar = datos
+    _precargar(usuario, rol, madre, padre)
+    return Actor(usuario, rol, madre, padre, hogar)
+
+
+class ActorMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.actor = SimpleLazyObject(lambda: obtener_actor(request))
+        return self.get_response(request)
+
+
+# -----------------------------------------------------------------
+# Invalidación
+# -----------------------------------------------------------------
+def invalidar_usuarios(usuario_ids):
+    claves = [clave_version(usuario_id) for usuario_id in set(usuario_ids) if usuario_id]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
@@ -5,4 +5,6 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     def ready(self):
-        import core.signals
\ No newline at end of file
+        import core.checks
+        import core.signals
+        import core.pragmas
@@ -0,0 +1,255 @@
+"""
+Búsqueda de texto sobre los registros del hogar: niños, novedades,
+seguimientos diarios y planeaciones.
+
+Cada registro se copia a ``DocumentoBusqueda`` (título, texto, hogar) y el
+motor indexa esa tabla:
+
+- SQLite: tabla virtual FTS5 ``documento_busqueda_fts`` (contenido externo),
+  sincronizada con disparadores; el orden es ``bm25`` con más peso al título.
+- PostgreSQL: columna generada ``vector`` (tsvector, configuración
+  ``spanish``) con índice GIN; el orden es ``ts_rank``.
+- Otros motores: ``icontains`` sin orden por relevancia (ahí las tildes sí cuentan).
+
+La tabla y el índice los crea la migración 0028 de core. Las señales de cada
+app llaman a ``indexar`` / ``quitar``; tras cargas con ``bulk_create`` (que no
+disparan señales) use ``reindexar_hogar`` o el comando
+``reconstruir_indice_busqueda``.
+
+Las tildes no cuentan: "sofia" encuentra "Sofía". Cada palabra de la consulta
+se busca como prefijo y todas deben aparecer.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import DocumentoBusqueda, HogarComunitario, Nino
+
+LIMITE_RESULTADOS = 50
+MAX_TERMINOS = 8
+# Peso del título frente al texto en bm25 (SQLite); en PostgreSQL el título va con peso 'A'
+PESO_TITULO = 4.0
+
+TABLA_FTS = 'documento_busqueda_fts'
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ni diéresis ("Niño Pérez" -> "nino perez")."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def terminos(consulta):
+    """Palabras de la consulta (solo letras y números: no llegan operadores al motor)."""
+    return re.findall(r'[^\W_]+', normalizar(consulta))[:MAX_TERMINOS]
+
+
+def _unir(*partes):
+    return '\n'.join(str(p) for p in partes if p)
+
+
+# --- Documentos por tipo --------------------------------------------------------
+
+def _documentos_ninos(ninos):
+    return [
+        DocumentoBusqueda(
+            tipo='nino', objeto_id=n.id, hogar_id=n.hogar_id, nino_id=n.id,
+            titulo=f"{n.nombres} {n.apellidos}", texto=_unir(n.documento),
+        )
+        for n in ninos
+    ]
+
+
+def _documentos_novedades(novedades):
+    return [
+        DocumentoBusqueda(
+            tipo='novedad', objeto_id=n.id, hogar_id=n.nino.hogar_id, nino_id=n.nino_id,
+            titulo=f"{n.get_tipo_display()} - {n.nino}",
+            texto=_unir(n.clase, n.descripcion, n.causa, n.disposicion, n.acuerdos, n.observaciones, n.docente),
+            fecha=n.fecha,
+        )
+        for n in novedades
+    ]
+
+
+def _documentos_seguimientos(seguimientos):
+    return [
+        DocumentoBusqueda(
+            tipo='seguimiento', objeto_id=s.id, hogar_id=s.nino.hogar_id, nino_id=s.nino_id,
+            titulo=f"Seguimiento de {s.nino} - {s.fecha:%d/%m/%Y}",
+            texto=_unir(s.observaciones, s.get_comportamiento_general_display() if s.comportamiento_general else '',
+                        s.get_estado_emocional_display() if s.estado_emocional else ''),
+            fecha=s.fecha,
+        )
+        for s in seguimientos
+    ]
+
+
+def _hogares_de_madres(usuario_ids):
+    """{usuario_id de la madre: id de su primer hogar}. Las planeaciones son de la madre, no del hogar."""
+    hogares = {}
+    for usuario_id, hogar_id in (
+        HogarComunitario.objects.filter(madre__usuario_id__in=set(usuario_ids))
+        .order_by('id').values_list('madre__usuario_id', 'id')
+    ):
+        hogares.setdefault(usuario_id, hogar_id)
+    return hogares
+
+
+def _documentos_planeaciones(planeaciones):
+    planeaciones = list(planeaciones)
+    hogares = _hogares_de_madres(p.madre_id for p in planeaciones)
+    return [
+        DocumentoBusqueda(
+            tipo='planeacion', objeto_id=p.id, hogar_id=hogares[p.madre_id], fecha=p.fecha,
+            titulo=p.nombre_experiencia,
+            texto=_unir(p.intencionalidad_pedagogica, p.materiales_utilizar, p.ambiente_educativo,
+                        p.experiencia_inicio, p.experiencia_pedagogica, p.cierre_experiencia,
+                        p.situaciones_presentadas),
+        )
+        for p in planeaciones if p.madre_id in hogares
+    ]
+
+
+def _fuentes():
+    """{tipo: (queryset base, constructor de documentos)}."""
+    from desarrollo.models import SeguimientoDiario
+    from novedades.models import Novedad
+    from planeaciones.models import Planeacion
+
+    return {
+        'nino': (Nino.objects.all(), _documentos_ninos),
+        'novedad': (Novedad.objects.select_related('nino'), _documentos_novedades),
+        'seguimiento': (SeguimientoDiario.objects.select_related('nino'), _documentos_seguimientos),
+        'planeacion': (Planeacion.objects.all(), _documentos_planeaciones),
+    }
+
+
+# --- Escritura ------------------------------------------------------------------
+
+def _guardar(documentos, batch_size=500):
+    DocumentoBusqueda.objects.bulk_create(
+        documentos, batch_size=batch_size, update_conflicts=True,
+        unique_fields=['tipo', 'objeto_id'],
+        update_fields=['hogar', 'nino_id', 'titulo', 'texto', 'fecha'],
+    )
+
+
+def indexar(tipo, objeto_ids):
+    """Crea o actualiza los documentos de esos registros; quita los que ya no existen o no tienen hogar."""
+    objeto_ids = set(objeto_ids)
+    if not objeto_ids:
+        return
+    queryset, construir = _fuentes()[tipo]
+    documentos = construir(queryset.filter(id__in=objeto_ids))
+    _guardar(documentos)
+    sobrantes = objeto_ids - {d.objeto_id for d in documentos}
+    if sobrantes:
+        quitar(tipo, sobrantes)
+
+
+def quitar(tipo, objeto_ids):
+    DocumentoBusqueda.objects.filter(tipo=tipo, objeto_id__in=list(objeto_ids)).delete()
+
+
+def indexar_nino(nino):
+    """
+    Documento del niño. Si cambió su nombre o su hogar, también los de sus
+    novedades y seguimientos, que llevan el nombre en el título.
+    """
+    previo = DocumentoBusqueda.objects.filter(tipo='nino', objeto_id=nino.id).values_list('titulo', 'hogar_id').first()
+    indexar('nino', [nino.id])
+    if previo is not None and previo != (f"{nino.nombres} {nino.apellidos}", nino.hogar_id):
+        for tipo in ('novedad', 'seguimiento'):
+            queryset, construir = _fuentes()[tipo]
+            _guardar(construir(queryset.filter(nino_id=nino.id)))
+
+
+def indexar_planeaciones_hogar(hogar):
+    """Tras cambiar la madre del hogar: sus planeaciones pasan al hogar de la madre nueva."""
+    from planeaciones.models import Planeacion
+
+    ids = set(DocumentoBusqueda.objects.filter(tipo='planeacion', hogar=hogar).values_list('objeto_id', flat=True))
+    ids.update(Planeacion.objects.filter(madre_id=hogar.madre.usuario_id).values_list('id', flat=True))
+    indexar('planeacion', ids)
+
+
+def reindexar_hogar(hogar_id, batch_size=500):
+    """Reconstruye todos los documentos del hogar. Devuelve cuántos quedaron."""
+    hogar = HogarComunitario.objects.select_related('madre').get(id=hogar_id)
+    fuentes = _fuentes()
+    DocumentoBusqueda.objects.filter(hogar_id=hogar_id).delete()
+    filtros = {
+        'nino': {'hogar_id': hogar_id},
+        'novedad': {'nino__hogar_id': hogar_id},
+        'seguimiento': {'nino__hogar_id': hogar_id},
+        'planeacion': {'madre_id': hogar.madre.usuario_id},
+    }
+    total = 0
+    for tipo, (queryset, construir) in fuentes.items():
+        documentos = construir(queryset.filter(**filtros[tipo]).iterator(chunk_size=batch_size))
+        if tipo == 'planeacion':
+            # Solo si este es el hogar de la madre que recibe sus planeaciones
+            documentos = [d for d in documentos if d.hogar_id == hogar_id]
+        _guardar(documentos, batch_size)
+        total += len(documentos)
+    return total
+
+
+# --- Consulta -------------------------------------------------------------------
+
+def motor():
+    """'fts5', 'tsvector' o None (sin índice de texto en este motor)."""
+    return {'sqlite': 'fts5', 'postgresql': 'tsvector'}.get(connection.vendor)
+
+
+def buscar(hogar_ids, consulta, tipos=None, limite=LIMITE_RESULTADOS):
+    """
+    Documentos de los hogares ``hogar_ids`` que contienen todas las palabras
+    de ``consulta``, del más al menos relevante. Cada documento trae
+    ``puntaje`` (mayor es mejor; 0 sin índice de texto).
+    """
+    palabras = terminos(consulta)
+    hogar_ids = list(hogar_ids)
+    if not palabras or not hogar_ids:
+        return []
+
+    tabla = DocumentoBusqueda._meta.db_table
+    condiciones = [f"d.hogar_id IN ({', '.join(['%s'] * len(hogar_ids))})"]
+    parametros = list(hogar_ids)
+    if tipos:
+        condiciones.append(f"d.tipo IN ({', '.join(['%s'] * len(tipos))})")
+        parametros += list(tipos)
+    tope = f" LIMIT {int(limite)}" if limite else ''
+
+    tipo_motor = motor()
+    if tipo_motor == 'fts5':
+        sql = (
+            f"SELECT d.*, -bm25({TABLA_FTS}, {PESO_TITULO}, 1.0) AS puntaje "
+            f"FROM {TABLA_FTS} JOIN {tabla} d ON d.id = {TABLA_FTS}.rowid "
+            f"WHERE {TABLA_FTS} MATCH %s AND {' AND '.join(condiciones)} "
+            f"ORDER BY puntaje DESC, d.fecha DESC{tope}"
+        )
+        parametros.insert(0, ' '.join(f'"{p}"*' for p in palabras))
+    elif tipo_motor == 'tsvector':
+        sql = (
+            f"SELECT d.*, ts_rank(d.vector, q, 1) AS puntaje "  # 1: los documentos cortos (el niño) primero
+            f"FROM {tabla} d, to_tsquery('spanish', %s) q "
+            f"WHERE d.vector @@ q AND {' AND '.join(condiciones)} "
+            f"ORDER BY puntaje DESC, d.fecha DESC NULLS LAST{tope}"
+        )
+        parametros.insert(0, ' & '.join(f"{p}:*" for p in palabras))
+    else:
+        documentos = DocumentoBusqueda.objects.filter(hogar_id__in=hogar_ids)
+        if tipos:
+            documentos = documentos.filter(tipo__in=tipos)
+        for palabra in palabras:
+            documentos = documentos.filter(Q(titulo__icontains=palabra) | Q(texto__icontains=palabra))
+        documentos = documentos.order_by('-fecha')
+        resultado = list(documentos[:limite] if limite else documentos)
+        for documento in resultado:
+            documento.puntaje = 0
+        return resultado
+    return list(DocumentoBusqueda.objects.raw(sql, parametros))
@@ -0,0 +1,185 @@
+"""
+Caché en disco de certificados PDF (MEDIA_ROOT/cache_pdf).
+
+Cada archivo se identifica por un hash de la plantilla (su código fuente y el
+de las plantillas que extiende o incluye), de ``PDF_CACHE_VERSION`` y de las
+versiones de los datos que muestra (``fecha_actualizacion`` de los modelos y,
+si aplica, la fecha de emisión). Mientras nada cambie, la descarga se sirve
+desde disco; el mismo hash es el ETag, así que un navegador que ya tiene el
+archivo recibe un 304 sin leer nada.
+
+- Los archivos se agrupan por niño (``nino-<id>/``) para poder invalidarlos
+  con las señales post_save de los modelos que alimentan los certificados.
+- Al escribir se poda el directorio hasta ``PDF_CACHE_DISCO_MAX_BYTES``
+  borrando los archivos usados hace más tiempo (cada acierto renueva su mtime).
+
+Configuración (settings, opcional):
+    PDF_CACHE_VERSION  se suma a la clave; cambiarlo en un despliegue descarta los
+                       PDF guardados (estilos, imágenes, filtros o plantillas
+                       con nombre calculado que el hash no alcanza a ver)
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from . import pdf
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES_POR_DEFECTO = 100 * 1024 * 1024
+
+
+def _directorio():
+    return os.path.join(settings.MEDIA_ROOT, 'cache_pdf')
+
+
+def grupo_nino(nino_id):
+    return f"nino-{nino_id}"
+
+
+def _fuentes(template_name, vistas):
+    """Código fuente de la plantilla y, recursivamente, de las que extiende o incluye."""
+    if template_name in vistas:
+        return
+    vistas.add(template_name)
+    plantilla = get_template(template_name).template
+    yield plantilla.source
+    nodos = plantilla.nodelist
+    expresiones = [n.parent_name for n in nodos.get_nodes_by_type(ExtendsNode)]
+    expresiones += [n.template for n in nodos.get_nodes_by_type(IncludeNode)]
+    for expresion in expresiones:
+        if isinstance(expresion.var, str):
+            yield from _fuentes(expresion.var, vistas)
+        else:
+            # Nombre calculado al renderizar: solo cuenta la expresión (ver PDF_CACHE_VERSION)
+            yield expresion.token
+
+
+def hash_plantilla(template_name):
+    sha = hashlib.sha256()
+    for fuente in _fuentes(template_name, set()):
+        sha.update(fuente.encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def calcular_clave(template_name, *versiones):
+    partes = [str(getattr(settings, 'PDF_CACHE_VERSION', '')), hash_plantilla(template_name)]
+    partes += [str(v) for v in versiones]
+    return hashlib.sha256('\0'.join(partes).encode('utf-8')).hexdigest()
+
+
+def _ruta(grupo, nombre, clave):
+    return os.path.join(_directorio(), grupo, f"{nombre}-{clave}.pdf")
+
+
+def leer(grupo, nombre, clave):
+    ruta = _ruta(grupo, nombre, clave)
+    try:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        os.utime(ruta)  # marca de uso para la poda LRU
+    except FileNotFoundError:
+        return None
+    return contenido
+
+
+def guardar(grupo, nombre, clave, contenido):
+    """Escribe el archivo de forma atómica, descarta versiones anteriores del mismo documento y poda."""
+    directorio = os.path.join(_directorio(), grupo)
+    os.makedirs(directorio, exist_ok=True)
+    invalidar(grupo, nombre)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, _ruta(grupo, nombre, clave))
+    podar()
+
+
+def invalidar(grupo, nombre=None):
+    """Borra los archivos del grupo (todos, o solo los del documento ``nombre``)."""
+    directorio = os.path.join(_directorio(), grupo)
+    if nombre is None:
+        shutil.rmtree(directorio, ignore_errors=True)
+        return
+    try:
+        archivos = os.listdir(directorio)
+    except FileNotFoundError:
+        return
+    for archivo in archivos:
+        if archivo.startswith(f"{nombre}-") and archivo.endswith('.pdf'):
+            try:
+                os.remove(os.path.join(directorio, archivo))
+            except FileNotFoundError:
+                pass
+
+
+def podar(max_bytes=None):
+    """Borra los archivos menos usados hasta que el total quede por debajo del límite."""
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'PDF_CACHE_DISCO_MAX_BYTES', MAX_BYTES_POR_DEFECTO)
+    archivos, total = [], 0
+    for raiz, _, nombres in os.walk(_directorio()):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            try:
+                info = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            archivos.append((info.st_mtime, info.st_size, ruta))
+            total += info.st_size
+    if total <= max_bytes:
+        return
+    for _, tamano, ruta in sorted(archivos):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        total -= tamano
+        if total <= max_bytes:
+            break
+
+
+def _con_etag(response, clave):
+    response['ETag'] = f'"{clave}"'
+    # El navegador guarda la copia pero revalida siempre (datos personales, pueden cambiar)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def respuesta_pdf_cacheada(request, template_name, construir_contexto, nombre_archivo,
+                           grupo, nombre, versiones, disposicion='attachment',
+                           mensaje_error='Error al generar el PDF'):
+    """
+    Responde con el PDF de ``nombre`` dentro de ``grupo``, usando la caché en disco.
+
+    ``construir_contexto(clave)`` solo se llama si hay que generar el archivo;
+    recibe la clave por si el documento necesita un valor estable derivado de
+    ella (p. ej. un código de verificación).
+    """
+    clave = calcular_clave(template_name, *versiones)
+
+    no_modificado = get_conditional_response(request, etag=f'"{clave}"')
+    if no_modificado is not None:
+        return _con_etag(no_modificado, clave)
+
+    contenido = leer(grupo, nombre, clave)
+    if contenido is None:
+        try:
+            contenido = pdf.generar_pdf(template_name, construir_contexto(clave))
+        except pdf.ErrorGeneracionPDF:
+            return HttpResponse(mensaje_error, status=500)
+        try:
+            guardar(grupo, nombre, clave, contenido)
+        except OSError:
+            logger.exception("No se pudo guardar el PDF %s/%s en la caché en disco.", grupo, nombre)
+
+    return _con_etag(pdf.respuesta_archivo_pdf(contenido, nombre_archivo, disposicion), clave)
@@ -0,0 +1,31 @@
+"""
+Tipo de la caché compartida configurada en ``CACHES`` (ver settings).
+
+Redis o Memcached son la caché de producción. ``DatabaseCache`` queda solo como
+respaldo para instalaciones sin ninguno de los dos: se comparte entre procesos,
+pero cada lectura o escritura es una consulta SQL a la tabla ``cache_icbf``, así
+que lo guardado ahí ahorra el trabajo de las consultas que reemplaza, no los
+viajes a la base de datos. Las rutas que leen la caché en bucle (el flujo SSE
+de notificaciones) y los presupuestos de consultas lo tienen en cuenta.
+"""
+from django.conf import settings
+
+BACKEND_BASE_DE_DATOS = 'django.core.cache.backends.db.DatabaseCache'
+BACKENDS_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def backend(alias='default'):
+    return settings.CACHES.get(alias, {}).get('BACKEND')
+
+
+def en_base_de_datos(alias='default'):
+    """True con el respaldo DatabaseCache: cada acceso a la caché es una consulta."""
+    return backend(alias) == BACKEND_BASE_DE_DATOS
+
+
+def es_local(alias='default'):
+    """True si la caché no se comparte entre procesos (memoria local o ninguna)."""
+    return backend(alias) in BACKENDS_LOCALES
@@ -0,0 +1,224 @@
+"""
+Calendario del padre de familia (``calendario_padres`` / ``calendario_feed``).
+
+``feed_mes`` arma en un solo diccionario todo el mes de un padre: los íconos de
+cada día y el detalle que antes pedía ``obtener_info`` día por día
+(planeación, novedades y seguimientos). Son cuatro consultas por mes, con
+rangos de fecha sobre los índices, y las planeaciones se limitan a las de la
+madre comunitaria del hogar de cada hijo (antes se recorrían las de todo el
+sistema).
+
+El feed se guarda en la caché por (usuario padre, mes). La clave incluye una
+versión por padre:
+
+- crear o borrar una planeación, novedad, seguimiento o evaluación borra solo
+  el mes afectado (``invalidar_mes``);
+- editar uno de esos registros, o cambiar el niño o su hogar, renueva la
+  versión del padre y descarta todos sus meses (``invalidar_padres``), porque
+  la fecha o la madre pudieron cambiar.
+
+Configuración (settings, opcional):
+    CALENDARIO_PADRE_CACHE_SEGUNDOS  vigencia de cada mes en caché (def. 3600)
+"""
+import calendar
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .fechas import rango_mes
+from .models import Nino
+
+MESES = {
+    1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril",
+    5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto",
+    9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
+}
+
+PREFIJO = 'calendario_padre:'
+
+
+def _segundos():
+    return getattr(settings, 'CALENDARIO_PADRE_CACHE_SEGUNDOS', 3600)
+
+
+def _clave_version(usuario_id):
+    return f"{PREFIJO}v:{usuario_id}"
+
+
+def _clave_mes(usuario_id, version, year, month):
+    return f"{PREFIJO}{usuario_id}:{version}:{year}-{month:02d}"
+
+
+def mes_vecino(year, month, delta):
+    month += delta
+    if month < 1:
+        return year - 1, 12
+    if month > 12:
+        return year + 1, 1
+    return year, month
+
+
+# -----------------------------------------------------------------
+# Construcción del feed
+# -----------------------------------------------------------------
+def _dia(dias, fecha):
+    return dias.setdefault(str(fecha.day), {
+        'eventos': {'planeacion': False, 'novedad': False, 'seguimiento': False},
+        'planeacion': None,
+        'novedades': [],
+        'seguimientos': [],
+    })
+
+
+def _datos_seguimiento(s):
+    estado = (s.get_estado_emocional_display() or 'sin registro').lower()
+    comportamiento = (s.get_comportamiento_general_display() or 'sin registro').lower()
+    resumen = f"Hoy {s.nino.nombres} se mostró principalmente {estado} y su comportamiento fue {comportamiento}."
+    if s.observacion_relevante and s.observaciones:
+        resumen += f" La madre comunitaria observó: \"{s.observaciones}\"."
+
+    return {
+        "nino_nombre": f"{s.nino.nombres} {s.nino.apellidos}",
+        "fecha": s.fecha.strftime("%d/%m/%Y"),
+        "resumen_dia": {
+            "comportamiento": s.get_comportamiento_general_display(),
+            "estado_emocional": s.get_estado_emocional_display(),
+            "observacion_relevante": s.observaciones if s.observacion_relevante else None,
+            "resumen_para_padres": resumen
+        },
+        "evaluaciones": [
+            {"dimension": ev.dimension.nombre, "desempeno": ev.get_desempeno_display()}
+            for ev in s.evaluaciones_dimension.all()
+        ],
+        "valoracion_dia": s.valoracion,
+        "valoracion_restante": 5 - (s.valoracion or 0)
+    }
+
+
+def feed_mes(padre, year, month):
+    """Eventos y detalle de todos los días del mes para los hijos de ``padre`` (``None`` = sin hijos)."""
+    from desarrollo.models import EvaluacionDimension, SeguimientoDiario
+    from novedades.models import Novedad
+    from planeaciones.models import Planeacion
+
+    inicio, fin = rango_mes(year, month)
+    first_day, total_days = calendar.monthrange(year, month)
+    dias = {}
+
+    ninos = list(Nino.objects.filter(padre=padre).values_list('id', 'hogar__madre__usuario_id')) if padre else []
+    nino_ids = [nino_id for nino_id, _ in ninos]
+    madres = {madre_id for _, madre_id in ninos if madre_id}
+
+    if madres:
+        for p in Planeacion.objects.filter(madre_id__in=madres, fecha__gte=inicio, fecha__lt=fin).order_by('fecha', 'id'):
+            dia = _dia(dias, p.fecha)
+            dia['eventos']['planeacion'] = True
+            if dia['planeacion'] is None:
+                dia['planeacion'] = {
+                    "nombre": p.nombre_experiencia,
+                    "intencionalidad": p.intencionalidad_pedagogica,
+                    "materiales": p.materiales_utilizar,
+                }
+
+    if nino_ids:
+        novedades = (
+            Novedad.objects.filter(nino_id__in=nino_ids, fecha__gte=inicio, fecha__lt=fin)
+            .select_related('nino').order_by('fecha', 'id')
+        )
+        for n in novedades:
+            dia = _dia(dias, n.fecha)
+            dia['eventos']['novedad'] = True
+            dia['novedades'].append({
+                "tipo": n.get_tipo_display(),
+                "descripcion": n.descripcion,
+                "nino_nombre": f"{n.nino.nombres} {n.nino.apellidos}"
+            })
+
+        seguimientos = (
+            SeguimientoDiario.objects.filter(nino_id__in=nino_ids, fecha__gte=inicio, fecha__lt=fin)
+            .select_related('nino')
+            .prefetch_related(Prefetch(
+                'evaluaciones_dimension',
+                queryset=EvaluacionDimension.objects.select_related('dimension').order_by('id'),
+            ))
+            .order_by('fecha', 'id')
+        )
+        for s in seguimientos:
+            dia = _dia(dias, s.fecha)
+            dia['eventos']['seguimiento'] = True
+            dia['seguimientos'].append(_datos_seguimiento(s))
+
+    anterior, siguiente = mes_vecino(year, month, -1), mes_vecino(year, month, 1)
+    return {
+        "year": year,
+        "month": month,
+        "month_name": MESES.get(month, str(month)),
+        "first_day": first_day,
+        "total_days": total_days,
+        "anterior": {"year": anterior[0], "month": anterior[1]},
+        "siguiente": {"year": siguiente[0], "month": siguiente[1]},
+        "dias": dias,
+    }
+
+
+def obtener_feed(usuario, year, month):
+    """``feed_mes`` del usuario padre desde la caché (lo construye si falta)."""
+    from .models import Padre
+
+    version = cache.get(_clave_version(usuario.pk))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(_clave_version(usuario.pk), version, _segundos())
+    clave = _clave_mes(usuario.pk, version, year, month)
+    feed = cache.get(clave)
+    if feed is None:
+        padre = Padre.objects.filter(usuario=usuario).first()
+        feed = feed_mes(padre, year, month)
+        cache.set(clave, feed, _segundos())
+    return feed
+
+
+# -----------------------------------------------------------------
+# Invalidación
+# -----------------------------------------------------------------
+def invalidar_padres(usuario_ids):
+    """Descarta todos los meses de estos usuarios padre."""
+    claves = [_clave_version(usuario_id) for usuario_id in set(usuario_ids) if usuario_id]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def invalidar_mes(usuario_ids, fecha):
+    """Descarta solo el mes de ``fecha`` de estos usuarios padre."""
+    usuario_ids = {usuario_id for usuario_id in usuario_ids if usuario_id}
+    if not usuario_ids or fecha is None:
+        return
+
+    def aplicar():
+        versiones = cache.get_many([_clave_version(usuario_id) for usuario_id in usuario_ids])
+        cache.delete_many([
+            _clave_mes(usuario_id, versiones[_clave_version(usuario_id)], fecha.year, fecha.month)
+            for usuario_id in usuario_ids if _clave_version(usuario_id) in versiones
+        ])
+
+    transaction.on_commit(aplicar)
+
+
+def padres_de_ninos(nino_ids):
+    return Nino.objects.filter(id__in=list(nino_ids)).values_list('padre__usuario_id', flat=True)
+
+
+def padres_de_madre(madre_usuario_id):
+    """Usuarios padre con hijos en los hogares de esta madre (usuario)."""
+    return Nino.objects.filter(hogar__madre__usuario_id=madre_usuario_id).values_list('padre__usuario_id', flat=True)
+
+
+def invalidar_registro(usuario_ids, fecha, solo_mes):
+    """Altas y bajas tocan un solo mes; una edición pudo mover la fecha y descarta todos."""
+    if solo_mes:
+        invalidar_mes(usuario_ids, fecha)
+    else:
+        invalidar_padres(usuario_ids)
@@ -0,0 +1,37 @@
+"""
+Revisiones de configuración (``python manage.py check``).
+
+- core.E001: la caché por defecto es local a cada proceso. El actor, el
+  contador de notificaciones y los dashboards se invalidan solo en el proceso
+  que guardó el cambio; con varios procesos los demás seguirían sirviendo
+  datos viejos, incluido el hogar con el que se autoriza a la madre. Para un
+  solo proceso de desarrollo se puede silenciar con ``SILENCED_SYSTEM_CHECKS``.
+- core.W002 (solo con ``check --deploy``): la caché es el respaldo en la base
+  de datos. Es correcta, pero cada acierto sigue siendo una consulta SQL y el
+  flujo SSE de notificaciones pasa a consultas periódicas (ver core/caches.py).
+"""
+from django.core.checks import Error, Tags, Warning, register
+
+from . import caches
+
+
+@register(Tags.caches)
+def revisar_cache_compartida(app_configs, **kwargs):
+    if not caches.es_local():
+        return []
+    return [Error(
+        f"La caché por defecto ({caches.backend()}) no se comparte entre procesos.",
+        hint="Use Redis (CACHE_REDIS_URL) o Memcached (CACHE_MEMCACHED); vea CACHES en settings.",
+        id='core.E001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def revisar_cache_en_base_de_datos(app_configs, **kwargs):
+    if not caches.en_base_de_datos():
+        return []
+    return [Warning(
+        "La caché por defecto es la tabla de la base de datos: cada lectura de la caché es una consulta.",
+        hint="Configure Redis (CACHE_REDIS_URL) o Memcached (CACHE_MEMCACHED) en producción.",
+        id='core.W002',
+    )]
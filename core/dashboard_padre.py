@@ -0,0 +1,125 @@
+"""
+Dashboard del padre de familia (``padre_dashboard``).
+
+- ``datos_dashboard`` arma las tarjetas de todos los hijos con UNA consulta: la
+  última asistencia, el último desarrollo y la última novedad de cada niño se
+  anotan con subconsultas correlacionadas (``Subquery`` + ``OuterRef``), que
+  recorren los índices (nino, fecha) en lugar de una consulta por niño.
+- ``obtener_dashboard`` guarda el resultado (solo valores simples) en la caché,
+  una entrada por usuario padre.
+- Las señales de Nino, Asistencia, DesarrolloNino y Novedad, y las rutas que
+  escriben con ``bulk_create``/``update`` (sin señales), llaman a
+  ``invalidar_ninos`` para borrar la entrada de los padres afectados.
+
+Configuración (settings, opcional):
+    PADRE_DASHBOARD_CACHE_SEGUNDOS  vigencia de la entrada en caché (def. 3600)
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import Asistencia, Nino
+
+PREFIJO = 'dashboard_padre:'
+
+
+def clave(usuario_id):
+    return f"{PREFIJO}{usuario_id}"
+
+
+def _ultimo(queryset, campo):
+    return Subquery(queryset.values(campo)[:1])
+
+
+def datos_dashboard(padre):
+    """Tarjetas de los hijos de ``padre`` (lista de diccionarios) en una sola consulta."""
+    from desarrollo.models import DesarrolloNino
+    from novedades.models import Novedad
+
+    asistencias = Asistencia.objects.filter(nino=OuterRef('pk')).order_by('-fecha')
+    desarrollos = DesarrolloNino.objects.filter(nino=OuterRef('pk')).order_by('-fecha_fin_mes')
+    novedades = Novedad.objects.filter(nino=OuterRef('pk')).order_by('-fecha', '-id')
+
+    ninos = (
+        Nino.objects.filter(padre=padre)
+        .select_related('hogar')
+        .only('id', 'nombres', 'apellidos', 'foto', 'hogar__nombre_hogar')
+        .annotate(
+            asistencia_estado=_ultimo(asistencias, 'estado'),
+            asistencia_fecha=_ultimo(asistencias, 'fecha'),
+            desarrollo_fecha_fin_mes=_ultimo(desarrollos, 'fecha_fin_mes'),
+            desarrollo_conclusion=_ultimo(desarrollos, 'conclusion_general'),
+            novedad_tipo=_ultimo(novedades, 'tipo'),
+            novedad_descripcion=_ultimo(novedades, 'descripcion'),
+        )
+        .order_by('nombres')
+    )
+
+    tipos_novedad = dict(Novedad.TIPOS_NOVEDAD)
+    ninos_data = []
+    for nino in ninos:
+        ultima_asistencia = None
+        if nino.asistencia_fecha:
+            ultima_asistencia = {
+                'estado': nino.asistencia_estado,
+                'mensaje': f"El día {nino.asistencia_fecha.strftime('%d/%m/%Y')} estuvo {nino.asistencia_estado.lower()}."
+            }
+        ultimo_desarrollo = None
+        if nino.desarrollo_fecha_fin_mes:
+            ultimo_desarrollo = {
+                'fecha_fin_mes': nino.desarrollo_fecha_fin_mes,
+                'conclusion_general': nino.desarrollo_conclusion,
+            }
+        ultima_novedad = None
+        if nino.novedad_tipo is not None:
+            ultima_novedad = {
+                'tipo': nino.novedad_tipo,
+                'tipo_display': tipos_novedad.get(nino.novedad_tipo, nino.novedad_tipo),
+                'descripcion': nino.novedad_descripcion,
+            }
+
+        ninos_data.append({
+            'nino': {
+                'id': nino.id,
+                'nombres': nino.nombres,
+                'apellidos': nino.apellidos,
+                'foto_url': nino.foto.url if nino.foto else '',
+                'nombre_hogar': nino.hogar.nombre_hogar,
+            },
+            'ultima_asistencia': ultima_asistencia,
+            'ultimo_desarrollo': ultimo_desarrollo,
+            'ultima_novedad': ultima_novedad,
+        })
+    return ninos_data
+
+
+def obtener_dashboard(usuario):
+    """
+    Tarjetas del dashboard del usuario padre, desde la caché si están.
+    Lanza ``Padre.DoesNotExist`` si el usuario no tiene perfil de padre.
+    """
+    from .models import Padre
+
+    ninos_data = cache.get(clave(usuario.pk))
+    if ninos_data is None:
+        padre = Padre.objects.get(usuario=usuario)
+        ninos_data = datos_dashboard(padre)
+        cache.set(clave(usuario.pk), ninos_data, getattr(settings, 'PADRE_DASHBOARD_CACHE_SEGUNDOS', 3600))
+    return ninos_data
+
+
+# -----------------------------------------------------------------
+# Invalidación
+# -----------------------------------------------------------------
+def invalidar_usuarios(usuario_ids):
+    claves = [clave(usuario_id) for usuario_id in set(usuario_ids) if usuario_id]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def invalidar_ninos(nino_ids):
+    """Borra el dashboard de los padres de estos niños (una consulta)."""
+    nino_ids = list(nino_ids)
+    if nino_ids:
+        invalidar_usuarios(Nino.objects.filter(id__in=nino_ids).values_list('padre__usuario_id', flat=True))
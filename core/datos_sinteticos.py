@@ -0,0 +1,293 @@
+"""
+Datos sintéticos a escala regional para pruebas de carga y benchmarks.
+
+Genera regionales, ciudades, hogares con su madre comunitaria, padres y niños,
+y para cada día hábil de los últimos meses: asistencia, planeación de la
+madre, seguimientos diarios con evaluaciones por dimensión y novedades.
+Todo se inserta con ``bulk_create`` hogar por hogar (una transacción por
+hogar), así que la memoria no crece con la escala.
+
+``bulk_create`` no dispara señales: los ``ResumenMensualSeguimiento`` se
+construyen aquí mismo con ``desarrollo.resumenes.construir_resumenes`` y el
+índice de búsqueda con ``core.busqueda.reindexar_hogar``. Los snapshots del
+dashboard se reconstruyen solos en la primera visita y los informes mensuales
+(``DesarrolloNino``) los genera ``close_month``.
+
+Los usuarios creados comparten la contraseña ``CONTRASENA`` para poder
+entrar a mirar los datos; sus correos terminan en ``@sintetico.example``.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from core import busqueda
+from core.fechas import rango_mes
+
+CONTRASENA = 'sintetico123'
+DOMINIO_CORREO = 'sintetico.example'
+PREFIJO_REGIONAL = 'Regional sintética'
+DIMENSIONES = ['Cognitiva', 'Comunicativa', 'Corporal', 'Socio-afectiva']
+
+# Escalas predefinidas: hogares y niños son por regional y por hogar
+ESCALAS = {
+    'hogar': {'regionales': 1, 'hogares': 1, 'ninos': 15, 'meses': 3},
+    'municipio': {'regionales': 1, 'hogares': 20, 'ninos': 15, 'meses': 3},
+    'regional': {'regionales': 3, 'hogares': 60, 'ninos': 15, 'meses': 6},
+}
+
+NOMBRES = [
+    'Sofía', 'Santiago', 'Valentina', 'Matías', 'Isabella', 'Samuel', 'Mariana', 'Sebastián',
+    'Luciana', 'Emiliano', 'Salomé', 'Jerónimo', 'Gabriela', 'Tomás', 'Antonella', 'Martín',
+]
+APELLIDOS = [
+    'Rodríguez', 'Gómez', 'González', 'Martínez', 'García', 'López', 'Hernández', 'Sánchez',
+    'Ramírez', 'Pérez', 'Díaz', 'Muñoz', 'Rojas', 'Moreno', 'Jiménez', 'Vargas',
+]
+ESTADOS_ASISTENCIA = (['Presente'] * 17) + (['Ausente'] * 2) + ['Justificado']
+DESEMPENOS = ['alto', 'adecuado', 'adecuado', 'proceso', 'bajo']
+VALORACIONES = [1, 2, 3, 3, 4, 4, 4, 5, 5]
+
+
+def dias_habiles(meses, hasta):
+    """Días de lunes a viernes desde el primero de hace ``meses - 1`` meses hasta ``hasta``."""
+    year, month = hasta.year, hasta.month - (meses - 1)
+    while month < 1:
+        year, month = year - 1, month + 12
+    dia, dias = rango_mes(year, month)[0], []
+    while dia <= hasta:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+class GeneradorDatosSinteticos:
+    """
+    ``GeneradorDatosSinteticos(regionales=2, hogares=10, ninos=15, meses=3).run()``
+    devuelve el número de filas creadas por modelo. Con la misma ``semilla`` y
+    la misma base de partida los datos son los mismos.
+    """
+
+    def __init__(self, regionales=1, hogares=10, ninos=15, meses=3, semilla=1, hasta=None,
+                 batch_size=2000, avance=None):
+        self.regionales = regionales
+        self.hogares = hogares
+        self.ninos = ninos
+        self.meses = meses
+        self.rnd = random.Random(semilla)
+        self.hasta = hasta or date.today()
+        self.batch_size = batch_size
+        self.avance = avance or (lambda mensaje: None)
+        self.conteo = dict.fromkeys([
+            'regionales', 'hogares', 'madres', 'padres', 'ninos', 'asistencias',
+            'planeaciones', 'seguimientos', 'evaluaciones', 'novedades', 'resumenes',
+            'documentos_busqueda',
+        ], 0)
+
+    # -----------------------------------------------------------------
+    def run(self):
+        from core.models import Rol, Usuario
+        from planeaciones.models import Dimension
+
+        self.dias = dias_habiles(self.meses, self.hasta)
+        self.roles = {
+            nombre: Rol.objects.get_or_create(nombre_rol=nombre)[0]
+            for nombre in ('administrador', 'madre_comunitaria', 'padre')
+        }
+        self.dimensiones = [Dimension.objects.get_or_create(nombre=nombre)[0] for nombre in DIMENSIONES]
+        self.password = make_password(CONTRASENA)  # un solo hash para todos: hashear es lento
+        self.documento = max(Usuario.objects.aggregate(m=Max('documento'))['m'] or 0, 1_000_000_000)
+
+        self._crear_administrador()
+        for regional in self._crear_regionales():
+            for hogar in self._crear_hogares(regional):
+                with transaction.atomic():
+                    self._poblar_hogar(hogar)
+            self.avance(f"{regional.nombre}: {self.hogares} hogares")
+        return self.conteo
+
+    # -----------------------------------------------------------------
+    def _usuario(self, rol, nombres, apellidos):
+        from core.models import Usuario
+
+        self.documento += 1
+        return Usuario(
+            documento=self.documento, nombres=nombres, apellidos=apellidos,
+            correo=f"u{self.documento}@{DOMINIO_CORREO}", rol=self.roles[rol],
+            password=self.password, telefono=f"3{self.rnd.randint(100000000, 199999999)}",
+        )
+
+    def _nombre(self):
+        return self.rnd.choice(NOMBRES), f"{self.rnd.choice(APELLIDOS)} {self.rnd.choice(APELLIDOS)}"
+
+    def _crear_administrador(self):
+        self._usuario('administrador', 'Administrador', 'Sintético').save()
+
+    def _crear_regionales(self):
+        from core.models import Regional
+
+        existentes = Regional.objects.filter(nombre__startswith=PREFIJO_REGIONAL).count()
+        regionales = Regional.objects.bulk_create([
+            Regional(nombre=f"{PREFIJO_REGIONAL} {existentes + i + 1}") for i in range(self.regionales)
+        ])
+        self.conteo['regionales'] += len(regionales)
+        return regionales
+
+    def _crear_hogares(self, regional):
+        from core.models import Ciudad, HogarComunitario, MadreComunitaria, Usuario
+
+        ciudades = Ciudad.objects.bulk_create([
+            Ciudad(nombre=f"Municipio {i + 1} ({regional.nombre})", regional=regional) for i in range(2)
+        ])
+        usuarios = Usuario.objects.bulk_create([
+            self._usuario('madre_comunitaria', *self._nombre()) for _ in range(self.hogares)
+        ])
+        madres = MadreComunitaria.objects.bulk_create([
+            MadreComunitaria(usuario=u, nivel_escolaridad='Técnico', disponibilidad_tiempo=True) for u in usuarios
+        ])
+        hogares = HogarComunitario.objects.bulk_create([
+            HogarComunitario(
+                regional=regional, regional_nombre=regional.nombre, ciudad=ciudades[i % len(ciudades)], madre=madre,
+                nombre_hogar=f"Hogar {madre.usuario.apellidos.split()[0]} {i + 1}",
+                direccion=f"Calle {self.rnd.randint(1, 120)} # {self.rnd.randint(1, 90)}-{self.rnd.randint(1, 60)}",
+                localidad=ciudades[i % len(ciudades)].nombre, estrato=self.rnd.randint(1, 3),
+                capacidad_maxima=max(15, self.ninos), estado='activo',
+            )
+            for i, madre in enumerate(madres)
+        ])
+        self.conteo['madres'] += len(madres)
+        self.conteo['hogares'] += len(hogares)
+        return hogares
+
+    # -----------------------------------------------------------------
+    def _poblar_hogar(self, hogar):
+        ninos = self._crear_ninos(hogar)
+        self._crear_asistencias(ninos)
+        planeaciones = self._crear_planeaciones(hogar)
+        self._crear_seguimientos(ninos, planeaciones)
+        self._crear_novedades(hogar, ninos)
+        self.conteo['documentos_busqueda'] += busqueda.reindexar_hogar(hogar.id, self.batch_size)
+
+    def _crear_ninos(self, hogar):
+        from core.models import Nino, Padre, Usuario
+
+        # Uno de cada siete niños es hermano del anterior (mismo acudiente)
+        hermanos = [i > 0 and self.rnd.random() < 0.15 for i in range(self.ninos)]
+        usuarios = Usuario.objects.bulk_create([
+            self._usuario('padre', *self._nombre()) for es_hermano in hermanos if not es_hermano
+        ])
+        padres = Padre.objects.bulk_create([
+            Padre(usuario=u, estrato=hogar.estrato, ocupacion=self.rnd.choice(['independiente', 'comerciante', 'empleado_privado', 'ama_casa'])) for u in usuarios
+        ])
+        acudientes, siguiente = [], iter(padres)
+        for es_hermano in hermanos:
+            acudientes.append(acudientes[-1] if es_hermano else next(siguiente))
+
+        ninos = Nino.objects.bulk_create([
+            Nino(
+                nombres=self.rnd.choice(NOMBRES), apellidos=padre.usuario.apellidos,
+                fecha_nacimiento=self.hasta - timedelta(days=self.rnd.randint(2 * 365, 5 * 365)),
+                genero=self.rnd.choice(['masculino', 'femenino']), parentesco='padre',
+                hogar=hogar, padre=padre,
+            )
+            for padre in acudientes
+        ])
+        self.conteo['padres'] += len(padres)
+        self.conteo['ninos'] += len(ninos)
+        return ninos
+
+    def _crear_asistencias(self, ninos):
+        from core.models import Asistencia
+
+        asistencias = []
+        for nino in ninos:
+            # Cada niño con su propia tendencia a faltar: algunos quedan con ausencias críticas
+            faltas = self.rnd.choice([0.02, 0.05, 0.1, 0.3])
+            nino.dias_presente = []
+            for dia in self.dias:
+                estado = self.rnd.choice(ESTADOS_ASISTENCIA[1:]) if self.rnd.random() < faltas else 'Presente'
+                asistencias.append(Asistencia(nino=nino, fecha=dia, estado=estado))
+                if estado == 'Presente':
+                    nino.dias_presente.append(dia)
+        Asistencia.objects.bulk_create(asistencias, batch_size=self.batch_size)
+        self.conteo['asistencias'] += len(asistencias)
+
+    def _crear_planeaciones(self, hogar):
+        from planeaciones.models import Planeacion
+
+        planeaciones = Planeacion.objects.bulk_create([
+            Planeacion(
+                madre_id=hogar.madre.usuario_id, fecha=dia,
+                nombre_experiencia=f"Experiencia {dia:%d/%m}",
+                intencionalidad_pedagogica="Explorar el entorno con los sentidos.",
+                materiales_utilizar="Cartulina, colores, bloques.",
+                ambiente_educativo="Patio del hogar.",
+                experiencia_inicio="Canción de bienvenida.",
+                experiencia_pedagogica="Juego por rincones.",
+                cierre_experiencia="Conversación en círculo.",
+                situaciones_presentadas="Ninguna.",
+            )
+            for dia in self.dias
+        ], batch_size=self.batch_size)
+        Relacion = Planeacion.dimensiones.through
+        Relacion.objects.bulk_create([
+            Relacion(planeacion_id=p.id, dimension_id=d.id)
+            for p in planeaciones for d in self.rnd.sample(self.dimensiones, 2)
+        ], batch_size=self.batch_size)
+        self.conteo['planeaciones'] += len(planeaciones)
+        return {p.fecha: p for p in planeaciones}
+
+    def _crear_seguimientos(self, ninos, planeaciones):
+        from desarrollo.models import EvaluacionDimension, ResumenMensualSeguimiento, SeguimientoDiario
+        from desarrollo.resumenes import construir_resumenes
+
+        comportamientos = [c for c, _ in SeguimientoDiario.COMPORTAMIENTO_CHOICES]
+        emociones = [e for e, _ in SeguimientoDiario.ESTADO_EMOCIONAL_CHOICES]
+        seguimientos = SeguimientoDiario.objects.bulk_create([
+            SeguimientoDiario(
+                nino=nino, planeacion=planeaciones[dia], fecha=dia,
+                comportamiento_general=self.rnd.choice(comportamientos),
+                estado_emocional=self.rnd.choice(emociones),
+                valoracion=self.rnd.choice(VALORACIONES),
+                observacion_relevante=self.rnd.random() < 0.1,
+                observaciones="Participó en la actividad del día." if self.rnd.random() < 0.3 else None,
+            )
+            for nino in ninos for dia in nino.dias_presente if self.rnd.random() < 0.7
+        ], batch_size=self.batch_size)
+
+        evaluaciones = {
+            s.id: [
+                EvaluacionDimension(seguimiento=s, dimension=d, desempeno=self.rnd.choice(DESEMPENOS))
+                for d in self.rnd.sample(self.dimensiones, 2)
+            ]
+            for s in seguimientos
+        }
+        EvaluacionDimension.objects.bulk_create(
+            [e for lista in evaluaciones.values() for e in lista], batch_size=self.batch_size,
+        )
+        resumenes = ResumenMensualSeguimiento.objects.bulk_create(
+            construir_resumenes((s, evaluaciones[s.id]) for s in seguimientos), batch_size=self.batch_size,
+        )
+        self.conteo['seguimientos'] += len(seguimientos)
+        self.conteo['evaluaciones'] += sum(len(lista) for lista in evaluaciones.values())
+        self.conteo['resumenes'] += len(resumenes)
+
+    def _crear_novedades(self, hogar, ninos):
+        from novedades.models import Novedad
+
+        tipos = [t for t, _ in Novedad.TIPOS_NOVEDAD]
+        madre = hogar.madre.usuario
+        novedades = [
+            Novedad(
+                nino=nino, fecha=dia, tipo=self.rnd.choice(tipos), usuario=madre,
+                docente=f"{madre.nombres} {madre.apellidos}", clase="Seguimiento",
+                descripcion="Novedad registrada en el seguimiento del día.",
+            )
+            for nino in ninos for dia in self.dias
+            if self.rnd.random() < 1.5 / 21  # cerca de una y media por niño al mes
+        ]
+        Novedad.objects.bulk_create(novedades, batch_size=self.batch_size)
+        self.conteo['novedades'] += len(novedades)
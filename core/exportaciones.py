@@ -0,0 +1,139 @@
+"""
+Exportación de los reportes del administrador a Excel y CSV en una sola pasada.
+
+- Excel: libro ``write_only`` de openpyxl. Las filas se escriben a medida que
+  llegan de la base de datos; los anchos de columna (que en modo write-only
+  deben fijarse antes de escribir) se calculan con una muestra de las
+  primeras ``FILAS_MUESTRA`` filas. El archivo se arma en un temporal y se
+  envía por partes con ``FileResponse``.
+- CSV: ``StreamingHttpResponse`` que va escribiendo fila por fila.
+"""
+import csv
+import tempfile
+from itertools import chain, islice
+
+import openpyxl
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+FILAS_MUESTRA = 200
+TAMANO_LOTE = 2000
+
+CONTENT_TYPE_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# --- ESTILOS (los mismos del encabezado de reportes original) ---
+FUENTE_TITULO = Font(name='Poppins', bold=True, size=16)
+FUENTE_BARRA = Font(name='Poppins', bold=True, color='FFFFFF')
+FUENTE_ETIQUETA = Font(name='Poppins', bold=True)
+FUENTE_ENCABEZADO = Font(name='Poppins', bold=True, color='FFFFFF')
+RELLENO_AZUL = PatternFill(start_color='004080', end_color='004080', fill_type='solid')
+CENTRADO = Alignment(horizontal='center', vertical='center')
+IZQUIERDA = Alignment(horizontal='left', vertical='center')
+BORDE_FINO = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+def _celda(ws, valor=None, font=None, fill=None, alignment=None):
+    celda = WriteOnlyCell(ws, value=valor)
+    celda.border = BORDE_FINO
+    if font is not None:
+        celda.font = font
+    if fill is not None:
+        celda.fill = fill
+    if alignment is not None:
+        celda.alignment = alignment
+    return celda
+
+
+def _largo(valor):
+    return len(str(valor)) if valor is not None else 0
+
+
+def _filas_encabezado(titulo, total, num_columnas):
+    """Valores de las filas 1-4 (título, barra y sección informativa) y sus celdas combinadas."""
+    punto_medio = num_columnas // 2
+    fecha = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def fila_info(etiqueta, valor):
+        fila = [None] * num_columnas
+        fila[0], fila[punto_medio] = etiqueta, valor
+        return fila
+
+    filas = [
+        [titulo] + [None] * (num_columnas - 1),
+        ["Información del reporte"] + [None] * (num_columnas - 1),
+        fila_info("Fecha de Generación:", fecha),
+        fila_info("Total de Registros:", total),
+    ]
+    ultima = get_column_letter(num_columnas)
+    medio = get_column_letter(punto_medio)
+    siguiente = get_column_letter(punto_medio + 1)
+    combinadas = [f"A1:{ultima}1", f"A2:{ultima}2", f"A3:{medio}3", f"{siguiente}3:{ultima}3",
+                  f"A4:{medio}4", f"{siguiente}4:{ultima}4"]
+    return filas, combinadas
+
+
+def respuesta_excel(nombre_archivo, hoja, titulo, encabezados, total, filas):
+    """
+    Escribe ``filas`` (iterable de listas) en un libro write-only y lo envía como adjunto.
+    ``total`` es el número de registros que se muestra en el encabezado.
+    """
+    filas = iter(filas)
+    muestra = list(islice(filas, FILAS_MUESTRA))
+    num_columnas = len(encabezados)
+    filas_encabezado, combinadas = _filas_encabezado(titulo, total, num_columnas)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(hoja)
+
+    # --- Anchos y alturas: deben definirse antes de escribir filas ---
+    for indice in range(num_columnas):
+        largo = max(_largo(fila[indice]) for fila in chain(filas_encabezado, [encabezados], muestra))
+        ws.column_dimensions[get_column_letter(indice + 1)].width = largo + 4
+    ws.row_dimensions[1].height = 30
+    ws.row_dimensions[2].height = 25
+    ws.row_dimensions[5].height = 25
+    for rango in combinadas:
+        ws.merged_cells.add(rango)
+
+    # --- Encabezado del reporte ---
+    titulo_fila, barra_fila, fecha_fila, total_fila = filas_encabezado
+    ws.append([_celda(ws, titulo_fila[0], font=FUENTE_TITULO, alignment=CENTRADO)]
+              + [_celda(ws) for _ in range(num_columnas - 1)])
+    ws.append([_celda(ws, barra_fila[0], font=FUENTE_BARRA, fill=RELLENO_AZUL, alignment=CENTRADO)]
+              + [_celda(ws) for _ in range(num_columnas - 1)])
+    for fila in (fecha_fila, total_fila):
+        ws.append([
+            _celda(ws, valor, font=FUENTE_ETIQUETA if indice == 0 else None,
+                   alignment=IZQUIERDA if indice == num_columnas // 2 else None)
+            for indice, valor in enumerate(fila)
+        ])
+
+    # --- Encabezados de la tabla y datos ---
+    ws.append([_celda(ws, titulo_columna, font=FUENTE_ENCABEZADO, fill=RELLENO_AZUL, alignment=CENTRADO)
+               for titulo_columna in encabezados])
+    for fila in chain(muestra, filas):
+        ws.append([_celda(ws, valor) for valor in fila])
+
+    archivo = tempfile.TemporaryFile()
+    wb.save(archivo)
+    archivo.seek(0)
+    return FileResponse(archivo, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE_EXCEL)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en lugar de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    """Envía ``filas`` como CSV a medida que se generan (con BOM para que Excel reconozca UTF-8)."""
+    escritor = csv.writer(_Eco())
+    contenido = chain(['\ufeff'], [escritor.writerow(encabezados)], (escritor.writerow(fila) for fila in filas))
+    response = StreamingHttpResponse(contenido, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
@@ -0,0 +1,50 @@
+"""
+Rangos de fechas para filtrar por mes.
+
+``fecha__month``/``fecha__year`` se traducen en SQL a una función sobre la
+columna (``strftime``/``EXTRACT``), que impide usar los índices (nino, fecha),
+(madre, fecha), etc. Estos ayudantes expresan el mismo mes como un rango
+semiabierto ``>= primer día`` y ``< primer día del mes siguiente``, que sí los
+recorre.
+
+    Novedad.objects.filter(nino=nino, **filtro_mes('fecha', 2025, 10))
+
+Lanzan ``ValueError`` si el año o el mes no son válidos, como ``date``.
+"""
+from datetime import date, datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def rango_mes(year, month):
+    """Primer día del mes y primer día del mes siguiente (rango semiabierto)."""
+    inicio = date(year, month, 1)
+    fin = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return inicio, fin
+
+
+def filtro_mes(campo, year, month):
+    """Argumentos de ``filter`` para las filas de ``campo`` (DateField) en ese mes."""
+    inicio, fin = rango_mes(year, month)
+    return {f"{campo}__gte": inicio, f"{campo}__lt": fin}
+
+
+def filtro_mes_datetime(campo, year, month):
+    """Igual que ``filtro_mes`` para un DateTimeField, en la zona horaria actual."""
+    inicio, fin = rango_mes(year, month)
+    return {
+        f"{campo}__gte": timezone.make_aware(datetime.combine(inicio, time.min)),
+        f"{campo}__lt": timezone.make_aware(datetime.combine(fin, time.min)),
+    }
+
+
+def q_mes_en_anios(campo, month, desde, hasta):
+    """
+    ``Q`` con el mes ``month`` de cada año entre ``desde`` y ``hasta`` (inclusive):
+    reemplaza a ``campo__month`` cuando el filtro no trae año.
+    """
+    condicion = Q(pk__in=[])
+    for year in range(desde, hasta + 1):
+        condicion |= Q(**filtro_mes(campo, year, month))
+    return condicion
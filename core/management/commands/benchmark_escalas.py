@@ -0,0 +1,269 @@
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.datos_sinteticos import ESCALAS, GeneradorDatosSinteticos
+from core.fechas import filtro_mes
+from core.presupuesto_consultas import registrar
+
+# (medición, usuario que la pide, nombre de URL, parámetro de la ruta)
+VISTAS = [
+    ('dashboard_madre', 'madre', 'madre_dashboard', None),
+    ('listado_ninos', 'madre', 'listar_ninos', None),
+    ('formulario_asistencia', 'madre', 'asistencia_form', None),
+    ('historial_asistencia', 'madre', 'historial_asistencia', 'nino'),
+    ('listado_seguimientos', 'madre', 'desarrollo:listar_seguimientos', None),
+    ('listado_desarrollos', 'madre', 'desarrollo:listar_desarrollos', None),
+    ('dashboard_padre', 'padre', 'padre_dashboard', None),
+    ('calendario_padre', 'padre', 'calendario_feed', None),
+    ('dashboard_admin', 'admin', 'admin_dashboard', None),
+    ('pdf_reporte_general_hogar', 'madre', 'reporte_general_hogar', None),
+    ('pdf_matricula', 'madre', 'reporte_matricula_nino_pdf', 'nino'),
+    ('pdf_certificado_matricula', 'madre', 'certificado_matricula_pdf', 'nino'),
+    ('pdf_historial_asistencia', 'madre', 'historial_pdf', 'nino'),
+    ('pdf_reporte_desarrollo', 'madre', 'desarrollo:generar_reporte_pdf', 'nino'),
+    ('pdf_certificado_desarrollo', 'madre', 'desarrollo:generar_certificado_desarrollo', 'desarrollo'),
+    ('excel_hogares', 'admin', 'reporte_hogares_excel', None),
+    ('excel_madres', 'admin', 'reporte_madres_excel', None),
+    ('csv_hogares', 'admin', 'reporte_hogares_csv', None),
+]
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _limpiar_caches():
+    """Caché de Django (dashboards, calendario, PDFs) y caché de certificados en disco."""
+    cache.clear()
+    shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'cache_pdf'), ignore_errors=True)
+
+
+def _medir(funcion, repeticiones):
+    """
+    Ejecuta ``funcion`` en frío (cachés vacías antes de cada llamada) y luego en
+    caliente. Devuelve medianas y p95 en ms, consultas de la primera llamada y
+    lo que devolvió ``funcion`` (estado HTTP de las vistas).
+    """
+    frio, caliente = [], []
+    for i in range(repeticiones):
+        _limpiar_caches()
+        with registrar() as consultas:
+            inicio = time.perf_counter()
+            resultado = funcion()
+            frio.append((time.perf_counter() - inicio) * 1000)
+        if i == 0:
+            primera = {'consultas': consultas.total, 'resultado': resultado}
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        caliente.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'frio_mediana_ms': round(statistics.median(frio), 2),
+        'frio_p95_ms': round(_percentil(frio, 95), 2),
+        'caliente_mediana_ms': round(statistics.median(caliente), 2),
+        **primera,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las vistas y servicios más usados (dashboards, generador mensual, PDFs, exportaciones "
+        "Excel) sobre datos sintéticos a varias escalas y guarda un informe JSON comparable entre "
+        "commits. Cada escala se genera en una base de datos de prueba temporal; no toca los datos reales. "
+        "Las vistas que no responden 200 se marcan como inválidas y el comando termina con error."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', default='hogar,municipio',
+                            help=f"Escalas a medir, separadas por coma ({', '.join(ESCALAS)}).")
+        parser.add_argument('--repeticiones', type=int, default=5, help="Llamadas por medición (en frío y en caliente).")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', help="Ruta de un archivo JSON donde guardar el informe.")
+        parser.add_argument('--comparar', help="Informe JSON anterior contra el que comparar las medianas en frío.")
+
+    def handle(self, *args, **options):
+        escalas = [e.strip() for e in options['escalas'].split(',') if e.strip()]
+        desconocidas = set(escalas) - set(ESCALAS)
+        if desconocidas:
+            raise CommandError(f"Escalas desconocidas: {', '.join(sorted(desconocidas))}")
+        repeticiones = max(1, options['repeticiones'])
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+
+        informe = {
+            'commit': _commit(),
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'motor': connection.vendor,
+            'repeticiones': repeticiones,
+            'escalas': [],
+        }
+        nombre_original = connection.settings_dict['NAME']
+        connection.settings_dict.setdefault('TEST', {})
+        nombre_prueba_original = connection.settings_dict['TEST'].get('NAME')
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media,
+            PDF_PROCESOS=0,  # conversión en el hilo: mide el costo completo del PDF
+            CONSULTAS_INSTRUMENTAR=False,
+        ):
+            if connection.vendor == 'sqlite':
+                # Base en archivo, como en producción: la de pruebas por defecto vive en memoria
+                connection.settings_dict['TEST']['NAME'] = os.path.join(media, 'benchmark_escalas.sqlite3')
+            try:
+                for escala in escalas:
+                    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                    try:
+                        informe['escalas'].append(self._escala(escala, options['semilla'], repeticiones))
+                    finally:
+                        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            finally:
+                connection.settings_dict['TEST']['NAME'] = nombre_prueba_original
+
+        for resultado in informe['escalas']:
+            self._imprimir(resultado, self._buscar(anterior, resultado['escala']))
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"📄 Informe guardado en {options['salida']}"))
+
+        invalidas = [
+            f"{resultado['escala']}/{nombre}"
+            for resultado in informe['escalas']
+            for nombre, m in resultado['mediciones'].items()
+            if not m.get('valida', True)
+        ]
+        if invalidas:
+            raise CommandError(f"{len(invalidas)} medición(es) sin respuesta 200: {', '.join(invalidas)}")
+
+    def _escala(self, escala, semilla, repeticiones):
+        from asistencia.utils import estadisticas_asistencia
+        from core.models import Asistencia, HogarComunitario, Regional, Usuario
+        from core.snapshots import reconstruir_snapshot
+        from desarrollo.models import DesarrolloNino
+        from desarrollo.services import GeneradorEvaluacionMensualLote
+
+        self.stdout.write(f"🏗️ Escala '{escala}': generando datos...")
+        inicio = time.perf_counter()
+        filas = GeneradorDatosSinteticos(**ESCALAS[escala], semilla=semilla).run()
+        generacion = round(time.perf_counter() - inicio, 2)
+
+        hogar = HogarComunitario.objects.select_related('madre__usuario').order_by('id').first()
+        regional = Regional.objects.order_by('id').first()
+        nino = hogar.ninos.select_related('padre__usuario').order_by('id').first()
+        usuarios = {
+            'madre': hogar.madre.usuario,
+            'padre': nino.padre.usuario,
+            'admin': Usuario.objects.filter(rol__nombre_rol='administrador').first(),
+        }
+        fin_mes = date.today().replace(day=1) - timedelta(days=1)
+        mediciones = {}
+
+        # Servicios (en este orden: el generador deja los informes que usan los PDF de desarrollo)
+        servicios = [
+            ('generador_mensual_regional',
+             lambda: sum(GeneradorEvaluacionMensualLote(fin_mes, regional=regional, regenerar=True).run().values())),
+            ('generador_mensual_hogar',
+             lambda: sum(GeneradorEvaluacionMensualLote(fin_mes, hogar=hogar, regenerar=True).run().values())),
+            ('estadisticas_asistencia_hogar',
+             lambda: estadisticas_asistencia(Asistencia.objects.filter(
+                 nino__hogar=hogar, **filtro_mes('fecha', fin_mes.year, fin_mes.month)))['total']),
+            ('snapshot_dashboard_madre', lambda: reconstruir_snapshot(hogar).id),
+        ]
+        for nombre, funcion in servicios:
+            mediciones[nombre] = _medir(funcion, repeticiones)
+            self.stdout.write(f"  · {nombre}")
+
+        parametros = {
+            'nino': nino.id,
+            'desarrollo': DesarrolloNino.objects.filter(nino=nino, fecha_fin_mes=fin_mes).values_list('id', flat=True).first(),
+        }
+        clientes = {}
+        for quien, usuario in usuarios.items():
+            clientes[quien] = Client()
+            clientes[quien].force_login(usuario)
+
+        for nombre, quien, nombre_url, parametro in VISTAS:
+            url = reverse(nombre_url, args=[parametros[parametro]] if parametro else None)
+            estados = set()
+
+            def pedir(cliente=clientes[quien], url=url, estados=estados):
+                respuesta = cliente.get(url)
+                # Las exportaciones se transmiten: el tiempo incluye consumir el cuerpo completo
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                estados.add(respuesta.status_code)
+                return respuesta.status_code
+
+            mediciones[nombre] = _medir(pedir, repeticiones)
+            # Un error o una redirección mide otra cosa (la página de error, el login): no es comparable
+            mediciones[nombre]['estados'] = sorted(estados)
+            mediciones[nombre]['valida'] = estados == {200}
+            if mediciones[nombre]['valida']:
+                self.stdout.write(f"  · {nombre}")
+            else:
+                self.stdout.write(self.style.ERROR(f"  ❌ {nombre}: respondió {', '.join(map(str, sorted(estados)))}"))
+
+        return {
+            'escala': escala,
+            'parametros': ESCALAS[escala],
+            'filas': filas,
+            'segundos_generacion': generacion,
+            'mediciones': mediciones,
+        }
+
+    def _buscar(self, informe, escala):
+        if not informe:
+            return {}
+        for resultado in informe.get('escalas', []):
+            if resultado['escala'] == escala:
+                return resultado['mediciones']
+        return {}
+
+    def _imprimir(self, resultado, anterior):
+        filas = resultado['filas']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n📊 {resultado['escala']}: {filas['ninos']} niños, {filas['asistencias']} asistencias, "
+            f"{filas['seguimientos']} seguimientos (generados en {resultado['segundos_generacion']} s)"
+        ))
+        encabezado = f"{'medición':>30} {'frío ms':>9} {'p95 ms':>9} {'caliente':>9} {'consultas':>9} {'result.':>8}"
+        if anterior:
+            encabezado += f" {'antes ms':>9} {'cambio':>8}"
+        self.stdout.write(encabezado)
+        for nombre, m in resultado['mediciones'].items():
+            linea = (
+                f"{nombre:>30} {m['frio_mediana_ms']:>9} {m['frio_p95_ms']:>9} {m['caliente_mediana_ms']:>9} "
+                f"{m['consultas']:>9} {str(m['resultado']):>8}"
+            )
+            previo = anterior.get(nombre)
+            if not m.get('valida', True):
+                linea += "  ❌ inválida"
+            elif previo and previo.get('valida', True) and previo['frio_mediana_ms']:
+                cambio = (m['frio_mediana_ms'] - previo['frio_mediana_ms']) / previo['frio_mediana_ms'] * 100
+                linea += f" {previo['frio_mediana_ms']:>9} {cambio:>+7.0f}%"
+            self.stdout.write(linea)
@@ -0,0 +1,202 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+ESTADOS = ['Presente', 'Presente', 'Presente', 'Ausente', 'Justificado']
+
+# "predeterminado" es SQLite de fábrica; "ajustado" equivale a DB_SQLITE_AJUSTES=1
+# con los valores por defecto de settings.
+MODOS = {
+    'predeterminado': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'ajustado': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 20000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara escrituras concurrentes de asistencia en SQLite con los PRAGMA de fábrica y con "
+        "los de DB_SQLITE_AJUSTES (WAL, synchronous=NORMAL, mmap_size, cache_size, busy_timeout). "
+        "Cada madre envía el formulario de asistencia desde su propio hilo. Trabaja en una base "
+        "de datos de prueba temporal; no toca los datos reales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hogares', type=int, default=8, help="Madres enviando asistencia a la vez (hilos).")
+        parser.add_argument('--ninos', type=int, default=15, help="Niños por hogar.")
+        parser.add_argument('--dias', type=int, default=20, help="Formularios que envía cada madre.")
+        parser.add_argument('--modos', default=','.join(MODOS), help="Modos a medir, separados por coma.")
+        parser.add_argument('--salida', help="Ruta de un archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("benchmark_sqlite solo aplica con DB_ENGINE=sqlite.")
+        modos = [m.strip() for m in options['modos'].split(',') if m.strip()]
+        desconocidos = set(modos) - set(MODOS)
+        if desconocidos:
+            raise CommandError(f"Modos desconocidos: {', '.join(sorted(desconocidos))}")
+
+        resultados = []
+        with tempfile.TemporaryDirectory() as carpeta:
+            for modo in modos:
+                resultados.append(self._escenario(modo, os.path.join(carpeta, f"{modo}.sqlite3"), options))
+
+        self.stdout.write(
+            f"{'modo':>15} {'envíos':>7} {'errores':>8} {'seg.':>7} {'envíos/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}"
+        )
+        for r in resultados:
+            self.stdout.write(
+                f"{r['modo']:>15} {r['envios']:>7} {r['errores']:>8} {r['segundos']:>7} {r['envios_por_segundo']:>9} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['max_ms']:>8}"
+            )
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"📄 Resultados guardados en {options['salida']}"))
+
+    def _escenario(self, modo, ruta, options):
+        # Base de prueba en archivo (no en memoria) para medir el bloqueo real entre conexiones
+        connections.close_all()
+        nombre_original = connection.settings_dict['NAME']
+        connection.settings_dict.setdefault('TEST', {})
+        nombre_prueba_original = connection.settings_dict['TEST'].get('NAME')
+        connection.settings_dict['TEST']['NAME'] = ruta
+
+        with override_settings(SQLITE_PRAGMAS=MODOS[modo]):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                madres = self._poblar(options['hogares'], options['ninos'])
+                connections.close_all()  # las conexiones nuevas toman los PRAGMA del modo
+                efectivos = self._pragmas_efectivos(MODOS[modo])
+                latencias, errores, segundos = self._enviar(madres, options['dias'])
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+                connection.settings_dict['TEST']['NAME'] = nombre_prueba_original
+
+        envios = len(latencias) + len(errores)
+        resultado = {
+            'modo': modo,
+            'pragmas': efectivos,
+            'hogares': options['hogares'],
+            'ninos_por_hogar': options['ninos'],
+            'envios': envios,
+            'errores': len(errores),
+            'ejemplo_error': errores[0] if errores else None,
+            'segundos': round(segundos, 3),
+            'envios_por_segundo': round(envios / segundos, 1) if segundos else 0,
+            'p50_ms': round(statistics.median(latencias), 1) if latencias else None,
+            'p95_ms': round(_percentil(latencias, 95), 1) if latencias else None,
+            'max_ms': round(max(latencias), 1) if latencias else None,
+        }
+        self.stdout.write(f"· {modo}: {envios} envíos, {len(errores)} con error, {resultado['segundos']} s")
+        return resultado
+
+    def _pragmas_efectivos(self, pragmas):
+        """Valores que SQLite reporta en una conexión nueva (confirma que se aplicaron)."""
+        with connection.cursor() as cursor:
+            efectivos = {}
+            for nombre in pragmas:
+                cursor.execute(f"PRAGMA {nombre}")
+                efectivos[nombre] = cursor.fetchone()[0]
+        return efectivos
+
+    def _poblar(self, hogares, ninos_por_hogar):
+        from core.models import (
+            Ciudad, HogarComunitario, MadreComunitaria, Nino, Padre, Regional, Rol, Usuario,
+        )
+
+        rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        regional = Regional.objects.create(nombre='Benchmark')
+        ciudad = Ciudad.objects.create(nombre='Benchmark', regional=regional)
+
+        madres = []
+        documento = 800000
+        for h in range(hogares):
+            documento += 1
+            usuario = Usuario.objects.create(
+                documento=documento, nombres=f"Madre {h}", apellidos="Benchmark",
+                correo=f"madre{h}@example.com", rol=rol_madre,
+            )
+            madre = MadreComunitaria.objects.create(usuario=usuario, nivel_escolaridad='Bachiller')
+            hogar = HogarComunitario.objects.create(
+                regional=regional, ciudad=ciudad, nombre_hogar=f"Hogar {h}",
+                direccion='Benchmark', localidad='Benchmark', madre=madre,
+            )
+            for i in range(ninos_por_hogar):
+                documento += 1
+                padre = Padre.objects.create(usuario=Usuario.objects.create(
+                    documento=documento, nombres=f"Padre {h}-{i}", apellidos="Benchmark",
+                    correo=f"padre{h}-{i}@example.com", rol=rol_padre,
+                ))
+                Nino.objects.create(
+                    nombres=f"Niño {i}", apellidos="Benchmark", fecha_nacimiento=date(2021, 1, 1),
+                    hogar=hogar, padre=padre,
+                )
+            madres.append((usuario, list(hogar.ninos.values_list('id', flat=True))))
+        return madres
+
+    def _enviar(self, madres, dias):
+        """Cada madre envía ``dias`` formularios desde su hilo. Devuelve (latencias ms, errores, segundos)."""
+        url = reverse('asistencia_form')
+        primer_dia = date.today() - timedelta(days=dias)
+        latencias, errores = [], []
+        cerrojo = threading.Lock()
+        salida = threading.Barrier(len(madres) + 1)
+
+        def madre_enviando(usuario, nino_ids, semilla):
+            cliente = Client()
+            cliente.force_login(usuario)
+            salida.wait()
+            try:
+                for dia in range(dias):
+                    datos = {'fecha': (primer_dia + timedelta(days=dia)).isoformat()}
+                    for n, nino_id in enumerate(nino_ids):
+                        datos[f'nino_{nino_id}'] = ESTADOS[(semilla + dia + n) % len(ESTADOS)]
+                    inicio = time.perf_counter()
+                    try:
+                        respuesta = cliente.post(url, datos)
+                        error = None if respuesta.status_code == 200 else f"HTTP {respuesta.status_code}"
+                    except Exception as e:
+                        error = repr(e)
+                    with cerrojo:
+                        if error:
+                            errores.append(error)
+                        else:
+                            latencias.append((time.perf_counter() - inicio) * 1000)
+            finally:
+                connections.close_all()
+
+        hilos = [
+            threading.Thread(target=madre_enviando, args=(usuario, nino_ids, i))
+            for i, (usuario, nino_ids) in enumerate(madres)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        salida.wait()
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.join()
+        return latencias, errores, time.perf_counter() - inicio
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.datos_sinteticos import CONTRASENA, ESCALAS, GeneradorDatosSinteticos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos con inserciones masivas: regionales, hogares, madres, padres y "
+        "niños, con meses de asistencia, seguimientos diarios, evaluaciones por dimensión y "
+        "novedades. Escribe en la base de datos configurada (no borra nada); para medir sin "
+        "tocarla use benchmark_escalas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=sorted(ESCALAS), default='municipio',
+                            help="Tamaño predefinido; las opciones siguientes lo ajustan.")
+        parser.add_argument('--regionales', type=int, help="Número de regionales.")
+        parser.add_argument('--hogares', type=int, help="Hogares por regional.")
+        parser.add_argument('--ninos', type=int, help="Niños por hogar.")
+        parser.add_argument('--meses', type=int, help="Meses de historia hasta hoy.")
+        parser.add_argument('--semilla', type=int, default=1, help="Semilla aleatoria (mismos datos con la misma semilla).")
+
+    def handle(self, *args, **options):
+        escala = dict(ESCALAS[options['escala']])
+        for campo in escala:
+            if options[campo] is not None:
+                escala[campo] = options[campo]
+        if min(escala.values()) < 1:
+            raise CommandError("Regionales, hogares, niños y meses deben ser mayores que cero.")
+
+        self.stdout.write(
+            f"🏗️ Generando {escala['regionales']} regionales × {escala['hogares']} hogares × "
+            f"{escala['ninos']} niños, {escala['meses']} meses de historia..."
+        )
+        inicio = time.monotonic()
+        conteo = GeneradorDatosSinteticos(
+            **escala, semilla=options['semilla'], avance=lambda mensaje: self.stdout.write(f"  · {mensaje}"),
+        ).run()
+        duracion = time.monotonic() - inicio
+
+        for modelo, filas in conteo.items():
+            self.stdout.write(f"  {modelo:>13}: {filas}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {sum(conteo.values())} filas en {duracion:.1f} s. Contraseña de los usuarios: {CONTRASENA}"
+        ))
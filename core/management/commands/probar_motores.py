@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MOTORES = ('sqlite', 'postgresql')
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las pruebas una vez por motor de base de datos (SQLite y PostgreSQL), cada "
+        "una en su propio proceso con DB_ENGINE. PostgreSQL toma la conexión de DB_NAME, "
+        "DB_USER, DB_PASSWORD, DB_HOST y DB_PORT. Termina con error si falla algún motor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('etiquetas', nargs='*', help="Módulos, clases o pruebas a ejecutar (por defecto, todas).")
+        parser.add_argument('--motores', default=','.join(MOTORES),
+                            help=f"Motores separados por coma ({', '.join(MOTORES)}).")
+
+    def handle(self, *args, **options):
+        motores = [m.strip() for m in options['motores'].split(',') if m.strip()]
+        desconocidos = set(motores) - set(MOTORES)
+        if desconocidos:
+            raise CommandError(f"Motores desconocidos: {', '.join(sorted(desconocidos))}")
+
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        fallidos = []
+        for motor in motores:
+            self.stdout.write(f"🧪 Pruebas con {motor}...")
+            self.stdout.flush()
+            comando = [sys.executable, manage, 'test', *options['etiquetas'], '--noinput', f"-v{options['verbosity']}"]
+            resultado = subprocess.run(comando, env={**os.environ, 'DB_ENGINE': motor}, cwd=settings.BASE_DIR)
+            if resultado.returncode:
+                fallidos.append(motor)
+                self.stdout.write(self.style.ERROR(f"❌ {motor}: las pruebas fallaron."))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✅ {motor}: pruebas superadas."))
+
+        if fallidos:
+            raise CommandError(f"Fallaron las pruebas en: {', '.join(fallidos)}")
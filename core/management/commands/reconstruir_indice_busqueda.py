@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import busqueda
+from core.models import HogarComunitario
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el índice de búsqueda de texto (niños, novedades, seguimientos diarios y "
+        "planeaciones) hogar por hogar. Necesario después de migrar por primera vez y tras "
+        "cargas masivas que no disparan señales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hogar', type=int, action='append', help="Solo este hogar (se puede repetir).")
+
+    def handle(self, *args, **options):
+        hogares = HogarComunitario.objects.order_by('id')
+        if options['hogar']:
+            hogares = hogares.filter(id__in=options['hogar'])
+            faltantes = set(options['hogar']) - set(hogares.values_list('id', flat=True))
+            if faltantes:
+                raise CommandError(f"No existen los hogares: {', '.join(map(str, sorted(faltantes)))}")
+
+        motor = busqueda.motor() or 'sin índice de texto (icontains)'
+        self.stdout.write(f"🔎 Motor de búsqueda: {motor}")
+        inicio = time.monotonic()
+        total = 0
+        for hogar_id in hogares.values_list('id', flat=True):
+            with transaction.atomic():
+                documentos = busqueda.reindexar_hogar(hogar_id)
+            total += documentos
+            self.stdout.write(f"  · hogar {hogar_id}: {documentos} documentos")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} documentos indexados en {time.monotonic() - inicio:.1f} s"
+        ))
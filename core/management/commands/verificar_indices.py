@@ -0,0 +1,105 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.fechas import filtro_mes, filtro_mes_datetime
+
+# Mes de referencia para los rangos: el plan no depende de los valores
+YEAR, MONTH = 2025, 10
+
+
+def consultas_frecuentes():
+    """
+    (nombre, modelo cuya tabla debe buscarse por índice, queryset) de las consultas
+    con la misma forma que las de las vistas. Al agregar un filtro por fecha en
+    una vista nueva, conviene agregarlo aquí también.
+    """
+    from django.db.models import Q
+
+    from core.models import Asistencia, HogarComunitario
+    from correos.models import EmailLog, TerminoDestinatario
+    from desarrollo.models import DesarrolloNino, SeguimientoDiario
+    from notifications.models import Notification
+    from novedades.models import Novedad
+    from planeaciones.models import Planeacion
+
+    return [
+        ("asistencia del niño en el mes", Asistencia,
+         Asistencia.objects.filter(nino_id=1, **filtro_mes('fecha', YEAR, MONTH))),
+        ("asistencia del hogar en el mes", Asistencia,
+         Asistencia.objects.filter(nino__hogar_id=1, **filtro_mes('fecha', YEAR, MONTH))),
+        ("seguimientos del niño en el mes", SeguimientoDiario,
+         SeguimientoDiario.objects.filter(nino_id=1, **filtro_mes('fecha', YEAR, MONTH))),
+        ("novedades del niño en el mes", Novedad,
+         Novedad.objects.filter(nino_id=1, **filtro_mes('fecha', YEAR, MONTH)).order_by('fecha')),
+        ("novedades recientes del hogar", Novedad,
+         Novedad.objects.filter(nino__hogar_id=1, fecha__gte=filtro_mes('fecha', YEAR, MONTH)['fecha__gte'])),
+        ("planeaciones de la madre en el mes", Planeacion,
+         Planeacion.objects.filter(madre_id=1, **filtro_mes('fecha', YEAR, MONTH)).order_by('-fecha')),
+        ("página siguiente del listado de hogares", HogarComunitario,
+         HogarComunitario.objects.filter(
+             Q(regional_nombre__gt='Regional') | Q(regional_nombre='Regional', nombre_hogar__gt='Hogar')
+         ).order_by('regional_nombre', 'nombre_hogar', 'id')[:6]),
+        ("desarrollos del niño", DesarrolloNino,
+         DesarrolloNino.objects.filter(nino_id=1).order_by('-fecha_fin_mes')),
+        ("desarrollo del niño en el mes", DesarrolloNino,
+         DesarrolloNino.objects.filter(nino_id=1, **filtro_mes('fecha_fin_mes', YEAR, MONTH))),
+        ("página de notificaciones", Notification,
+         Notification.objects.filter(recipient_id=1, id__lt=1000).order_by('-id')[:20]),
+        ("notificaciones no leídas", Notification,
+         Notification.objects.filter(recipient_id=1, read=False).values('id')),
+        ("correos enviados en el mes", EmailLog,
+         EmailLog.objects.filter(**filtro_mes_datetime('fecha_envio', YEAR, MONTH)).order_by('-fecha_envio')),
+        ("destinatarios de correos por palabra", TerminoDestinatario,
+         TerminoDestinatario.objects.filter(termino__gte='gomez', termino__lt='gomez\uffff').values('receptor_id')),
+    ]
+
+
+def _plan(queryset):
+    if connection.vendor == 'postgresql':
+        # Con tablas pequeñas PostgreSQL prefiere el recorrido secuencial aunque
+        # exista el índice: se desactiva para ver si el índice es utilizable.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+    return queryset.explain()
+
+
+def recorrido_completo(plan, tabla):
+    """True si el plan recorre ``tabla`` completa en lugar de buscar por índice."""
+    if connection.vendor == 'postgresql':
+        return re.search(rf'Seq Scan on "?{re.escape(tabla)}"?\b', plan) is not None
+    # SQLite: "SEARCH tabla USING INDEX ..." frente a "SCAN tabla"
+    return re.search(rf'\bSCAN "?{re.escape(tabla)}"?(?=\s|$)', plan, re.MULTILINE) is not None
+
+
+class Command(BaseCommand):
+    help = (
+        "Revisa con EXPLAIN que las consultas frecuentes por rango de fechas usen índices. "
+        "Termina con error si alguna recorre su tabla completa (pensado para CI, después de migrate)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--planes', action='store_true', help="Muestra el plan completo de cada consulta.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(f"⚠️ Motor '{connection.vendor}' no soportado; no se revisó nada."))
+            return
+
+        fallidas = []
+        for nombre, modelo, queryset in consultas_frecuentes():
+            plan = _plan(queryset)
+            if recorrido_completo(plan, modelo._meta.db_table):
+                fallidas.append(nombre)
+                self.stdout.write(self.style.ERROR(f"❌ {nombre}: recorre {modelo._meta.db_table} completa"))
+            else:
+                self.stdout.write(f"✅ {nombre}")
+            if options['planes'] or nombre in fallidas:
+                for linea in plan.splitlines():
+                    self.stdout.write(f"     {linea}")
+
+        if fallidas:
+            raise CommandError(f"{len(fallidas)} consulta(s) sin índice: {', '.join(fallidas)}")
+        self.stdout.write(self.style.SUCCESS("📈 Todas las consultas frecuentes usan índices."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_nino_fecha_ingreso_alter_padre_ocupacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HogarDashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_referencia', models.DateField()),
+                ('ninos', models.JSONField(blank=True, default=dict)),
+                ('novedades_recientes', models.JSONField(blank=True, default=list)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('hogar', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshot', to='core.hogarcomunitario')),
+            ],
+            options={
+                'db_table': 'hogar_dashboard_snapshot',
+            },
+        ),
+    ]
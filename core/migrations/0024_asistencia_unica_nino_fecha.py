@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:05
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def eliminar_asistencias_duplicadas(apps, schema_editor):
+    """Conserva el registro más reciente (mayor id) de cada niño y fecha."""
+    Asistencia = apps.get_model('core', 'Asistencia')
+    duplicados = (
+        Asistencia.objects.values('nino_id', 'fecha')
+        .annotate(cantidad=Count('id'), ultimo_id=Max('id'))
+        .filter(cantidad__gt=1)
+    )
+    for dup in duplicados:
+        Asistencia.objects.filter(nino_id=dup['nino_id'], fecha=dup['fecha']).exclude(id=dup['ultimo_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_hogardashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_asistencias_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='asistencia',
+            unique_together={('nino', 'fecha')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_nino_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='asistencia',
+            name='asistencia_nino_id_c8975f_idx',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:56
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_nombres(apps, schema_editor):
+    """Llena regional_nombre de los hogares existentes."""
+    HogarComunitario = apps.get_model('core', 'HogarComunitario')
+    Regional = apps.get_model('core', 'Regional')
+    HogarComunitario.objects.update(
+        regional_nombre=Subquery(Regional.objects.filter(pk=OuterRef('regional_id')).values('nombre')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_asistencia_sin_indice_nino'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hogarcomunitario',
+            name='regional_nombre',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='hogarcomunitario',
+            index=models.Index(fields=['regional_nombre', 'nombre_hogar'], name='hogares_com_regiona_7e5611_idx'),
+        ),
+        migrations.RunPython(copiar_nombres, migrations.RunPython.noop),
+    ]
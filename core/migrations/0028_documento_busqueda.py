@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Índice de texto propio de cada motor sobre documento_busqueda (ver core/busqueda.py).
+# En SQLite los disparadores viven en la tabla: si una migración futura la reconstruye
+# (cambios de columnas), hay que volver a crearlos y correr reconstruir_indice_busqueda.
+SQLITE = [
+    """CREATE VIRTUAL TABLE documento_busqueda_fts USING fts5(
+        titulo, texto, content='documento_busqueda', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER documento_busqueda_ai AFTER INSERT ON documento_busqueda BEGIN
+        INSERT INTO documento_busqueda_fts(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+    """CREATE TRIGGER documento_busqueda_ad AFTER DELETE ON documento_busqueda BEGIN
+        INSERT INTO documento_busqueda_fts(documento_busqueda_fts, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+    END""",
+    """CREATE TRIGGER documento_busqueda_au AFTER UPDATE ON documento_busqueda BEGIN
+        INSERT INTO documento_busqueda_fts(documento_busqueda_fts, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+        INSERT INTO documento_busqueda_fts(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+]
+SQLITE_REVERSA = [
+    "DROP TRIGGER IF EXISTS documento_busqueda_au",
+    "DROP TRIGGER IF EXISTS documento_busqueda_ad",
+    "DROP TRIGGER IF EXISTS documento_busqueda_ai",
+    "DROP TABLE IF EXISTS documento_busqueda_fts",
+]
+
+# translate() quita las tildes sin depender de la extensión unaccent (requiere una base
+# con codificación UTF8, la de initdb por defecto); el título va con peso 'A'
+_SIN_TILDES = "translate(lower({}), 'áéíóúüñàèìòù', 'aeiouunaeiou')"
+POSTGRESQL = [
+    f"""ALTER TABLE documento_busqueda ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish'::regconfig, {_SIN_TILDES.format('titulo')}), 'A') ||
+        setweight(to_tsvector('spanish'::regconfig, {_SIN_TILDES.format('texto')}), 'B')
+    ) STORED""",
+    "CREATE INDEX documento_busqueda_vector ON documento_busqueda USING GIN (vector)",
+]
+POSTGRESQL_REVERSA = [
+    "DROP INDEX IF EXISTS documento_busqueda_vector",
+    "ALTER TABLE documento_busqueda DROP COLUMN IF EXISTS vector",
+]
+
+
+def _ejecutar(schema_editor, por_motor):
+    for sentencia in por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def crear_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE, 'postgresql': POSTGRESQL})
+
+
+def quitar_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_REVERSA, 'postgresql': POSTGRESQL_REVERSA})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_hogar_indice_regional_nombre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('nino', 'Niño'), ('novedad', 'Novedad'), ('seguimiento', 'Seguimiento diario'), ('planeacion', 'Planeación')], max_length=15)),
+                ('objeto_id', models.BigIntegerField()),
+                ('nino_id', models.BigIntegerField(blank=True, null=True)),
+                ('titulo', models.CharField(max_length=255)),
+                ('texto', models.TextField(blank=True)),
+                ('fecha', models.DateField(blank=True, null=True)),
+                ('hogar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos_busqueda', to='core.hogarcomunitario')),
+            ],
+            options={
+                'db_table': 'documento_busqueda',
+                'indexes': [models.Index(fields=['nino_id'], name='documento_b_nino_id_35a7fd_idx')],
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        # Los registros existentes se indexan con: python manage.py reconstruir_indice_busqueda
+        migrations.RunPython(crear_indice_texto, quitar_indice_texto),
+    ]
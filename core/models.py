@@ -179,6 +179,7 @@ class Padre(models.Model):
     situacion_economica_hogar = models.CharField(max_length=100, null=True, blank=True)
     documento_identidad_img = models.FileField(max_length=255, null=True, blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     clasificacion_sisben = models.FileField(max_length=50, null=True, blank=True)
 
     class Meta:
@@ -242,6 +243,12 @@ class HogarComunitario(models.Model):
     # 💡 NUEVO: Relación con la regional. Es obligatorio para cada hogar.
     # Usamos PROTECT para evitar que se borre una regional si tiene hogares asociados.
     regional = models.ForeignKey(Regional, on_delete=models.PROTECT, related_name='hogares')
+    # Copia de regional.nombre: el listado de hogares se ordena por ella usando el índice.
+    # La mantienen save() y la señal post_save de Regional. Lo que no pasa por save()
+    # no la actualiza: HogarComunitario.objects.update(regional=...), bulk_update() o
+    # bulk_create() deben asignar también regional_nombre (o volver a guardar la regional,
+    # que copia su nombre a todos sus hogares).
+    regional_nombre = models.CharField(max_length=100, editable=False, default='')
     ciudad = models.ForeignKey(Ciudad, on_delete=models.PROTECT, related_name='hogares')
     nombre_hogar = models.CharField(max_length=100)
     direccion = models.CharField(max_length=200)
@@ -283,9 +290,20 @@ class HogarComunitario(models.Model):
     madre = models.ForeignKey(MadreComunitaria, on_delete=models.PROTECT, related_name='hogares_asignados')
 
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'hogares_comunitarios'
+        # Orden del listado de hogares (paginación por cursor): nombre de la regional y del hogar
+        indexes = [models.Index(fields=['regional_nombre', 'nombre_hogar'])]
+
+    def save(self, *args, **kwargs):
+        if self.regional_id:
+            self.regional_nombre = self.regional.nombre
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'regional' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'regional_nombre'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.nombre_hogar
@@ -387,6 +405,7 @@ class Nino(models.Model):
     carnet_vacunacion = models.FileField(upload_to='ninos/vacunacion/', null=True, blank=True)
     certificado_eps = models.FileField(upload_to='ninos/eps/', null=True, blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     registro_civil_img = models.FileField(upload_to='ninos/registro_civil/', null=True, blank=True)
 
     class Meta:
@@ -413,11 +432,82 @@ class Asistencia(models.Model):
 
     class Meta:
         db_table = 'asistencia'
-        indexes = [models.Index(fields=['nino'])]
+        # El índice único (nino, fecha) también sirve a las búsquedas por niño
+        unique_together = ('nino', 'fecha')  # Un solo registro por niño y día (permite el upsert masivo)
 
     def __str__(self):
         return f"Asistencia {self.nino} - {self.fecha} : {self.estado}"
 
+# ------------------------
+# Snapshot del dashboard de la madre
+# ------------------------
+class HogarDashboardSnapshot(models.Model):
+    """
+    Datos materializados del dashboard de la madre comunitaria para un hogar.
+    Se actualiza por niño con las señales de Nino, Asistencia y Novedad
+    (ver core/snapshots.py) y se reconstruye completo al cambiar de día,
+    porque la ventana de asistencia de 28 días y las edades dependen de la fecha.
+    """
+    hogar = models.OneToOneField(HogarComunitario, on_delete=models.CASCADE, related_name='dashboard_snapshot')
+    fecha_referencia = models.DateField()
+    # {"<nino_id>": {"nombres": ..., "edad": ..., "faltas": ..., "estado": ..., ...}}
+    ninos = models.JSONField(default=dict, blank=True)
+    # Últimas novedades de la semana: [{"nino_nombres": ..., "descripcion": ..., "fecha": "AAAA-MM-DD"}]
+    novedades_recientes = models.JSONField(default=list, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'hogar_dashboard_snapshot'
+
+    def __str__(self):
+        return f"Dashboard {self.hogar} ({self.fecha_referencia})"
+
+
+# ------------------------
+# Índice de búsqueda de texto
+# ------------------------
+class DocumentoBusqueda(models.Model):
+    """
+    Un registro buscable (niño, novedad, seguimiento diario o planeación) del
+    hogar. Lo mantienen las señales (ver core/busqueda.py); el índice de texto
+    propio del motor se crea en la migración 0028: tabla FTS5 en SQLite y
+    columna tsvector con índice GIN en PostgreSQL.
+    """
+    TIPOS = [
+        ('nino', 'Niño'),
+        ('novedad', 'Novedad'),
+        ('seguimiento', 'Seguimiento diario'),
+        ('planeacion', 'Planeación'),
+    ]
+
+    tipo = models.CharField(max_length=15, choices=TIPOS)
+    objeto_id = models.BigIntegerField()
+    hogar = models.ForeignKey(HogarComunitario, on_delete=models.CASCADE, related_name='documentos_busqueda')
+    nino_id = models.BigIntegerField(null=True, blank=True)  # para reindexar al renombrar o trasladar al niño
+    titulo = models.CharField(max_length=255)
+    texto = models.TextField(blank=True)
+    fecha = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'documento_busqueda'
+        unique_together = ('tipo', 'objeto_id')
+        indexes = [models.Index(fields=['nino_id'])]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.titulo}"
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        rutas = {
+            'nino': ('ver_ficha_nino', 'id'),
+            'novedad': ('novedades:novedades_detail', 'pk'),
+            'seguimiento': ('desarrollo:editar_seguimiento', 'id'),
+            'planeacion': ('planeaciones:detalle_planeacion', 'id'),
+        }
+        nombre, parametro = rutas[self.tipo]
+        return reverse(nombre, kwargs={parametro: self.objeto_id})
+
+
 # ------------------------
 # Planeación
 # ------------------------
@@ -0,0 +1,240 @@
+"""
+Paginación por cursor (keyset) para los listados grandes.
+
+En lugar de ``OFFSET`` la página siguiente se pide "después de" los valores
+de orden de la última fila mostrada: ``WHERE (fecha, id) < (:fecha, :id)
+ORDER BY fecha DESC, id DESC LIMIT n``. Con el orden sobre columnas
+indexadas la página 500 cuesta lo mismo que la primera, y nunca se cargan
+más de ``por_pagina + 1`` filas.
+
+    pagina = paginar(request, Planeacion.objects.filter(madre=madre), ['-fecha'], por_pagina=4)
+
+``pagina`` se itera como la lista de la página y trae los enlaces ya armados
+(``consulta_siguiente``, ``consulta_anterior``, ``consulta_primera``,
+``consulta_ultima``) conservando los filtros del ``GET``. El cursor es opaco
+(base64 de los valores de orden y el número de página).
+
+Conteo (``conteo=``):
+    'exacto'    ``COUNT(*)`` completo, como ``Paginator``
+    'estimado'  cuenta hasta ``PAGINACION_TOPE_CONTEO`` filas; si hay más, en
+                PostgreSQL toma la estimación del planificador ("de unas N
+                páginas") y en los demás motores el tope ("de más de N")
+    None        sin conteo (solo anterior / siguiente)
+"""
+import base64
+import binascii
+import json
+import math
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+PARAMETRO_DESPUES = 'despues'
+PARAMETRO_ANTES = 'antes'
+PARAMETRO_ULTIMA = 'ultima'
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def _normalizar_orden(modelo, orden):
+    """[(campo, descendente)] con la llave primaria al final para que el orden sea total."""
+    columnas = [(c.lstrip('-'), c.startswith('-')) for c in orden]
+    if not any(modelo._meta.get_field(campo).primary_key for campo, _ in columnas):
+        columnas.append((modelo._meta.pk.name, columnas[-1][1] if columnas else False))
+    return columnas
+
+
+def _codificar(valores, numero):
+    texto = json.dumps({'v': valores, 'n': numero or 0}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor, modelo, columnas):
+    """(valores, número de página o ``None`` si no se conoce) o ``None`` si el cursor no es válido."""
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        valores = [
+            modelo._meta.get_field(campo).to_python(valor)
+            for (campo, _), valor in zip(columnas, datos['v'], strict=True)
+        ]
+        return valores, int(datos.get('n') or 0) or None
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError, ValidationError):
+        return None
+
+
+def _valores(objeto, modelo, columnas):
+    return [getattr(objeto, modelo._meta.get_field(campo).attname) for campo, _ in columnas]
+
+
+def _despues_de(columnas, valores, invertir=False):
+    """Q de las filas posteriores a ``valores`` en el orden dado (anteriores si ``invertir``)."""
+    condicion = Q()
+    for i, (campo, descendente) in enumerate(columnas):
+        hacia_atras = descendente != invertir
+        paso = Q(**{f"{campo}__{'lt' if hacia_atras else 'gt'}": valores[i]})
+        for campo_previo, valor_previo in zip((c for c, _ in columnas[:i]), valores[:i]):
+            paso &= Q(**{campo_previo: valor_previo})
+        condicion |= paso
+    return condicion
+
+
+def _orden_sql(columnas, invertir=False):
+    return [f"{'-' if descendente != invertir else ''}{campo}" for campo, descendente in columnas]
+
+
+def contar(queryset, conteo='exacto'):
+    """
+    (total, tipo) con tipo 'exacto', 'aproximado' (estimación del planificador)
+    o 'minimo' (hay al menos ese total). Con 'estimado' el costo queda acotado por el tope.
+    """
+    if conteo != 'estimado':
+        return queryset.count(), 'exacto'
+    tope = _config('PAGINACION_TOPE_CONTEO', 1000)
+    total = queryset.order_by()[:tope + 1].count()
+    if total <= tope:
+        return total, 'exacto'
+    conexion = connections[queryset.db]
+    if conexion.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with conexion.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]['Plan']['Plan Rows']), tope + 1), 'aproximado'
+    return tope, 'minimo'
+
+
+class PaginaCursor:
+    def __init__(self, objetos, por_pagina, numero, hay_anterior, hay_siguiente,
+                 primero, ultimo, parametros, total=None, tipo_total='exacto'):
+        self.object_list = objetos
+        self.por_pagina = por_pagina
+        self.number = numero
+        self.has_previous = hay_anterior
+        self.has_next = hay_siguiente
+        self.total = total
+        self.tipo_total = tipo_total
+        self._primero = primero
+        self._ultimo = ultimo
+        self._parametros = parametros
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def num_pages(self):
+        if self.total is None:
+            return None
+        return max(1, math.ceil(self.total / self.por_pagina))
+
+    @property
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    @property
+    def descripcion(self):
+        """"Página 3 de 12", "de unas 40", "de más de 200" o solo "Página 3" según el conteo."""
+        if self.number is None:
+            return "Última página" if not self.has_next else "Página"
+        if self.total is None:
+            return f"Página {self.number}"
+        if self.tipo_total != 'exacto' and self.number > self.num_pages:
+            return f"Página {self.number}"
+        if self.tipo_total == 'aproximado':
+            return f"Página {self.number} de unas {self.num_pages}"
+        if self.tipo_total == 'minimo':
+            return f"Página {self.number} de más de {self.num_pages}"
+        return f"Página {self.number} de {self.num_pages}"
+
+    def _consulta(self, **extra):
+        return urlencode({**self._parametros, **extra})
+
+    @property
+    def consulta_primera(self):
+        return self._consulta()
+
+    @property
+    def consulta_siguiente(self):
+        return self._consulta(**{PARAMETRO_DESPUES: self._ultimo}) if self.has_next else ''
+
+    @property
+    def consulta_anterior(self):
+        if not self.has_previous:
+            return ''
+        if self.number == 2:
+            return self._consulta()
+        return self._consulta(**{PARAMETRO_ANTES: self._primero})
+
+    @property
+    def consulta_ultima(self):
+        return self._consulta(**{PARAMETRO_ULTIMA: 1})
+
+
+def paginar(request, queryset, orden, por_pagina=10, conteo='exacto'):
+    """
+    Página de ``queryset`` según los parámetros ``despues`` / ``antes`` /
+    ``ultima`` de ``request.GET``. ``orden`` son campos de la tabla (con ``-``
+    para descendente), de preferencia los de un índice; si no incluye la
+    llave primaria se agrega al final.
+    """
+    modelo = queryset.model
+    columnas = _normalizar_orden(modelo, orden)
+    parametros = {
+        clave: valor for clave, valor in request.GET.items()
+        if clave not in (PARAMETRO_DESPUES, PARAMETRO_ANTES, PARAMETRO_ULTIMA, 'page')
+    }
+    total, tipo_total = contar(queryset, conteo) if conteo else (None, 'exacto')
+
+    despues = _decodificar(request.GET.get(PARAMETRO_DESPUES, ''), modelo, columnas)
+    antes = _decodificar(request.GET.get(PARAMETRO_ANTES, ''), modelo, columnas)
+    ultima = request.GET.get(PARAMETRO_ULTIMA) and not (despues or antes)
+
+    if antes or ultima:
+        # Hacia atrás: orden invertido y se da vuelta el resultado
+        consulta = queryset.order_by(*_orden_sql(columnas, invertir=True))
+        if antes:
+            consulta = consulta.filter(_despues_de(columnas, antes[0], invertir=True))
+        # Con el total exacto la última página trae el resto, como con OFFSET: así
+        # sus anteriores coinciden con las páginas que se recorren desde la primera
+        tamano = por_pagina
+        if ultima and total and tipo_total == 'exacto':
+            tamano = total % por_pagina or por_pagina
+        filas = list(consulta[:tamano + 1])
+        hay_anterior, hay_siguiente = len(filas) > tamano, bool(antes)
+        objetos = filas[:tamano][::-1]
+        if not hay_anterior:
+            numero = 1
+        elif antes:
+            numero = antes[1] - 1 if antes[1] else None
+        else:
+            numero = math.ceil(total / por_pagina) if total and tipo_total == 'exacto' else None
+    else:
+        consulta = queryset.order_by(*_orden_sql(columnas))
+        if despues:
+            consulta = consulta.filter(_despues_de(columnas, despues[0]))
+        filas = list(consulta[:por_pagina + 1])
+        hay_anterior, hay_siguiente = bool(despues), len(filas) > por_pagina
+        objetos = filas[:por_pagina]
+        if not despues:
+            numero = 1
+        else:
+            numero = despues[1] + 1 if despues[1] else None
+
+    primero = _codificar(_valores(objetos[0], modelo, columnas), numero) if objetos else ''
+    ultimo = _codificar(_valores(objetos[-1], modelo, columnas), numero) if objetos else ''
+    return PaginaCursor(
+        objetos, por_pagina, numero, hay_anterior, hay_siguiente, primero, ultimo,
+        parametros, total, tipo_total,
+    )
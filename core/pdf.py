@@ -0,0 +1,346 @@
+"""
+Servicio compartido de generación de PDF (xhtml2pdf).
+
+- La plantilla se renderiza en la petición (necesita el ORM); la conversión
+  HTML → PDF, que es la parte costosa, corre en un pool de procesos.
+- Resultados, errores y tokens de descarga se guardan como archivos en
+  ``PDF_DIRECTORIO``, que comparten todos los procesos web: el sondeo de
+  ``descargar_pdf`` puede caer en cualquier worker. El nombre de cada archivo
+  es el hash del HTML renderizado: mismo contexto ⇒ mismo HTML ⇒ mismo PDF.
+- Un render en curso se marca con ``<clave>.en_curso`` (creado con O_EXCL):
+  dos clics seguidos, aunque lleguen a procesos distintos, comparten un único
+  render. Si el proceso que lo tenía muere, la marca caduca a los
+  ``PDF_RENDER_MAX_SEGUNDOS`` y otro proceso lo retoma.
+- Si el render no termina en ``PDF_ESPERA_SEGUNDOS`` se responde 202 con una
+  página de espera que apunta a ``descargar_pdf`` con un token de descarga.
+- El pool usa el contexto ``forkserver`` (``spawn`` donde no existe): el
+  proceso web tiene hilos propios (workers de desarrollos y correos) y hacer
+  ``fork`` de un proceso con hilos no es seguro.
+
+Configuración (settings, todas opcionales):
+    PDF_PROCESOS              procesos del pool; 0 convierte en el mismo hilo (def. 2)
+    PDF_ESPERA_SEGUNDOS       espera síncrona antes de devolver un token (def. 5)
+    PDF_CACHE_SEGUNDOS        vigencia de PDFs, errores y tokens (def. 600)
+    PDF_RENDER_MAX_SEGUNDOS   tras este tiempo un render en curso se da por perdido (def. 300)
+    PDF_DIRECTORIO            directorio compartido (def. MEDIA_ROOT/pdf_generados)
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturoTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SONDEO = 0.2  # segundos entre lecturas mientras otro proceso convierte
+
+_lock = threading.Lock()
+_pool = None
+_en_curso = {}  # clave de contenido -> Future del render lanzado por este proceso
+
+
+class ErrorGeneracionPDF(Exception):
+    """xhtml2pdf no pudo convertir el documento."""
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def html_a_pdf(html):
+    """Convierte HTML a bytes de PDF. Se ejecuta dentro de los procesos del pool."""
+    from xhtml2pdf import pisa
+
+    destino = io.BytesIO()
+    try:
+        estado = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=destino, encoding='utf-8')
+    except Exception as error:  # xhtml2pdf lanza excepciones propias ante HTML que no sabe maquetar
+        raise ErrorGeneracionPDF(f"{type(error).__name__}: {error}") from None
+    if estado.err:
+        raise ErrorGeneracionPDF(f"xhtml2pdf reportó {estado.err} errores")
+    return destino.getvalue()
+
+
+def clave_contenido(template_name, html):
+    return hashlib.sha256(f"{template_name}\0{html}".encode('utf-8')).hexdigest()
+
+
+# -----------------------------------------------------------------
+# Almacén compartido en disco
+# -----------------------------------------------------------------
+def _directorio():
+    return _config('PDF_DIRECTORIO', None) or os.path.join(settings.MEDIA_ROOT, 'pdf_generados')
+
+
+def _ruta(nombre):
+    return os.path.join(_directorio(), nombre)
+
+
+def _vigente(ruta, segundos):
+    try:
+        return time.time() - os.stat(ruta).st_mtime < segundos
+    except FileNotFoundError:
+        return False
+
+
+def _leer(nombre):
+    """Contenido del archivo si existe y no ha caducado; ``None`` si no."""
+    ruta = _ruta(nombre)
+    if not _vigente(ruta, _config('PDF_CACHE_SEGUNDOS', 600)):
+        return None
+    try:
+        with open(ruta, 'rb') as archivo:
+            return archivo.read()
+    except FileNotFoundError:
+        return None
+
+
+def _escribir(nombre, contenido):
+    """Escribe de forma atómica: quien lee ve el archivo completo o no lo ve."""
+    os.makedirs(_directorio(), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=_directorio(), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, _ruta(nombre))
+
+
+def _borrar(nombre):
+    try:
+        os.remove(_ruta(nombre))
+    except FileNotFoundError:
+        pass
+
+
+def podar():
+    """Borra resultados, errores y tokens caducados (y marcas de renders perdidos)."""
+    ahora = time.time()
+    vigencia = max(_config('PDF_CACHE_SEGUNDOS', 600), _config('PDF_RENDER_MAX_SEGUNDOS', 300))
+    try:
+        entradas = list(os.scandir(_directorio()))
+    except FileNotFoundError:
+        return
+    for entrada in entradas:
+        try:
+            if ahora - entrada.stat().st_mtime >= vigencia:
+                os.remove(entrada.path)
+        except FileNotFoundError:
+            pass
+
+
+def _reclamar(clave):
+    """
+    Marca el render de ``clave`` como en curso. Devuelve False si otro proceso
+    ya lo tiene (y su marca no ha caducado).
+    """
+    os.makedirs(_directorio(), exist_ok=True)
+    ruta = _ruta(f"{clave}.en_curso")
+    for _ in range(2):
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            if _vigente(ruta, _config('PDF_RENDER_MAX_SEGUNDOS', 300)):
+                return False
+            _borrar(f"{clave}.en_curso")  # El proceso que lo convertía murió
+    return False
+
+
+# -----------------------------------------------------------------
+# Pool de procesos
+# -----------------------------------------------------------------
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+        _pool = ProcessPoolExecutor(max_workers=_config('PDF_PROCESOS', 2), mp_context=contexto)
+    return _pool
+
+
+def _reiniciar_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _al_terminar(clave, futuro):
+    with _lock:
+        _en_curso.pop(clave, None)
+    try:
+        if futuro.cancelled():
+            return
+        error = futuro.exception()
+        if error is None:
+            _escribir(f"{clave}.pdf", futuro.result())
+        elif not isinstance(error, BrokenProcessPool):
+            logger.warning("Falló la generación del PDF %s: %s", clave, error)
+            _escribir(f"{clave}.error", str(error).encode('utf-8'))
+    except OSError:
+        logger.exception("No se pudo guardar el resultado del PDF %s.", clave)
+    finally:
+        _borrar(f"{clave}.en_curso")
+
+
+def _enviar(clave, html):
+    """
+    Encola el render de ``html`` o devuelve el que este proceso ya tiene en
+    curso para la misma clave. ``None`` si lo está convirtiendo otro proceso
+    (o si ya terminó mientras tanto).
+    """
+    with _lock:
+        futuro = _en_curso.get(clave)
+        if futuro is not None:
+            return futuro
+        if not _reclamar(clave):
+            return None
+        if os.path.exists(_ruta(f"{clave}.pdf")):
+            _borrar(f"{clave}.en_curso")
+            return None
+        _borrar(f"{clave}.error")  # Un error anterior no bloquea el reintento
+        futuro = _obtener_pool().submit(html_a_pdf, html)
+        _en_curso[clave] = futuro
+    futuro.add_done_callback(lambda f: _al_terminar(clave, f))
+    return futuro
+
+
+def _convertir_aqui(clave, html):
+    pdf = html_a_pdf(html)
+    try:
+        _escribir(f"{clave}.pdf", pdf)
+    except OSError:
+        logger.exception("No se pudo guardar el PDF %s.", clave)
+    return pdf
+
+
+def _convertir(clave, html, espera):
+    """
+    Devuelve los bytes del PDF o ``None`` si el render sigue en curso tras ``espera``
+    segundos (``None``: sin límite). Lanza ``ErrorGeneracionPDF`` si la conversión falla.
+    """
+    pdf = _leer(f"{clave}.pdf")
+    if pdf is not None:
+        return pdf
+
+    if _config('PDF_PROCESOS', 2) <= 0:
+        return _convertir_aqui(clave, html)
+
+    limite = None if espera is None else time.monotonic() + espera
+    while True:
+        futuro = _enviar(clave, html)
+        if futuro is not None:
+            try:
+                return futuro.result(timeout=None if limite is None else max(limite - time.monotonic(), 0))
+            except FuturoTimeout:
+                return None
+            except BrokenProcessPool:
+                # Un proceso del pool murió: se recrea para las siguientes peticiones
+                # y esta se atiende en el mismo hilo.
+                logger.exception("El pool de PDF se rompió; se convierte en el hilo de la petición.")
+                _reiniciar_pool()
+                return _convertir_aqui(clave, html)
+
+        # Otro proceso lo está convirtiendo: se espera su archivo
+        pdf = _leer(f"{clave}.pdf")
+        if pdf is not None:
+            return pdf
+        error = _leer(f"{clave}.error")
+        if error is not None:
+            raise ErrorGeneracionPDF(error.decode('utf-8'))
+        if limite is not None and time.monotonic() >= limite:
+            return None
+        time.sleep(INTERVALO_SONDEO)
+
+
+# -----------------------------------------------------------------
+# Respuestas
+# -----------------------------------------------------------------
+def generar_pdf(template_name, context):
+    """Renderiza y convierte esperando el resultado. Lanza ``ErrorGeneracionPDF`` si falla."""
+    html = get_template(template_name).render(context)
+    return _convertir(clave_contenido(template_name, html), html, None)
+
+
+def respuesta_archivo_pdf(pdf, nombre_archivo, disposicion='attachment'):
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'{disposicion}; filename="{nombre_archivo}"'
+    return response
+
+
+def _respuesta_en_proceso(request, token, nombre_archivo):
+    return render(request, 'reporte/pdf_en_proceso.html', {
+        'url_descarga': reverse('descargar_pdf', args=[token]),
+        'nombre_archivo': nombre_archivo,
+    }, status=202)
+
+
+def respuesta_pdf(request, template_name, context, nombre_archivo,
+                  disposicion='attachment', mensaje_error='Error al generar el PDF'):
+    """
+    Renderiza ``template_name`` con ``context`` y responde con el PDF.
+
+    Si la conversión tarda más de ``PDF_ESPERA_SEGUNDOS`` devuelve una página
+    de espera (202) que se recarga sobre ``descargar_pdf`` hasta que el archivo
+    esté listo.
+    """
+    html = get_template(template_name).render(context)
+    clave = clave_contenido(template_name, html)
+
+    try:
+        pdf = _convertir(clave, html, _config('PDF_ESPERA_SEGUNDOS', 5))
+    except ErrorGeneracionPDF:
+        return HttpResponse(mensaje_error, status=500)
+    if pdf is not None:
+        return respuesta_archivo_pdf(pdf, nombre_archivo, disposicion)
+
+    token = secrets.token_urlsafe(16)
+    podar()
+    # El HTML permite reencolar si el proceso que convertía murió
+    _escribir(f"{clave}.html", html.encode('utf-8'))
+    _escribir(f"token-{token}.json", json.dumps({
+        'clave': clave,
+        'usuario_id': request.user.pk,
+        'nombre_archivo': nombre_archivo,
+        'disposicion': disposicion,
+        'mensaje_error': mensaje_error,
+    }).encode('utf-8'))
+    return _respuesta_en_proceso(request, token, nombre_archivo)
+
+
+def descargar_por_token(request, token):
+    """Respuesta para ``descargar_pdf``: el PDF si ya está listo, la página de espera si no."""
+    contenido = _leer(f"token-{os.path.basename(token)}.json")
+    trabajo = json.loads(contenido) if contenido is not None else None
+    if trabajo is None or trabajo['usuario_id'] != request.user.pk:
+        return HttpResponse('El enlace de descarga no existe o ya expiró.', status=404)
+
+    clave = trabajo['clave']
+    if _leer(f"{clave}.error") is not None:
+        return HttpResponse(trabajo['mensaje_error'], status=500)
+
+    pdf = _leer(f"{clave}.pdf")
+    if pdf is None:
+        html = _leer(f"{clave}.html")
+        if html is None:
+            return HttpResponse('El enlace de descarga no existe o ya expiró.', status=404)
+        try:
+            pdf = _convertir(clave, html.decode('utf-8'), 0)
+        except ErrorGeneracionPDF:
+            return HttpResponse(trabajo['mensaje_error'], status=500)
+    if pdf is None:
+        return _respuesta_en_proceso(request, token, trabajo['nombre_archivo'])
+    return respuesta_archivo_pdf(pdf, trabajo['nombre_archivo'], trabajo['disposicion'])
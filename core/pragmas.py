@@ -0,0 +1,41 @@
+"""
+PRAGMA de SQLite aplicados a cada conexión nueva (señal ``connection_created``).
+
+``settings.SQLITE_PRAGMAS`` es un diccionario {pragma: valor}. Por defecto
+solo trae el modo WAL (``journal_mode=WAL``, ``synchronous=NORMAL``); con
+``DB_SQLITE_AJUSTES=1`` se agregan ``mmap_size``, ``cache_size``,
+``busy_timeout`` y ``temp_store`` (ver settings). Con PostgreSQL no hace nada.
+
+El comando ``benchmark_sqlite`` compara escrituras concurrentes de asistencia
+con y sin estos ajustes.
+"""
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Nombres y valores admitidos: identificadores o enteros (van dentro del SQL)
+_VALOR_VALIDO = re.compile(r'^-?\w+$')
+
+
+def sentencias(pragmas):
+    """Sentencias ``PRAGMA nombre = valor`` para un diccionario de pragmas."""
+    resultado = []
+    for nombre, valor in pragmas.items():
+        if not (_VALOR_VALIDO.match(str(nombre)) and _VALOR_VALIDO.match(str(valor))):
+            raise ValueError(f"PRAGMA no válido en SQLITE_PRAGMAS: {nombre}={valor!r}")
+        resultado.append(f"PRAGMA {nombre} = {valor}")
+    return resultado
+
+
+@receiver(connection_created)
+def aplicar_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for sentencia in sentencias(pragmas):
+            cursor.execute(sentencia)
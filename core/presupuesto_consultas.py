@@ -0,0 +1,199 @@
+"""
+Presupuesto de consultas por petición y detector de N+1.
+
+``PresupuestoConsultasMiddleware`` envuelve cada petición con
+``connection.execute_wrapper`` (funciona sin DEBUG) y anota cuántas consultas
+hizo, cuánto tardó el SQL y cuántas veces se repitió cada sentencia. La
+"huella" de una sentencia es su SQL sin valores: la misma consulta ejecutada
+una vez por fila del listado deja muchas veces la misma huella, que es la
+marca de un N+1. Las peticiones que superan el presupuesto de su URL, o que
+repiten una huella, se registran en el logger ``core.presupuesto_consultas``
+y la respuesta lleva el encabezado ``Server-Timing`` (visible en el navegador).
+
+Para pruebas, ``asegurar_presupuesto`` hace la petición a una URL con nombre y
+lanza ``AssertionError`` si se pasa; ``asegurar_presupuestos`` recorre todas
+las URL con nombre de ``icbfconecta/urls.py``.
+
+Configuración (settings, opcional):
+    CONSULTAS_INSTRUMENTAR         activa el middleware (def. DEBUG)
+    CONSULTAS_PRESUPUESTO_DEFECTO  consultas permitidas por petición (def. 30)
+    CONSULTAS_PRESUPUESTOS         {nombre de URL: máximo}; con espacio de nombres,
+                                   p. ej. 'desarrollo:listar_desarrollos'
+    CONSULTAS_PRESUPUESTOS_CACHE_BD  {nombre de URL: máximo} que reemplaza al anterior
+                                   cuando la caché es DatabaseCache: ahí cada lectura de
+                                   la caché es una consulta y cada escritura varias
+    CONSULTAS_REPETICIONES_N1      repeticiones de una misma huella que se reportan (def. 5)
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from . import caches
+
+logger = logging.getLogger(__name__)
+
+_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def huella(sql):
+    """SQL sin valores ni largo de las listas ``IN``: igual para la misma consulta con otros datos."""
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    sql = _LITERALES.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+class RegistroConsultas:
+    """``execute_wrapper`` que cuenta consultas, tiempo de SQL y huellas."""
+
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.total += 1
+            self.huellas[huella(sql)] += 1
+
+    @property
+    def milisegundos(self):
+        return round(self.segundos * 1000, 1)
+
+    def repetidas(self, umbral=None):
+        """[(huella, veces)] de las sentencias repetidas ``umbral`` veces o más."""
+        umbral = umbral or _config('CONSULTAS_REPETICIONES_N1', 5)
+        return [(h, veces) for h, veces in self.huellas.most_common() if veces >= umbral]
+
+
+@contextmanager
+def registrar():
+    """Cuenta las consultas de todas las conexiones dentro del bloque."""
+    registro = RegistroConsultas()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(registro))
+        yield registro
+
+
+def presupuesto(nombre_url):
+    """Máximo de consultas de la URL con la caché configurada (ver core/caches.py)."""
+    if caches.en_base_de_datos():
+        con_cache_bd = _config('CONSULTAS_PRESUPUESTOS_CACHE_BD', {})
+        if nombre_url in con_cache_bd:
+            return con_cache_bd[nombre_url]
+    return _config('CONSULTAS_PRESUPUESTOS', {}).get(nombre_url, _config('CONSULTAS_PRESUPUESTO_DEFECTO', 30))
+
+
+def problemas(registro, limite):
+    """Descripción de lo que excede el presupuesto (lista vacía si no hay nada)."""
+    resultado = []
+    if registro.total > limite:
+        resultado.append(f"{registro.total} consultas (presupuesto {limite})")
+    for sentencia, veces in registro.repetidas():
+        resultado.append(f"posible N+1, {veces} veces: {sentencia[:200]}")
+    return resultado
+
+
+# -----------------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------------
+class PresupuestoConsultasMiddleware:
+    def __init__(self, get_response):
+        if not _config('CONSULTAS_INSTRUMENTAR', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with registrar() as registro:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        nombre = match.view_name if match else request.path
+        errores = problemas(registro, presupuesto(nombre))
+        if errores:
+            logger.warning(
+                "%s %s (%s): %d consultas, %s ms de SQL. %s",
+                request.method, request.path, nombre, registro.total, registro.milisegundos, " | ".join(errores),
+            )
+        response['Server-Timing'] = f'db;dur={registro.milisegundos};desc="{registro.total} consultas"'
+        return response
+
+
+# -----------------------------------------------------------------
+# Ayudantes para pruebas
+# -----------------------------------------------------------------
+def asegurar_presupuesto(client, nombre_url, args=None, kwargs=None, metodo='get', datos=None, maximo=None):
+    """
+    Hace la petición a ``nombre_url`` con el cliente de pruebas (ya autenticado)
+    y lanza ``AssertionError`` si supera su presupuesto o repite una sentencia.
+    Devuelve la respuesta.
+
+        asegurar_presupuesto(self.client, 'padre_dashboard')
+        asegurar_presupuesto(self.client, 'historial_asistencia', kwargs={'nino_id': nino.id}, maximo=8)
+    """
+    url = reverse(nombre_url, args=args, kwargs=kwargs)
+    with registrar() as registro:
+        respuesta = getattr(client, metodo)(url, datos or {})
+    errores = problemas(registro, presupuesto(nombre_url) if maximo is None else maximo)
+    if errores:
+        raise AssertionError(f"{nombre_url} ({url}): " + "; ".join(errores))
+    return respuesta
+
+
+def _parametros_ruta(patron):
+    """Nombres de los parámetros de la ruta: convertidores de ``path()`` o grupos de ``re_path()``."""
+    return list(patron.pattern.regex.groupindex)
+
+
+def urls_con_nombre(resolver=None, espacio=''):
+    """[(nombre con espacio de nombres, parámetros de la ruta)] de todas las URL con nombre."""
+    resolver = resolver or get_resolver()
+    resultado = []
+    for patron in resolver.url_patterns:
+        if isinstance(patron, URLResolver):
+            prefijo = f"{espacio}{patron.namespace}:" if patron.namespace else espacio
+            parametros = _parametros_ruta(patron)
+            resultado += [(nombre, parametros + params) for nombre, params in urls_con_nombre(patron, prefijo)]
+        elif isinstance(patron, URLPattern) and patron.name:
+            resultado.append((f"{espacio}{patron.name}", _parametros_ruta(patron)))
+    return resultado
+
+
+def asegurar_presupuestos(client, parametros=None, omitir=()):
+    """
+    Recorre las URL con nombre y pide cada una con ``GET``. ``parametros`` da los
+    kwargs de las rutas que los necesitan ({nombre: {...}}); las que los necesitan
+    y no están, o las de ``omitir``, se saltan. Lanza un solo ``AssertionError``
+    con todas las URL que superaron su presupuesto. Devuelve los nombres revisados.
+    """
+    parametros = parametros or {}
+    revisadas, errores = [], []
+    for nombre, requeridos in urls_con_nombre():
+        if nombre in omitir or nombre in revisadas:
+            continue
+        if requeridos and nombre not in parametros:
+            continue
+        try:
+            asegurar_presupuesto(client, nombre, kwargs=parametros.get(nombre))
+        except AssertionError as e:
+            errores.append(str(e))
+        revisadas.append(nombre)
+    if errores:
+        raise AssertionError("\n".join(errores))
+    return revisadas
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete, pre_save
 from django.dispatch import receiver
-from core.models import Rol
+from core.models import Rol, Nino, Asistencia, Padre, HogarComunitario, MadreComunitaria, Regional, Usuario
+from core import actor, busqueda, cache_pdf, calendario_padre, dashboard_padre, snapshots
 
 @receiver(post_migrate)
 def crear_roles_iniciales(sender, **kwargs):
@@ -8,3 +9,165 @@ def crear_roles_iniciales(sender, **kwargs):
         roles = ['administrador', 'madre_comunitaria', 'padre']
         for nombre in roles:
             Rol.objects.get_or_create(nombre_rol=nombre)
+
+
+# --- Snapshot del dashboard de la madre ---
+
+@receiver(pre_save, sender=Nino)
+def guardar_hogar_previo(sender, instance, **kwargs):
+    # También guarda el padre previo para el dashboard del padre
+    instance._hogar_previo_id = instance._padre_previo_id = None
+    if instance.pk:
+        previo = Nino.objects.filter(pk=instance.pk).values_list('hogar_id', 'padre_id').first()
+        if previo:
+            instance._hogar_previo_id, instance._padre_previo_id = previo
+
+@receiver(post_save, sender=Nino)
+def actualizar_snapshot_nino(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    hogar_previo_id = getattr(instance, '_hogar_previo_id', None)
+    if hogar_previo_id and hogar_previo_id != instance.hogar_id:
+        snapshots.quitar_nino(hogar_previo_id, instance.id)
+    snapshots.actualizar_nino(instance.id)
+
+@receiver(post_delete, sender=Nino)
+def quitar_nino_snapshot(sender, instance, **kwargs):
+    snapshots.quitar_nino(instance.hogar_id, instance.id)
+
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+def actualizar_snapshot_asistencia(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshots.actualizar_nino(instance.nino_id)
+
+
+# --- Caché en disco de certificados PDF ---
+
+@receiver(post_save, sender=Nino)
+@receiver(post_delete, sender=Nino)
+def invalidar_certificados_nino(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cache_pdf.invalidar(cache_pdf.grupo_nino(instance.id))
+
+@receiver(post_save, sender=Padre)
+@receiver(post_save, sender=HogarComunitario)
+def invalidar_certificados_relacionados(sender, instance, raw=False, **kwargs):
+    # La versión del certificado ya cambia con su fecha_actualizacion; aquí solo se liberan los archivos viejos
+    if raw:
+        return
+    for nino_id in instance.ninos.values_list('id', flat=True):
+        cache_pdf.invalidar(cache_pdf.grupo_nino(nino_id))
+
+
+# --- Caché del dashboard y del calendario del padre ---
+
+@receiver(post_save, sender=Nino)
+@receiver(post_delete, sender=Nino)
+def invalidar_caches_padre_nino(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    padre_ids = {instance.padre_id, getattr(instance, '_padre_previo_id', None)} - {None}
+    usuario_ids = list(Padre.objects.filter(id__in=padre_ids).values_list('usuario_id', flat=True))
+    dashboard_padre.invalidar_usuarios(usuario_ids)
+    calendario_padre.invalidar_padres(usuario_ids)
+
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+def invalidar_dashboard_padre_asistencia(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    dashboard_padre.invalidar_ninos([instance.nino_id])
+
+@receiver(post_save, sender=HogarComunitario)
+def invalidar_caches_padre_hogar(sender, instance, raw=False, **kwargs):
+    # El dashboard muestra el nombre del hogar; el calendario, las planeaciones de su madre
+    if raw:
+        return
+    usuario_ids = list(instance.ninos.values_list('padre__usuario_id', flat=True))
+    dashboard_padre.invalidar_usuarios(usuario_ids)
+    calendario_padre.invalidar_padres(usuario_ids)
+
+
+# --- Índice de búsqueda de texto ---
+
+@receiver(post_save, sender=Nino)
+def indexar_nino_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    busqueda.indexar_nino(instance)
+
+@receiver(post_delete, sender=Nino)
+def quitar_nino_busqueda(sender, instance, **kwargs):
+    busqueda.quitar('nino', [instance.id])
+
+@receiver(pre_save, sender=HogarComunitario)
+def guardar_madre_previa(sender, instance, **kwargs):
+    instance._madre_previa_id = None
+    if instance.pk:
+        instance._madre_previa_id = HogarComunitario.objects.filter(pk=instance.pk).values_list('madre_id', flat=True).first()
+
+@receiver(post_save, sender=HogarComunitario)
+def indexar_planeaciones_hogar(sender, instance, raw=False, created=False, **kwargs):
+    # Las planeaciones son de la madre: se buscan desde el hogar que tenga asignado
+    if raw:
+        return
+    if created or getattr(instance, '_madre_previa_id', None) != instance.madre_id:
+        busqueda.indexar_planeaciones_hogar(instance)
+
+
+# --- Caché de request.actor (rol, perfil y hogar del usuario) ---
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_actor_usuario(sender, instance, raw=False, update_fields=None, **kwargs):
+    # El inicio de sesión solo actualiza last_login: no cambia el actor
+    if raw or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    actor.invalidar_usuarios([instance.id])
+
+@receiver(post_save, sender=Rol)
+def invalidar_actor_rol(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    actor.invalidar_usuarios(Usuario.objects.filter(rol=instance).values_list('id', flat=True))
+
+@receiver(pre_save, sender=MadreComunitaria)
+@receiver(pre_save, sender=Padre)
+def guardar_usuario_previo(sender, instance, **kwargs):
+    instance._usuario_previo_id = None
+    if instance.pk:
+        instance._usuario_previo_id = sender.objects.filter(pk=instance.pk).values_list('usuario_id', flat=True).first()
+
+@receiver(post_save, sender=MadreComunitaria)
+@receiver(post_delete, sender=MadreComunitaria)
+@receiver(post_save, sender=Padre)
+@receiver(post_delete, sender=Padre)
+def invalidar_actor_perfil(sender, instance, raw=False, **kwargs):
+    # El usuario del perfil y, si el perfil pasó a otro usuario, el anterior
+    if raw:
+        return
+    actor.invalidar_usuarios([instance.usuario_id, getattr(instance, '_usuario_previo_id', None)])
+
+@receiver(post_save, sender=HogarComunitario)
+@receiver(post_delete, sender=HogarComunitario)
+def invalidar_actor_hogar(sender, instance, raw=False, **kwargs):
+    # La madre nueva y, si cambió, la anterior
+    if raw:
+        return
+    madre_ids = {instance.madre_id, getattr(instance, '_madre_previa_id', None)} - {None}
+    actor.invalidar_usuarios(MadreComunitaria.objects.filter(id__in=madre_ids).values_list('usuario_id', flat=True))
+
+
+# --- Nombre de la regional copiado en los hogares (orden del listado) ---
+# Solo cubre los cambios hechos con save(); ver HogarComunitario.regional_nombre.
+
+@receiver(post_save, sender=Regional)
+def copiar_nombre_regional(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    HogarComunitario.objects.filter(regional=instance).exclude(
+        regional_nombre=instance.nombre
+    ).update(regional_nombre=instance.nombre)
@@ -0,0 +1,178 @@
+"""
+Mantenimiento de HogarDashboardSnapshot (dashboard de la madre comunitaria).
+
+- ``obtener_snapshot`` devuelve el snapshot del día; si no existe o es de otro
+  día lo reconstruye con un número fijo de consultas.
+- Las señales de Nino, Asistencia y Novedad llaman a ``actualizar_nino``,
+  ``quitar_nino`` y ``actualizar_novedades`` para refrescar solo la parte afectada.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from .models import Asistencia, HogarDashboardSnapshot, Nino
+
+DIAS_VENTANA_ASISTENCIA = 28
+DIAS_NOVEDADES_RECIENTES = 7
+DOCUMENTOS_TOTAL = 3
+
+
+def _asistencias_por_nino(nino_filtro, hoy):
+    """Presentes y faltas de la ventana de asistencia, agrupados por niño."""
+    from asistencia.utils import estadisticas_asistencia
+
+    fecha_inicio = hoy - timedelta(days=DIAS_VENTANA_ASISTENCIA)
+    return estadisticas_asistencia(
+        Asistencia.objects.filter(fecha__gte=fecha_inicio, **nino_filtro)
+    )['por_nino']
+
+
+def _datos_nino(nino, conteo, hoy):
+    faltas = conteo.get('ausentes', 0)
+    asistencias = conteo.get('presentes', 0)
+
+    # Determinar estado
+    if faltas >= 7:
+        estado, icono_estado = 'Alto riesgo', 'alert'
+    elif faltas >= 4:
+        estado, icono_estado = 'Advertencia', 'warning'
+    else:
+        estado, icono_estado = 'Normal', 'check'
+
+    documentos_faltantes = []
+    if not nino.registro_civil_img:
+        documentos_faltantes.append({'nombre': 'Registro Civil', 'campo': 'registro_civil_img', 'requerido': True})
+    if not nino.carnet_vacunacion:
+        documentos_faltantes.append({'nombre': 'Carnet de Vacunación', 'campo': 'carnet_vacunacion', 'requerido': True})
+    if not nino.certificado_eps:
+        documentos_faltantes.append({'nombre': 'Certificado de Afiliación a Salud (EPS)', 'campo': 'certificado_eps', 'requerido': True})
+    if not nino.foto:
+        documentos_faltantes.append({'nombre': 'Foto del Niño', 'campo': 'foto', 'requerido': False})
+
+    return {
+        'id': nino.id,
+        'nombres': nino.nombres,
+        'apellidos': nino.apellidos,
+        'edad': (hoy - nino.fecha_nacimiento).days // 365 if nino.fecha_nacimiento else None,
+        'genero': nino.genero,
+        'genero_display': nino.get_genero_display(),
+        'faltas': faltas,
+        'asistencias': asistencias,
+        'porcentaje': round((asistencias / DIAS_VENTANA_ASISTENCIA) * 100) if asistencias > 0 else 0,
+        'estado': estado,
+        'icono_estado': icono_estado,
+        'documentos': sum(1 for f in (nino.documento, nino.carnet_vacunacion, nino.certificado_eps) if f),
+        # Los contadores de la tarjeta de documentos cuentan los campos no nulos en BD
+        'tiene_cedula': nino.documento is not None,
+        'tiene_vacunas': nino.carnet_vacunacion.name is not None,
+        'tiene_afiliacion': nino.certificado_eps.name is not None,
+        'documentos_faltantes': documentos_faltantes,
+    }
+
+
+def _novedades_recientes(hogar_id, hoy):
+    from novedades.models import Novedad
+
+    novedades = (
+        Novedad.objects.filter(nino__hogar_id=hogar_id, fecha__gte=hoy - timedelta(days=DIAS_NOVEDADES_RECIENTES))
+        .select_related('nino')
+        .order_by('-fecha')[:3]
+    )
+    return [
+        {'id': n.id, 'nino_nombres': n.nino.nombres, 'descripcion': n.descripcion, 'fecha': n.fecha.isoformat()}
+        for n in novedades
+    ]
+
+
+def reconstruir_snapshot(hogar, hoy=None):
+    """Recalcula el snapshot completo del hogar con tres consultas."""
+    hoy = hoy or date.today()
+    ninos = list(Nino.objects.filter(hogar=hogar).order_by('id'))
+    conteos = _asistencias_por_nino({'nino__hogar': hogar}, hoy)
+    datos = {
+        'fecha_referencia': hoy,
+        'ninos': {str(n.id): _datos_nino(n, conteos.get(n.id, {}), hoy) for n in ninos},
+        'novedades_recientes': _novedades_recientes(hogar.id, hoy),
+    }
+    snapshot, _ = HogarDashboardSnapshot.objects.update_or_create(hogar=hogar, defaults=datos)
+    return snapshot
+
+
+def obtener_snapshot(hogar):
+    """Devuelve el snapshot vigente del hogar (una fila), reconstruyéndolo si es de otro día."""
+    hoy = date.today()
+    snapshot = HogarDashboardSnapshot.objects.filter(hogar=hogar).first()
+    if snapshot is None or snapshot.fecha_referencia != hoy:
+        snapshot = reconstruir_snapshot(hogar, hoy)
+    return snapshot
+
+
+def _snapshot_para_actualizar(hogar_id):
+    return HogarDashboardSnapshot.objects.select_for_update().filter(hogar_id=hogar_id).first()
+
+
+def actualizar_ninos(nino_ids):
+    """
+    Recalcula las filas de varios niños (datos, documentos y asistencia de la ventana).
+    Útil tras escrituras masivas (bulk_create, update) que no disparan señales.
+    """
+    ninos_por_hogar = {}
+    for nino in Nino.objects.filter(id__in=nino_ids):
+        ninos_por_hogar.setdefault(nino.hogar_id, []).append(nino)
+    for hogar_id, ninos in ninos_por_hogar.items():
+        with transaction.atomic():
+            snapshot = _snapshot_para_actualizar(hogar_id)
+            if snapshot is None:
+                continue  # Se construirá completo la próxima vez que se abra el dashboard
+            hoy = snapshot.fecha_referencia
+            conteos = _asistencias_por_nino({'nino_id__in': [n.id for n in ninos]}, hoy)
+            for nino in ninos:
+                snapshot.ninos[str(nino.id)] = _datos_nino(nino, conteos.get(nino.id, {}), hoy)
+            snapshot.save(update_fields=['ninos', 'fecha_actualizacion'])
+
+
+def actualizar_nino(nino_id):
+    """Recalcula la fila de un niño."""
+    actualizar_ninos([nino_id])
+
+
+def quitar_nino(hogar_id, nino_id):
+    with transaction.atomic():
+        snapshot = _snapshot_para_actualizar(hogar_id)
+        if snapshot is not None and snapshot.ninos.pop(str(nino_id), None) is not None:
+            snapshot.save(update_fields=['ninos', 'fecha_actualizacion'])
+
+
+def actualizar_novedades(hogar_id):
+    with transaction.atomic():
+        snapshot = _snapshot_para_actualizar(hogar_id)
+        if snapshot is not None:
+            snapshot.novedades_recientes = _novedades_recientes(hogar_id, snapshot.fecha_referencia)
+            snapshot.save(update_fields=['novedades_recientes', 'fecha_actualizacion'])
+
+
+def resumen_dashboard(snapshot):
+    """Totales del hogar calculados en memoria a partir de las filas por niño."""
+    ninos = sorted(snapshot.ninos.values(), key=lambda n: n['id'])
+    edades = [n['edad'] for n in ninos if n['edad'] is not None]
+    presentes = sum(n['asistencias'] for n in ninos)
+    total_ninos = len(ninos)
+    total_dias_registro = (total_ninos * DIAS_VENTANA_ASISTENCIA) if total_ninos > 0 else 1
+    return {
+        'ninos': ninos,
+        'total_ninos': total_ninos,
+        'ninos_masculino': sum(1 for n in ninos if n['genero'] == 'masculino'),
+        'ninos_femenino': sum(1 for n in ninos if n['genero'] == 'femenino'),
+        'edad_promedio': round(sum(edades) / len(edades), 1) if edades else 0,
+        'edad_minima': min(edades) if edades else None,
+        'edad_maxima': max(edades) if edades else None,
+        'edad_0_2': sum(1 for e in edades if e <= 2),
+        'edad_3_4': sum(1 for e in edades if 3 <= e <= 4),
+        'edad_5': sum(1 for e in edades if e >= 5),
+        'ninos_con_cedula': sum(1 for n in ninos if n['tiene_cedula']),
+        'ninos_con_vacunas': sum(1 for n in ninos if n['tiene_vacunas']),
+        'ninos_con_afiliacion': sum(1 for n in ninos if n['tiene_afiliacion']),
+        'asistencias_presentes': presentes,
+        'asistencias_ausentes': sum(n['faltas'] for n in ninos),
+        'porcentaje_asistencia': round((presentes / total_dias_registro) * 100),
+    }
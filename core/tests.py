@@ -1,3 +1,427 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import actor, busqueda, cache_pdf, caches
+from core.models import Asistencia, Ciudad, DocumentoBusqueda, HogarComunitario, MadreComunitaria, Nino, Padre, Regional, Rol, Usuario
+from core.paginacion import contar, paginar
+from core.presupuesto_consultas import asegurar_presupuestos
+from desarrollo.models import DesarrolloNino, SeguimientoDiario
+from novedades.models import Novedad
+from planeaciones.models import Planeacion
+
+
+class VerificarIndicesTests(TestCase):
+    """Las consultas frecuentes por rango de fechas deben resolverse con índices."""
+
+    def test_consultas_frecuentes_usan_indices(self):
+        salida = StringIO()
+        try:
+            call_command('verificar_indices', stdout=salida)
+        except CommandError as error:
+            self.fail(f"{error}\n{salida.getvalue()}")
+
+
+def _plantillas_en_memoria(plantillas):
+    return override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', plantillas)]},
+    }])
+
+
+class ClaveCachePdfTests(TestCase):
+    """La clave de un PDF cambia con cualquier plantilla que use y con PDF_CACHE_VERSION."""
+
+    PLANTILLAS = {
+        'base.html': '<html>{% block cuerpo %}{% endblock %}</html>',
+        'firma.html': '<p>Firma</p>',
+        'certificado.html': '{% extends "base.html" %}{% block cuerpo %}{{ nino }}{% include "firma.html" %}{% endblock %}',
+    }
+
+    def _clave(self, **cambios):
+        with _plantillas_en_memoria({**self.PLANTILLAS, **cambios}):
+            return cache_pdf.calcular_clave('certificado.html', 'v1')
+
+    def test_cambia_con_las_plantillas_que_extiende_o_incluye(self):
+        clave = self._clave()
+        self.assertEqual(self._clave(), clave)
+        self.assertNotEqual(self._clave(**{'base.html': '<html><b>{% block cuerpo %}{% endblock %}</b></html>'}), clave)
+        self.assertNotEqual(self._clave(**{'firma.html': '<p>Firma y sello</p>'}), clave)
+
+    def test_cambia_con_pdf_cache_version(self):
+        clave = self._clave()
+        with self.settings(PDF_CACHE_VERSION='2'):
+            self.assertNotEqual(self._clave(), clave)
+
+
+class MigracionAsistenciaUnicaTests(TransactionTestCase):
+    """La migración 0024 deja un registro por niño y fecha (el de mayor id) antes de crear el índice único."""
+
+    antes = [('core', '0023_hogardashboardsnapshot')]
+    despues = [('core', '0024_asistencia_unica_nino_fecha')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.antes)
+        self.apps = executor.loader.project_state(self.antes).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_elimina_duplicados(self):
+        modelo = self.apps.get_model
+        rol = modelo('core', 'Rol').objects.get_or_create(nombre_rol='padre')[0]
+        regional = modelo('core', 'Regional').objects.create(nombre='Regional Prueba')
+        ciudad = modelo('core', 'Ciudad').objects.create(nombre='Ciudad Prueba', regional=regional)
+        usuario = modelo('core', 'Usuario').objects.create(
+            documento=1, nombres='Pedro', apellidos='Padre', correo='padre@prueba.co', rol=rol,
+        )
+        madre = modelo('core', 'MadreComunitaria').objects.create(usuario=usuario, nivel_escolaridad='Bachiller')
+        hogar = modelo('core', 'HogarComunitario').objects.create(
+            regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro', madre=madre,
+        )
+        padre = modelo('core', 'Padre').objects.create(usuario=usuario)
+        Nino = modelo('core', 'Nino')
+        uno, otro = (
+            Nino.objects.create(nombres=nombre, apellidos='Prueba', fecha_nacimiento=datetime.date(2021, 1, 1), hogar=hogar, padre=padre)
+            for nombre in ('Uno', 'Otro')
+        )
+        Asistencia = modelo('core', 'Asistencia')
+        lunes, martes = datetime.date(2025, 10, 6), datetime.date(2025, 10, 7)
+        for nino, fecha, estado in [
+            (uno, lunes, 'Presente'), (uno, lunes, 'Ausente'), (uno, lunes, 'Justificado'),
+            (uno, martes, 'Presente'), (otro, lunes, 'Ausente'), (otro, lunes, 'Presente'),
+        ]:
+            Asistencia.objects.create(nino=nino, fecha=fecha, estado=estado)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.despues)
+
+        Asistencia = executor.loader.project_state(self.despues).apps.get_model('core', 'Asistencia')
+        self.assertEqual(
+            sorted(Asistencia.objects.values_list('nino_id', 'fecha', 'estado')),
+            sorted([(uno.id, lunes, 'Justificado'), (uno.id, martes, 'Presente'), (otro.id, lunes, 'Presente')]),
+        )
+
+
+class PaginacionCursorTests(TestCase):
+    """El cursor recorre el listado de hogares sin saltar ni repetir filas, aun con claves de orden iguales."""
+
+    ORDEN = ['regional_nombre', 'nombre_hogar']
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        usuario = Usuario.objects.create(documento=1, nombres='Marta', apellidos='Madre', correo='madre@prueba.co', rol=rol)
+        madre = MadreComunitaria.objects.create(usuario=usuario, nivel_escolaridad='Bachiller')
+        norte, sur = Regional.objects.create(nombre='Norte'), Regional.objects.create(nombre='Sur')
+        ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=norte)
+        # Varios hogares con la misma regional y el mismo nombre: solo el id los ordena
+        for regional, nombre in [
+            (sur, 'Hogar B'), (norte, 'Hogar A'), (norte, 'Hogar A'), (sur, 'Hogar A'),
+            (norte, 'Hogar A'), (norte, 'Hogar B'), (sur, 'Hogar A'), (norte, 'Hogar A'),
+        ]:
+            HogarComunitario.objects.create(
+                regional=regional, ciudad=ciudad, nombre_hogar=nombre, direccion='Calle 1', localidad='Centro', madre=madre,
+            )
+
+    def _pagina(self, consulta=''):
+        return paginar(RequestFactory().get(f'/?{consulta}'), HogarComunitario.objects.all(), self.ORDEN, por_pagina=3)
+
+    def test_avanzar_y_retroceder_con_claves_iguales(self):
+        esperado = list(HogarComunitario.objects.order_by(*self.ORDEN, 'id').values_list('id', flat=True))
+
+        paginas = [self._pagina()]
+        while paginas[-1].has_next:
+            paginas.append(self._pagina(paginas[-1].consulta_siguiente))
+        self.assertEqual([p.number for p in paginas], [1, 2, 3])
+        self.assertEqual([h.id for p in paginas for h in p], esperado)
+
+        hacia_atras = [self._pagina('ultima=1')]
+        while hacia_atras[-1].has_previous:
+            hacia_atras.append(self._pagina(hacia_atras[-1].consulta_anterior))
+        self.assertEqual([[h.id for h in p] for p in reversed(hacia_atras)], [[h.id for h in p] for p in paginas])
+
+    def test_conteo_estimado_por_encima_del_tope(self):
+        with self.settings(PAGINACION_TOPE_CONTEO=3):
+            total, tipo = contar(HogarComunitario.objects.all(), 'estimado')
+        if connection.vendor == 'postgresql':
+            # Estimación del planificador (EXPLAIN), nunca por debajo del tope
+            self.assertEqual(tipo, 'aproximado')
+            self.assertGreaterEqual(total, 4)
+        else:
+            self.assertEqual((total, tipo), (3, 'minimo'))
+        with self.settings(PAGINACION_TOPE_CONTEO=20):
+            self.assertEqual(contar(HogarComunitario.objects.all(), 'estimado'), (8, 'exacto'))
+
+
+class BusquedaTests(TestCase):
+    """Índice de búsqueda del hogar: tildes, prefijos y documentos que siguen a sus registros."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        regional = Regional.objects.create(nombre='Regional Prueba')
+        ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=regional)
+        cls.madres = [
+            MadreComunitaria.objects.create(
+                usuario=Usuario.objects.create(
+                    documento=i, nombres=f'Madre{i}', apellidos='Prueba', correo=f'madre{i}@prueba.co', rol=rol_madre,
+                ),
+                nivel_escolaridad='Bachiller',
+            )
+            for i in (1, 2)
+        ]
+        cls.hogar = HogarComunitario.objects.create(
+            regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro',
+            madre=cls.madres[0],
+        )
+        usuario_padre = Usuario.objects.create(documento=10, nombres='Pedro', apellidos='Padre', correo='padre@prueba.co', rol=rol_padre)
+        cls.nino = Nino.objects.create(
+            nombres='Sofía', apellidos='Pérez', fecha_nacimiento=datetime.date(2021, 1, 1),
+            hogar=cls.hogar, padre=Padre.objects.create(usuario=usuario_padre),
+        )
+        cls.novedad = Novedad.objects.create(
+            nino=cls.nino, docente='Marta', fecha=datetime.date(2025, 10, 3), clase='Salud',
+            descripcion='Llegó con fiebre', tipo='a',
+        )
+
+    def _buscar(self, consulta, **kwargs):
+        return [(d.tipo, d.objeto_id) for d in busqueda.buscar([self.hogar.id], consulta, **kwargs)]
+
+    def _planeacion(self, madre, nombre):
+        return Planeacion.objects.create(madre=madre.usuario, fecha=datetime.date(2025, 10, 1), nombre_experiencia=nombre)
+
+    def test_sin_tildes_ni_mayusculas_y_por_prefijo(self):
+        esperado = ('nino', self.nino.id)
+        for consulta in ('sofía pérez', 'SOFIA', 'sof per', 'Pérez Sofí'):
+            self.assertIn(esperado, self._buscar(consulta, tipos=['nino']), consulta)
+        self.assertEqual(self._buscar('maria', tipos=['nino']), [])
+        # Todas las palabras deben aparecer
+        self.assertEqual(self._buscar('sofia gomez', tipos=['nino']), [])
+
+    def test_renombrar_al_nino_reindexa_sus_novedades(self):
+        self.assertIn(('novedad', self.novedad.id), self._buscar('sofia fiebre'))
+
+        self.nino.nombres = 'Valentina'
+        self.nino.save()
+
+        self.assertIn(('novedad', self.novedad.id), self._buscar('valentina fiebre'))
+        self.assertEqual(self._buscar('sofia'), [])
+
+    def test_cambiar_la_madre_del_hogar_mueve_las_planeaciones(self):
+        anterior = self._planeacion(self.madres[0], 'Juego de roles')
+        nueva = self._planeacion(self.madres[1], 'Cuentos con títeres')
+        self.assertEqual(self._buscar('juego'), [('planeacion', anterior.id)])
+        self.assertEqual(self._buscar('titeres'), [])
+
+        self.hogar.madre = self.madres[1]
+        self.hogar.save()
+
+        self.assertEqual(self._buscar('titeres'), [('planeacion', nueva.id)])
+        # La madre anterior ya no tiene hogar: su planeación sale del índice
+        self.assertEqual(self._buscar('juego'), [])
+        self.assertFalse(DocumentoBusqueda.objects.filter(tipo='planeacion', objeto_id=anterior.id).exists())
+
+    def test_disparadores_fts5(self):
+        if busqueda.motor() != 'fts5':
+            self.skipTest("Los disparadores FTS5 solo existen en SQLite.")
+
+        def coincidencias(termino):
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT rowid FROM {busqueda.TABLA_FTS} WHERE {busqueda.TABLA_FTS} MATCH %s", [termino])
+                return [fila[0] for fila in cursor.fetchall()]
+
+        documento = DocumentoBusqueda.objects.get(tipo='novedad', objeto_id=self.novedad.id)
+        self.assertEqual(coincidencias('fiebre'), [documento.id])
+
+        # UPDATE y DELETE directos sobre la tabla también llegan al índice
+        DocumentoBusqueda.objects.filter(id=documento.id).update(texto='Llegó con tos')
+        self.assertEqual(coincidencias('fiebre'), [])
+        self.assertEqual(coincidencias('tos'), [documento.id])
+        DocumentoBusqueda.objects.filter(id=documento.id).delete()
+        self.assertEqual(coincidencias('tos'), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {busqueda.TABLA_FTS}({busqueda.TABLA_FTS}) VALUES ('integrity-check')")
+
+
+class ActorTests(TestCase):
+    """request.actor en caché: se renueva con los cambios y, ya en caché, no consulta las tablas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        cls.rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        regional = Regional.objects.create(nombre='Regional Prueba')
+        ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=regional)
+        cls.usuario = Usuario.objects.create(documento=1, nombres='Marta', apellidos='Madre', correo='madre@prueba.co', rol=cls.rol_madre)
+        cls.otro = Usuario.objects.create(documento=2, nombres='Rosa', apellidos='Madre', correo='rosa@prueba.co', rol=cls.rol_madre)
+        cls.madre = MadreComunitaria.objects.create(usuario=cls.usuario, nivel_escolaridad='Bachiller')
+        cls.hogar = HogarComunitario.objects.create(
+            regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro', madre=cls.madre,
+        )
+
+    def _resolver(self, usuario):
+        # Un usuario recién leído, como el que carga AuthenticationMiddleware en cada petición
+        request = RequestFactory().get('/')
+        request.user = Usuario.objects.get(pk=usuario.pk)
+        return actor.obtener_actor(request)
+
+    def test_en_cache_no_consulta_las_tablas(self):
+        self._resolver(self.usuario)
+        request = RequestFactory().get('/')
+        request.user = Usuario.objects.get(pk=self.usuario.pk)
+        tabla_cache = settings.CACHES['default'].get('LOCATION')
+
+        with CaptureQueriesContext(connection) as consultas:
+            resuelto = actor.obtener_actor(request)
+            self.assertEqual((resuelto.hogar, request.user.madre_profile, request.user.rol), (self.hogar, self.madre, self.rol_madre))
+        if caches.en_base_de_datos():
+            # Solo las lecturas de la caché, que con DatabaseCache son consultas a su tabla
+            self.assertEqual([q['sql'] for q in consultas if tabla_cache not in q['sql']], [])
+        else:
+            self.assertEqual(len(consultas), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_en_cache_en_memoria_no_hace_consultas(self):
+        self.test_en_cache_no_consulta_las_tablas()
+
+    def test_cambio_de_rol_sin_senales(self):
+        self.assertTrue(self._resolver(self.usuario).es_madre)
+
+        Usuario.objects.filter(pk=self.usuario.pk).update(rol=self.rol_padre)
+
+        resuelto = self._resolver(self.usuario)
+        self.assertTrue(resuelto.es_padre)
+        self.assertFalse(resuelto.es_madre)
+
+    def test_perfil_reasignado_a_otro_usuario(self):
+        self.assertEqual(self._resolver(self.usuario).hogar, self.hogar)
+        self.assertIsNone(self._resolver(self.otro).madre)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.madre.usuario = self.otro
+            self.madre.save()
+
+        anterior, nuevo = self._resolver(self.usuario), self._resolver(self.otro)
+        self.assertEqual((anterior.madre, anterior.hogar), (None, None))
+        self.assertEqual((nuevo.madre, nuevo.hogar), (self.madre, self.hogar))
+
+    def test_la_version_cambia_al_confirmar(self):
+        self._resolver(self.usuario)
+        version = cache.get(actor.clave_version(self.usuario.pk))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Usuario.objects.get(pk=self.usuario.pk).save()
+        # Antes de confirmar la transacción la entrada sigue vigente
+        self.assertEqual(cache.get(actor.clave_version(self.usuario.pk)), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(actor.clave_version(self.usuario.pk)))
+        self._resolver(self.usuario)
+        self.assertNotIn(cache.get(actor.clave_version(self.usuario.pk)), (None, version))
+
+    def test_entrada_vieja_se_descarta(self):
+        self._resolver(self.usuario)
+        version = cache.get(actor.clave_version(self.usuario.pk))
+        vieja = cache.get(actor.clave(self.usuario.pk, version))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hogar.madre = MadreComunitaria.objects.create(usuario=self.otro, nivel_escolaridad='Bachiller')
+            self.hogar.save()
+        # Una petición que leyó antes del cambio guarda tarde los datos viejos bajo la versión anterior
+        cache.set(actor.clave(self.usuario.pk, version), vieja)
+
+        self.assertIsNone(self._resolver(self.usuario).hogar)
+
+
+class PresupuestoConsultasTests(TestCase):
+    """
+    Cada vista con nombre, pedida por cada rol, se mantiene dentro de su presupuesto
+    de consultas con la caché configurada (en pruebas, el respaldo DatabaseCache).
+    """
+
+    # Cierra la sesión: las URL siguientes se pedirían sin usuario
+    OMITIR = ('logout',)
+
+    @classmethod
+    def setUpTestData(cls):
+        rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+        rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        rol_admin = Rol.objects.get_or_create(nombre_rol='administrador')[0]
+        regional = Regional.objects.create(nombre='Regional Prueba')
+        ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=regional)
+
+        cls.admin = Usuario.objects.create(
+            documento=1, nombres='Ana', apellidos='Admin', correo='admin@prueba.co', rol=rol_admin, is_staff=True,
+        )
+        cls.madre = Usuario.objects.create(documento=2, nombres='Marta', apellidos='Madre', correo='madre@prueba.co', rol=rol_madre)
+        madre = MadreComunitaria.objects.create(usuario=cls.madre, nivel_escolaridad='Bachiller')
+        hogar = HogarComunitario.objects.create(
+            regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro', madre=madre,
+        )
+        planeacion = Planeacion.objects.create(madre=cls.madre, fecha=datetime.date(2025, 10, 1))
+
+        ninos = []
+        for i in range(5):
+            usuario_padre = Usuario.objects.create(
+                documento=10 + i, nombres=f'Pedro{i}', apellidos='Padre', correo=f'padre{i}@prueba.co', rol=rol_padre,
+            )
+            padre = Padre.objects.create(usuario=usuario_padre)
+            nino = Nino.objects.create(
+                nombres=f'Niño{i}', apellidos='Prueba', fecha_nacimiento=datetime.date(2021, 1, 1), hogar=hogar, padre=padre,
+            )
+            ninos.append(nino)
+            for dia in range(1, 11):
+                fecha = datetime.date(2025, 10, dia)
+                Asistencia.objects.create(nino=nino, fecha=fecha, estado='Presente' if dia % 4 else 'Ausente')
+                SeguimientoDiario.objects.create(
+                    nino=nino, planeacion=planeacion, fecha=fecha, estado_emocional='feliz', valoracion=4,
+                )
+            Novedad.objects.create(nino=nino, docente='Marta', fecha=datetime.date(2025, 10, 3), clase='c', descripcion='x', tipo='a')
+            DesarrolloNino.objects.create(nino=nino, fecha_fin_mes=datetime.date(2025, 10, 31))
+
+        cls.nino = ninos[0]
+        cls.padre = cls.nino.padre.usuario
+
+    def _parametros(self):
+        nino = self.nino
+        desarrollo = DesarrolloNino.objects.filter(nino=nino).first()
+        return {
+            'padre_ver_desarrollo': {'nino_id': nino.id},
+            'desarrollo:padre_ver_desarrollo': {'nino_id': nino.id},
+            'historial_asistencia': {'nino_id': nino.id},
+            'ver_ficha_nino': {'id': nino.id},
+            'desarrollo:ver_desarrollo': {'id': desarrollo.id},
+        }
+
+    def _revisar(self, usuario):
+        self.client.force_login(usuario)
+        revisadas = asegurar_presupuestos(self.client, self._parametros(), omitir=self.OMITIR)
+        self.assertTrue(revisadas)
+
+    def test_madre(self):
+        self._revisar(self.madre)
+
+    def test_padre(self):
+        self._revisar(self.padre)
+
+    def test_administrador(self):
+        self._revisar(self.admin)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PresupuestoConsultasCacheEnMemoriaTests(PresupuestoConsultasTests):
+    """Los mismos presupuestos con una caché que no usa la base de datos (como Redis o Memcached)."""
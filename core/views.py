@@ -4,8 +4,9 @@ from django.contrib.auth import update_session_auth_hash
 from django.contrib import messages
 from django.db import transaction
 from django.contrib.auth.hashers import make_password
-from django.db.models import Q, Count
-from .models import Usuario, Rol, Padre, Nino, HogarComunitario, Regional
+from django.db.models import Q, Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import Usuario, Rol, Padre, Nino, HogarComunitario, Regional, DocumentoBusqueda
 from django.utils import timezone
 from django import forms
 from django.contrib.auth.forms import SetPasswordForm
@@ -15,12 +16,11 @@ from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from .models import Rol, Usuario, MadreComunitaria, HogarComunitario
 from .forms import UsuarioMadreForm, MadreProfileForm, HogarForm 
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from .models import Ciudad
 from django.core.paginator import Paginator
-from django.template.loader import get_template
-import io
-from xhtml2pdf import pisa
+from .paginacion import paginar
+from . import busqueda
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
@@ -28,17 +28,13 @@ from django.http import JsonResponse
 from datetime import date, datetime, timedelta
 import calendar
 from datetime import date
-from calendar import monthrange
 from django.shortcuts import render
 from django.http import JsonResponse
 from core.models import Nino
-from planeaciones.models import Planeacion
 from django.contrib.auth.decorators import login_required
-from novedades.models import Novedad
-from planeaciones.models import Planeacion
 from datetime import datetime as _datetime, date as _date
-from core.models import Asistencia
-from desarrollo.models import SeguimientoDiario
+from . import cache_pdf, calendario_padre, dashboard_padre, exportaciones, pdf
+from .fechas import filtro_mes
 
 # --- VISTAS PERSONALIZADAS DE AUTENTICACIÓN ---
 from django.contrib.auth.forms import PasswordResetForm
@@ -105,7 +101,6 @@ def reporte_matricula_nino_pdf(request, nino_id):
                 return None
         return None
     
-    template = get_template('madre/reporte_ninos.html')
     context = {
         'nino': nino,
         'padre': padre,
@@ -121,13 +116,10 @@ def reporte_matricula_nino_pdf(request, nino_id):
         'padre_documento_path': get_absolute_path(padre.documento_identidad_img) if padre else None,
         'padre_sisben_path': get_absolute_path(padre.clasificacion_sisben) if padre else None,
     }
-    html = template.render(context)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="reporte_matricula_{nino.nombres}_{nino.apellidos}.pdf"'
-    pisa_status = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=response, encoding='utf-8')
-    if pisa_status.err:
-        return HttpResponse('Error al generar el PDF', status=500)
-    return response
+    return pdf.respuesta_pdf(
+        request, 'madre/reporte_ninos.html', context,
+        f"reporte_matricula_{nino.nombres}_{nino.apellidos}.pdf",
+    )
 
 @login_required
 def reporte_general_hogar_pdf(request):
@@ -136,20 +128,14 @@ def reporte_general_hogar_pdf(request):
     from django.conf import settings
     
     # Verificar que el usuario sea madre comunitaria
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, 'Acceso denegado. No tienes los permisos necesarios.')
         return redirect('home')
     
     # Obtener el hogar de la madre comunitaria logueada
-    try:
-        madre = MadreComunitaria.objects.get(usuario=request.user)
-        # El hogar se obtiene a través del related_name 'hogares_asignados'
-        hogar = madre.hogares_asignados.first()
-        if not hogar:
-            messages.error(request, 'No tienes un hogar asignado.')
-            return redirect('listar_ninos')
-    except MadreComunitaria.DoesNotExist:
-        messages.error(request, 'No se encontró información de madre comunitaria.')
+    hogar = request.actor.hogar
+    if not hogar:
+        messages.error(request, 'No tienes un hogar asignado.')
         return redirect('listar_ninos')
     
     # Obtener todos los niños del hogar
@@ -187,7 +173,6 @@ def reporte_general_hogar_pdf(request):
         }
         ninos_data.append(nino_info)
     
-    template = get_template('madre/reporte_general_hogar.html')
     context = {
         'hogar': hogar,
         'ninos_data': ninos_data,
@@ -195,20 +180,15 @@ def reporte_general_hogar_pdf(request):
         'usuario_generador': usuario_generador,
         'fecha_reporte': fecha_reporte,
     }
-    
-    html = template.render(context)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="reporte_general_{hogar.nombre_hogar.replace(" ", "_")}.pdf"'
-    pisa_status = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=response, encoding='utf-8')
-    if pisa_status.err:
-        return HttpResponse('Error al generar el PDF', status=500)
-    return response
+    return pdf.respuesta_pdf(
+        request, 'madre/reporte_general_hogar.html', context,
+        f"reporte_general_{hogar.nombre_hogar.replace(' ', '_')}.pdf",
+    )
 
 @login_required
 def certificado_matricula_pdf(request, nino_id):
     """Genera un certificado de matrícula oficial en PDF"""
     import os
-    import random
     from datetime import date
     import locale
     
@@ -221,58 +201,79 @@ def certificado_matricula_pdf(request, nino_id):
         except:
             pass
     
-    nino = get_object_or_404(Nino, id=nino_id)
+    nino = get_object_or_404(
+        Nino.objects.select_related('padre__usuario', 'hogar__madre__usuario', 'hogar__ciudad', 'hogar__regional'),
+        id=nino_id,
+    )
     padre = nino.padre
     hogar = nino.hogar
-    
-    # Calcular edad del niño
     hoy = date.today()
-    edad = hoy.year - nino.fecha_nacimiento.year - ((hoy.month, hoy.day) < (nino.fecha_nacimiento.month, nino.fecha_nacimiento.day))
-    
-    # Generar código de verificación único
-    codigo_verificacion = f"ICBF-{hogar.id:04d}-{nino.id:05d}-{random.randint(1000, 9999)}"
-    
-    # Obtener ruta absoluta del logo
-    from django.conf import settings
-    logo_path = os.path.join(settings.BASE_DIR, 'core', 'static', 'img', 'logo.png')
-    if not os.path.exists(logo_path):
-        logo_path = None
-    else:
-        logo_path = os.path.abspath(logo_path)
-    
-    # Formatear fecha en español manualmente
-    meses = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 
-             'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-    fecha_emision = f"{hoy.day} de {meses[hoy.month - 1]} de {hoy.year}"
-    
-    # Formatear fechas del niño
-    fecha_nac = nino.fecha_nacimiento
-    fecha_nacimiento_texto = f"{fecha_nac.day} de {meses[fecha_nac.month - 1]} de {fecha_nac.year}"
-    
-    fecha_ing = nino.fecha_ingreso
-    fecha_ingreso_texto = f"{fecha_ing.day} de {meses[fecha_ing.month - 1]} de {fecha_ing.year}"
-    
-    template = get_template('madre/certificado_matricula.html')
-    context = {
-        'nino': nino,
-        'padre': padre,
-        'hogar': hogar,
-        'edad': edad,
-        'codigo_verificacion': codigo_verificacion,
-        'fecha_emision': fecha_emision,
-        'fecha_nacimiento_texto': fecha_nacimiento_texto,
-        'fecha_ingreso_texto': fecha_ingreso_texto,
-        'año_actual': hoy.year,
-        'logo_path': logo_path,
-    }
-    
-    html = template.render(context)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="certificado_matricula_{nino.nombres}_{nino.apellidos}.pdf"'
-    pisa_status = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=response, encoding='utf-8')
-    if pisa_status.err:
-        return HttpResponse('Error al generar el certificado', status=500)
-    return response
+
+    # El certificado se sirve desde la caché en disco mientras no cambien los datos
+    # que muestra; la fecha entra en la versión porque cambia la edad y la emisión.
+    # Ciudad y regional se muestran por nombre y no tienen fecha de actualización.
+    versiones = [
+        nino.fecha_actualizacion,
+        padre.fecha_actualizacion,
+        padre.usuario.fecha_actualizacion,
+        hogar.fecha_actualizacion,
+        hogar.ciudad,
+        hogar.regional,
+        hogar.madre.usuario.fecha_actualizacion,
+        hoy,
+    ]
+
+    def construir_contexto(clave):
+        # Calcular edad del niño
+        edad = hoy.year - nino.fecha_nacimiento.year - ((hoy.month, hoy.day) < (nino.fecha_nacimiento.month, nino.fecha_nacimiento.day))
+
+        # Código de verificación: estable para una misma versión del certificado
+        codigo_verificacion = f"ICBF-{hogar.id:04d}-{nino.id:05d}-{int(clave[:8], 16) % 9000 + 1000}"
+
+        # Obtener ruta absoluta del logo
+        from django.conf import settings
+        logo_path = os.path.join(settings.BASE_DIR, 'core', 'static', 'img', 'logo.png')
+        if not os.path.exists(logo_path):
+            logo_path = None
+        else:
+            logo_path = os.path.abspath(logo_path)
+
+        # Formatear fecha en español manualmente
+        meses = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 
+                 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+        fecha_emision = f"{hoy.day} de {meses[hoy.month - 1]} de {hoy.year}"
+
+        # Formatear fechas del niño
+        fecha_nac = nino.fecha_nacimiento
+        fecha_nacimiento_texto = f"{fecha_nac.day} de {meses[fecha_nac.month - 1]} de {fecha_nac.year}"
+
+        fecha_ing = nino.fecha_ingreso
+        fecha_ingreso_texto = f"{fecha_ing.day} de {meses[fecha_ing.month - 1]} de {fecha_ing.year}"
+
+        return {
+            'nino': nino,
+            'padre': padre,
+            'hogar': hogar,
+            'edad': edad,
+            'codigo_verificacion': codigo_verificacion,
+            'fecha_emision': fecha_emision,
+            'fecha_nacimiento_texto': fecha_nacimiento_texto,
+            'fecha_ingreso_texto': fecha_ingreso_texto,
+            'año_actual': hoy.year,
+            'logo_path': logo_path,
+        }
+
+    return cache_pdf.respuesta_pdf_cacheada(
+        request, 'madre/certificado_matricula.html', construir_contexto,
+        f"certificado_matricula_{nino.nombres}_{nino.apellidos}.pdf",
+        grupo=cache_pdf.grupo_nino(nino.id), nombre='matricula', versiones=versiones,
+        mensaje_error='Error al generar el certificado',
+    )
+
+@login_required
+def descargar_pdf(request, token):
+    """Entrega un PDF generado en segundo plano (token devuelto por core.pdf.respuesta_pdf)."""
+    return pdf.descargar_por_token(request, token)
 
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -281,13 +282,6 @@ from .forms import UsuarioMadreForm, MadreProfileForm, HogarForm
 from django.http import JsonResponse
 from .models import Ciudad
 from django.core.paginator import Paginator
-
-# --- Dependencias para PDF ---
-from django.http import HttpResponse
-from django.template.loader import get_template
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from xhtml2pdf import pisa
 # Asegúrate de importar todos los formularios y modelos necesarios
 
 # ----------------------------------------------------
@@ -301,7 +295,8 @@ def rol_requerido(nombre_rol):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             # Asegurarse de que el usuario esté autenticado y tenga el rol correcto
-            if not request.user.is_authenticated or not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != nombre_rol:
+            # request.actor trae el rol desde la caché (core.actor)
+            if request.actor.nombre_rol != nombre_rol:
                 messages.error(request, 'Acceso denegado. No tienes los permisos necesarios.')
                 return redirect('home')  # Redirigir a una página de inicio o de error
             return view_func(request, *args, **kwargs)
@@ -338,15 +333,13 @@ def buscar_padre_por_documento(request):
 @login_required
 def matricular_nino(request):
     # Solo madres comunitarias pueden acceder
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, 'Solo las madres comunitarias pueden matricular niños.')
         return redirect('home')
 
     # Obtener el hogar de la madre logueada
-    try:
-        madre_profile = request.user.madre_profile
-        hogar_madre = HogarComunitario.objects.get(madre=madre_profile)
-    except (MadreComunitaria.DoesNotExist, HogarComunitario.DoesNotExist):
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         messages.error(request, 'No tienes un hogar comunitario asignado.')
         return redirect('madre_dashboard')
 
@@ -511,10 +504,8 @@ def listar_madres(request):
     if query_hogar:
         madres_query = madres_query.filter(hogares_asignados__nombre_hogar__icontains=query_hogar)
     
-    # 💡 CORRECCIÓN: Añadir paginación
-    paginator = Paginator(madres_query.distinct(), 5) # 5 madres por página
-    page_number = request.GET.get('page')
-    madres_paginadas = paginator.get_page(page_number)
+    # Paginación por cursor sobre la llave primaria (5 madres por página)
+    madres_paginadas = paginar(request, madres_query.distinct(), ['id'], por_pagina=5, conteo='estimado')
 
     context = {
         'madres': madres_paginadas, # Enviar el objeto paginado a la plantilla
@@ -523,7 +514,6 @@ def listar_madres(request):
             'documento': query_documento,
             'hogar': query_hogar,
         },
-        'paginator': paginator # Opcional, pero útil para la plantilla
     }
     return render(request, 'admin/madres_list.html', context)
 
@@ -535,12 +525,15 @@ def listar_hogares(request):
     query_madre = request.GET.get('madre', '')
     query_regional = request.GET.get('regional', '')
 
-    # Consulta base
+    # Consulta base. El conteo de niños es una subconsulta: se calcula solo para
+    # los hogares de la página y no agrupa la tabla completa.
     hogares = HogarComunitario.objects.select_related(
-        'madre__usuario', 'regional'
+        'madre__usuario', 'regional', 'ciudad'
     ).annotate(
-        num_ninos=Count('ninos')
-    ).order_by('regional__nombre', 'nombre_hogar')
+        num_ninos=Coalesce(Subquery(
+            Nino.objects.filter(hogar=OuterRef('pk')).order_by().values('hogar').annotate(n=Count('id')).values('n')
+        ), 0)
+    )
 
     if query_nombre:
         hogares = hogares.filter(nombre_hogar__icontains=query_nombre)
@@ -549,10 +542,9 @@ def listar_hogares(request):
     if query_regional:
         hogares = hogares.filter(regional_id=query_regional)
 
-    # 💡 CORRECCIÓN: Añadir paginación
-    paginator = Paginator(hogares, 5) # 5 hogares por página
-    page_number = request.GET.get('page')
-    hogares_paginados = paginator.get_page(page_number)
+    # Paginación por cursor, 5 hogares por página, en el orden de siempre (nombre de la
+    # regional y del hogar) sobre el índice de la copia desnormalizada regional_nombre
+    hogares_paginados = paginar(request, hogares, ['regional_nombre', 'nombre_hogar'], por_pagina=5, conteo='estimado')
 
     context = {
         'hogares': hogares_paginados, # Enviar el objeto paginado
@@ -562,7 +554,6 @@ def listar_hogares(request):
             'madre': query_madre,
             'regional': query_regional,
         },
-        'paginator': paginator # Opcional
     }
 
     return render(request, 'admin/hogares_list.html', context)
@@ -861,79 +852,18 @@ def editar_administrador(request, id):
 
     return render(request, 'admin/administradores_form.html', {'form': form, 'admin': admin})
 
-def _setup_excel_report_header(ws, title, record_count, num_columns):
-    """
-    Función auxiliar para configurar el encabezado personalizado en los reportes de Excel.
-    """
-    # --- ESTILOS ---
-    title_font = Font(name='Poppins', bold=True, size=16)
-    info_bar_font = Font(name='Poppins', bold=True, color='FFFFFF')
-    info_bar_fill = PatternFill(start_color='004080', end_color='004080', fill_type='solid')
-    info_label_font = Font(name='Poppins', bold=True)
-    center_alignment = Alignment(horizontal='center', vertical='center')
-    left_alignment = Alignment(horizontal='left', vertical='center')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # --- TÍTULO PRINCIPAL ---
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=num_columns)
-    title_cell = ws.cell(row=1, column=1, value=title)
-    title_cell.font = title_font
-    title_cell.alignment = center_alignment
-    ws.row_dimensions[1].height = 30
-
-    # --- BARRA DE INFORMACIÓN ---
-    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=num_columns)
-    info_bar_cell = ws.cell(row=2, column=1, value="Información del reporte")
-    info_bar_cell.font = info_bar_font
-    info_bar_cell.fill = info_bar_fill
-    info_bar_cell.alignment = center_alignment
-    ws.row_dimensions[2].height = 25
-
-    # --- Lógica para dividir las columnas de la sección informativa ---
-    # Si hay 6 columnas, el punto medio será 3. El label irá de 1 a 3, y el valor de 4 a 6.
-    mid_point_col = num_columns // 2
-
-    # --- SECCIÓN INFORMATIVA ---
-    # Fecha de Generación
-    ws.merge_cells(start_row=3, start_column=1, end_row=3, end_column=mid_point_col)
-    fecha_label = ws.cell(row=3, column=1, value="Fecha de Generación:")
-    fecha_label.font = info_label_font
-
-    ws.merge_cells(start_row=3, start_column=mid_point_col + 1, end_row=3, end_column=num_columns)
-    fecha_value = ws.cell(row=3, column=mid_point_col + 1, value=timezone.now().strftime('%Y-%m-%d %H:%M:%S'))
-    fecha_value.alignment = left_alignment
-
-    # Aplicar borde a toda la fila 3
-    for col in range(1, num_columns + 1):
-        ws.cell(row=3, column=col).border = thin_border
-
-    # Total de Registros
-    ws.merge_cells(start_row=4, start_column=1, end_row=4, end_column=mid_point_col)
-    total_label = ws.cell(row=4, column=1, value="Total de Registros:")
-    total_label.font = info_label_font
-
-    ws.merge_cells(start_row=4, start_column=mid_point_col + 1, end_row=4, end_column=num_columns)
-    total_value = ws.cell(row=4, column=mid_point_col + 1, value=record_count)
-    total_value.alignment = left_alignment
-
-    # Aplicar borde a toda la fila 4
-    for col in range(1, num_columns + 1):
-        ws.cell(row=4, column=col).border = thin_border
-
-    # Ajustar ancho de la primera columna
-    ws.column_dimensions['A'].width = 25
-
-    # Devolver la fila donde deben empezar los datos de la tabla
-    return 5 # Los datos comenzarán en la fila 5
 
-@login_required
-@rol_requerido('administrador')
-def reporte_administradores_excel(request):
-    # Obtener filtros de la URL
+# --- REPORTES DEL ADMINISTRADOR (Excel write-only y CSV, ver core/exportaciones.py) ---
+ENCABEZADOS_ADMINISTRADORES = ['Nombres', 'Apellidos', 'Tipo Documento', 'Documento', 'Correo', 'Teléfono']
+ENCABEZADOS_MADRES = ['Nombres', 'Apellidos', 'Correo', 'Documento', 'Nivel de Escolaridad', 'Hogar Asignado']
+ENCABEZADOS_HOGARES = ['Nombre del Hogar', 'Madre Comunitaria', 'Regional', 'Ciudad', 'Dirección', 'Niños Matriculados', 'Capacidad', 'Estado']
+
+
+def _reporte_administradores(request):
+    """Devuelve (total, filas) del reporte de administradores según los filtros de la URL."""
     nombre = request.GET.get('nombre', '')
     documento = request.GET.get('documento', '')
 
-    # Filtrar administradores
     rol_admin, _ = Rol.objects.get_or_create(nombre_rol='administrador')
     administradores = Usuario.objects.filter(rol=rol_admin).order_by('nombres')
     if nombre:
@@ -941,145 +871,48 @@ def reporte_administradores_excel(request):
     if documento:
         administradores = administradores.filter(documento__icontains=documento)
 
-    # --- Encabezados y configuración inicial ---
-    headers = ['Nombres', 'Apellidos', 'Tipo Documento', 'Documento', 'Correo', 'Teléfono']
-    num_columns = len(headers)
-
-    # Crear el libro de Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'Administradores'
-
-    # --- Generar encabezado del reporte ---
-    start_row = _setup_excel_report_header(ws, "Reporte De Administradores", administradores.count(), num_columns)
-
-    # --- ESTILOS PARA LA TABLA DE DATOS ---
-    header_font = Font(name='Poppins', bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='004080', end_color='004080', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # --- Escribir encabezados de la tabla de datos ---
-    for col_num, header_title in enumerate(headers, 1):
-        cell = ws.cell(row=start_row, column=col_num, value=header_title)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    ws.row_dimensions[start_row].height = 25
-
-    # --- Llenar datos ---
-    for admin in administradores:
-        start_row += 1
-        ws.cell(row=start_row, column=1, value=admin.nombres)
-        ws.cell(row=start_row, column=2, value=admin.apellidos)
-        ws.cell(row=start_row, column=3, value=admin.get_tipo_documento_display())
-        ws.cell(row=start_row, column=4, value=admin.documento)
-        ws.cell(row=start_row, column=5, value=admin.correo)
-        ws.cell(row=start_row, column=6, value=admin.telefono)
-
-    # --- AJUSTAR ANCHO DE COLUMNAS Y BORDES ---
-    for col_num, header_title in enumerate(headers, 1):
-        max_length = 0
-        column_letter = openpyxl.utils.get_column_letter(col_num)
-        for cell in ws[column_letter]:
-            cell.border = thin_border
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 4)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    # Preparar la respuesta HTTP
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="reporte_administradores.xlsx"'
-    wb.save(response)
-    return response
+    filas = (
+        [admin.nombres, admin.apellidos, admin.get_tipo_documento_display(), admin.documento, admin.correo, admin.telefono]
+        for admin in administradores.iterator(chunk_size=exportaciones.TAMANO_LOTE)
+    )
+    return administradores.count(), filas
 
-@login_required
-@rol_requerido('administrador')
-def reporte_madres_excel(request):
-    # Obtener filtros
+
+def _reporte_madres(request):
+    """Devuelve (total, filas) del reporte de madres comunitarias según los filtros de la URL."""
     nombre = request.GET.get('nombre')
     hogar_asignado = request.GET.get('hogar') # Corregido para coincidir con el filtro de la lista
     escolaridad = request.GET.get('escolaridad', None)
 
-    # Filtrar madres
-    madres = MadreComunitaria.objects.select_related('usuario').prefetch_related('hogares_asignados').order_by('usuario__nombres')
+    # El primer hogar por id, como hacía hogares_asignados.first(), pero precargado
+    madres = MadreComunitaria.objects.select_related('usuario').prefetch_related(
+        Prefetch('hogares_asignados', queryset=HogarComunitario.objects.order_by('pk'))
+    ).order_by('usuario__nombres')
     if nombre:
         madres = madres.filter(Q(usuario__nombres__icontains=nombre) | Q(usuario__apellidos__icontains=nombre))
     if hogar_asignado and hogar_asignado != '':
         madres = madres.filter(hogares_asignados__nombre_hogar__icontains=hogar_asignado)
     if escolaridad and escolaridad != '':
         madres = madres.filter(nivel_escolaridad=escolaridad)
-    
     madres_list = madres.distinct()
 
-    # --- Encabezados y configuración inicial ---
-    headers = ['Nombres', 'Apellidos', 'Correo', 'Documento', 'Nivel de Escolaridad', 'Hogar Asignado']
-    num_columns = len(headers)
-
-    # --- Crear libro de Excel ---
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'Madres Comunitarias'
-
-    # --- Generar encabezado del reporte ---
-    start_row = _setup_excel_report_header(ws, "Reporte De Madres Comunitarias", madres_list.count(), num_columns)
-
-    # --- ESTILOS PARA LA TABLA DE DATOS ---
-    header_font = Font(name='Poppins', bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='004080', end_color='004080', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # --- Escribir encabezados de la tabla de datos ---
-    for col_num, header_title in enumerate(headers, 1):
-        cell = ws.cell(row=start_row, column=col_num, value=header_title)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    ws.row_dimensions[start_row].height = 25
-        
-    # --- Llenar datos ---
-    for madre in madres_list:
-        hogar = madre.hogares_asignados.first()
-        start_row += 1
-        row_data = [madre.usuario.nombres, madre.usuario.apellidos, madre.usuario.correo, madre.usuario.documento, madre.get_nivel_escolaridad_display(), hogar.nombre_hogar if hogar else 'N/A']
-        for col_num, cell_value in enumerate(row_data, 1):
-            ws.cell(row=start_row, column=col_num, value=cell_value)
-
-    # --- AJUSTAR ANCHO DE COLUMNAS Y BORDES ---
-    for col_num, header_title in enumerate(headers, 1):
-        max_length = 0
-        column_letter = openpyxl.utils.get_column_letter(col_num)
-        for cell in ws[column_letter]:
-            cell.border = thin_border
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 4)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    def fila(madre):
+        hogares = madre.hogares_asignados.all()
+        hogar = hogares[0] if hogares else None
+        return [madre.usuario.nombres, madre.usuario.apellidos, madre.usuario.correo, madre.usuario.documento, madre.get_nivel_escolaridad_display(), hogar.nombre_hogar if hogar else 'N/A']
 
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="reporte_madres_comunitarias.xlsx"'
-    wb.save(response)
-    return response
+    filas = (fila(madre) for madre in madres_list.iterator(chunk_size=exportaciones.TAMANO_LOTE))
+    return madres_list.count(), filas
 
-@login_required
-@rol_requerido('administrador')
-def reporte_hogares_excel(request):
-    # Obtener filtros
+
+def _reporte_hogares(request):
+    """Devuelve (total, filas) del reporte de hogares comunitarios según los filtros de la URL."""
     nombre_hogar = request.GET.get('nombre_hogar')
     regional_id = request.GET.get('regional', '')
     ciudad = request.GET.get('ciudad', '')
     madre_comunitaria = request.GET.get('madre', '') # Corregido para coincidir con el filtro de la lista
     ninos_matriculados = request.GET.get('ninos_matriculados')
 
-    # Filtrar hogares
     hogares = HogarComunitario.objects.select_related('madre__usuario', 'regional', 'ciudad').annotate(
         num_ninos=Count('ninos')
     ).order_by('regional__nombre', 'nombre_hogar')
@@ -1097,57 +930,57 @@ def reporte_hogares_excel(request):
         except (ValueError, TypeError):
             pass
 
-    # --- Encabezados y configuración inicial ---
-    headers = ['Nombre del Hogar', 'Madre Comunitaria', 'Regional', 'Ciudad', 'Dirección', 'Niños Matriculados', 'Capacidad', 'Estado']
-    num_columns = len(headers)
-
-    # --- Crear libro de Excel ---
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'Hogares Comunitarios'
-
-    # --- Generar encabezado del reporte ---
-    start_row = _setup_excel_report_header(ws, "Reporte De Hogares Comunitarios", hogares.count(), num_columns)
-
-    # --- ESTILOS PARA LA TABLA DE DATOS ---
-    header_font = Font(name='Poppins', bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='004080', end_color='004080', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # --- Escribir encabezados de la tabla de datos ---
-    for col_num, header_title in enumerate(headers, 1):
-        cell = ws.cell(row=start_row, column=col_num, value=header_title)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    ws.row_dimensions[start_row].height = 25
-
-    # --- Llenar datos ---
-    for hogar in hogares:
-        start_row += 1
-        row_data = [hogar.nombre_hogar, f"{hogar.madre.usuario.nombres} {hogar.madre.usuario.apellidos}", hogar.regional.nombre if hogar.regional else 'N/A', hogar.ciudad.nombre if hogar.ciudad else 'N/A', hogar.direccion, hogar.num_ninos, hogar.capacidad_maxima, hogar.get_estado_display()]
-        for col_num, cell_value in enumerate(row_data, 1):
-            ws.cell(row=start_row, column=col_num, value=cell_value)
-
-    # --- AJUSTAR ANCHO DE COLUMNAS Y BORDES ---
-    for col_num, header_title in enumerate(headers, 1):
-        max_length = 0
-        column_letter = openpyxl.utils.get_column_letter(col_num)
-        for cell in ws[column_letter]:
-            cell.border = thin_border
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 4)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    filas = (
+        [hogar.nombre_hogar, f"{hogar.madre.usuario.nombres} {hogar.madre.usuario.apellidos}", hogar.regional.nombre if hogar.regional else 'N/A', hogar.ciudad.nombre if hogar.ciudad else 'N/A', hogar.direccion, hogar.num_ninos, hogar.capacidad_maxima, hogar.get_estado_display()]
+        for hogar in hogares.iterator(chunk_size=exportaciones.TAMANO_LOTE)
+    )
+    return hogares.count(), filas
 
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="reporte_hogares_comunitarios.xlsx"'
-    wb.save(response)
-    return response
+
+@login_required
+@rol_requerido('administrador')
+def reporte_administradores_excel(request):
+    total, filas = _reporte_administradores(request)
+    return exportaciones.respuesta_excel(
+        'reporte_administradores.xlsx', 'Administradores', "Reporte De Administradores",
+        ENCABEZADOS_ADMINISTRADORES, total, filas,
+    )
+
+@login_required
+@rol_requerido('administrador')
+def reporte_administradores_csv(request):
+    _, filas = _reporte_administradores(request)
+    return exportaciones.respuesta_csv('reporte_administradores.csv', ENCABEZADOS_ADMINISTRADORES, filas)
+
+@login_required
+@rol_requerido('administrador')
+def reporte_madres_excel(request):
+    total, filas = _reporte_madres(request)
+    return exportaciones.respuesta_excel(
+        'reporte_madres_comunitarias.xlsx', 'Madres Comunitarias', "Reporte De Madres Comunitarias",
+        ENCABEZADOS_MADRES, total, filas,
+    )
+
+@login_required
+@rol_requerido('administrador')
+def reporte_madres_csv(request):
+    _, filas = _reporte_madres(request)
+    return exportaciones.respuesta_csv('reporte_madres_comunitarias.csv', ENCABEZADOS_MADRES, filas)
+
+@login_required
+@rol_requerido('administrador')
+def reporte_hogares_excel(request):
+    total, filas = _reporte_hogares(request)
+    return exportaciones.respuesta_excel(
+        'reporte_hogares_comunitarios.xlsx', 'Hogares Comunitarios', "Reporte De Hogares Comunitarios",
+        ENCABEZADOS_HOGARES, total, filas,
+    )
+
+@login_required
+@rol_requerido('administrador')
+def reporte_hogares_csv(request):
+    _, filas = _reporte_hogares(request)
+    return exportaciones.respuesta_csv('reporte_hogares_comunitarios.csv', ENCABEZADOS_HOGARES, filas)
 
 @login_required
 def eliminar_administrador(request, id):
@@ -1164,10 +997,10 @@ def role_redirect(request):
     Redirige al dashboard apropiado según el rol del usuario.
     Esta será la URL de redirección principal después de un login exitoso.
     """
-    if not request.user.rol:
+    if not request.actor.rol:
         return redirect('home')
 
-    role = request.user.rol.nombre_rol.lower()
+    role = request.actor.nombre_rol.lower()
 
     if role == 'administrador':
         return redirect('admin_dashboard')
@@ -1183,132 +1016,59 @@ def role_redirect(request):
 # ----------------------------------------------------
 @login_required
 def madre_dashboard(request):
-    from django.db.models import Count, Q, F, Value, CharField
-    from django.utils import timezone
     from datetime import datetime, timedelta
     from planeaciones.models import Planeacion
-    from novedades.models import Novedad
     import json
     
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
     # Obtener hogar de la madre
-    hogar_madre = HogarComunitario.objects.filter(madre=request.user.madre_profile).first()
+    hogar_madre = request.actor.hogar
     
     if not hogar_madre:
         return render(request, 'madre/dashboard.html', {'error': 'No tienes un hogar asignado.'})
     
-    # Obtener todos los niños del hogar
-    ninos = Nino.objects.filter(hogar=hogar_madre).select_related('padre', 'padre__usuario')
-    total_ninos = ninos.count()
-    
+    # Snapshot materializado del hogar: una fila con los datos de cada niño
+    # (se mantiene con señales de Nino, Asistencia y Novedad; ver core/snapshots.py)
+    from core.snapshots import obtener_snapshot, resumen_dashboard, DOCUMENTOS_TOTAL
+    snapshot = obtener_snapshot(hogar_madre)
+    resumen = resumen_dashboard(snapshot)
+    total_ninos = resumen['total_ninos']
+    hoy = snapshot.fecha_referencia
+
     # Información del hogar
     capacidad_maxima = hogar_madre.capacidad_maxima
     disponibles = capacidad_maxima - total_ninos
     porcentaje_ocupacion = round((total_ninos / capacidad_maxima) * 100) if capacidad_maxima > 0 else 0
-    
-    # Datos de género
-    ninos_masculino = ninos.filter(genero='masculino').count()
-    ninos_femenino = ninos.filter(genero='femenino').count()
-    
-    # Calcular edades
-    hoy = datetime.now().date()
-    edades_data = []
-    edad_promedio = 0
-    edad_minima = None
-    edad_maxima = None
-    
-    for nino in ninos:
-        if nino.fecha_nacimiento:
-            edad = (hoy - nino.fecha_nacimiento).days // 365
-            edades_data.append(edad)
-            if edad_minima is None or edad < edad_minima:
-                edad_minima = edad
-            if edad_maxima is None or edad > edad_maxima:
-                edad_maxima = edad
-    
-    if edades_data:
-        edad_promedio = round(sum(edades_data) / len(edades_data), 1)
-    
-    # Distribución por edad (para gráfica)
-    edad_0_2 = sum(1 for e in edades_data if e <= 2)
-    edad_3_4 = sum(1 for e in edades_data if 3 <= e <= 4)
-    edad_5 = sum(1 for e in edades_data if e >= 5)
-    
-    # Documentos
-    ninos_con_cedula = ninos.filter(documento__isnull=False).count()
-    ninos_con_vacunas = ninos.filter(carnet_vacunacion__isnull=False).count()
-    ninos_con_afiliacion = ninos.filter(certificado_eps__isnull=False).count()
-    
-    # Asistencia últimas 4 semanas
-    fecha_inicio = hoy - timedelta(days=28)
-    asistencias = Asistencia.objects.filter(
-        nino__hogar=hogar_madre,
-        fecha__gte=fecha_inicio
-    )
-    
-    asistencias_presentes = asistencias.filter(estado='Presente').count()
-    asistencias_ausentes = asistencias.filter(estado='Ausente').count()
-    total_dias_registro = (total_ninos * 28) if total_ninos > 0 else 1
-    porcentaje_asistencia = round((asistencias_presentes / total_dias_registro) * 100) if total_dias_registro > 0 else 0
-    
+
     # Datos de asistencia por niño (para tabla)
-    ninos_asistencia = []
-    for nino in ninos:
-        asistencias_nino = Asistencia.objects.filter(
-            nino=nino,
-            fecha__gte=fecha_inicio
-        )
-        faltas = asistencias_nino.filter(estado='Ausente').count()
-        asistencias_nino_count = asistencias_nino.filter(estado='Presente').count()
-        porcentaje_nino = round((asistencias_nino_count / 28) * 100) if asistencias_nino_count > 0 else 0
-        
-        # Calcular edad
-        edad = 0
-        if nino.fecha_nacimiento:
-            edad = (hoy - nino.fecha_nacimiento).days // 365
-        
-        # Determinar estado
-        if faltas >= 7:
-            estado = 'Alto riesgo'
-            icono_estado = 'alert'
-        elif faltas >= 4:
-            estado = 'Advertencia'
-            icono_estado = 'warning'
-        else:
-            estado = 'Normal'
-            icono_estado = 'check'
-        
-        # Verificar documentos
-        documentos_completos = 0
-        if nino.documento:
-            documentos_completos += 1
-        if nino.carnet_vacunacion:
-            documentos_completos += 1
-        if nino.certificado_eps:
-            documentos_completos += 1
-        
-        ninos_asistencia.append({
+    ninos_asistencia = [
+        {
             'nino': nino,
-            'edad': edad,
-            'genero': nino.get_genero_display(),
-            'faltas': faltas,
-            'asistencias': asistencias_nino_count,
-            'porcentaje': porcentaje_nino,
-            'estado': estado,
-            'icono_estado': icono_estado,
-            'documentos': documentos_completos,
-            'documentos_total': 3
-        })
-    
+            'edad': nino['edad'] or 0,
+            'genero': nino['genero_display'],
+            'faltas': nino['faltas'],
+            'asistencias': nino['asistencias'],
+            'porcentaje': nino['porcentaje'],
+            'estado': nino['estado'],
+            'icono_estado': nino['icono_estado'],
+            'documentos': nino['documentos'],
+            'documentos_total': DOCUMENTOS_TOTAL,
+        }
+        for nino in resumen['ninos']
+    ]
+
     # Novedades recientes
-    fecha_novedades = hoy - timedelta(days=7)
-    novedades_recientes = Novedad.objects.filter(
-        nino__hogar=hogar_madre,
-        fecha__gte=fecha_novedades
-    ).select_related('nino').order_by('-fecha')[:3]
-    
+    novedades_recientes = [
+        {
+            'nino': {'nombres': novedad['nino_nombres']},
+            'descripcion': novedad['descripcion'],
+            'fecha': datetime.strptime(novedad['fecha'], '%Y-%m-%d').date(),
+        }
+        for novedad in snapshot.novedades_recientes
+    ]
+
     # Planeaciones de esta semana
     inicio_semana = hoy - timedelta(days=hoy.weekday())
     planeaciones_semana = Planeacion.objects.filter(
@@ -1319,68 +1079,32 @@ def madre_dashboard(request):
     
     # Datos para gráficas
     genero_data = json.dumps({
-        'Masculino': ninos_masculino,
-        'Femenino': ninos_femenino
+        'Masculino': resumen['ninos_masculino'],
+        'Femenino': resumen['ninos_femenino']
     })
     
     edad_distribucion = json.dumps({
-        '0-2 años': edad_0_2,
-        '3-4 años': edad_3_4,
-        '5+ años': edad_5
+        '0-2 años': resumen['edad_0_2'],
+        '3-4 años': resumen['edad_3_4'],
+        '5+ años': resumen['edad_5']
     })
     
     documentos_data = json.dumps({
-        'Cédula': ninos_con_cedula,
-        'Vacunas': ninos_con_vacunas,
-        'Salud': ninos_con_afiliacion
+        'Cédula': resumen['ninos_con_cedula'],
+        'Vacunas': resumen['ninos_con_vacunas'],
+        'Salud': resumen['ninos_con_afiliacion']
     })
     
-    # Calcular niños con documentos faltantes
-    ninos_documentos_faltantes = []
-    ninos_sin_documentos_completos = 0
-    
-    for nino in ninos:
-        documentos_faltantes = []
-        
-        # Verificar registro civil
-        if not nino.registro_civil_img:
-            documentos_faltantes.append({
-                'nombre': 'Registro Civil',
-                'campo': 'registro_civil_img',
-                'requerido': True
-            })
-        
-        # Verificar carnet de vacunación
-        if not nino.carnet_vacunacion:
-            documentos_faltantes.append({
-                'nombre': 'Carnet de Vacunación',
-                'campo': 'carnet_vacunacion',
-                'requerido': True
-            })
-        
-        # Verificar certificado EPS
-        if not nino.certificado_eps:
-            documentos_faltantes.append({
-                'nombre': 'Certificado de Afiliación a Salud (EPS)',
-                'campo': 'certificado_eps',
-                'requerido': True
-            })
-        
-        # Verificar foto
-        if not nino.foto:
-            documentos_faltantes.append({
-                'nombre': 'Foto del Niño',
-                'campo': 'foto',
-                'requerido': False
-            })
-        
-        if documentos_faltantes:
-            ninos_sin_documentos_completos += 1
-            ninos_documentos_faltantes.append({
-                'id': nino.id,
-                'nombre': f"{nino.nombres} {nino.apellidos}",
-                'documentos_faltantes': documentos_faltantes
-            })
+    # Niños con documentos faltantes
+    ninos_documentos_faltantes = [
+        {
+            'id': nino['id'],
+            'nombre': f"{nino['nombres']} {nino['apellidos']}",
+            'documentos_faltantes': nino['documentos_faltantes']
+        }
+        for nino in resumen['ninos'] if nino['documentos_faltantes']
+    ]
+    ninos_sin_documentos_completos = len(ninos_documentos_faltantes)
     
     # Convertir a JSON para JavaScript
     ninos_documentos_faltantes_json = json.dumps(ninos_documentos_faltantes)
@@ -1409,24 +1133,23 @@ def madre_dashboard(request):
         'disponibles': disponibles,
         'porcentaje_ocupacion': porcentaje_ocupacion,
         # Información de niños
-        'ninos': ninos,
         'ninos_asistencia': ninos_asistencia,
-        'ninos_masculino': ninos_masculino,
-        'ninos_femenino': ninos_femenino,
+        'ninos_masculino': resumen['ninos_masculino'],
+        'ninos_femenino': resumen['ninos_femenino'],
         # Edades
-        'edad_promedio': edad_promedio,
-        'edad_minima': edad_minima,
-        'edad_maxima': edad_maxima,
+        'edad_promedio': resumen['edad_promedio'],
+        'edad_minima': resumen['edad_minima'],
+        'edad_maxima': resumen['edad_maxima'],
         # Documentos
-        'ninos_con_cedula': ninos_con_cedula,
-        'ninos_con_vacunas': ninos_con_vacunas,
-        'ninos_con_afiliacion': ninos_con_afiliacion,
+        'ninos_con_cedula': resumen['ninos_con_cedula'],
+        'ninos_con_vacunas': resumen['ninos_con_vacunas'],
+        'ninos_con_afiliacion': resumen['ninos_con_afiliacion'],
         'ninos_sin_documentos_completos': ninos_sin_documentos_completos,
         'ninos_documentos_faltantes': ninos_documentos_faltantes_json,
         # Asistencia
-        'asistencias_presentes': asistencias_presentes,
-        'asistencias_ausentes': asistencias_ausentes,
-        'porcentaje_asistencia': porcentaje_asistencia,
+        'asistencias_presentes': resumen['asistencias_presentes'],
+        'asistencias_ausentes': resumen['asistencias_ausentes'],
+        'porcentaje_asistencia': resumen['porcentaje_asistencia'],
         # Gráficas
         'genero_data': genero_data,
         'edad_distribucion': edad_distribucion,
@@ -1444,38 +1167,12 @@ def madre_dashboard(request):
 # ----------------------------------------------------
 @login_required
 def padre_dashboard(request):
-    if request.user.rol.nombre_rol != 'padre':
+    if request.actor.nombre_rol != 'padre':
         return redirect('role_redirect')
-    # Importar modelos necesarios aquí para evitar importaciones circulares
-    from novedades.models import Novedad
-    from desarrollo.models import DesarrolloNino
 
     try:
-        padre = Padre.objects.get(usuario=request.user)
-        ninos_qs = Nino.objects.filter(padre=padre).order_by('nombres')
-
-        ninos_data = []
-        for nino in ninos_qs:
-            # Obtener la última asistencia registrada para el niño
-            ultima_asistencia_obj = Asistencia.objects.filter(nino=nino).order_by('-fecha').first()
-            if ultima_asistencia_obj:
-                asistencia_info = {
-                    'estado': ultima_asistencia_obj.estado,
-                    'mensaje': f"El día {ultima_asistencia_obj.fecha.strftime('%d/%m/%Y')} estuvo {ultima_asistencia_obj.estado.lower()}."
-                }
-            else:
-                asistencia_info = None
-
-            # Obtener el último desarrollo y la última novedad
-            ultimo_desarrollo = DesarrolloNino.objects.filter(nino=nino).order_by('-fecha_fin_mes').first()
-            ultima_novedad = Novedad.objects.filter(nino=nino).order_by('-fecha').first()
-
-            ninos_data.append({
-                'nino': nino,
-                'ultima_asistencia': asistencia_info,
-                'ultimo_desarrollo': ultimo_desarrollo,
-                'ultima_novedad': ultima_novedad
-            })
+        # Última asistencia, desarrollo y novedad de cada hijo en una consulta, cacheado por padre
+        ninos_data = dashboard_padre.obtener_dashboard(request.user)
 
         return render(request, 'padre/dashboard.html', {
             'ninos_data': ninos_data,
@@ -1504,11 +1201,13 @@ def _get_logro_style(logro):
 # ----------------------------------------------------
 @login_required
 def padre_ver_desarrollo(request, nino_id):
-    if request.user.rol.nombre_rol != 'padre':
+    if request.actor.nombre_rol != 'padre':
         return redirect('role_redirect')
 
+    padre = request.actor.padre
+    if padre is None:
+        return redirect('padre_dashboard')
     try:
-        padre = Padre.objects.get(usuario=request.user)
         nino = get_object_or_404(Nino, id=nino_id, padre=padre)
 
         desarrollos_qs = DesarrolloNino.objects.filter(nino=nino).order_by('-fecha_fin_mes')
@@ -1517,7 +1216,7 @@ def padre_ver_desarrollo(request, nino_id):
         if mes_filtro:
             try:
                 year, month = map(int, mes_filtro.split('-'))
-                desarrollos_qs = desarrollos_qs.filter(fecha_fin_mes__year=year, fecha_fin_mes__month=month)
+                desarrollos_qs = desarrollos_qs.filter(**filtro_mes('fecha_fin_mes', year, month))
             except (ValueError, TypeError):
                 mes_filtro = ''
 
@@ -1544,77 +1243,49 @@ def padre_ver_desarrollo(request, nino_id):
                 'mes': mes_filtro
             }
         })
-    except (Padre.DoesNotExist, Nino.DoesNotExist):
+    except Nino.DoesNotExist:
         return redirect('padre_dashboard') # pragma: no cover
 
-MESES = {
-    1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril",
-    5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto",
-    9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
-}
-
-@login_required
-def calendario_padres(request):
-    tutor = request.user
+def _mes_solicitado(request):
+    """(year, month) de los parámetros GET; el mes actual si faltan o no son válidos."""
     hoy = _date.today()
+    try:
+        year = int(request.GET.get("year", hoy.year))
+        month = int(request.GET.get("month", hoy.month))
+    except (TypeError, ValueError):
+        return hoy.year, hoy.month
+    if not (1 <= month <= 12 and 1 <= year <= 9999):
+        return hoy.year, hoy.month
+    return year, month
 
-    year = int(request.GET.get("year", hoy.year))
-    month = int(request.GET.get("month", hoy.month))
 
-    first_day, total_days = monthrange(year, month)
+@login_required
+def calendario_padres(request):
+    year, month = _mes_solicitado(request)
 
-    # Obtener los niños del tutor (perfil Padre)
-    try:
-        padre = Padre.objects.get(usuario=request.user)
-        ninos = Nino.objects.filter(padre=padre)
-    except Padre.DoesNotExist:
-        ninos = Nino.objects.none()
-
-    # Planeaciones del mes
-    planeaciones = Planeacion.objects.filter(fecha__year=year, fecha__month=month)
-
-    # Novedades de todos los niños del padre (si existen)
-    novedades = Novedad.objects.filter(
-        nino__in=ninos,
-        fecha__year=year,
-        fecha__month=month
-    ) if ninos.exists() else Novedad.objects.none()
-
-    # Seguimientos de todos los niños del padre (si existen)
-    seguimientos = SeguimientoDiario.objects.filter(
-        nino__in=ninos,
-        fecha__year=year,
-        fecha__month=month
-    ) if ninos.exists() else SeguimientoDiario.objects.none()
-
-    eventos = {}
-
-    for p in planeaciones:
-        dia = p.fecha.day
-        eventos.setdefault(dia, {"planeacion": False, "novedad": False})
-        eventos[dia]["planeacion"] = True
-
-    for n in novedades:
-        dia = n.fecha.day
-        eventos.setdefault(dia, {"planeacion": False, "novedad": False})
-        eventos[dia]["novedad"] = True
-
-    for s in seguimientos:
-        dia = s.fecha.day
-        eventos.setdefault(dia, {"planeacion": False, "novedad": False, "seguimiento": False})
-        eventos[dia]["seguimiento"] = True
+    # Todo el mes (íconos y detalle de cada día) sale del feed cacheado por padre y mes
+    feed = calendario_padre.obtener_feed(request.user, year, month)
+    eventos = {int(dia): datos["eventos"] for dia, datos in feed["dias"].items()}
 
     return render(request, "padre/calendario_padres.html", {
         "year": year,
         "month": month,
-        "month_name": MESES.get(month, str(month)),
-        "first_day": first_day,
-        "total_days": total_days,
+        "month_name": feed["month_name"],
+        "first_day": feed["first_day"],
+        "total_days": feed["total_days"],
         "eventos": eventos,
-        "hoy": hoy,
+        "feed": feed,
+        "hoy": _date.today(),
     })
 
 
+@login_required
+def calendario_feed(request):
+    """Feed JSON de un mes: eventos y detalle de todos los días en una sola respuesta."""
+    year, month = _mes_solicitado(request)
+    return JsonResponse(calendario_padre.obtener_feed(request.user, year, month))
+
+
 @login_required
 def obtener_info(request):
     fecha = request.GET.get("fecha")
@@ -1625,68 +1296,15 @@ def obtener_info(request):
     except Exception:
         return JsonResponse({"planeacion": None, "novedad": None, "seguimientos": []})
 
-    # Obtener los niños desde el perfil del Padre
-    try:
-        padre = Padre.objects.get(usuario=request.user)
-        ninos = Nino.objects.filter(padre=padre)
-    except Padre.DoesNotExist:
-        ninos = Nino.objects.none()
-
-    planeacion = Planeacion.objects.filter(fecha=fecha_obj).first()
-    novedades_del_dia = Novedad.objects.filter(nino__in=ninos, fecha=fecha_obj) if ninos.exists() else Novedad.objects.none()
-    
-    # --- NUEVA LÓGICA PARA SEGUIMIENTOS ---
-    seguimientos_del_dia = SeguimientoDiario.objects.filter(
-        nino__in=ninos, fecha=fecha_obj
-    ).select_related('nino').prefetch_related('evaluaciones_dimension__dimension') if ninos.exists() else []
-
-    seguimientos_data = []
-    for s in seguimientos_del_dia:
-        # Construir resumen para padres
-        resumen = f"Hoy {s.nino.nombres} se mostró principalmente {s.get_estado_emocional_display().lower()} y su comportamiento fue {s.get_comportamiento_general_display().lower()}."
-        if s.observacion_relevante and s.observaciones:
-            resumen += f" La madre comunitaria observó: \"{s.observaciones}\"."
-
-        # Obtener evaluaciones por dimensión
-        evaluaciones = []
-        for ev in s.evaluaciones_dimension.all():
-            evaluaciones.append({
-                "dimension": ev.dimension.nombre,
-                "desempeno": ev.get_desempeno_display()
-            })
-
-        seguimientos_data.append({
-            "nino_nombre": f"{s.nino.nombres} {s.nino.apellidos}",
-            "fecha": s.fecha.strftime("%d/%m/%Y"),
-            "resumen_dia": {
-                "comportamiento": s.get_comportamiento_general_display(),
-                "estado_emocional": s.get_estado_emocional_display(),
-                "observacion_relevante": s.observaciones if s.observacion_relevante else None,
-                "resumen_para_padres": resumen
-            },
-            "evaluaciones": evaluaciones,
-            "valoracion_dia": s.valoracion,
-            "valoracion_restante": 5 - (s.valoracion or 0)
-        })
-
-    # --- NUEVA LÓGICA PARA NOVEDADES ---
-    novedades_data = []
-    for n in novedades_del_dia:
-        novedades_data.append({
-            "tipo": n.get_tipo_display(),
-            "descripcion": n.descripcion,
-            "nino_nombre": f"{n.nino.nombres} {n.nino.apellidos}"
-        })
+    # El detalle del día sale del feed del mes (cacheado)
+    feed = calendario_padre.obtener_feed(request.user, fecha_obj.year, fecha_obj.month)
+    dia = feed["dias"].get(str(fecha_obj.day), {})
 
     return JsonResponse({
-        "planeacion": {
-            "nombre": planeacion.nombre_experiencia if planeacion else None,
-            "intencionalidad": planeacion.intencionalidad_pedagogica if planeacion else None,
-            "materiales": planeacion.materiales_utilizar if planeacion else None
-        } if planeacion else None,
+        "planeacion": dia.get("planeacion"),
         # Se envían como listas para manejar múltiples eventos por día
-        "novedades": novedades_data,
-        "seguimientos": seguimientos_data,
+        "novedades": dia.get("novedades", []),
+        "seguimientos": dia.get("seguimientos", []),
     })
 
 @login_required
@@ -1782,11 +1400,7 @@ def editar_nino(request, id):
         padre_form = PadreForm(instance=usuario_padre, prefix='padre', initial=initial_data_padre)
 
     # Obtener el hogar de la madre para el template
-    try:
-        madre_profile = request.user.madre_profile
-        hogar_madre = HogarComunitario.objects.get(madre=madre_profile)
-    except (MadreComunitaria.DoesNotExist, HogarComunitario.DoesNotExist):
-        hogar_madre = nino.hogar  # Usar el hogar del niño como fallback
+    hogar_madre = request.actor.hogar or nino.hogar  # Usar el hogar del niño como fallback
 
     return render(request, 'madre/nino_form_nuevo.html', {
         'nino_form': nino_form,
@@ -1801,7 +1415,7 @@ def editar_nino(request, id):
 @login_required
 def editar_perfil(request):
     user = request.user
-    rol = user.rol.nombre_rol
+    rol = request.actor.nombre_rol
 
     # 1. Seleccionar el formulario y la instancia adecuados según el rol
     if rol == 'padre':
@@ -1840,16 +1454,20 @@ def editar_perfil(request):
 @login_required
 def listar_ninos(request):
     # Solo madres comunitarias pueden ver su listado
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, 'Acceso denegado.')
         return redirect('home')
-    try:
-        hogar = HogarComunitario.objects.get(madre=request.user.madre_profile)
-    except HogarComunitario.DoesNotExist:
+    hogar = request.actor.hogar
+    if hogar is None:
         messages.error(request, 'No tienes un hogar comunitario asignado.')
         return redirect('madre_dashboard')
     
-    ninos = Nino.objects.filter(hogar=hogar)
+    # Padre, usuario y discapacidades de cada tarjeta en la misma tanda de consultas
+    ninos = (
+        Nino.objects.filter(hogar=hogar)
+        .select_related('padre__usuario')
+        .prefetch_related('tipos_discapacidad')
+    )
     
     # Contexto con información de matrícula exitosa si existe
     context = {
@@ -1881,24 +1499,43 @@ def eliminar_nino(request, id):
 @login_required
 def gestion_ninos(request):
     # 1. Verificar rol y obtener el hogar de la madre
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria': # pragma: no cover
+    if request.actor.nombre_rol != 'madre_comunitaria': # pragma: no cover
         messages.error(request, 'Acceso denegado.')
         return redirect('home')
-    try:
-        hogar = HogarComunitario.objects.get(madre=request.user.madre_profile)
-    except HogarComunitario.DoesNotExist: # pragma: no cover
+    hogar = request.actor.hogar
+    if hogar is None: # pragma: no cover
         messages.error(request, 'No tienes un hogar comunitario asignado.')
         return redirect('madre_dashboard')
     # 2. Filtrar los niños que pertenecen a ese hogar
-    ninos_lista = Nino.objects.filter(hogar=hogar).order_by('nombres', 'apellidos')
+    ninos_lista = Nino.objects.filter(hogar=hogar)
 
-    # 3. Aplicar paginación
-    paginator = Paginator(ninos_lista, 3)  # 3 niños por página, como fue solicitado.
-    page_number = request.GET.get('page')
-    ninos_paginados = paginator.get_page(page_number)
+    # 3. Aplicar paginación por cursor (3 niños por página, como fue solicitado)
+    ninos_paginados = paginar(request, ninos_lista, ['nombres', 'apellidos'], por_pagina=3, conteo='estimado')
 
     return render(request, 'madre/gestion_ninos_list.html', {'ninos': ninos_paginados})
 
+
+@login_required
+@rol_requerido('madre_comunitaria')
+def buscar(request):
+    """Búsqueda de texto en los niños, novedades, seguimientos y planeaciones del hogar de la madre."""
+    consulta = request.GET.get('q', '').strip()
+    tipo = request.GET.get('tipo', '')
+    if tipo not in dict(DocumentoBusqueda.TIPOS):
+        tipo = ''
+    resultados = []
+    if consulta:
+        hogar_ids = HogarComunitario.objects.filter(madre__usuario=request.user).values_list('id', flat=True)
+        resultados = busqueda.buscar(hogar_ids, consulta, tipos=[tipo] if tipo else None)
+
+    return render(request, 'madre/buscar.html', {
+        'consulta': consulta,
+        'tipo': tipo,
+        'tipos': DocumentoBusqueda.TIPOS,
+        'resultados': resultados,
+        'limite': busqueda.LIMITE_RESULTADOS,
+    })
+
 # ----------------------------------------------------
 # 💡 NUEVA FUNCIÓN: Cambiar Contraseña del Usuario
 # ----------------------------------------------------
@@ -1987,15 +1624,13 @@ def cargar_ciudades(request):
 @login_required
 def matricular_nino_a_padre_existente(request):
     """Matricular un niño nuevo a un padre que ya existe en el sistema"""
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, 'Solo las madres comunitarias pueden matricular niños.')
         return redirect('home')
 
     # Obtener el hogar de la madre logueada
-    try:
-        madre_profile = request.user.madre_profile
-        hogar_madre = HogarComunitario.objects.get(madre=madre_profile)
-    except (MadreComunitaria.DoesNotExist, HogarComunitario.DoesNotExist):
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         messages.error(request, 'No tienes un hogar comunitario asignado.')
         return redirect('madre_dashboard')
 
@@ -2094,15 +1729,13 @@ def buscar_padre_ajax(request):
 @login_required
 def cambiar_padre_de_nino(request):
     """Cambiar la asignación de padre de un niño existente"""
-    if not hasattr(request.user, 'rol') or request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, 'Solo las madres comunitarias pueden cambiar asignaciones.')
         return redirect('home')
 
     # Obtener el hogar de la madre logueada
-    try:
-        madre_profile = request.user.madre_profile
-        hogar_madre = HogarComunitario.objects.get(madre=madre_profile)
-    except (MadreComunitaria.DoesNotExist, HogarComunitario.DoesNotExist):
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         messages.error(request, 'No tienes un hogar comunitario asignado.')
         return redirect('madre_dashboard')
 
@@ -2258,7 +1891,7 @@ def actualizar_foto_perfil(request):
     Vista AJAX para que la madre comunitaria actualice su foto de perfil
     directamente desde el navbar.
     """
-    if request.method == 'POST' and request.user.rol.nombre_rol == 'madre_comunitaria':
+    if request.method == 'POST' and request.actor.nombre_rol == 'madre_comunitaria':
         try:
             madre_profile = get_object_or_404(MadreComunitaria, usuario=request.user)
             
@@ -2287,11 +1920,11 @@ def subir_documentos_nino(request):
     if request.method == 'POST':
         try:
             # Verificar que sea madre comunitaria
-            if request.user.rol.nombre_rol != 'madre_comunitaria':
+            if request.actor.nombre_rol != 'madre_comunitaria':
                 return JsonResponse({'success': False, 'error': 'No tienes permisos para realizar esta acción.'}, status=403)
             
             # Obtener el hogar de la madre
-            hogar_madre = HogarComunitario.objects.filter(madre=request.user.madre_profile).first()
+            hogar_madre = request.actor.hogar
             if not hogar_madre:
                 return JsonResponse({'success': False, 'error': 'No tienes un hogar asignado.'}, status=400)
             
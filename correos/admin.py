@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('destinatario', 'log', 'estado', 'intentos', 'proximo_intento', 'fecha_envio')
+    list_filter = ('estado',)
+    search_fields = ('destinatario',)
@@ -0,0 +1,274 @@
+"""
+Cola de salida de correos masivos (tabla ``OutboundEmail``).
+
+``enviar_correos`` solo guarda la campaña y un ``OutboundEmail`` por padre; el
+envío lo hace un worker:
+
+- el hilo en proceso que se despierta al confirmar la campaña (cuando
+  ``CORREOS_WORKER_EN_PROCESO`` está activo; por defecto solo con DEBUG), o
+- el comando ``enviar_correos_pendientes`` ejecutado como worker dedicado.
+
+El worker reclama lotes de ``CORREOS_TAMANO_LOTE`` correos, los envía por una
+sola conexión SMTP, respeta ``CORREOS_MAX_POR_MINUTO`` y reintenta los fallos
+con espera exponencial hasta ``CORREOS_MAX_INTENTOS``. Los adjuntos de cada
+campaña se leen una sola vez por lote y se comparten entre todos sus mensajes.
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Un correo 'enviando' que no avanza en este tiempo se considera abandonado.
+TIEMPO_MAXIMO_ENVIANDO = timedelta(minutes=10)
+ESPERA_BASE_REINTENTO = timedelta(minutes=1)
+
+_lock = threading.Lock()
+_hay_trabajo = threading.Event()
+_hilo = None
+_ultimo_envio = 0.0
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+# -----------------------------------------------------------------
+# Encolar
+# -----------------------------------------------------------------
+def encolar_campana(log, mensajes):
+    """
+    Crea los ``EmailRecipient`` y ``OutboundEmail`` de una campaña.
+    ``mensajes`` es una lista de tuplas (padre, correo, etiqueta, cuerpo personalizado).
+    """
+    from .models import EmailRecipient, OutboundEmail, TerminoDestinatario
+
+    receptores = EmailRecipient.objects.bulk_create([
+        EmailRecipient(log=log, padre=padre, email=correo.lower(), nombre=etiqueta)
+        for padre, correo, etiqueta, _ in mensajes
+    ])
+    TerminoDestinatario.objects.bulk_create(TerminoDestinatario.para(receptores))
+    OutboundEmail.objects.bulk_create([
+        OutboundEmail(log=log, receptor=receptor, padre=padre, destinatario=correo, cuerpo=cuerpo)
+        for receptor, (padre, correo, _, cuerpo) in zip(receptores, mensajes)
+    ])
+    if _config('CORREOS_WORKER_EN_PROCESO', settings.DEBUG):
+        transaction.on_commit(_despertar_worker)
+
+
+def _despertar_worker():
+    global _hilo
+    with _lock:
+        _hay_trabajo.set()
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_worker, name='correos-worker', daemon=True)
+            _hilo.start()
+
+
+def _bucle_worker():
+    """Envía mientras quede algo en cola, durmiendo hasta el próximo reintento programado."""
+    global _hilo
+    try:
+        while True:
+            _hay_trabajo.clear()
+            procesar_pendientes()
+            espera = segundos_hasta_proximo()
+            with _lock:
+                if espera is None and not _hay_trabajo.is_set():
+                    _hilo = None
+                    return
+            if espera:
+                _hay_trabajo.wait(espera)
+    except Exception:
+        logger.exception("El worker de correos terminó con error.")
+        with _lock:
+            _hilo = None
+    finally:
+        connection.close()
+
+
+# -----------------------------------------------------------------
+# Procesar
+# -----------------------------------------------------------------
+def _filtro_disponibles(ahora):
+    return (
+        Q(estado='pendiente', proximo_intento__lte=ahora)
+        | Q(estado='enviando', proximo_intento__lt=ahora - TIEMPO_MAXIMO_ENVIANDO)
+    )
+
+
+def reclamar_lote(tamano=None):
+    """
+    Marca como 'enviando' hasta ``tamano`` correos disponibles y los devuelve.
+    La marca ``lote`` propia evita que dos workers envíen el mismo correo.
+    """
+    from .models import OutboundEmail
+
+    tamano = tamano or _config('CORREOS_TAMANO_LOTE', 50)
+    ahora = timezone.now()
+    lote = uuid.uuid4().hex
+    ids = list(
+        OutboundEmail.objects.filter(_filtro_disponibles(ahora))
+        .order_by('proximo_intento', 'id').values_list('id', flat=True)[:tamano]
+    )
+    if not ids:
+        return []
+    # proximo_intento marca el momento del reclamo para detectar envíos abandonados
+    OutboundEmail.objects.filter(_filtro_disponibles(ahora), id__in=ids).update(
+        estado='enviando', lote=lote, proximo_intento=ahora
+    )
+    return list(OutboundEmail.objects.filter(lote=lote, estado='enviando').select_related('log').order_by('id'))
+
+
+def _adjuntos_por_log(log_ids):
+    """Lee cada adjunto una sola vez: {log_id: [(nombre, contenido)]}."""
+    from .models import EmailLog
+
+    adjuntos = {}
+    for log in EmailLog.objects.filter(id__in=log_ids).prefetch_related('adjuntos'):
+        archivos = []
+        for adj in log.adjuntos.all():
+            with adj.archivo.open('rb') as archivo:
+                archivos.append((adj.nombre_original, archivo.read()))
+        adjuntos[log.id] = archivos
+    return adjuntos
+
+
+def _esperar_turno():
+    """Limita el ritmo de envío a CORREOS_MAX_POR_MINUTO (por proceso)."""
+    global _ultimo_envio
+    maximo = _config('CORREOS_MAX_POR_MINUTO', 60)
+    if maximo:
+        espera = _ultimo_envio + 60.0 / maximo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+    _ultimo_envio = time.monotonic()
+
+
+def _programar_reintento(envio, error):
+    envio.intentos += 1
+    envio.ultimo_error = str(error)
+    if envio.intentos >= _config('CORREOS_MAX_INTENTOS', 5):
+        envio.estado = 'error'
+    else:
+        envio.estado = 'pendiente'
+        envio.proximo_intento = timezone.now() + ESPERA_BASE_REINTENTO * 2 ** (envio.intentos - 1)
+
+
+def enviar_lote(envios):
+    """Envía un lote ya reclamado por una sola conexión y guarda el estado de cada correo."""
+    from .models import EmailRecipient, OutboundEmail
+
+    adjuntos = _adjuntos_por_log({envio.log_id for envio in envios})
+    conexion = get_connection()
+    try:
+        conexion.open()
+    except Exception as e:
+        logger.warning("No se pudo abrir la conexión de correo: %s", e)
+        for envio in envios:
+            _programar_reintento(envio, e)
+    else:
+        try:
+            for envio in envios:
+                mensaje = EmailMessage(
+                    subject=envio.log.asunto,
+                    body=envio.cuerpo,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[envio.destinatario],
+                    connection=conexion,
+                )
+                for nombre, contenido in adjuntos.get(envio.log_id, []):
+                    mensaje.attach(nombre, contenido)
+                _esperar_turno()
+                try:
+                    mensaje.send()
+                except Exception as e:
+                    _programar_reintento(envio, e)
+                else:
+                    envio.estado = 'enviado'
+                    envio.intentos += 1
+                    envio.ultimo_error = ''
+                    envio.fecha_envio = timezone.now()
+        finally:
+            conexion.close()
+
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(
+            envios, ['estado', 'intentos', 'proximo_intento', 'ultimo_error', 'fecha_envio']
+        )
+        # Estado de entrega por destinatario (solo los estados finales)
+        for estado in ('enviado', 'error'):
+            receptores = [envio.receptor_id for envio in envios if envio.estado == estado and envio.receptor_id]
+            if receptores:
+                EmailRecipient.objects.filter(id__in=receptores).update(estado=estado)
+        actualizar_logs({envio.log_id for envio in envios})
+
+
+def actualizar_logs(log_ids):
+    """
+    Refleja en cada EmailLog el resultado de sus envíos. Solo hay éxito cuando
+    ningún envío sigue en cola (pendiente, enviando o esperando un reintento) ni
+    terminó en error; la nota lista los errores definitivos y los reintentos.
+    """
+    from .models import EmailLog, OutboundEmail
+
+    en_cola = dict(
+        OutboundEmail.objects.filter(log_id__in=log_ids, estado__in=['pendiente', 'enviando'])
+        .values('log_id').annotate(cantidad=Count('id')).values_list('log_id', 'cantidad')
+    )
+    fallos, sin_exito = {}, set(en_cola)
+    for log_id, estado, destinatario, error in (
+        OutboundEmail.objects.filter(log_id__in=log_ids).exclude(estado='enviado').exclude(ultimo_error='')
+        .order_by('id').values_list('log_id', 'estado', 'destinatario', 'ultimo_error')
+    ):
+        if estado == 'error':
+            sin_exito.add(log_id)
+            fallos.setdefault(log_id, []).append(f"{destinatario}: {error}")
+        else:
+            fallos.setdefault(log_id, []).append(f"{destinatario} (se reintentará): {error}")
+    logs = list(EmailLog.objects.filter(id__in=log_ids))
+    for log in logs:
+        log.enviado_con_exito = log.id not in sin_exito
+        log.nota_error = "\n".join(fallos.get(log.id, []))
+    EmailLog.objects.bulk_update(logs, ['enviado_con_exito', 'nota_error'])
+
+
+def procesar_pendientes(limite=None):
+    """Envía lotes hasta vaciar lo disponible (o hasta ``limite`` correos). Devuelve cuántos procesó."""
+    procesados = 0
+    while limite is None or procesados < limite:
+        tamano = _config('CORREOS_TAMANO_LOTE', 50)
+        if limite is not None:
+            tamano = min(tamano, limite - procesados)
+        envios = reclamar_lote(tamano)
+        if not envios:
+            break
+        enviar_lote(envios)
+        procesados += len(envios)
+    return procesados
+
+
+def segundos_hasta_proximo():
+    """Segundos hasta el próximo reintento programado, o None si no queda nada en cola."""
+    from .models import OutboundEmail
+
+    proximos = OutboundEmail.objects.aggregate(
+        pendiente=Min('proximo_intento', filter=Q(estado='pendiente')),
+        enviando=Min('proximo_intento', filter=Q(estado='enviando')),
+    )
+    # Un 'enviando' (de este u otro worker) solo vuelve a estar disponible si se abandona
+    candidatos = [proximos['pendiente']]
+    if proximos['enviando'] is not None:
+        candidatos.append(proximos['enviando'] + TIEMPO_MAXIMO_ENVIANDO)
+    candidatos = [c for c in candidatos if c is not None]
+    if not candidatos:
+        return None
+    return max((min(candidatos) - timezone.now()).total_seconds(), 0)
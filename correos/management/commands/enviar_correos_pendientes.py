@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from correos.cola import procesar_pendientes, segundos_hasta_proximo
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de correos masivos. Envía los OutboundEmail pendientes "
+        "por lotes, con límite de ritmo y reintentos con espera exponencial."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', dest='una_vez', help="Envía lo disponible y termina.")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Máximo de segundos de espera cuando no hay correos disponibles.")
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            procesados = procesar_pendientes()
+            self.stdout.write(self.style.SUCCESS(f"✅ {procesados} correos procesados."))
+            return
+
+        self.stdout.write("📬 Worker de correos iniciado (Ctrl+C para detener).")
+        try:
+            while True:
+                procesados = procesar_pendientes()
+                if procesados:
+                    self.stdout.write(f"✅ {procesados} correos procesados.")
+                    continue
+                espera = segundos_hasta_proximo()
+                time.sleep(options['intervalo'] if espera is None else min(espera, options['intervalo']))
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
@@ -0,0 +1,123 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:17
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _terminos(texto):
+    # Copia de correos.models.terminos_busqueda (las migraciones no importan código de la app)
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    normalizado = ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+    return re.findall(r'[^\W_]+', normalizado)
+
+
+def poblar_receptores(apps, schema_editor):
+    """Crea los destinatarios de las campañas existentes a partir de su cola o del texto guardado."""
+    EmailLog = apps.get_model('correos', 'EmailLog')
+    EmailRecipient = apps.get_model('correos', 'EmailRecipient')
+    OutboundEmail = apps.get_model('correos', 'OutboundEmail')
+    Padre = apps.get_model('core', 'Padre')
+
+    padres = {}
+    for padre in Padre.objects.select_related('usuario').prefetch_related('ninos'):
+        nombre = f"{padre.usuario.nombres} {padre.usuario.apellidos}"
+        ninos = ", ".join(f"{n.nombres} {n.apellidos}" for n in padre.ninos.all())
+        padres[padre.usuario.correo.lower()] = (padre, f"{nombre} - {ninos}" if ninos else nombre)
+
+    for log in EmailLog.objects.prefetch_related('envios').iterator(chunk_size=200):
+        envios = list(log.envios.all())
+        if envios:
+            for envio in envios:
+                correo = envio.destinatario.lower()
+                _, etiqueta = padres.get(correo, (None, correo))
+                envio.receptor = EmailRecipient.objects.create(
+                    log=log, padre_id=envio.padre_id, email=correo, nombre=etiqueta,
+                    estado='pendiente' if envio.estado == 'enviando' else envio.estado,
+                )
+            OutboundEmail.objects.bulk_update(envios, ['receptor'])
+            continue
+
+        # Campañas anteriores a la cola: 'Etiqueta <correo>' separados por '||' o correos separados por coma
+        raw = log.destinatarios or ''
+        partes = [p.strip() for p in raw.split('||' if '||' in raw else ',') if p.strip()]
+        con_error = (log.nota_error or '').lower()
+        receptores = []
+        for parte in partes:
+            if '<' in parte and '>' in parte:
+                etiqueta = parte.split('<')[0].strip()
+                correo = parte.split('<', 1)[1].split('>')[0].strip().lower()
+            else:
+                etiqueta, correo = None, parte.lower()
+            padre, etiqueta_padre = padres.get(correo, (None, correo))
+            receptores.append(EmailRecipient(
+                log=log, padre=padre, email=correo, nombre=etiqueta or etiqueta_padre,
+                estado='error' if correo and correo in con_error else 'enviado',
+            ))
+        EmailRecipient.objects.bulk_create(receptores)
+
+
+def poblar_terminos(apps, schema_editor):
+    """Indexa las palabras de la etiqueta de los destinatarios creados."""
+    EmailRecipient = apps.get_model('correos', 'EmailRecipient')
+    TerminoDestinatario = apps.get_model('correos', 'TerminoDestinatario')
+    lote = []
+    for receptor in EmailRecipient.objects.only('id', 'nombre').iterator(chunk_size=500):
+        lote.extend(
+            TerminoDestinatario(receptor_id=receptor.id, termino=termino[:100])
+            for termino in dict.fromkeys(_terminos(receptor.nombre))
+        )
+        if len(lote) >= 1000:
+            TerminoDestinatario.objects.bulk_create(lote)
+            lote = []
+    TerminoDestinatario.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_nino_fecha_actualizacion'),
+        ('correos', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(help_text='Correo en minúsculas', max_length=254)),
+                ('nombre', models.CharField(help_text="Etiqueta 'Padre - Niño(s)' que se muestra en el historial", max_length=500)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receptores', to='correos.emaillog')),
+                ('padre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='correos_registrados', to='core.padre')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='outboundemail',
+            name='receptor',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='envio', to='correos.emailrecipient'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecipient',
+            index=models.Index(fields=['email'], name='correos_ema_email_ecafa7_idx'),
+        ),
+        migrations.CreateModel(
+            name='TerminoDestinatario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=100)),
+                ('receptor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='correos.emailrecipient')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['termino'], name='correos_ter_termino_e420ca_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_receptores, migrations.RunPython.noop),
+        migrations.RunPython(poblar_terminos, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='emaillog',
+            name='destinatarios',
+        ),
+    ]
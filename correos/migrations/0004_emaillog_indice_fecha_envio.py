@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('correos', '0003_emailrecipient'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['fecha_envio'], name='correos_ema_fecha_e_4699e4_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
+import re
+import unicodedata
+
 from django.db import models
+from django.utils import timezone
 
 class ArchivoAdjunto(models.Model):
     archivo = models.FileField(upload_to='correos_adjuntos/')
@@ -16,11 +20,109 @@ class ArchivoAdjunto(models.Model):
 class EmailLog(models.Model):
     asunto = models.CharField(max_length=255)
     cuerpo = models.TextField()
-    destinatarios = models.TextField(help_text="Correos separados por coma")
     fecha_envio = models.DateTimeField(auto_now_add=True)
     adjuntos = models.ManyToManyField(ArchivoAdjunto, blank=True)
     enviado_con_exito = models.BooleanField(default=True)
     nota_error = models.TextField(blank=True)
 
+    class Meta:
+        # El historial se ordena por fecha de envío y se filtra por mes
+        indexes = [models.Index(fields=['fecha_envio'])]
+
     def __str__(self):
         return f"{self.asunto} — {self.fecha_envio.strftime('%Y-%m-%d %H:%M')}"
+
+
+def normalizar_busqueda(texto):
+    """Minúsculas y sin tildes, para las columnas de búsqueda por prefijo."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+def terminos_busqueda(texto):
+    """Palabras normalizadas de ``texto`` ("Ana Pérez - Tomás" -> ["ana", "perez", "tomas"])."""
+    return re.findall(r'[^\W_]+', normalizar_busqueda(texto))
+
+
+class EmailRecipient(models.Model):
+    """
+    Destinatario de una campaña (EmailLog), con su estado de entrega.
+    Es la única lista de destinatarios: el antiguo texto ``EmailLog.destinatarios``
+    se migró aquí (0003) y se eliminó.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('error', 'Error'),
+    ]
+
+    log = models.ForeignKey(EmailLog, on_delete=models.CASCADE, related_name='receptores')
+    padre = models.ForeignKey('core.Padre', on_delete=models.SET_NULL, null=True, blank=True, related_name='correos_registrados')
+    email = models.CharField(max_length=254, help_text="Correo en minúsculas")
+    nombre = models.CharField(max_length=500, help_text="Etiqueta 'Padre - Niño(s)' que se muestra en el historial")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+
+    class Meta:
+        indexes = [models.Index(fields=['email'])]
+
+    def save(self, *args, **kwargs):
+        self.email = (self.email or '').lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.nombre} <{self.email}>"
+
+
+class TerminoDestinatario(models.Model):
+    """
+    Una palabra (normalizada) de la etiqueta de un destinatario: nombres y
+    apellidos del padre y de sus niños. El historial busca cada palabra de la
+    consulta como prefijo de estos términos, así que encuentra por apellido o
+    por el nombre del niño usando el índice.
+    """
+    receptor = models.ForeignKey(EmailRecipient, on_delete=models.CASCADE, related_name='terminos')
+    termino = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [models.Index(fields=['termino'])]
+
+    @classmethod
+    def para(cls, receptores):
+        """Términos de búsqueda de los ``receptores`` (sin guardar), a partir de su etiqueta."""
+        return [
+            cls(receptor=receptor, termino=termino[:100])
+            for receptor in receptores
+            for termino in dict.fromkeys(terminos_busqueda(receptor.nombre))
+        ]
+
+
+class OutboundEmail(models.Model):
+    """
+    Un correo de una campaña (EmailLog) para un destinatario, en cola de envío.
+    El worker (correos/cola.py) los envía por lotes y reintenta los fallidos.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('error', 'Error'),
+    ]
+
+    log = models.ForeignKey(EmailLog, on_delete=models.CASCADE, related_name='envios')
+    receptor = models.OneToOneField(EmailRecipient, on_delete=models.CASCADE, null=True, blank=True, related_name='envio')
+    padre = models.ForeignKey('core.Padre', on_delete=models.SET_NULL, null=True, blank=True, related_name='correos_recibidos')
+    destinatario = models.EmailField()
+    cuerpo = models.TextField(help_text="Cuerpo personalizado para el destinatario")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    lote = models.CharField(max_length=32, blank=True, help_text="Worker que reclamó el envío")
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['estado', 'proximo_intento'])]
+
+    def __str__(self):
+        return f"{self.destinatario} ({self.estado})"
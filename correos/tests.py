@@ -1,3 +1,80 @@
-from django.test import TestCase
+import datetime
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import cola
+from .models import EmailLog, EmailRecipient, OutboundEmail
+
+
+@override_settings(CORREOS_MAX_POR_MINUTO=0, CORREOS_MAX_INTENTOS=3)
+class ColaCorreosTests(TestCase):
+    """Envío por la cola: reintentos y resultado de la campaña en su EmailLog."""
+
+    def setUp(self):
+        self.log = EmailLog.objects.create(asunto='Reunión', cuerpo='Hola', enviado_con_exito=False)
+        cola.encolar_campana(self.log, [
+            (None, 'ana@prueba.co', 'Ana Pérez - Tomás', 'Hola Ana'),
+            (None, 'luis@prueba.co', 'Luis Gómez - Sara', 'Hola Luis'),
+        ])
+
+    def _enviar(self, falla_para=()):
+        """Procesa la cola; los envíos a ``falla_para`` lanzan un error SMTP."""
+        enviar = mail.EmailMessage.send
+
+        def enviar_o_fallar(mensaje, *args, **kwargs):
+            if mensaje.to[0] in falla_para:
+                raise SMTPException('buzón no disponible')
+            return enviar(mensaje, *args, **kwargs)
+
+        with mock.patch.object(mail.EmailMessage, 'send', enviar_o_fallar):
+            return cola.procesar_pendientes()
+
+    def _vencer_reintentos(self):
+        OutboundEmail.objects.filter(estado='pendiente').update(proximo_intento=timezone.now() - datetime.timedelta(seconds=1))
+
+    def test_todos_enviados(self):
+        self.assertEqual(self._enviar(), 2)
+
+        self.log.refresh_from_db()
+        self.assertTrue(self.log.enviado_con_exito)
+        self.assertEqual(self.log.nota_error, '')
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(set(EmailRecipient.objects.values_list('estado', flat=True)), {'enviado'})
+
+    def test_reintento_pendiente_no_es_exito(self):
+        self._enviar(falla_para={'luis@prueba.co'})
+
+        envio = OutboundEmail.objects.get(destinatario='luis@prueba.co')
+        self.assertEqual((envio.estado, envio.intentos), ('pendiente', 1))
+        self.assertGreater(envio.proximo_intento, timezone.now())
+        self.log.refresh_from_db()
+        self.assertFalse(self.log.enviado_con_exito)
+        self.assertIn('luis@prueba.co (se reintentará): buzón no disponible', self.log.nota_error)
+
+        # El reintento aún no vence: no se vuelve a enviar
+        self.assertEqual(self._enviar(), 0)
+
+        self._vencer_reintentos()
+        self.assertEqual(self._enviar(), 1)
+        envio.refresh_from_db()
+        self.assertEqual((envio.estado, envio.intentos), ('enviado', 2))
+        self.log.refresh_from_db()
+        self.assertTrue(self.log.enviado_con_exito)
+        self.assertEqual(self.log.nota_error, '')
+
+    def test_agotar_los_intentos_deja_error(self):
+        for _ in range(3):
+            self._vencer_reintentos()
+            self._enviar(falla_para={'luis@prueba.co'})
+
+        envio = OutboundEmail.objects.get(destinatario='luis@prueba.co')
+        self.assertEqual((envio.estado, envio.intentos), ('error', 3))
+        self.assertEqual(EmailRecipient.objects.get(email='luis@prueba.co').estado, 'error')
+        self.log.refresh_from_db()
+        self.assertFalse(self.log.enviado_con_exito)
+        self.assertEqual(self.log.nota_error, 'luis@prueba.co: buzón no disponible')
+        self.assertIsNone(cola.segundos_hasta_proximo())
@@ -1,13 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import EmailMessage, get_connection
-from django.conf import settings
+from django.db import transaction
 
-from core.models import Padre, MadreComunitaria
+from core.models import Nino, Padre
+from core.fechas import filtro_mes_datetime
 from .forms import EmailMassForm
-from .models import ArchivoAdjunto, EmailLog
+from .models import ArchivoAdjunto, EmailLog, EmailRecipient, TerminoDestinatario, terminos_busqueda
+from . import cola
 from django.views.decorators.http import require_POST
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
+from django.core.paginator import Paginator
 from datetime import datetime
 
 
@@ -19,15 +21,17 @@ def obtener_choices_padres(madre):
     # Obtenemos los IDs de los hogares asignados a la madre
     hogares_ids = madre.hogares_asignados.values_list("id", flat=True)
 
-    # Obtenemos los padres que tienen niños en esos hogares
+    # Obtenemos los padres que tienen niños en esos hogares, con esos niños precargados
     padres = Padre.objects.filter(
         ninos__hogar_id__in=hogares_ids
-    ).distinct().select_related("usuario")
+    ).distinct().select_related("usuario").prefetch_related(
+        Prefetch("ninos", queryset=Nino.objects.filter(hogar_id__in=hogares_ids), to_attr="ninos_hogar")
+    )
 
     choices = []
     for padre in padres:
-        # Obtenemos los nombres de todos los niños asociados a ese padre en esos hogares
-        ninos = padre.ninos.filter(hogar_id__in=hogares_ids)
+        # Nombres de todos los niños asociados a ese padre en esos hogares
+        ninos = padre.ninos_hogar
         nombres_ninos = ", ".join([f"{n.nombres} {n.apellidos}" for n in ninos])
 
         # Formamos la cadena "Nombre del padre - Nombres de los niños"
@@ -41,9 +45,8 @@ def enviar_correos(request):
     # =============================
     # 1. OBTENER LA MADRE LOGUEADA
     # =============================
-    try:
-        madre = request.user.madre_profile
-    except MadreComunitaria.DoesNotExist:
+    madre = request.actor.madre
+    if madre is None:
         messages.error(request, "Solo las Madres Comunitarias pueden enviar correos.")
         return redirect("home")
 
@@ -92,70 +95,41 @@ def enviar_correos(request):
         adj.save()
         adjuntos_guardados.append(adj)
 
-    # Construir lista de destinatarios con información legible (padre - niños <email>)
-    destinatarios_lista = []
-    for p in padres:
-        correo = p.usuario.correo
-        nombres_ninos = ", ".join([f"{n.nombres} {n.apellidos}" for n in p.ninos.all()])
-        label = f"{p.usuario.nombres} {p.usuario.apellidos} - {nombres_ninos} <{correo}>"
-        destinatarios_lista.append(label)
-
-    connection = get_connection()
-    try:
-        connection.open()
-    except:
-        pass
-
-    fallos = []
-
+    # =============================
+    # 6. Guardar Log y encolar los envíos
+    # =============================
+    # Los correos los envía el worker de correos/cola.py; aquí solo se encolan.
+    # La etiqueta 'Padre - Niño(s)' queda en EmailRecipient, que es lo que lee el historial.
+    mensajes = []
     for p in padres:
-        correo_padre = p.usuario.correo
         nombres_ninos = ", ".join([f"{n.nombres} {n.apellidos}" for n in p.ninos.all()])
-
+        etiqueta = f"{p.usuario.nombres} {p.usuario.apellidos} - {nombres_ninos}"
         cuerpo_final = (
             f"Hola {p.usuario.nombres},\n\n"
             f"{cuerpo}\n\n"
             f"Niño(s) asociado(s): {nombres_ninos}"
         )
+        mensajes.append((p, p.usuario.correo, etiqueta, cuerpo_final))
 
-        email = EmailMessage(
-            subject=asunto,
-            body=cuerpo_final,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[correo_padre],
-            connection=connection
-        )
-
-        for adj in adjuntos_guardados:
-            email.attach(adj.nombre_original, adj.archivo.read())
-
-        try:
-            email.send()
-        except Exception as e:
-            fallos.append(f"{correo_padre}: {str(e)}")
-
-    # =============================
-    # 6. Guardar Log
-    # =============================
-    # Guardamos los destinatarios como una cadena separada por '||' para preservar comas
-    log = EmailLog.objects.create(
-        asunto=asunto,
-        cuerpo=cuerpo,
-        destinatarios="||".join(destinatarios_lista),
-        enviado_con_exito=(len(fallos) == 0),
-        nota_error="\n".join(fallos)
-    )
-
-    if adjuntos_guardados:
-        log.adjuntos.set(adjuntos_guardados)
+    with transaction.atomic():
+        # Sin éxito hasta que el worker confirme todos los envíos (ver cola.actualizar_logs)
+        log = EmailLog.objects.create(asunto=asunto, cuerpo=cuerpo, enviado_con_exito=not mensajes)
+        if adjuntos_guardados:
+            log.adjuntos.set(adjuntos_guardados)
+        cola.encolar_campana(log, mensajes)
 
-    messages.success(request, "Correos enviados correctamente.")
+    messages.success(request, f"{len(mensajes)} correos quedaron en cola de envío.")
     return redirect("correos:historial")
 
 
 
 def historial(request):
-    logs = EmailLog.objects.all().order_by("-fecha_envio")
+    logs = EmailLog.objects.annotate(
+        envios_pendientes=Count("envios", filter=Q(envios__estado__in=["pendiente", "enviando"]))
+    ).prefetch_related(
+        Prefetch("receptores", queryset=EmailRecipient.objects.order_by("id")),
+        "adjuntos",
+    ).order_by("-fecha_envio")
 
     # --- FILTROS ---
     mes = request.GET.get("mes")
@@ -165,52 +139,39 @@ def historial(request):
     if mes:
         try:
             fecha = datetime.strptime(mes, "%Y-%m")
-            logs = logs.filter(
-                fecha_envio__year=fecha.year,
-                fecha_envio__month=fecha.month
-            )
+            logs = logs.filter(**filtro_mes_datetime("fecha_envio", fecha.year, fecha.month))
         except:
             pass
 
-    # Filtrar por nombre de destinatario (correo)
+    # Filtrar por nombre o apellido del padre o de sus niños, o por correo.
+    # Cada palabra se busca como prefijo de los términos del destinatario
+    # (rango >= palabra, < palabra + '\uffff', para que use el índice en cualquier motor);
+    # el correo se busca como prefijo del texto completo.
     if nombre:
-        logs = logs.filter(destinatarios__icontains=nombre)
-
-    # Lista de correos convertida en array
-    for log in logs:
-        labels = []
-        raw = log.destinatarios or ""
-
-        # Soportar ambos formatos: nuevo '||' y antiguo separado por comas
-        if '||' in raw:
-            parts = [p.strip() for p in raw.split('||') if p.strip()]
-        else:
-            parts = [p.strip() for p in raw.split(',') if p.strip()]
-
-        for part in parts:
-            text = part
-            # Si viene como 'Nombre - Niños <email>' eliminar el email
-            if '<' in text and '>' in text:
-                text = text.split('<')[0].strip()
-
-            # Si lo que queda es un correo (ej. registros antiguos), intentar resolver el padre
-            if '@' in text and not any(c.isalpha() for c in text.replace('@', '')):
-                # es muy probablemente un email
-                try:
-                    padre = Padre.objects.select_related('usuario').prefetch_related('ninos').get(usuario__correo__iexact=text)
-                    ninos = ", ".join([f"{n.nombres} {n.apellidos}" for n in padre.ninos.all()])
-                    label = f"{padre.usuario.nombres} {padre.usuario.apellidos} - {ninos}" if ninos else f"{padre.usuario.nombres} {padre.usuario.apellidos}"
-                    labels.append(label)
-                except Padre.DoesNotExist:
-                    labels.append(text)
-            else:
-                # ya es una etiqueta con nombres → añadir tal cual
-                labels.append(text)
-
-        log.lista_destinatarios = labels
+        correo = nombre.strip().lower()
+        filtro = Q(email__gte=correo, email__lt=correo + "\uffff")
+        palabras = terminos_busqueda(nombre)
+        if palabras:
+            por_nombre = Q()
+            for palabra in palabras:
+                por_nombre &= Q(id__in=TerminoDestinatario.objects.filter(
+                    termino__gte=palabra, termino__lt=palabra + "\uffff",
+                ).values("receptor_id"))
+            filtro |= por_nombre
+        receptores = EmailRecipient.objects.filter(filtro)
+        logs = logs.filter(id__in=receptores.values("log_id"))
+
+    # ------ PAGINACIÓN ------
+    paginator = Paginator(logs, 12)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    # Lista de destinatarios legible (ya normalizada en EmailRecipient)
+    for log in page_obj:
+        log.lista_destinatarios = [r.nombre for r in log.receptores.all()]
 
     return render(request, "correos/historial.html", {
-        "logs": logs
+        "logs": page_obj,
+        "filtros": {"mes": mes or "", "nombre": nombre or ""},
     })
 @require_POST
 def eliminar_log(request, log_id):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DesarrolloNino, SeguimientoDiario
+from .models import DesarrolloNino, SeguimientoDiario, CierreMensualHogar
 
 @admin.register(DesarrolloNino)
 class DesarrolloNinoAdmin(admin.ModelAdmin):
@@ -12,3 +12,8 @@ class SeguimientoDiarioAdmin(admin.ModelAdmin):
     list_display = ('nino', 'fecha', 'planeacion', 'valoracion')
     list_filter = ('fecha', 'nino__hogar', 'valoracion')
     search_fields = ('nino__nombres', 'nino__apellidos', 'planeacion__nombre_actividad')
+
+@admin.register(CierreMensualHogar)
+class CierreMensualHogarAdmin(admin.ModelAdmin):
+    list_display = ('hogar', 'fecha_fin_mes', 'estado', 'creados', 'actualizados', 'duracion_segundos')
+    list_filter = ('fecha_fin_mes', 'estado', 'hogar__regional')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DesarrolloConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'desarrollo'
+
+    def ready(self):
+        import desarrollo.signals
@@ -0,0 +1,147 @@
+import calendar
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _inicializar_proceso():
+    """Prepara Django en cada proceso del pool (necesario cuando el arranque es 'spawn')."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'icbfconecta.settings')
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    # Cada proceso abre su propia conexión; nunca se comparte la del proceso padre
+    from django.db import connections
+    for conn in connections.all(initialized_only=True):
+        conn.close_if_unusable_or_obsolete()
+
+
+def _cerrar_shard(hogar_ids, fecha_fin_mes, regenerar):
+    """
+    Genera los informes del mes para un grupo de hogares.
+    Cada hogar deja su checkpoint en CierreMensualHogar al terminar.
+    """
+    from django.db import connections
+    from core.models import HogarComunitario
+    from desarrollo.models import CierreMensualHogar
+    from desarrollo.services import GeneradorEvaluacionMensualLote
+
+    resultados = []
+    try:
+        for hogar in HogarComunitario.objects.filter(id__in=hogar_ids).order_by('id'):
+            inicio = time.monotonic()
+            try:
+                resultado = GeneradorEvaluacionMensualLote(fecha_fin_mes, hogar=hogar, regenerar=regenerar).run()
+                estado, error = 'completado', None
+            except Exception as e:
+                resultado = {'creados': 0, 'actualizados': 0, 'omitidos': 0}
+                estado, error = 'error', str(e)
+            duracion = time.monotonic() - inicio
+            checkpoint = {'estado': estado, 'error': error, 'duracion_segundos': duracion, **resultado}
+            # Sin update_or_create: su transacción de lectura+escritura bloquea SQLite entre procesos
+            if not CierreMensualHogar.objects.filter(hogar=hogar, fecha_fin_mes=fecha_fin_mes).update(**checkpoint):
+                CierreMensualHogar.objects.create(hogar=hogar, fecha_fin_mes=fecha_fin_mes, **checkpoint)
+            resultados.append({'hogar_id': hogar.id, 'estado': estado, 'error': error, **resultado})
+    finally:
+        connections.close_all()
+    return resultados
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra el mes: genera los informes de desarrollo (DesarrolloNino) de todos los "
+        "hogares repartiéndolos en un pool de procesos. Es reanudable: los hogares ya "
+        "completados para el mes se omiten salvo que se use --reiniciar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mes', help="Mes a cerrar en formato AAAA-MM (por defecto, el mes anterior).")
+        parser.add_argument('--regional', type=int, help="ID de la regional a procesar.")
+        parser.add_argument('--hogar', type=int, action='append', dest='hogares', help="ID de hogar (se puede repetir).")
+        parser.add_argument('--procesos', type=int, default=min(4, os.cpu_count() or 1), help="Número de procesos del pool.")
+        parser.add_argument('--tamano-shard', type=int, default=10, dest='tamano_shard', help="Hogares por tarea enviada al pool.")
+        parser.add_argument('--regenerar', action='store_true', help="Recalcula los campos automáticos de informes ya existentes.")
+        parser.add_argument('--reiniciar', action='store_true', help="Ignora los checkpoints y vuelve a procesar todos los hogares.")
+
+    def _fecha_fin_mes(self, mes):
+        if mes:
+            try:
+                referencia = datetime.strptime(mes, '%Y-%m').date()
+            except ValueError:
+                raise CommandError("El mes debe tener el formato AAAA-MM.")
+        else:
+            referencia = date.today().replace(day=1) - timedelta(days=1)
+        ultimo_dia = calendar.monthrange(referencia.year, referencia.month)[1]
+        return referencia.replace(day=ultimo_dia)
+
+    def handle(self, *args, **options):
+        from django.db import connections
+        from core.models import HogarComunitario
+        from desarrollo.models import CierreMensualHogar
+
+        fecha_fin_mes = self._fecha_fin_mes(options['mes'])
+        procesos = max(1, options['procesos'])
+        tamano_shard = max(1, options['tamano_shard'])
+
+        hogares = HogarComunitario.objects.all()
+        if options['regional']:
+            hogares = hogares.filter(regional_id=options['regional'])
+        if options['hogares']:
+            hogares = hogares.filter(id__in=options['hogares'])
+        hogar_ids = list(hogares.order_by('id').values_list('id', flat=True))
+
+        if not options['reiniciar']:
+            completados = set(CierreMensualHogar.objects.filter(
+                fecha_fin_mes=fecha_fin_mes, hogar_id__in=hogar_ids, estado='completado'
+            ).values_list('hogar_id', flat=True))
+            if completados:
+                self.stdout.write(f"↩️  {len(completados)} hogares ya cerrados para {fecha_fin_mes:%Y-%m}; se omiten.")
+            hogar_ids = [h for h in hogar_ids if h not in completados]
+
+        total = len(hogar_ids)
+        if not total:
+            self.stdout.write(self.style.SUCCESS(f"✅ No hay hogares pendientes para {fecha_fin_mes:%Y-%m}."))
+            return
+
+        shards = [hogar_ids[i:i + tamano_shard] for i in range(0, total, tamano_shard)]
+        self.stdout.write(
+            f"🗓️ Cerrando {fecha_fin_mes:%Y-%m}: {total} hogares en {len(shards)} shards con {procesos} procesos."
+        )
+
+        # Las conexiones abiertas no deben heredarse en los procesos hijos
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+
+        inicio = time.monotonic()
+        procesados = creados = actualizados = errores = 0
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_inicializar_proceso) as pool:
+            futuros = [pool.submit(_cerrar_shard, shard, fecha_fin_mes, options['regenerar']) for shard in shards]
+            for futuro in as_completed(futuros):
+                for resultado in futuro.result():
+                    procesados += 1
+                    creados += resultado['creados']
+                    actualizados += resultado['actualizados']
+                    if resultado['estado'] == 'error':
+                        errores += 1
+                        self.stderr.write(f"❌ Hogar {resultado['hogar_id']}: {resultado['error']}")
+                transcurrido = time.monotonic() - inicio
+                informes = creados + actualizados
+                self.stdout.write(
+                    f"[{procesados}/{total}] {procesados / transcurrido:.1f} hogares/s · "
+                    f"{informes / transcurrido:.1f} informes/s · {informes} informes"
+                )
+
+        transcurrido = time.monotonic() - inicio
+        resumen = (
+            f"Cierre {fecha_fin_mes:%Y-%m} terminado en {transcurrido:.1f}s: "
+            f"{creados} creados, {actualizados} actualizados, {errores} hogares con error."
+        )
+        if errores:
+            self.stdout.write(self.style.WARNING(f"⚠️ {resumen} Vuelva a ejecutar el comando para reintentarlos."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {resumen}"))
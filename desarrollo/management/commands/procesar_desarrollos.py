@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from desarrollo.tareas import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de generación de informes de desarrollo. "
+        "Procesa los DesarrolloNino en estado 'pendiente' (y los 'procesando' abandonados)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', dest='una_vez', help="Vacía la cola y termina.")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Segundos de espera cuando la cola está vacía.")
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            procesados = procesar_pendientes()
+            self.stdout.write(self.style.SUCCESS(f"✅ {procesados} informes generados."))
+            return
+
+        self.stdout.write("👷 Worker de desarrollos iniciado (Ctrl+C para detener).")
+        try:
+            while True:
+                procesados = procesar_pendientes()
+                if procesados:
+                    self.stdout.write(f"✅ {procesados} informes generados.")
+                else:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
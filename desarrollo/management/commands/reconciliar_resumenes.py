@@ -0,0 +1,112 @@
+import calendar
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Nino
+from desarrollo.models import ResumenMensualSeguimiento, SeguimientoDiario
+from desarrollo.resumenes import CAMPOS_ACUMULADOS, reencolar_informes, resumenes_desde_filas
+from desarrollo.services import _seguimientos_con_evaluaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara cada ResumenMensualSeguimiento con el resumen calculado desde sus "
+        "seguimientos y reconstruye los que no coinciden (faltantes, sobrantes o con "
+        "acumulados distintos). Los informes afectados vuelven a la cola de generación."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mes', help="Mes a revisar en formato AAAA-MM (por defecto, todos).")
+        parser.add_argument('--regional', type=int, help="ID de la regional a revisar.")
+        parser.add_argument('--hogar', type=int, action='append', dest='hogares', help="ID de hogar (se puede repetir).")
+        parser.add_argument('--tamano-lote', type=int, default=500, dest='tamano_lote', help="Niños por consulta.")
+        parser.add_argument(
+            '--solo-revisar', action='store_true', dest='solo_revisar',
+            help="Solo informa; termina con error si hay resúmenes desalineados.",
+        )
+
+    def _meses(self, mes, ninos):
+        if mes:
+            try:
+                referencia = datetime.strptime(mes, '%Y-%m').date()
+            except ValueError:
+                raise CommandError("El mes debe tener el formato AAAA-MM.")
+            return [referencia.replace(day=calendar.monthrange(referencia.year, referencia.month)[1])]
+        meses = set(
+            ResumenMensualSeguimiento.objects.filter(nino__in=ninos)
+            .values_list('fecha_fin_mes', flat=True).distinct()
+        )
+        for inicio in SeguimientoDiario.objects.filter(nino__in=ninos).dates('fecha', 'month'):
+            meses.add(inicio.replace(day=calendar.monthrange(inicio.year, inicio.month)[1]))
+        return sorted(meses)
+
+    def _revisar(self, nino_ids, fecha_fin_mes):
+        """Devuelve (calculados, guardados, claves desalineadas) de un lote de niños en un mes."""
+        calculados = {
+            (r.nino_id, r.fecha_fin_mes): r
+            for r in resumenes_desde_filas(_seguimientos_con_evaluaciones(SeguimientoDiario.objects.filter(
+                nino_id__in=nino_ids, fecha__gte=fecha_fin_mes.replace(day=1), fecha__lte=fecha_fin_mes,
+            )))
+        }
+        guardados = {
+            (r.nino_id, r.fecha_fin_mes): r
+            for r in ResumenMensualSeguimiento.objects.filter(nino_id__in=nino_ids, fecha_fin_mes=fecha_fin_mes)
+        }
+        desalineadas = {
+            clave for clave in calculados.keys() | guardados.keys()
+            if clave not in calculados or clave not in guardados
+            or any(getattr(calculados[clave], c) != getattr(guardados[clave], c) for c in CAMPOS_ACUMULADOS)
+        }
+        return calculados, guardados, desalineadas
+
+    def handle(self, *args, **options):
+        ninos = Nino.objects.all()
+        if options['regional']:
+            ninos = ninos.filter(hogar__regional_id=options['regional'])
+        if options['hogares']:
+            ninos = ninos.filter(hogar_id__in=options['hogares'])
+        tamano_lote = max(1, options['tamano_lote'])
+        nino_ids = list(ninos.order_by('id').values_list('id', flat=True))
+        lotes = [nino_ids[i:i + tamano_lote] for i in range(0, len(nino_ids), tamano_lote)]
+
+        faltantes = sobrantes = distintos = 0
+        for fecha_fin_mes in self._meses(options['mes'], ninos):
+            for lote in lotes:
+                calculados, guardados, desalineadas = self._revisar(lote, fecha_fin_mes)
+                if not desalineadas:
+                    continue
+                for clave in sorted(desalineadas):
+                    if clave not in guardados:
+                        faltantes += 1
+                        motivo = "falta"
+                    elif clave not in calculados:
+                        sobrantes += 1
+                        motivo = "sobra (no hay seguimientos)"
+                    else:
+                        distintos += 1
+                        motivo = "acumulados distintos a los seguimientos"
+                    self.stdout.write(f"🔎 Niño {clave[0]}, {fecha_fin_mes:%Y-%m}: {motivo}.")
+                if options['solo_revisar']:
+                    continue
+                with transaction.atomic():
+                    ResumenMensualSeguimiento.objects.filter(
+                        id__in=[guardados[c].id for c in desalineadas if c in guardados]
+                    ).delete()
+                    ResumenMensualSeguimiento.objects.bulk_create(
+                        [calculados[c] for c in desalineadas if c in calculados]
+                    )
+                    for nino_id, fin_mes in desalineadas:
+                        reencolar_informes(nino_id, fin_mes)
+
+        total = faltantes + sobrantes + distintos
+        detalle = f"{faltantes} faltantes, {sobrantes} sobrantes y {distintos} con acumulados distintos"
+        if not total:
+            self.stdout.write(self.style.SUCCESS("✅ Todos los resúmenes coinciden con sus seguimientos."))
+        elif options['solo_revisar']:
+            raise CommandError(f"❌ {total} resúmenes desalineados ({detalle}). Ejecute sin --solo-revisar para repararlos.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {total} resúmenes reconstruidos ({detalle}); sus informes volvieron a la cola."
+            ))
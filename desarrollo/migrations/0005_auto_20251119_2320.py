@@ -35,8 +35,10 @@ def fix_database_schema(apps, schema_editor):
     ]
 
     with schema_editor.connection.cursor() as cursor:
-        cursor.execute(f"PRAGMA table_info({table})")
-        existing_columns = {row[1] for row in cursor.fetchall()}
+        # Introspección de Django en lugar de "PRAGMA table_info": funciona en SQLite y PostgreSQL
+        existing_columns = {
+            column.name for column in schema_editor.connection.introspection.get_table_description(cursor, table)
+        }
 
         # Eliminar columnas viejas si existen (solo SQLite >= 3.35.0 soporta DROP COLUMN)
         for field in fields_to_remove:
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_nino_fecha_ingreso_alter_padre_ocupacion'),
+        ('desarrollo', '0009_alter_seguimientodiario_observacion_relevante'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreMensualHogar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_fin_mes', models.DateField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=15)),
+                ('creados', models.PositiveIntegerField(default=0)),
+                ('actualizados', models.PositiveIntegerField(default=0)),
+                ('omitidos', models.PositiveIntegerField(default=0)),
+                ('duracion_segundos', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('hogar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cierres_mensuales', to='core.hogarcomunitario')),
+            ],
+            options={
+                'verbose_name': 'Cierre Mensual de Hogar',
+                'verbose_name_plural': 'Cierres Mensuales de Hogares',
+                'ordering': ['-fecha_fin_mes', 'hogar'],
+                'unique_together': {('hogar', 'fecha_fin_mes')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_nino_fecha_ingreso_alter_padre_ocupacion'),
+        ('desarrollo', '0010_cierremensualhogar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='desarrollonino',
+            name='error_generacion',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='desarrollonino',
+            name='estado_generacion',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], default='completado', help_text="Los informes nuevos quedan 'pendiente' hasta que el worker ejecuta el generador.", max_length=15, verbose_name='Estado de la Generación'),
+        ),
+        migrations.AddField(
+            model_name='desarrollonino',
+            name='generacion_actualizada',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='desarrollonino',
+            index=models.Index(fields=['estado_generacion', 'generacion_actualizada'], name='desarrollo__estado__f251ad_idx'),
+        ),
+    ]
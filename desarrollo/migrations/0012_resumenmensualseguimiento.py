@@ -0,0 +1,91 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:00
+
+import calendar
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MAP_DIMENSIONES = {
+    'cognitiva': 'Cognitiva', 'comunicativa': 'Comunicativa',
+    'socio-afectiva': 'Socio-afectiva', 'corporal': 'Corporal'
+}
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Calcula los acumulados de los seguimientos ya registrados."""
+    SeguimientoDiario = apps.get_model('desarrollo', 'SeguimientoDiario')
+    EvaluacionDimension = apps.get_model('desarrollo', 'EvaluacionDimension')
+    ResumenMensualSeguimiento = apps.get_model('desarrollo', 'ResumenMensualSeguimiento')
+
+    resumenes = {}
+
+    def resumen_de(nino_id, fecha):
+        fin_mes = fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+        clave = (nino_id, fin_mes)
+        if clave not in resumenes:
+            resumenes[clave] = ResumenMensualSeguimiento(
+                nino_id=nino_id, fecha_fin_mes=fin_mes,
+                histograma_emocional={}, histograma_comportamiento={}, desempenos_por_dimension={},
+            )
+        return resumenes[clave]
+
+    for s in SeguimientoDiario.objects.all().iterator():
+        r = resumen_de(s.nino_id, s.fecha)
+        r.cantidad_seguimientos += 1
+        if s.valoracion is not None:
+            r.suma_valoraciones += s.valoracion
+            r.cantidad_valoraciones += 1
+            if s.valoracion <= 2:
+                r.valoraciones_bajas += 1
+        if s.observacion_relevante:
+            r.observaciones_relevantes += 1
+        if s.estado_emocional:
+            r.histograma_emocional[s.estado_emocional] = r.histograma_emocional.get(s.estado_emocional, 0) + 1
+        if s.comportamiento_general:
+            r.histograma_comportamiento[s.comportamiento_general] = r.histograma_comportamiento.get(s.comportamiento_general, 0) + 1
+
+    evaluaciones = EvaluacionDimension.objects.values_list(
+        'seguimiento__nino_id', 'seguimiento__fecha', 'dimension__nombre', 'desempeno'
+    )
+    for nino_id, fecha, nombre, desempeno in evaluaciones.iterator():
+        dimension = next((t for k, t in MAP_DIMENSIONES.items() if k in (nombre or '').lower()), None)
+        if dimension is None:
+            continue
+        conteo = resumen_de(nino_id, fecha).desempenos_por_dimension.setdefault(dimension, {})
+        conteo[desempeno] = conteo.get(desempeno, 0) + 1
+
+    ResumenMensualSeguimiento.objects.bulk_create(resumenes.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_nino_fecha_ingreso_alter_padre_ocupacion'),
+        ('desarrollo', '0011_desarrollonino_estado_generacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensualSeguimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_fin_mes', models.DateField()),
+                ('cantidad_seguimientos', models.PositiveIntegerField(default=0)),
+                ('suma_valoraciones', models.PositiveIntegerField(default=0)),
+                ('cantidad_valoraciones', models.PositiveIntegerField(default=0)),
+                ('valoraciones_bajas', models.PositiveIntegerField(default=0, help_text='Días con valoración menor o igual a 2.')),
+                ('observaciones_relevantes', models.PositiveIntegerField(default=0)),
+                ('histograma_emocional', models.JSONField(blank=True, default=dict)),
+                ('histograma_comportamiento', models.JSONField(blank=True, default=dict)),
+                ('desempenos_por_dimension', models.JSONField(blank=True, default=dict)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('nino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to='core.nino')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual de Seguimientos',
+                'verbose_name_plural': 'Resúmenes Mensuales de Seguimientos',
+                'unique_together': {('nino', 'fecha_fin_mes')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
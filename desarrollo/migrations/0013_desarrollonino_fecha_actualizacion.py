@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('desarrollo', '0012_resumenmensualseguimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='desarrollonino',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from core.models import Nino
+from core.fechas import filtro_mes
 from planeaciones.models import Planeacion
 from django.db.models.signals import post_save, post_delete
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -82,6 +83,22 @@ class DesarrolloNino(models.Model):
         help_text="Recomendaciones específicas para la familia o el seguimiento."
     )
 
+    # --- 9. Estado de la Generación Automática ---
+    ESTADO_GENERACION_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+    estado_generacion = models.CharField(
+        max_length=15, choices=ESTADO_GENERACION_CHOICES, default='completado',
+        verbose_name="Estado de la Generación",
+        help_text="Los informes nuevos quedan 'pendiente' hasta que el worker ejecuta el generador."
+    )
+    generacion_actualizada = models.DateTimeField(null=True, blank=True)
+    error_generacion = models.TextField(null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"Desarrollo de {self.nino.nombres} para {self.fecha_fin_mes.strftime('%B %Y')}"
 
@@ -90,14 +107,23 @@ class DesarrolloNino(models.Model):
         verbose_name_plural = "Desarrollos de los Niños"
         ordering = ['-fecha_fin_mes', 'nino']
         unique_together = ('nino', 'fecha_fin_mes')
+        indexes = [models.Index(fields=['estado_generacion', 'generacion_actualizada'])]
 
     def save(self, *args, **kwargs):
-        # El generador se ejecuta solo si no es una actualización desde el generador mismo
+        # El generador no se ejecuta aquí: la fila queda 'pendiente' y se encola
+        # para el worker local (ver desarrollo/tareas.py).
         run_generator = kwargs.pop('run_generator', True)
+        if run_generator:
+            self.estado_generacion = 'pendiente'
+            self.error_generacion = None
         super().save(*args, **kwargs)
         if run_generator:
-            from .services import GeneradorEvaluacionMensual
-            GeneradorEvaluacionMensual(self).run()
+            from .tareas import encolar_generacion
+            encolar_generacion(self.pk)
+
+    @property
+    def generacion_en_curso(self):
+        return self.estado_generacion in ('pendiente', 'procesando')
     
     def get_participacion_frecuente_display(self):
         # Mapea los valores calculados a textos legibles
@@ -125,8 +151,7 @@ class DesarrolloNino(models.Model):
         from .models import SeguimientoDiario, EvaluacionDimension
         seguimientos = SeguimientoDiario.objects.filter(
             nino=self.nino,
-            fecha__month=self.fecha_fin_mes.month,
-            fecha__year=self.fecha_fin_mes.year
+            **filtro_mes('fecha', self.fecha_fin_mes.year, self.fecha_fin_mes.month)
         )
         # Dimensiones a considerar
         dimensiones = {
@@ -255,4 +280,112 @@ class EvaluacionDimension(models.Model):
     observacion = models.TextField(blank=True, null=True)
 
     class Meta:
-        unique_together = ('seguimiento', 'dimension')
\ No newline at end of file
+        unique_together = ('seguimiento', 'dimension')
+
+# ------------------------
+# 🗓️ CIERRE MENSUAL (checkpoint por hogar)
+# ------------------------
+class CierreMensualHogar(models.Model):
+    """
+    Punto de control del comando ``close_month``: registra qué hogares ya
+    tienen generados los informes de un mes para poder reanudar el proceso.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    hogar = models.ForeignKey('core.HogarComunitario', on_delete=models.CASCADE, related_name='cierres_mensuales')
+    fecha_fin_mes = models.DateField()
+    estado = models.CharField(max_length=15, choices=ESTADO_CHOICES, default='pendiente')
+    creados = models.PositiveIntegerField(default=0)
+    actualizados = models.PositiveIntegerField(default=0)
+    omitidos = models.PositiveIntegerField(default=0)
+    duracion_segundos = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cierre Mensual de Hogar"
+        verbose_name_plural = "Cierres Mensuales de Hogares"
+        ordering = ['-fecha_fin_mes', 'hogar']
+        unique_together = ('hogar', 'fecha_fin_mes')
+
+    def __str__(self):
+        return f"Cierre {self.fecha_fin_mes.strftime('%Y-%m')} - {self.hogar} ({self.estado})"
+
+
+# ------------------------
+# 📊 RESUMEN MENSUAL INCREMENTAL
+# ------------------------
+class ResumenMensualSeguimiento(models.Model):
+    """
+    Acumulados por niño y mes de los seguimientos diarios.
+    Se actualizan de forma incremental con las señales de SeguimientoDiario y
+    EvaluacionDimension (ver desarrollo/signals.py), de modo que el logro y la
+    tendencia del mes se obtienen sin volver a recorrer los seguimientos.
+    """
+    nino = models.ForeignKey(Nino, on_delete=models.CASCADE, related_name='resumenes_mensuales')
+    fecha_fin_mes = models.DateField()
+
+    cantidad_seguimientos = models.PositiveIntegerField(default=0)
+    suma_valoraciones = models.PositiveIntegerField(default=0)
+    cantidad_valoraciones = models.PositiveIntegerField(default=0)
+    valoraciones_bajas = models.PositiveIntegerField(default=0, help_text="Días con valoración menor o igual a 2.")
+    observaciones_relevantes = models.PositiveIntegerField(default=0)
+    # {'alegre': 3, 'triste': 1, ...}
+    histograma_emocional = models.JSONField(default=dict, blank=True)
+    # {'participativo': 5, 'inquieto': 2, ...}
+    histograma_comportamiento = models.JSONField(default=dict, blank=True)
+    # {'Cognitiva': {'alto': 4, 'proceso': 1}, ...}
+    desempenos_por_dimension = models.JSONField(default=dict, blank=True)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen Mensual de Seguimientos"
+        verbose_name_plural = "Resúmenes Mensuales de Seguimientos"
+        unique_together = ('nino', 'fecha_fin_mes')
+
+    def __str__(self):
+        return f"Resumen de {self.nino} para {self.fecha_fin_mes.strftime('%Y-%m')}"
+
+    @property
+    def promedio_valoracion(self):
+        if not self.cantidad_valoraciones:
+            return None
+        return self.suma_valoraciones / self.cantidad_valoraciones
+
+    @property
+    def logro_mes(self):
+        # Misma regla que GeneradorEvaluacionMensual: sin valoraciones cuenta como promedio 0
+        if not self.cantidad_seguimientos:
+            return None
+        from .services import clasificar_logro
+        return clasificar_logro(self.promedio_valoracion or 0)
+
+    @property
+    def estado_emocional_frecuente(self):
+        if not self.histograma_emocional:
+            return None
+        # En empate gana el primero en orden alfabético (JSONB no conserva el orden de las claves)
+        return max(sorted(self.histograma_emocional.items()), key=lambda item: item[1])[0]
+
+    @property
+    def comportamiento_frecuente(self):
+        if not self.histograma_comportamiento:
+            return None
+        return max(sorted(self.histograma_comportamiento.items()), key=lambda item: item[1])[0]
+
+    def desempeno_frecuente(self, dimension):
+        conteo = self.desempenos_por_dimension.get(dimension)
+        if not conteo:
+            return None
+        return max(sorted(conteo.items()), key=lambda item: item[1])[0]
+
+    def contar_estados(self, estados):
+        return sum(self.histograma_emocional.get(e, 0) for e in estados)
+
+    def contar_comportamientos(self, comportamientos):
+        return sum(self.histograma_comportamiento.get(c, 0) for c in comportamientos)
@@ -0,0 +1,270 @@
+"""
+Mantenimiento incremental de ResumenMensualSeguimiento.
+
+Cada seguimiento (y cada evaluación por dimensión) aporta a los acumulados de
+su niño y mes; al guardar se resta el aporte anterior y se suma el nuevo, y al
+eliminar se resta. Si un seguimiento cambia de niño o de mes, sus evaluaciones
+se mueven con él. Las señales están en desarrollo/signals.py.
+
+Un acumulado que quedaría en negativo indica que el resumen ya no coincide con
+sus filas (p. ej. por un ``update()`` masivo que no dispara señales): no se
+recorta a cero, se registra un aviso y el resumen se reconstruye desde los
+seguimientos. El comando ``reconciliar_resumenes`` revisa y repara en bloque.
+
+Cada cambio en un resumen devuelve a la cola (``estado_generacion='pendiente'``)
+el informe de ese mes y el del mes siguiente (su tendencia y sus alertas usan
+este mes), para que el worker regenere juntos todos sus campos automáticos.
+"""
+import calendar
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DesarrolloNino, ResumenMensualSeguimiento, SeguimientoDiario
+
+logger = logging.getLogger(__name__)
+
+
+# Lo que se acumula por (niño, mes); dos resúmenes con estos valores iguales coinciden
+CAMPOS_ACUMULADOS = (
+    'cantidad_seguimientos', 'suma_valoraciones', 'cantidad_valoraciones', 'valoraciones_bajas',
+    'observaciones_relevantes', 'histograma_emocional', 'histograma_comportamiento', 'desempenos_por_dimension',
+)
+
+
+class ResumenDesalineado(Exception):
+    """Restar un aporte dejaría un acumulado en negativo: el resumen no coincide con sus filas."""
+
+
+def _fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def _nombre_dimension(nombre):
+    from .services import MAP_DIMENSIONES
+    for key_lower, name_title in MAP_DIMENSIONES.items():
+        if key_lower in (nombre or '').lower():
+            return name_title
+    return None
+
+
+def aporte_seguimiento(seguimiento):
+    """Lo que un seguimiento suma a los acumulados de su mes (sin las dimensiones)."""
+    return {
+        'nino_id': seguimiento.nino_id,
+        'fecha_fin_mes': _fin_de_mes(seguimiento.fecha),
+        'valoracion': seguimiento.valoracion,
+        'estado_emocional': seguimiento.estado_emocional,
+        'comportamiento_general': seguimiento.comportamiento_general,
+        'observacion_relevante': bool(seguimiento.observacion_relevante),
+    }
+
+
+def aporte_evaluacion(evaluacion, seguimiento=None):
+    if seguimiento is None:
+        seguimiento = SeguimientoDiario.objects.only('nino_id', 'fecha').get(id=evaluacion.seguimiento_id)
+    dimension = _nombre_dimension(evaluacion.dimension.nombre)
+    if dimension is None:
+        return None
+    return {
+        'nino_id': seguimiento.nino_id,
+        'fecha_fin_mes': _fin_de_mes(seguimiento.fecha),
+        'dimension': dimension,
+        'desempeno': evaluacion.desempeno,
+    }
+
+
+def _sumar_en_histograma(histograma, clave, signo):
+    if clave is None:
+        return
+    valor = histograma.get(clave, 0) + signo
+    if valor < 0:
+        raise ResumenDesalineado(clave)
+    if valor:
+        histograma[clave] = valor
+    else:
+        histograma.pop(clave, None)
+
+
+def _sumar(resumen, campo, cantidad):
+    valor = getattr(resumen, campo) + cantidad
+    if valor < 0:
+        raise ResumenDesalineado(campo)
+    setattr(resumen, campo, valor)
+
+
+def _resumen(nino_id, fecha_fin_mes, signo):
+    consulta = ResumenMensualSeguimiento.objects.select_for_update()
+    if signo < 0:
+        # Al restar no se crea: en un borrado en cascada del niño el resumen
+        # puede haberse eliminado ya y recrearlo violaría la llave foránea.
+        return consulta.filter(nino_id=nino_id, fecha_fin_mes=fecha_fin_mes).first()
+    resumen, _ = consulta.get_or_create(nino_id=nino_id, fecha_fin_mes=fecha_fin_mes)
+    return resumen
+
+
+def _acumular(resumen, aporte, signo):
+    _sumar(resumen, 'cantidad_seguimientos', signo)
+    if aporte['valoracion'] is not None:
+        _sumar(resumen, 'suma_valoraciones', signo * aporte['valoracion'])
+        _sumar(resumen, 'cantidad_valoraciones', signo)
+        if aporte['valoracion'] <= 2:
+            _sumar(resumen, 'valoraciones_bajas', signo)
+    if aporte['observacion_relevante']:
+        _sumar(resumen, 'observaciones_relevantes', signo)
+    _sumar_en_histograma(resumen.histograma_emocional, aporte['estado_emocional'], signo)
+    _sumar_en_histograma(resumen.histograma_comportamiento, aporte['comportamiento_general'], signo)
+
+
+def _acumular_evaluacion(resumen, aporte, signo):
+    conteo = resumen.desempenos_por_dimension.setdefault(aporte['dimension'], {})
+    _sumar_en_histograma(conteo, aporte['desempeno'], signo)
+    if not conteo:
+        resumen.desempenos_por_dimension.pop(aporte['dimension'])
+
+
+def _guardar(resumen):
+    """Guarda el resumen, o lo elimina si ya no acumula nada (como un recálculo desde las filas)."""
+    if resumen.cantidad_seguimientos or resumen.desempenos_por_dimension:
+        resumen.save()
+    else:
+        resumen.delete()
+
+
+def aplicar_seguimiento(aporte, signo):
+    """Suma (signo=+1) o resta (signo=-1) el aporte de un seguimiento a su resumen."""
+    resumen = _resumen(aporte['nino_id'], aporte['fecha_fin_mes'], signo)
+    if resumen is None:
+        return
+    _acumular(resumen, aporte, signo)
+    _guardar(resumen)
+    reencolar_informes(resumen.nino_id, resumen.fecha_fin_mes)
+
+
+def aplicar_evaluacion(aporte, signo):
+    """Suma o resta el desempeño de una evaluación por dimensión a su resumen."""
+    resumen = _resumen(aporte['nino_id'], aporte['fecha_fin_mes'], signo)
+    if resumen is None:
+        return
+    _acumular_evaluacion(resumen, aporte, signo)
+    _guardar(resumen)
+    reencolar_informes(resumen.nino_id, resumen.fecha_fin_mes)
+
+
+def mover_evaluaciones(seguimiento, aporte_previo):
+    """
+    Si el seguimiento cambió de niño o de mes, lleva el desempeño de sus
+    evaluaciones por dimensión del resumen anterior al nuevo.
+    """
+    aporte = aporte_seguimiento(seguimiento)
+    clave_previa = (aporte_previo['nino_id'], aporte_previo['fecha_fin_mes'])
+    if clave_previa == (aporte['nino_id'], aporte['fecha_fin_mes']):
+        return
+    aportes = [
+        a for a in (
+            aporte_evaluacion(evaluacion, seguimiento)
+            for evaluacion in seguimiento.evaluaciones_dimension.select_related('dimension')
+        )
+        if a is not None
+    ]
+    if not aportes:
+        return
+    origen = _resumen(*clave_previa, -1)
+    destino = _resumen(aporte['nino_id'], aporte['fecha_fin_mes'], +1)
+    for aporte_dimension in aportes:
+        if origen is not None:
+            _acumular_evaluacion(origen, aporte_dimension, -1)
+        _acumular_evaluacion(destino, aporte_dimension, +1)
+    if origen is not None:
+        _guardar(origen)
+    destino.save()
+
+
+def reencolar_informes(nino_id, fecha_fin_mes, incluir_mes=True):
+    """
+    Devuelve a la cola los informes que dependen del resumen del mes: el del mes
+    (salvo ``incluir_mes=False``) y el del mes siguiente. El worker los regenera
+    completos, así que logro, tendencia, fortalezas, aspectos, alertas y
+    conclusión nunca quedan calculados con datos distintos.
+    """
+    from .tareas import encolar_generacion
+
+    meses = [_fin_de_mes(fecha_fin_mes + timedelta(days=1))]
+    if incluir_mes:
+        meses.append(fecha_fin_mes)
+    ids = list(
+        DesarrolloNino.objects.filter(nino_id=nino_id, fecha_fin_mes__in=meses)
+        .exclude(estado_generacion='pendiente').values_list('id', flat=True)
+    )
+    if not ids:
+        return
+    # update() no marca auto_now: la fecha se pone a mano (versión de la caché de PDF)
+    ahora = timezone.now()
+    DesarrolloNino.objects.filter(id__in=ids).update(
+        estado_generacion='pendiente', error_generacion=None,
+        generacion_actualizada=ahora, fecha_actualizacion=ahora,
+    )
+    encolar_generacion(ids[0])
+
+
+def construir_resumenes(seguimientos_con_evaluaciones):
+    """
+    Resúmenes sin guardar a partir de pares (seguimiento, evaluaciones), sin
+    consultas. Para cargas con ``bulk_create``, que no disparan las señales.
+    """
+    resumenes = {}
+    for seguimiento, evaluaciones in seguimientos_con_evaluaciones:
+        aporte = aporte_seguimiento(seguimiento)
+        clave = (aporte['nino_id'], aporte['fecha_fin_mes'])
+        resumen = resumenes.get(clave)
+        if resumen is None:
+            resumen = resumenes[clave] = ResumenMensualSeguimiento(nino_id=clave[0], fecha_fin_mes=clave[1])
+        _acumular(resumen, aporte, +1)
+        for evaluacion in evaluaciones:
+            aporte_dimension = aporte_evaluacion(evaluacion, seguimiento)
+            if aporte_dimension is not None:
+                _acumular_evaluacion(resumen, aporte_dimension, +1)
+    return list(resumenes.values())
+
+
+def resumenes_desde_filas(seguimientos):
+    """Como ``construir_resumenes``, para seguimientos con sus evaluaciones ya cargadas (prefetch)."""
+    return construir_resumenes((s, s.evaluaciones_dimension.all()) for s in seguimientos)
+
+
+def reconstruir_resumen(nino_id, fecha_fin_mes):
+    """Recalcula desde cero el resumen de un niño y mes (útil para reparar acumulados)."""
+    seguimientos = list(
+        SeguimientoDiario.objects.filter(
+            nino_id=nino_id, fecha__gte=fecha_fin_mes.replace(day=1), fecha__lte=fecha_fin_mes
+        ).prefetch_related('evaluaciones_dimension__dimension')
+    )
+    ResumenMensualSeguimiento.objects.filter(nino_id=nino_id, fecha_fin_mes=fecha_fin_mes).delete()
+    reencolar_informes(nino_id, fecha_fin_mes)
+    if not seguimientos:
+        return None
+    resumen, = resumenes_desde_filas(seguimientos)
+    resumen.save()
+    return resumen
+
+
+@contextmanager
+def reparar_desalineados(*aportes):
+    """
+    Ejecuta en una transacción la actualización incremental de los resúmenes de
+    los ``aportes``; si alguno resulta desalineado, deshace los cambios, lo
+    registra y reconstruye esos resúmenes desde los seguimientos.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except ResumenDesalineado as error:
+        claves = sorted({(a['nino_id'], a['fecha_fin_mes']) for a in aportes if a is not None})
+        logger.warning(
+            "Resumen mensual desalineado (%s) para %s; se reconstruye desde los seguimientos.", error, claves
+        )
+        for nino_id, fecha_fin_mes in claves:
+            reconstruir_resumen(nino_id, fecha_fin_mes)
@@ -1,28 +1,101 @@
 import calendar
-from collections import Counter
+import logging
 from datetime import timedelta
 
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
 
-from .models import DesarrolloNino, SeguimientoDiario
+from .models import DesarrolloNino, SeguimientoDiario, EvaluacionDimension, ResumenMensualSeguimiento
+from .resumenes import resumenes_desde_filas
+from core import dashboard_padre
 from core.models import Asistencia
 from novedades.models import Novedad
 
+logger = logging.getLogger(__name__)
+
+MAP_DIMENSIONES = {
+    'cognitiva': 'Cognitiva', 'comunicativa': 'Comunicativa',
+    'socio-afectiva': 'Socio-afectiva', 'corporal': 'Corporal'
+}
+
+
+def _seguimientos_con_evaluaciones(queryset):
+    """Adjunta las evaluaciones por dimensión (con su dimensión) en una sola consulta extra."""
+    return queryset.prefetch_related(
+        Prefetch(
+            'evaluaciones_dimension',
+            queryset=EvaluacionDimension.objects.select_related('dimension').order_by('id'),
+        )
+    )
+
+
+def clasificar_logro(promedio):
+    """Convierte el promedio de valoraciones (1 a 5) en el logro cualitativo del mes."""
+    if promedio >= 4.5:
+        return 'Alto'
+    elif promedio >= 3:
+        return 'Adecuado'
+    return 'En Proceso'
+
+
+def calcular_tendencia(logro_actual, logro_anterior):
+    """Compara el logro del mes con el del mes anterior."""
+    if not logro_actual or not logro_anterior:
+        return 'Sin datos previos'
+    if logro_actual == logro_anterior:
+        return 'Se Mantiene'
+    elif logro_actual == 'Alto' and logro_anterior != 'Alto':
+        return 'Avanza'
+    elif logro_actual == 'En Proceso' and logro_anterior != 'En Proceso':
+        return 'Retrocede'
+    return 'Se Mantiene'
+
 
 class GeneradorEvaluacionMensual:
     """
     Servicio para generar automáticamente el informe de desarrollo mensual de un niño.
+
+    Los datos del mes se cargan una sola vez en memoria. Si se recibe ``datos``
+    (ver ``GeneradorEvaluacionMensualLote``) no se hace ninguna consulta.
+    Todas las cifras del informe (logro, comportamiento, desempeños por área,
+    emociones, valoraciones bajas) salen de ``ResumenMensualSeguimiento``; de
+    las filas solo se toman los textos de las observaciones. Si el resumen no
+    cuenta los mismos seguimientos que se cargaron, se avisa en el log y se
+    recalcula desde las filas.
     """
 
-    def __init__(self, evaluacion_instance: DesarrolloNino):
+    def __init__(self, evaluacion_instance: DesarrolloNino, datos=None):
         self.evaluacion = evaluacion_instance
         self.nino = self.evaluacion.nino
         self.fecha_fin_mes = self.evaluacion.fecha_fin_mes
         self.fecha_inicio_mes = self.fecha_fin_mes.replace(day=1)
 
         # Obtenemos los datos del mes una sola vez
-        self.seguimientos_mes = self._get_seguimientos()
-        self.novedades_mes = self._get_novedades()
+        if datos is None:
+            datos = self._cargar_datos()
+        self.seguimientos_mes = datos['seguimientos']
+        self.novedades_mes = datos['novedades']
+        self.asistencias_total = datos['asistencias_total']
+        self.asistencias_presentes = datos['asistencias_presentes']
+        self.desarrollo_anterior = datos['desarrollo_anterior']
+        # Si falta la fila del resumen (o no coincide con los seguimientos ya
+        # cargados) se calcula desde las filas; sin seguimientos queda uno vacío
+        self.resumen = datos['resumen']
+        if self.resumen is not None and self.resumen.cantidad_seguimientos != len(self.seguimientos_mes):
+            logger.warning(
+                "El resumen de %s para %s cuenta %s seguimientos y hay %s; se usan las filas.",
+                self.nino.pk, self.fecha_fin_mes, self.resumen.cantidad_seguimientos, len(self.seguimientos_mes),
+            )
+            self.resumen = None
+        if self.resumen is None and self.seguimientos_mes:
+            self.resumen, = resumenes_desde_filas(self.seguimientos_mes)
+        if self.resumen is None:
+            self.resumen = ResumenMensualSeguimiento(nino=self.nino, fecha_fin_mes=self.fecha_fin_mes)
+        self.resumen_anterior = datos['resumen_anterior']
+
+        # Derivados que varios pasos necesitan
+        self.novedades_criticas = [n for n in self.novedades_mes if n.tipo in ['a', 'b'] and n.get_prioridad() >= 4]
 
     def run(self, only_tendencia=False, save_instance=True):
         """
@@ -44,19 +117,53 @@ class GeneradorEvaluacionMensual:
         if save_instance:
             self.evaluacion.save(run_generator=False) # Guardar sin volver a llamar al generador
 
+    # ------------------------------------------------------------------
+    # Carga de datos (modo individual)
+    # ------------------------------------------------------------------
+    def _cargar_datos(self):
+        mes_anterior_fin = self.fecha_inicio_mes - timedelta(days=1)
+        asistencias = self._get_asistencias().aggregate(
+            total=Count('id'),
+            presentes=Count('id', filter=Q(estado='Presente')),
+        )
+        resumenes = {
+            r.fecha_fin_mes: r
+            for r in ResumenMensualSeguimiento.objects.filter(
+                nino=self.nino, fecha_fin_mes__in=[self.fecha_fin_mes, mes_anterior_fin]
+            )
+        }
+        if mes_anterior_fin not in resumenes:
+            # Sin fila para el mes anterior se recalcula desde sus seguimientos (si los hay)
+            seguimientos_anteriores = _seguimientos_con_evaluaciones(SeguimientoDiario.objects.filter(
+                nino=self.nino, fecha__gte=mes_anterior_fin.replace(day=1), fecha__lte=mes_anterior_fin
+            ))
+            for resumen in resumenes_desde_filas(seguimientos_anteriores):
+                resumenes[mes_anterior_fin] = resumen
+        return {
+            'seguimientos': list(self._get_seguimientos()),
+            'novedades': list(self._get_novedades()),
+            'asistencias_total': asistencias['total'],
+            'asistencias_presentes': asistencias['presentes'],
+            'resumen': resumenes.get(self.fecha_fin_mes),
+            'resumen_anterior': resumenes.get(mes_anterior_fin),
+            'desarrollo_anterior': DesarrolloNino.objects.filter(
+                nino=self.nino, fecha_fin_mes=mes_anterior_fin
+            ).first(),
+        }
+
     def _get_seguimientos(self):
-        return SeguimientoDiario.objects.filter(
+        return _seguimientos_con_evaluaciones(SeguimientoDiario.objects.filter(
             nino=self.nino,
             fecha__gte=self.fecha_inicio_mes,
             fecha__lte=self.fecha_fin_mes
-        )
+        ))
 
     def _get_novedades(self):
         return Novedad.objects.filter(
             nino=self.nino,
             fecha__gte=self.fecha_inicio_mes,
             fecha__lte=self.fecha_fin_mes
-        )
+        ).order_by('id')
 
     def _get_asistencias(self):
         return Asistencia.objects.filter(
@@ -65,8 +172,11 @@ class GeneradorEvaluacionMensual:
             fecha__lte=self.fecha_fin_mes
         )
 
+    # ------------------------------------------------------------------
+    # Pasos de generación
+    # ------------------------------------------------------------------
     def _generar_valoracion_general(self, only_asistencia=False):
-        if not self.seguimientos_mes.exists():
+        if not self.resumen.cantidad_seguimientos:
             self.evaluacion.logro_mes = None
             self.evaluacion.tendencia_valoracion = None
             self.evaluacion.participacion_frecuente = None
@@ -75,60 +185,28 @@ class GeneradorEvaluacionMensual:
             return
 
         # 1. Logro del Mes (Cualitativo)
-        valoraciones = list(self.seguimientos_mes.values_list('valoracion', flat=True))
-        if valoraciones:
-            promedio = sum([v for v in valoraciones if v is not None]) / max(len([v for v in valoraciones if v is not None]), 1)
-            if promedio >= 4.5:
-                self.evaluacion.logro_mes = 'Alto'
-            elif promedio >= 3:
-                self.evaluacion.logro_mes = 'Adecuado'
-            else:
-                self.evaluacion.logro_mes = 'En Proceso'
-        else:
-            self.evaluacion.logro_mes = 'En Proceso'
+        self.evaluacion.logro_mes = self.resumen.logro_mes
 
         # 2. Tendencia
-        mes_anterior_fin = self.fecha_inicio_mes - timedelta(days=1)
-        try:
-            desarrollo_anterior = DesarrolloNino.objects.get(nino=self.nino, fecha_fin_mes=mes_anterior_fin)
-            if desarrollo_anterior.logro_mes and self.evaluacion.logro_mes:
-                if self.evaluacion.logro_mes == desarrollo_anterior.logro_mes:
-                    self.evaluacion.tendencia_valoracion = 'Se Mantiene'
-                elif self.evaluacion.logro_mes == 'Alto' and desarrollo_anterior.logro_mes != 'Alto':
-                    self.evaluacion.tendencia_valoracion = 'Avanza'
-                elif self.evaluacion.logro_mes == 'En Proceso' and desarrollo_anterior.logro_mes != 'En Proceso':
-                    self.evaluacion.tendencia_valoracion = 'Retrocede'
-                else:
-                    self.evaluacion.tendencia_valoracion = 'Se Mantiene'
-            else:
-                self.evaluacion.tendencia_valoracion = 'Sin datos previos'
-        except DesarrolloNino.DoesNotExist:
-            self.evaluacion.tendencia_valoracion = 'Sin datos previos'
+        logro_anterior = self.desarrollo_anterior.logro_mes if self.desarrollo_anterior is not None else None
+        self.evaluacion.tendencia_valoracion = calcular_tendencia(self.evaluacion.logro_mes, logro_anterior)
 
         # 3. Participación y Comportamiento más frecuentes
-        comportamientos = list(self.seguimientos_mes.values_list('comportamiento_general', flat=True))
-        if comportamientos:
-            from collections import Counter
-            conteo = Counter(comportamientos)
-            mas_frecuente = conteo.most_common(1)[0][0]
-            self.evaluacion.comportamiento_frecuente = mas_frecuente
-            # Si el comportamiento más frecuente es participativo, lo reflejamos en participación
-            if mas_frecuente == 'participativo':
-                self.evaluacion.participacion_frecuente = 'Alta'
-            elif mas_frecuente == 'colaborativo':
-                self.evaluacion.participacion_frecuente = 'Media'
-            else:
-                self.evaluacion.participacion_frecuente = 'Baja'
-        else:
-            self.evaluacion.comportamiento_frecuente = None
+        mas_frecuente = self.resumen.comportamiento_frecuente
+        self.evaluacion.comportamiento_frecuente = mas_frecuente
+        # Si el comportamiento más frecuente es participativo, lo reflejamos en participación
+        if mas_frecuente is None:
             self.evaluacion.participacion_frecuente = None
+        elif mas_frecuente == 'participativo':
+            self.evaluacion.participacion_frecuente = 'Alta'
+        elif mas_frecuente == 'colaborativo':
+            self.evaluacion.participacion_frecuente = 'Media'
+        else:
+            self.evaluacion.participacion_frecuente = 'Baja'
 
         # 4. Porcentaje de Asistencia
-        asistencias_mes = self._get_asistencias()
-        total_dias_registrados = asistencias_mes.count()
-        dias_presente = asistencias_mes.filter(estado='Presente').count()
-        if total_dias_registrados > 0:
-            porcentaje = int((dias_presente / total_dias_registrados) * 100)
+        if self.asistencias_total > 0:
+            porcentaje = int((self.asistencias_presentes / self.asistencias_total) * 100)
             self.evaluacion.porcentaje_asistencia = porcentaje
         else:
             self.evaluacion.porcentaje_asistencia = None
@@ -137,8 +215,8 @@ class GeneradorEvaluacionMensual:
             return
 
     def _generar_evaluacion_por_areas(self):
-        # Narrativo: integra observaciones relevantes con conectores y frases completas
-        if not self.seguimientos_mes.exists():
+        # Narrativo: el desempeño sale del resumen y las observaciones de las filas
+        if not self.resumen.cantidad_seguimientos:
             self.evaluacion.evaluacion_cognitiva = "No hay suficientes datos para una evaluación."
             self.evaluacion.evaluacion_comunicativa = "No hay suficientes datos para una evaluación."
             self.evaluacion.evaluacion_socio_afectiva = "No hay suficientes datos para una evaluación."
@@ -151,29 +229,20 @@ class GeneradorEvaluacionMensual:
             'evaluacion_socio_afectiva': 'Socio-afectiva',
             'evaluacion_corporal': 'Corporal',
         }
-        from collections import Counter
-        from desarrollo.models import EvaluacionDimension
+        seguimientos_ordenados = sorted(self.seguimientos_mes, key=lambda s: s.fecha)
 
         for campo, nombre in dimensiones.items():
-            desempenos = []
-            observaciones = []
-            fechas = []
-            seguimientos_ordenados = self.seguimientos_mes.order_by('fecha')
-            for seguimiento in seguimientos_ordenados:
-                for ev in getattr(seguimiento, 'evaluaciones_dimension', []).all():
-                    if nombre.lower() in ev.dimension.nombre.lower():
-                        desempenos.append(ev.desempeno)
-                        if ev.observacion:
-                            observaciones.append(ev.observacion)
-            if not desempenos and not observaciones:
+            desempeno_frecuente = self.resumen.desempeno_frecuente(nombre)
+            if not desempeno_frecuente:
                 texto_final = f"En el área {nombre}, no se registraron datos suficientes para una evaluación este mes."
                 setattr(self.evaluacion, campo, texto_final)
                 continue
-            if desempenos:
-                conteo = Counter(desempenos)
-                desempeno_frecuente = conteo.most_common(1)[0][0]
-            else:
-                desempeno_frecuente = None
+            observaciones = [
+                ev.observacion
+                for seguimiento in seguimientos_ordenados
+                for ev in seguimiento.evaluaciones_dimension.all()
+                if nombre.lower() in ev.dimension.nombre.lower() and ev.observacion
+            ]
             # Narrativa de observaciones
             if observaciones:
                 partes = []
@@ -189,30 +258,11 @@ class GeneradorEvaluacionMensual:
                     texto_obs += " (Se muestran solo las observaciones más representativas.)"
                 texto_final = f"En el área {nombre}, el niño/a tuvo un desempeño {desempeno_frecuente.lower()} durante el mes. {texto_obs}"
             else:
-                if desempeno_frecuente:
-                    texto_final = f"En el área {nombre}, el niño/a tuvo un desempeño {desempeno_frecuente.lower()} durante el mes."
-                else:
-                    texto_final = f"En el área {nombre}, no se registraron datos suficientes para una evaluación este mes."
+                texto_final = f"En el área {nombre}, el niño/a tuvo un desempeño {desempeno_frecuente.lower()} durante el mes."
             setattr(self.evaluacion, campo, texto_final)
 
     def _generar_fortalezas(self):
-        # --- Análisis de Dimensiones ---
-        desempenos_por_dimension = {
-            'Cognitiva': [], 'Comunicativa': [], 'Socio-afectiva': [], 'Corporal': []
-        }
-        map_dimensiones = {
-            'cognitiva': 'Cognitiva', 'comunicativa': 'Comunicativa', 
-            'socio-afectiva': 'Socio-afectiva', 'corporal': 'Corporal'
-        }
-        for seguimiento in self.seguimientos_mes.prefetch_related('evaluaciones_dimension__dimension'):
-            for ev in seguimiento.evaluaciones_dimension.all():
-                for key_lower, name_title in map_dimensiones.items():
-                    if key_lower in ev.dimension.nombre.lower():
-                        desempenos_por_dimension[name_title].append(ev.desempeno)
-                        break
-        # --- Fin Análisis ---
-
-        if not self.seguimientos_mes.exists():
+        if not self.resumen.cantidad_seguimientos:
             self.evaluacion.fortalezas_mes = "No hay datos para identificar fortalezas."
             return
 
@@ -224,19 +274,18 @@ class GeneradorEvaluacionMensual:
         if self.evaluacion.tendencia_valoracion == 'Avanza':
             fortalezas.append("Tendencia de avance clara en comparación con el mes anterior.")
         # Nueva fortaleza: Desempeño destacado en dimensiones específicas
-        for dimension, desempenos in desempenos_por_dimension.items():
-            if desempenos:
-                conteo = Counter(desempenos)
-                if conteo.get('alto', 0) >= len(desempenos) * 0.6:
+        for dimension in MAP_DIMENSIONES.values():
+            conteo = self.resumen.desempenos_por_dimension.get(dimension)
+            if conteo:
+                if conteo.get('alto', 0) >= sum(conteo.values()) * 0.6:
                     fortalezas.append(f"Destacó en el área {dimension} por su desempeño alto durante el mes.")
 
         # 2. Comportamiento y Emociones
         if self.evaluacion.comportamiento_frecuente in ['participativo', 'colaborativo', 'excelente']:
             fortalezas.append(f"Comportamiento general positivo y constructivo ('{self.evaluacion.get_comportamiento_frecuente_display()}').")
 
-        estados_emocionales = list(self.seguimientos_mes.values_list('estado_emocional', flat=True).exclude(estado_emocional__isnull=True))
-        if estados_emocionales:
-            estado_frecuente = Counter(estados_emocionales).most_common(1)[0][0]
+        estado_frecuente = self.resumen.estado_emocional_frecuente
+        if estado_frecuente:
             if estado_frecuente in ['alegre', 'tranquilo', 'motivado', 'curioso']:
                 fortalezas.append(f"Estado emocional predominante positivo ('{estado_frecuente.capitalize()}').")
 
@@ -244,40 +293,23 @@ class GeneradorEvaluacionMensual:
         if self.evaluacion.porcentaje_asistencia and self.evaluacion.porcentaje_asistencia >= 90:
             fortalezas.append(f"Excelente asistencia ({self.evaluacion.porcentaje_asistencia}%), demostrando constancia.")
 
-        novedades_criticas = [n for n in self.novedades_mes.filter(tipo__in=['a', 'b']) if n.get_prioridad() >= 4]
-        if not novedades_criticas:
+        if not self.novedades_criticas:
             fortalezas.append("Ausencia de novedades de alta prioridad, indicando un mes estable.")
 
         self.evaluacion.fortalezas_mes = "- " + "\n- ".join(fortalezas) if fortalezas else "Se requiere más observación para definir fortalezas claras."
 
     def _generar_aspectos_a_mejorar(self):
-        # --- Análisis de Dimensiones ---
-        desempenos_por_dimension = {
-            'Cognitiva': [], 'Comunicativa': [], 'Socio-afectiva': [], 'Corporal': []
-        }
-        map_dimensiones = {
-            'cognitiva': 'Cognitiva', 'comunicativa': 'Comunicativa', 
-            'socio-afectiva': 'Socio-afectiva', 'corporal': 'Corporal'
-        }
-        for seguimiento in self.seguimientos_mes.prefetch_related('evaluaciones_dimension__dimension'):
-            for ev in seguimiento.evaluaciones_dimension.all():
-                for key_lower, name_title in map_dimensiones.items():
-                    if key_lower in ev.dimension.nombre.lower():
-                        desempenos_por_dimension[name_title].append(ev.desempeno)
-                        break
-        # --- Fin Análisis ---
-
-        if not self.seguimientos_mes.exists():
+        if not self.resumen.cantidad_seguimientos:
             self.evaluacion.aspectos_a_mejorar = "No hay datos para identificar aspectos a mejorar."
             return
         
         aspectos = []
         dimensiones_con_dificultad = []
         # 1. Dimensiones con bajo desempeño (si hay al menos un bajo/en proceso/requiere apoyo, se menciona)
-        for dimension, desempenos in desempenos_por_dimension.items():
-            if desempenos:
-                conteo = Counter(desempenos)
-                total = len(desempenos)
+        for dimension in MAP_DIMENSIONES.values():
+            conteo = self.resumen.desempenos_por_dimension.get(dimension)
+            if conteo:
+                total = sum(conteo.values())
                 bajos = conteo.get('bajo', 0) + conteo.get('requiere_apoyo', 0) + conteo.get('en_proceso', 0)
                 if bajos > 0:
                     porcentaje_bajo = int((bajos/total)*100) if total else 0
@@ -290,26 +322,24 @@ class GeneradorEvaluacionMensual:
         if self.evaluacion.tendencia_valoracion == 'Retrocede':
             aspectos.append("Se observa un retroceso en el logro general en comparación con el mes anterior. Es crucial identificar las causas y reforzar el acompañamiento.")
         # 3. Valoraciones bajas globales
-        valoraciones_bajas = self.seguimientos_mes.filter(valoracion__lte=2).count()
+        valoraciones_bajas = self.resumen.valoraciones_bajas
         if valoraciones_bajas > 2:
             aspectos.append(f"Se registraron {valoraciones_bajas} días con valoraciones bajas, lo que sugiere la necesidad de observar y dialogar sobre las situaciones presentadas en esas fechas.")
         # 4. Comportamiento y emociones
         if self.evaluacion.comportamiento_frecuente in ['retraido', 'dificultad', 'agresivo']:
             aspectos.append(f"El comportamiento más frecuente fue '{self.evaluacion.get_comportamiento_frecuente_display()}', lo que requiere atención y apoyo emocional.")
-        estados_emocionales = list(self.seguimientos_mes.values_list('estado_emocional', flat=True).exclude(estado_emocional__isnull=True))
-        if estados_emocionales:
-            estado_frecuente = Counter(estados_emocionales).most_common(1)[0][0]
+        estado_frecuente = self.resumen.estado_emocional_frecuente
+        if estado_frecuente:
             if estado_frecuente in ['triste', 'irritable', 'ansioso', 'frustrado']:
                 aspectos.append(f"El estado emocional predominante fue '{estado_frecuente.capitalize()}', por lo que se recomienda acompañamiento emocional y espacios de escucha.")
         # 5. Asistencia y novedades
         if self.evaluacion.porcentaje_asistencia and self.evaluacion.porcentaje_asistencia < 85:
             aspectos.append(f"El porcentaje de asistencia mensual ({self.evaluacion.porcentaje_asistencia}%) es bajo y puede afectar el proceso de desarrollo. Se sugiere buscar estrategias para mejorar la asistencia.")
-        novedades_asistencia = self.novedades_mes.filter(tipo='c').count()
+        novedades_asistencia = sum(1 for n in self.novedades_mes if n.tipo == 'c')
         if novedades_asistencia > 2:
             aspectos.append(f"Se registraron {novedades_asistencia} novedades por inasistencia, lo cual puede estar incidiendo en el proceso de adaptación y aprendizaje.")
         # 6. Novedades críticas
-        novedades_criticas = [n for n in self.novedades_mes.filter(tipo__in=['a', 'b']) if n.get_prioridad() >= 4]
-        if novedades_criticas:
+        if self.novedades_criticas:
             aspectos.append("Se presentaron novedades de alta prioridad (salud o emocional), por lo que se recomienda un seguimiento cercano y articulación con la familia.")
         self.evaluacion.aspectos_a_mejorar = "- " + "\n- ".join(aspectos) if aspectos else "No se identificaron aspectos críticos a mejorar este mes."
 
@@ -317,18 +347,11 @@ class GeneradorEvaluacionMensual:
         alertas = []
 
         # 1. Alerta por caída en el rendimiento general
-        valoraciones = [s.valoracion for s in self.seguimientos_mes if s.valoracion is not None]
-        if valoraciones:
-            promedio_actual = sum(valoraciones) / len(valoraciones)
-            mes_anterior_fin = self.fecha_inicio_mes - timedelta(days=1)
-            mes_anterior_inicio = mes_anterior_fin.replace(day=1)
-            seguimientos_anteriores = SeguimientoDiario.objects.filter(
-                nino=self.nino, fecha__gte=mes_anterior_inicio, fecha__lte=mes_anterior_fin
-            )
-            valoraciones_anteriores = [s.valoracion for s in seguimientos_anteriores if s.valoracion is not None]
+        promedio_actual = self.resumen.promedio_valoracion
+        if promedio_actual is not None:
+            promedio_anterior = self.resumen_anterior.promedio_valoracion if self.resumen_anterior else None
 
-            if valoraciones_anteriores:
-                promedio_anterior = sum(valoraciones_anteriores) / len(valoraciones_anteriores)
+            if promedio_anterior is not None:
                 # Se considera una caída significativa si el promedio baja más de 1.0 punto
                 if promedio_actual < promedio_anterior - 1.0:
                     alertas.append(
@@ -336,20 +359,16 @@ class GeneradorEvaluacionMensual:
                     )
 
         # 2. Alerta por estados emocionales negativos recurrentes
-        estados_negativos = [
-            s.estado_emocional for s in self.seguimientos_mes 
-            if s.estado_emocional in ['triste', 'irritable', 'ansioso', 'frustrado', 'enojado']
-        ]
-        if len(estados_negativos) >= 4:  # Umbral de 4 o más días en el mes
+        estados_negativos = self.resumen.contar_estados(['triste', 'irritable', 'ansioso', 'frustrado', 'enojado'])
+        if estados_negativos >= 4:  # Umbral de 4 o más días en el mes
             alertas.append(
-                f"Estado emocional: Se han registrado estados emocionales negativos en {len(estados_negativos)} ocasiones durante el mes. Es importante ofrecer apoyo emocional y un espacio de diálogo."
+                f"Estado emocional: Se han registrado estados emocionales negativos en {estados_negativos} ocasiones durante el mes. Es importante ofrecer apoyo emocional y un espacio de diálogo."
             )
 
         # 3. Alerta por novedades críticas (salud, emocionales)
-        novedades_criticas = [n for n in self.novedades_mes if n.tipo in ['a', 'b'] and n.get_prioridad() >= 4]
-        if novedades_criticas:
+        if self.novedades_criticas:
             tipos = {}
-            for nov in novedades_criticas:
+            for nov in self.novedades_criticas:
                 tipo = 'salud' if nov.tipo == 'a' else 'emocional'
                 tipos[tipo] = tipos.get(tipo, 0) + 1
             
@@ -363,80 +382,14 @@ class GeneradorEvaluacionMensual:
             alertas.append(f"Inasistencia crítica: El porcentaje de asistencia ({self.evaluacion.porcentaje_asistencia}%) es muy bajo y requiere una intervención inmediata para garantizar la continuidad del proceso pedagógico.")
 
         # 5. Alerta por comportamiento disruptivo frecuente
-        comportamientos_negativos = self.seguimientos_mes.filter(comportamiento_general__in=['agresivo', 'dificultad']).count()
+        comportamientos_negativos = self.resumen.contar_comportamientos(['agresivo', 'dificultad'])
         if comportamientos_negativos >= 4:
             alertas.append(f"Comportamiento: Se observó un comportamiento disruptivo en {comportamientos_negativos} días, lo que sugiere la necesidad de implementar estrategias de manejo conductual y apoyo.")
 
         self.evaluacion.alertas_mes = "- " + "\n- ".join(alertas) if alertas else "No se generaron alertas automáticas este mes."
 
     def _generar_conclusion_general(self):
-        if not self.seguimientos_mes.exists():
-            self.evaluacion.conclusion_general = "No es posible generar una conclusión debido a la falta de seguimientos diarios este mes."
-            return
-
-        # --- 1. Recopilación de datos adicionales ---
-        mes_nombre = calendar.month_name[self.fecha_fin_mes.month].capitalize()
-        logro = self.evaluacion.logro_mes
-        tendencia = self.evaluacion.tendencia_valoracion
-
-        # Estado emocional más frecuente
-        estados_emocionales = list(self.seguimientos_mes.values_list('estado_emocional', flat=True).exclude(estado_emocional__isnull=True))
-        estado_emocional_frecuente = Counter(estados_emocionales).most_common(1)[0][0] if estados_emocionales else None
-
-        # Observaciones relevantes del educador
-        obs_relevantes = list(self.seguimientos_mes.filter(observacion_relevante=True).values_list('observaciones', flat=True))
-        
-        # Novedades críticas (salud/emocional)
-        novedades_criticas = [n for n in self.novedades_mes.filter(tipo__in=['a', 'b']) if n.get_prioridad() >= 4]
-
-        # --- 2. Construcción de la conclusión por partes ---
-        partes_conclusion = []
-
-        # Parte A: Desempeño general
-        if logro == 'Alto':
-            estado = f"mostró un desarrollo sobresaliente, cumpliendo consistentemente con los objetivos esperados."
-        elif logro == 'Adecuado':
-            estado = f"mostró un progreso constante y adecuado a su etapa de desarrollo."
-        else: # En Proceso
-            estado = f"se encontró en un proceso que requiere apoyo para afianzar los aprendizajes."
-        partes_conclusion.append(f"Durante el mes de {mes_nombre}, el niño/a {estado}")
-
-        # Parte B: Comportamiento y estado emocional
-        if self.evaluacion.comportamiento_frecuente and estado_emocional_frecuente:
-            # Mapeo para un lenguaje más natural
-            map_emociones = {'alegre': 'alegría', 'tranquilo': 'tranquilidad', 'curioso': 'curiosidad', 'motivado': 'motivación'}
-            emocion_texto = map_emociones.get(estado_emocional_frecuente, estado_emocional_frecuente)
-            partes_conclusion.append(f"Su comportamiento predominante fue '{self.evaluacion.get_comportamiento_frecuente_display()}', manifestando principalmente un estado de {emocion_texto}.")
-
-        # Parte C: Tendencia y observaciones clave
-        if tendencia == 'Avanza':
-            partes_conclusion.append("Se destaca una clara tendencia de avance respecto al mes anterior.")
-        elif tendencia == 'Retrocede':
-            partes_conclusion.append("Se observó un retroceso en su desempeño general, lo cual requiere atención.")
-
-        if obs_relevantes:
-            resumen_obs = ". ".join(obs_relevantes[:2]) # Tomamos las primeras 2 para ser concisos
-            partes_conclusion.append(f"El educador destacó como observaciones relevantes: \"{resumen_obs}\".")
-
-        # Parte D: Recomendación final basada en todo el contexto
-        recomendacion = "La recomendación principal es continuar fomentando sus habilidades y mantener un seguimiento cercano a su proceso."
-        if "No se identificaron aspectos críticos" not in self.evaluacion.aspectos_a_mejorar or novedades_criticas:
-            recomendacion = "Se recomienda enfocar los esfuerzos en los 'aspectos a mejorar' identificados y atender las alertas generadas, trabajando en conjunto con la familia para establecer un plan de apoyo."
-        partes_conclusion.append(recomendacion)
-
-        # --- 3. Unión de las partes ---
-        conclusion = " ".join(partes_conclusion)
-        self.evaluacion.conclusion_general = conclusion
-        if cantidad == 1:
-                    alertas.append(f"Alerta: Se registró 1 novedad crítica de {tipo} este mes.")
-        else:
-                    alertas.append(f"Alerta: Se registraron {cantidad} novedades críticas de {tipo} este mes.")
-        if self.evaluacion.porcentaje_asistencia is not None and self.evaluacion.porcentaje_asistencia < 70:
-            alertas.append(f"Alerta de Inasistencia: El porcentaje de asistencia ({self.evaluacion.porcentaje_asistencia}%) es bajo y requiere atención.")
-        self.evaluacion.alertas_mes = "\n".join(alertas) if alertas else "No se generaron alertas automáticas este mes."
-
-    def _generar_conclusion_general(self):
-        if not self.seguimientos_mes.exists():
+        if not self.resumen.cantidad_seguimientos:
             self.evaluacion.conclusion_general = "No es posible generar una conclusión debido a la falta de seguimientos diarios este mes."
             return
 
@@ -446,14 +399,10 @@ class GeneradorEvaluacionMensual:
         tendencia = self.evaluacion.tendencia_valoracion
 
         # Estado emocional más frecuente
-        estados_emocionales = list(self.seguimientos_mes.values_list('estado_emocional', flat=True).exclude(estado_emocional__isnull=True))
-        estado_emocional_frecuente = Counter(estados_emocionales).most_common(1)[0][0] if estados_emocionales else None
+        estado_emocional_frecuente = self.resumen.estado_emocional_frecuente
 
         # Observaciones relevantes del educador
-        obs_relevantes = list(self.seguimientos_mes.filter(observacion_relevante=True).values_list('observaciones', flat=True))
-        
-        # Novedades críticas (salud/emocional)
-        novedades_criticas = [n for n in self.novedades_mes.filter(tipo__in=['a', 'b']) if n.get_prioridad() >= 4]
+        obs_relevantes = [s.observaciones for s in self.seguimientos_mes if s.observacion_relevante and s.observaciones]
 
         # --- 2. Construcción de la conclusión por partes ---
         partes_conclusion = []
@@ -486,102 +435,146 @@ class GeneradorEvaluacionMensual:
 
         # Parte D: Recomendación final basada en todo el contexto
         recomendacion = "La recomendación principal es continuar fomentando sus habilidades y mantener un seguimiento cercano a su proceso."
-        if "No se identificaron aspectos críticos" not in self.evaluacion.aspectos_a_mejorar or novedades_criticas:
-            recomendacion = "Se recomienda enfocar los esfuerzos en los 'aspectos a mejorar' identificados y atender las alertas generadas, trabajando en conjunto con la familia para establecer un plan de apoyo."
-        partes_conclusion.append(recomendacion)
-
-        # --- 3. Unión de las partes ---
-        conclusion = " ".join(partes_conclusion)
-        self.evaluacion.conclusion_general = conclusion
-        # Parte B: Comportamiento y estado emocional
-        if self.evaluacion.comportamiento_frecuente and estado_emocional_frecuente:
-            # Mapeo para un lenguaje más natural
-            map_emociones = {'alegre': 'alegría', 'tranquilo': 'tranquilidad', 'curioso': 'curiosidad', 'motivado': 'motivación'}
-            emocion_texto = map_emociones.get(estado_emocional_frecuente, estado_emocional_frecuente)
-            partes_conclusion.append(f"Su comportamiento predominante fue '{self.evaluacion.get_comportamiento_frecuente_display()}', manifestando principalmente un estado de {emocion_texto}.")
-
-        # Parte C: Tendencia y observaciones clave
-        if tendencia == 'Avanza':
-            partes_conclusion.append("Se destaca una clara tendencia de avance respecto al mes anterior.")
-        elif tendencia == 'Retrocede':
-            partes_conclusion.append("Se observó un retroceso en su desempeño general, lo cual requiere atención.")
-
-        if obs_relevantes:
-            resumen_obs = ". ".join(obs_relevantes[:2]) # Tomamos las primeras 2 para ser concisos
-            partes_conclusion.append(f"El educador destacó como observaciones relevantes: \"{resumen_obs}\".")
-
-        # Parte D: Recomendación final basada en todo el contexto
-        recomendacion = "La recomendación principal es continuar fomentando sus habilidades y mantener un seguimiento cercano a su proceso."
-        if "No se identificaron aspectos críticos" not in self.evaluacion.aspectos_a_mejorar or novedades_criticas:
+        if "No se identificaron aspectos críticos" not in self.evaluacion.aspectos_a_mejorar or self.novedades_criticas:
             recomendacion = "Se recomienda enfocar los esfuerzos en los 'aspectos a mejorar' identificados y atender las alertas generadas, trabajando en conjunto con la familia para establecer un plan de apoyo."
         partes_conclusion.append(recomendacion)
 
         # --- 3. Unión de las partes ---
         conclusion = " ".join(partes_conclusion)
         self.evaluacion.conclusion_general = conclusion
-        if cantidad == 1:
-                    alertas.append(f"Alerta: Se registró 1 novedad crítica de {tipo} este mes.")
-        else:
-                    alertas.append(f"Alerta: Se registraron {cantidad} novedades críticas de {tipo} este mes.")
-        if self.evaluacion.porcentaje_asistencia is not None and self.evaluacion.porcentaje_asistencia < 70:
-            alertas.append(f"Alerta de Inasistencia: El porcentaje de asistencia ({self.evaluacion.porcentaje_asistencia}%) es bajo y requiere atención.")
-        self.evaluacion.alertas_mes = "\n".join(alertas) if alertas else "No se generaron alertas automáticas este mes."
 
-    def _generar_conclusion_general(self):
-        if not self.seguimientos_mes.exists():
-            self.evaluacion.conclusion_general = "No es posible generar una conclusión debido a la falta de seguimientos diarios este mes."
-            return
 
-        # --- 1. Recopilación de datos adicionales ---
-        mes_nombre = calendar.month_name[self.fecha_fin_mes.month].capitalize()
-        logro = self.evaluacion.logro_mes
-        tendencia = self.evaluacion.tendencia_valoracion
+class GeneradorEvaluacionMensualLote:
+    """
+    Genera los informes mensuales de todos los niños de un hogar o de una regional.
 
-        # Estado emocional más frecuente
-        estados_emocionales = list(self.seguimientos_mes.values_list('estado_emocional', flat=True).exclude(estado_emocional__isnull=True))
-        estado_emocional_frecuente = Counter(estados_emocionales).most_common(1)[0][0] if estados_emocionales else None
+    Carga los datos del mes con un número fijo de consultas (sin importar cuántos
+    niños haya), ejecuta ``GeneradorEvaluacionMensual`` en memoria para cada niño
+    y persiste con ``bulk_create`` / ``bulk_update``.
 
-        # Observaciones relevantes del educador
-        obs_relevantes = list(self.seguimientos_mes.filter(observacion_relevante=True).values_list('observaciones', flat=True))
-        
-        # Novedades críticas (salud/emocional)
-        novedades_criticas = [n for n in self.novedades_mes.filter(tipo__in=['a', 'b']) if n.get_prioridad() >= 4]
+    Por defecto los informes que ya existen no se tocan (pueden tener ajustes
+    manuales); con ``regenerar=True`` se recalculan sus campos automáticos.
+    """
 
-        # --- 2. Construcción de la conclusión por partes ---
-        partes_conclusion = []
+    CAMPOS_AUTOMATICOS = [
+        'logro_mes', 'tendencia_valoracion', 'participacion_frecuente',
+        'porcentaje_asistencia', 'comportamiento_frecuente',
+        'evaluacion_cognitiva', 'evaluacion_comunicativa',
+        'evaluacion_socio_afectiva', 'evaluacion_corporal',
+        'fortalezas_mes', 'aspectos_a_mejorar', 'alertas_mes', 'conclusion_general',
+    ]
+
+    def __init__(self, fecha_fin_mes, hogar=None, regional=None, regenerar=False, batch_size=500):
+        if hogar is None and regional is None:
+            raise ValueError("Debe indicar un hogar o una regional.")
+        ultimo_dia = calendar.monthrange(fecha_fin_mes.year, fecha_fin_mes.month)[1]
+        self.fecha_fin_mes = fecha_fin_mes.replace(day=ultimo_dia)
+        self.fecha_inicio_mes = self.fecha_fin_mes.replace(day=1)
+        self.mes_anterior_fin = self.fecha_inicio_mes - timedelta(days=1)
+        self.hogar = hogar
+        self.regional = regional
+        self.regenerar = regenerar
+        self.batch_size = batch_size
+
+    def _filtro_ninos(self, prefijo=''):
+        if self.hogar is not None:
+            return {f'{prefijo}hogar': self.hogar}
+        return {f'{prefijo}hogar__regional': self.regional}
+
+    def _cargar(self):
+        from core.models import Nino
+
+        ninos = list(Nino.objects.filter(**self._filtro_ninos()).order_by('id'))
+        filtro = self._filtro_ninos('nino__')
+        rango_mes = {'fecha__gte': self.fecha_inicio_mes, 'fecha__lte': self.fecha_fin_mes}
+
+        seguimientos = {}
+        for s in _seguimientos_con_evaluaciones(SeguimientoDiario.objects.filter(**filtro, **rango_mes)):
+            seguimientos.setdefault(s.nino_id, []).append(s)
+
+        resumenes = {
+            (r.nino_id, r.fecha_fin_mes): r
+            for r in ResumenMensualSeguimiento.objects.filter(
+                **filtro, fecha_fin_mes__in=[self.fecha_fin_mes, self.mes_anterior_fin]
+            )
+        }
+        # Los niños con seguimientos del mes anterior pero sin su fila de resumen
+        # se recalculan desde las filas (el mes actual lo resuelve el generador)
+        seguimientos_anteriores = _seguimientos_con_evaluaciones(
+            SeguimientoDiario.objects.filter(
+                **filtro,
+                fecha__gte=self.mes_anterior_fin.replace(day=1),
+                fecha__lte=self.mes_anterior_fin,
+            ).exclude(nino__resumenes_mensuales__fecha_fin_mes=self.mes_anterior_fin)
+        )
+        for resumen in resumenes_desde_filas(seguimientos_anteriores):
+            resumenes[(resumen.nino_id, resumen.fecha_fin_mes)] = resumen
+
+        novedades = {}
+        for n in Novedad.objects.filter(**filtro, **rango_mes).order_by('id'):
+            novedades.setdefault(n.nino_id, []).append(n)
+
+        asistencias = {
+            fila['nino_id']: fila
+            for fila in Asistencia.objects.filter(**filtro, **rango_mes)
+            .values('nino_id')
+            .annotate(total=Count('id'), presentes=Count('id', filter=Q(estado='Presente')))
+        }
 
-        # Parte A: Desempeño general
-        if logro == 'Alto':
-            estado = f"mostró un desarrollo sobresaliente, cumpliendo consistentemente con los objetivos esperados."
-        elif logro == 'Adecuado':
-            estado = f"mostró un progreso constante y adecuado a su etapa de desarrollo."
-        else: # En Proceso
-            estado = f"se encontró en un proceso que requiere apoyo para afianzar los aprendizajes."
-        partes_conclusion.append(f"Durante el mes de {mes_nombre}, el niño/a {estado}")
+        desarrollos = {}
+        for d in DesarrolloNino.objects.filter(
+            **filtro, fecha_fin_mes__in=[self.fecha_fin_mes, self.mes_anterior_fin]
+        ):
+            desarrollos[(d.nino_id, d.fecha_fin_mes)] = d
 
-        # Parte B: Comportamiento y estado emocional
-        if self.evaluacion.comportamiento_frecuente and estado_emocional_frecuente:
-            # Mapeo para un lenguaje más natural
-            map_emociones = {'alegre': 'alegría', 'tranquilo': 'tranquilidad', 'curioso': 'curiosidad', 'motivado': 'motivación'}
-            emocion_texto = map_emociones.get(estado_emocional_frecuente, estado_emocional_frecuente)
-            partes_conclusion.append(f"Su comportamiento predominante fue '{self.evaluacion.get_comportamiento_frecuente_display()}', manifestando principalmente un estado de {emocion_texto}.")
+        return ninos, seguimientos, resumenes, novedades, asistencias, desarrollos
 
-        # Parte C: Tendencia y observaciones clave
-        if tendencia == 'Avanza':
-            partes_conclusion.append("Se destaca una clara tendencia de avance respecto al mes anterior.")
-        elif tendencia == 'Retrocede':
-            partes_conclusion.append("Se observó un retroceso en su desempeño general, lo cual requiere atención.")
+    def run(self):
+        """
+        Ejecuta la generación del lote.
+        Devuelve un diccionario con los contadores 'creados', 'actualizados' y 'omitidos'.
+        """
+        ninos, seguimientos, resumenes, novedades, asistencias, desarrollos = self._cargar()
 
-        if obs_relevantes:
-            resumen_obs = ". ".join(obs_relevantes[:2]) # Tomamos las primeras 2 para ser concisos
-            partes_conclusion.append(f"El educador destacó como observaciones relevantes: \"{resumen_obs}\".")
+        nuevos, actualizados, omitidos = [], [], 0
+        for nino in ninos:
+            seguimientos_nino = seguimientos.get(nino.id)
+            if not seguimientos_nino:
+                omitidos += 1
+                continue
 
-        # Parte D: Recomendación final basada en todo el contexto
-        recomendacion = "La recomendación principal es continuar fomentando sus habilidades y mantener un seguimiento cercano a su proceso."
-        if "No se identificaron aspectos críticos" not in self.evaluacion.aspectos_a_mejorar or novedades_criticas:
-            recomendacion = "Se recomienda enfocar los esfuerzos en los 'aspectos a mejorar' identificados y atender las alertas generadas, trabajando en conjunto con la familia para establecer un plan de apoyo."
-        partes_conclusion.append(recomendacion)
+            existente = desarrollos.get((nino.id, self.fecha_fin_mes))
+            if existente is not None and not self.regenerar:
+                omitidos += 1
+                continue
 
-        # --- 3. Unión de las partes ---
-        conclusion = " ".join(partes_conclusion)
-        self.evaluacion.conclusion_general = conclusion
+            evaluacion = existente or DesarrolloNino(nino=nino, fecha_fin_mes=self.fecha_fin_mes)
+            evaluacion.nino = nino  # Evita una consulta extra al acceder a evaluacion.nino
+            asistencia = asistencias.get(nino.id, {})
+            datos = {
+                'seguimientos': seguimientos_nino,
+                'novedades': novedades.get(nino.id, []),
+                'asistencias_total': asistencia.get('total', 0),
+                'asistencias_presentes': asistencia.get('presentes', 0),
+                'resumen': resumenes.get((nino.id, self.fecha_fin_mes)),
+                'resumen_anterior': resumenes.get((nino.id, self.mes_anterior_fin)),
+                'desarrollo_anterior': desarrollos.get((nino.id, self.mes_anterior_fin)),
+            }
+            GeneradorEvaluacionMensual(evaluacion, datos=datos).run(save_instance=False)
+            (actualizados if existente is not None else nuevos).append(evaluacion)
+
+        with transaction.atomic():
+            if nuevos:
+                DesarrolloNino.objects.bulk_create(nuevos, batch_size=self.batch_size)
+            if actualizados:
+                # bulk_update no aplica auto_now: la fecha se marca a mano (versión de la caché de PDF)
+                ahora = timezone.now()
+                for evaluacion in actualizados:
+                    evaluacion.fecha_actualizacion = ahora
+                DesarrolloNino.objects.bulk_update(
+                    actualizados, self.CAMPOS_AUTOMATICOS + ['fecha_actualizacion'], batch_size=self.batch_size
+                )
+            # bulk_create/bulk_update no disparan señales
+            dashboard_padre.invalidar_ninos([evaluacion.nino_id for evaluacion in nuevos + actualizados])
+
+        return {'creados': len(nuevos), 'actualizados': len(actualizados), 'omitidos': omitidos}
@@ -0,0 +1,136 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import busqueda, cache_pdf, calendario_padre, dashboard_padre
+
+from .models import DesarrolloNino, EvaluacionDimension, SeguimientoDiario
+from .resumenes import (
+    aplicar_evaluacion, aplicar_seguimiento, aporte_evaluacion, aporte_seguimiento, mover_evaluaciones,
+    reparar_desalineados,
+)
+
+
+# --- SeguimientoDiario ---------------------------------------------------------
+
+@receiver(pre_save, sender=SeguimientoDiario)
+def guardar_aporte_previo_seguimiento(sender, instance, **kwargs):
+    instance._aporte_previo = None
+    if instance.pk:
+        previo = SeguimientoDiario.objects.filter(pk=instance.pk).first()
+        if previo is not None:
+            instance._aporte_previo = aporte_seguimiento(previo)
+
+
+@receiver(post_save, sender=SeguimientoDiario)
+def actualizar_resumen_seguimiento(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previo = getattr(instance, '_aporte_previo', None)
+    aporte = aporte_seguimiento(instance)
+    with reparar_desalineados(previo, aporte):
+        if previo is not None:
+            aplicar_seguimiento(previo, -1)
+        aplicar_seguimiento(aporte, +1)
+        if previo is not None:
+            mover_evaluaciones(instance, previo)
+
+
+@receiver(post_delete, sender=SeguimientoDiario)
+def descontar_resumen_seguimiento(sender, instance, **kwargs):
+    aporte = aporte_seguimiento(instance)
+    with reparar_desalineados(aporte):
+        aplicar_seguimiento(aporte, -1)
+
+
+# --- EvaluacionDimension -------------------------------------------------------
+
+@receiver(pre_save, sender=EvaluacionDimension)
+def guardar_aporte_previo_evaluacion(sender, instance, **kwargs):
+    instance._aporte_previo = None
+    if instance.pk:
+        previo = EvaluacionDimension.objects.select_related('seguimiento', 'dimension').filter(pk=instance.pk).first()
+        if previo is not None:
+            instance._aporte_previo = aporte_evaluacion(previo, previo.seguimiento)
+
+
+@receiver(post_save, sender=EvaluacionDimension)
+def actualizar_resumen_evaluacion(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previo = getattr(instance, '_aporte_previo', None)
+    aporte = aporte_evaluacion(instance)
+    with reparar_desalineados(previo, aporte):
+        if previo is not None:
+            aplicar_evaluacion(previo, -1)
+        if aporte is not None:
+            aplicar_evaluacion(aporte, +1)
+
+
+@receiver(post_delete, sender=EvaluacionDimension)
+def descontar_resumen_evaluacion(sender, instance, **kwargs):
+    # En un borrado en cascada las evaluaciones se eliminan antes que su
+    # seguimiento, así que el seguimiento todavía existe al llegar aquí.
+    try:
+        aporte = aporte_evaluacion(instance)
+    except SeguimientoDiario.DoesNotExist:
+        return
+    if aporte is not None:
+        with reparar_desalineados(aporte):
+            aplicar_evaluacion(aporte, -1)
+
+
+# --- DesarrolloNino -------------------------------------------------------------
+
+@receiver(post_save, sender=DesarrolloNino)
+@receiver(post_delete, sender=DesarrolloNino)
+def invalidar_certificado_desarrollo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cache_pdf.invalidar(cache_pdf.grupo_nino(instance.nino_id), f"desarrollo-{instance.id}")
+
+
+@receiver(post_save, sender=DesarrolloNino)
+@receiver(post_delete, sender=DesarrolloNino)
+def invalidar_dashboard_padre(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    dashboard_padre.invalidar_ninos([instance.nino_id])
+
+
+@receiver(post_save, sender=SeguimientoDiario)
+@receiver(post_delete, sender=SeguimientoDiario)
+def invalidar_calendario_padre_seguimiento(sender, instance, raw=False, created=True, **kwargs):
+    if raw:
+        return
+    calendario_padre.invalidar_registro(
+        calendario_padre.padres_de_ninos([instance.nino_id]), instance.fecha, solo_mes=created
+    )
+
+
+@receiver(post_save, sender=EvaluacionDimension)
+@receiver(post_delete, sender=EvaluacionDimension)
+def invalidar_calendario_padre_evaluacion(sender, instance, raw=False, **kwargs):
+    # La evaluación siempre pertenece al mes de su seguimiento
+    if raw:
+        return
+    seguimiento = (
+        SeguimientoDiario.objects.filter(id=instance.seguimiento_id)
+        .values_list('nino__padre__usuario_id', 'fecha').first()
+    )
+    if seguimiento is not None:
+        usuario_id, fecha = seguimiento
+        calendario_padre.invalidar_mes([usuario_id], fecha)
+
+
+# --- Índice de búsqueda de texto -----------------------------------------------
+
+@receiver(post_save, sender=SeguimientoDiario)
+def indexar_seguimiento_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    busqueda.indexar('seguimiento', [instance.id])
+
+
+@receiver(post_delete, sender=SeguimientoDiario)
+def quitar_seguimiento_busqueda(sender, instance, **kwargs):
+    busqueda.quitar('seguimiento', [instance.id])
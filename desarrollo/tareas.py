@@ -0,0 +1,125 @@
+"""
+Cola local para la generación diferida de informes de desarrollo.
+
+La cola es la propia tabla ``DesarrolloNino``: las filas con
+``estado_generacion='pendiente'`` son trabajos por hacer. No se necesita un
+broker externo; los trabajos los toma un hilo en el proceso web (cuando
+``DESARROLLO_WORKER_EN_PROCESO`` está activo) o el comando
+``procesar_desarrollos`` ejecutado como worker dedicado. Fuera de DEBUG (en
+producción y en las pruebas) el hilo está apagado salvo que se active.
+
+Configuración (settings, opcional):
+    DESARROLLO_WORKER_EN_PROCESO  lanzar el hilo en el proceso web (def. DEBUG)
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Un trabajo 'procesando' que no avanza en este tiempo se considera abandonado
+# (p. ej. el proceso murió) y vuelve a tomarse.
+TIEMPO_MAXIMO_PROCESANDO = timedelta(minutes=10)
+
+_lock = threading.Lock()
+_hay_trabajo = threading.Event()
+_hilo = None
+
+
+def encolar_generacion(desarrollo_id):
+    """Avisa al worker en proceso cuando la transacción que creó el trabajo se confirme."""
+    if getattr(settings, 'DESARROLLO_WORKER_EN_PROCESO', settings.DEBUG):
+        transaction.on_commit(_despertar_worker)
+
+
+def _despertar_worker():
+    global _hilo
+    with _lock:
+        _hay_trabajo.set()
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_worker, name='desarrollo-worker', daemon=True)
+            _hilo.start()
+
+
+def _bucle_worker():
+    global _hilo
+    try:
+        while True:
+            _hay_trabajo.clear()
+            procesar_pendientes()
+            with _lock:
+                if not _hay_trabajo.is_set():
+                    _hilo = None
+                    return
+    except Exception:
+        logger.exception("El worker de generación de desarrollos terminó con error.")
+    finally:
+        connection.close()
+
+
+def _filtro_disponibles():
+    limite = timezone.now() - TIEMPO_MAXIMO_PROCESANDO
+    return Q(estado_generacion='pendiente') | Q(estado_generacion='procesando', generacion_actualizada__lt=limite)
+
+
+def reclamar_siguiente():
+    """
+    Marca como 'procesando' el siguiente trabajo disponible y devuelve su id.
+    La actualización condicional evita que dos workers tomen el mismo trabajo.
+    """
+    from .models import DesarrolloNino
+
+    candidatos = DesarrolloNino.objects.filter(_filtro_disponibles()).order_by('id').values_list('id', flat=True)[:10]
+    for desarrollo_id in candidatos:
+        tomado = DesarrolloNino.objects.filter(_filtro_disponibles(), id=desarrollo_id).update(
+            estado_generacion='procesando', generacion_actualizada=timezone.now()
+        )
+        if tomado:
+            return desarrollo_id
+    return None
+
+
+def ejecutar_generacion(desarrollo_id):
+    """Ejecuta el generador para un trabajo ya reclamado y deja su estado final."""
+    from .models import DesarrolloNino
+    from .services import GeneradorEvaluacionMensual, GeneradorEvaluacionMensualLote
+
+    try:
+        desarrollo = DesarrolloNino.objects.select_related('nino').get(id=desarrollo_id)
+    except DesarrolloNino.DoesNotExist:
+        return  # Se eliminó mientras esperaba en la cola
+
+    try:
+        GeneradorEvaluacionMensual(desarrollo).run(save_instance=False)
+    except Exception as e:
+        logger.exception("Error generando el desarrollo %s", desarrollo_id)
+        DesarrolloNino.objects.filter(id=desarrollo_id).update(
+            estado_generacion='error', error_generacion=str(e), generacion_actualizada=timezone.now()
+        )
+        return
+
+    desarrollo.estado_generacion = 'completado'
+    desarrollo.error_generacion = None
+    desarrollo.generacion_actualizada = timezone.now()
+    # Solo los campos del generador: no se pisan ediciones guardadas mientras tanto
+    desarrollo.save(run_generator=False, update_fields=[
+        *GeneradorEvaluacionMensualLote.CAMPOS_AUTOMATICOS,
+        'estado_generacion', 'error_generacion', 'generacion_actualizada', 'fecha_actualizacion',
+    ])
+
+
+def procesar_pendientes(limite=None):
+    """Procesa trabajos hasta vaciar la cola (o hasta ``limite``). Devuelve cuántos procesó."""
+    procesados = 0
+    while limite is None or procesados < limite:
+        desarrollo_id = reclamar_siguiente()
+        if desarrollo_id is None:
+            break
+        ejecutar_generacion(desarrollo_id)
+        procesados += 1
+    return procesados
@@ -1,3 +1,311 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Ciudad, HogarComunitario, MadreComunitaria, Nino, Padre, Regional, Rol, Usuario
+from planeaciones.models import Dimension, Planeacion
+
+from .models import DesarrolloNino, EvaluacionDimension, ResumenMensualSeguimiento, SeguimientoDiario
+from .resumenes import CAMPOS_ACUMULADOS, resumenes_desde_filas
+from .services import GeneradorEvaluacionMensual, GeneradorEvaluacionMensualLote, _seguimientos_con_evaluaciones
+from .tareas import TIEMPO_MAXIMO_PROCESANDO, procesar_pendientes, reclamar_siguiente
+
+FIN_OCTUBRE = datetime.date(2025, 10, 31)
+FIN_SEPTIEMBRE = datetime.date(2025, 9, 30)
+
+
+def crear_hogar(cantidad_ninos=2):
+    """Hogar con su madre, una planeación y ``cantidad_ninos`` niños con padre."""
+    rol_madre = Rol.objects.get_or_create(nombre_rol='madre_comunitaria')[0]
+    rol_padre = Rol.objects.get_or_create(nombre_rol='padre')[0]
+    regional = Regional.objects.create(nombre='Regional Prueba')
+    ciudad = Ciudad.objects.create(nombre='Ciudad Prueba', regional=regional)
+    usuario_madre = Usuario.objects.create(documento=1, nombres='Marta', apellidos='Madre', correo='madre@prueba.co', rol=rol_madre)
+    madre = MadreComunitaria.objects.create(usuario=usuario_madre, nivel_escolaridad='Bachiller')
+    hogar = HogarComunitario.objects.create(
+        regional=regional, ciudad=ciudad, nombre_hogar='Hogar Prueba', direccion='Calle 1', localidad='Centro', madre=madre,
+    )
+    planeacion = Planeacion.objects.create(madre=usuario_madre, fecha=datetime.date(2025, 9, 1), nombre_experiencia='Juego')
+    ninos = []
+    for i in range(cantidad_ninos):
+        usuario_padre = Usuario.objects.create(
+            documento=10 + i, nombres=f'Pedro{i}', apellidos='Padre', correo=f'padre{i}@prueba.co', rol=rol_padre,
+        )
+        ninos.append(Nino.objects.create(
+            nombres=f'Niño{i}', apellidos='Prueba', fecha_nacimiento=datetime.date(2021, 1, 1),
+            hogar=hogar, padre=Padre.objects.create(usuario=usuario_padre),
+        ))
+    return hogar, planeacion, ninos
+
+
+def crear_seguimiento(nino, planeacion, fecha, valoracion, estado='alegre', comportamiento='participativo', desempenos=()):
+    seguimiento = SeguimientoDiario.objects.create(
+        nino=nino, planeacion=planeacion, fecha=fecha, valoracion=valoracion,
+        estado_emocional=estado, comportamiento_general=comportamiento,
+        observaciones=f'Observación del {fecha:%d}', observacion_relevante=fecha.day % 2 == 0,
+    )
+    for nombre, desempeno in desempenos:
+        dimension = Dimension.objects.get_or_create(nombre=nombre)[0]
+        EvaluacionDimension.objects.create(seguimiento=seguimiento, dimension=dimension, desempeno=desempeno)
+    return seguimiento
+
+
+class ResumenFaltanteTests(TestCase):
+    """Sin la fila de ResumenMensualSeguimiento el informe se calcula igual, desde los seguimientos."""
+
+    CAMPOS = GeneradorEvaluacionMensualLote.CAMPOS_AUTOMATICOS
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hogar, planeacion, cls.ninos = crear_hogar()
+        for nino in cls.ninos:
+            for dia in range(1, 8):
+                crear_seguimiento(nino, planeacion, datetime.date(2025, 9, dia), valoracion=5)
+                crear_seguimiento(
+                    nino, planeacion, datetime.date(2025, 10, dia), valoracion=1 + dia % 3, estado='triste',
+                    comportamiento='inquieto', desempenos=[('Dimensión Cognitiva', 'bajo'), ('Dimensión Corporal', 'alto')],
+                )
+
+    def _generar(self, nino):
+        evaluacion = DesarrolloNino(nino=nino, fecha_fin_mes=FIN_OCTUBRE)
+        GeneradorEvaluacionMensual(evaluacion).run(save_instance=False)
+        return {campo: getattr(evaluacion, campo) for campo in self.CAMPOS}
+
+    def test_generador_individual(self):
+        nino = self.ninos[0]
+        esperado = self._generar(nino)
+        self.assertIn('Disminución del rendimiento', esperado['alertas_mes'])
+
+        ResumenMensualSeguimiento.objects.filter(nino=nino).delete()
+        self.assertEqual(self._generar(nino), esperado)
+
+    def test_generador_por_lote(self):
+        esperados = {nino.id: self._generar(nino) for nino in self.ninos}
+        ResumenMensualSeguimiento.objects.all().delete()
+
+        resultado = GeneradorEvaluacionMensualLote(FIN_OCTUBRE, hogar=self.hogar).run()
+
+        self.assertEqual(resultado['creados'], len(self.ninos))
+        for evaluacion in DesarrolloNino.objects.filter(fecha_fin_mes=FIN_OCTUBRE):
+            self.assertEqual({campo: getattr(evaluacion, campo) for campo in self.CAMPOS}, esperados[evaluacion.nino_id])
+
+
+class ColaGeneracionTests(TestCase):
+    """La cola de DesarrolloNino: reclamo, trabajos abandonados y errores."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, planeacion, cls.ninos = crear_hogar(cantidad_ninos=3)
+        for nino in cls.ninos:
+            crear_seguimiento(nino, planeacion, datetime.date(2025, 10, 2), valoracion=4)
+
+    def _crear(self, nino):
+        return DesarrolloNino.objects.create(nino=nino, fecha_fin_mes=FIN_OCTUBRE)
+
+    def test_sin_debug_no_se_lanza_el_hilo(self):
+        with mock.patch('desarrollo.tareas._despertar_worker') as despertar:
+            with self.captureOnCommitCallbacks(execute=True):
+                desarrollo = self._crear(self.ninos[0])
+        despertar.assert_not_called()
+        desarrollo.refresh_from_db()
+        self.assertEqual(desarrollo.estado_generacion, 'pendiente')
+
+    @override_settings(DESARROLLO_WORKER_EN_PROCESO=True)
+    def test_activado_se_despierta_al_confirmar(self):
+        with mock.patch('desarrollo.tareas._despertar_worker') as despertar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._crear(self.ninos[0])
+        despertar.assert_called_once_with()
+
+    def test_reclamar_toma_cada_trabajo_una_vez(self):
+        primero, segundo = self._crear(self.ninos[0]), self._crear(self.ninos[1])
+
+        self.assertEqual(reclamar_siguiente(), primero.id)
+        self.assertEqual(reclamar_siguiente(), segundo.id)
+        self.assertIsNone(reclamar_siguiente())
+        self.assertEqual(
+            set(DesarrolloNino.objects.values_list('estado_generacion', flat=True)), {'procesando'}
+        )
+
+    def test_procesando_abandonado_vuelve_a_tomarse(self):
+        reciente, abandonado = self._crear(self.ninos[0]), self._crear(self.ninos[1])
+        DesarrolloNino.objects.filter(id=reciente.id).update(
+            estado_generacion='procesando', generacion_actualizada=timezone.now()
+        )
+        DesarrolloNino.objects.filter(id=abandonado.id).update(
+            estado_generacion='procesando',
+            generacion_actualizada=timezone.now() - TIEMPO_MAXIMO_PROCESANDO - datetime.timedelta(minutes=1),
+        )
+
+        self.assertEqual(reclamar_siguiente(), abandonado.id)
+        # Al reclamarlo se renueva su marca de tiempo: ya no está abandonado
+        self.assertIsNone(reclamar_siguiente())
+
+    def test_procesar_completa_el_informe(self):
+        desarrollo = self._crear(self.ninos[0])
+        self.assertEqual(procesar_pendientes(), 1)
+        desarrollo.refresh_from_db()
+        self.assertEqual(desarrollo.estado_generacion, 'completado')
+        self.assertEqual(desarrollo.logro_mes, 'Adecuado')
+
+    def test_error_del_generador_queda_registrado(self):
+        desarrollo = self._crear(self.ninos[0])
+        with mock.patch.object(GeneradorEvaluacionMensual, 'run', side_effect=ValueError('sin plantilla')):
+            with self.assertLogs('desarrollo.tareas', level='ERROR'):
+                self.assertEqual(procesar_pendientes(), 1)
+
+        desarrollo.refresh_from_db()
+        self.assertEqual(desarrollo.estado_generacion, 'error')
+        self.assertEqual(desarrollo.error_generacion, 'sin plantilla')
+        self.assertIsNone(reclamar_siguiente())
+
+        # Guardarlo de nuevo lo devuelve a la cola y limpia el error
+        desarrollo.save()
+        desarrollo.refresh_from_db()
+        self.assertEqual((desarrollo.estado_generacion, desarrollo.error_generacion), ('pendiente', None))
+        self.assertEqual(procesar_pendientes(), 1)
+        desarrollo.refresh_from_db()
+        self.assertEqual(desarrollo.estado_generacion, 'completado')
+
+
+class ResumenIncrementalTests(TestCase):
+    """Los acumulados incrementales coinciden siempre con un recálculo desde las filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hogar, cls.planeacion, cls.ninos = crear_hogar()
+
+    def _desde_filas(self):
+        resumenes = resumenes_desde_filas(_seguimientos_con_evaluaciones(SeguimientoDiario.objects.all()))
+        return {(r.nino_id, r.fecha_fin_mes): [getattr(r, c) for c in CAMPOS_ACUMULADOS] for r in resumenes}
+
+    maxDiff = None
+
+    def assertCoincideConFilas(self):
+        guardados = {
+            (r.nino_id, r.fecha_fin_mes): [getattr(r, c) for c in CAMPOS_ACUMULADOS]
+            for r in ResumenMensualSeguimiento.objects.all()
+        }
+        self.assertEqual(guardados, self._desde_filas())
+
+    def _seguimiento(self, nino, dia, valoracion=4, mes=10, **kwargs):
+        return crear_seguimiento(nino, self.planeacion, datetime.date(2025, mes, dia), valoracion, **kwargs)
+
+    def test_crear_editar_mover_y_eliminar(self):
+        uno, otro = self.ninos
+        seguimientos = [
+            self._seguimiento(uno, dia, valoracion=1 + dia % 5, desempenos=[('Cognitiva', 'alto'), ('Corporal', 'bajo')])
+            for dia in range(1, 6)
+        ]
+        self._seguimiento(otro, 1, estado='triste')
+        self.assertCoincideConFilas()
+
+        # Editar los valores del seguimiento y el desempeño de una evaluación
+        seguimiento = seguimientos[0]
+        seguimiento.valoracion, seguimiento.estado_emocional, seguimiento.observacion_relevante = 1, 'ansioso', True
+        seguimiento.save()
+        evaluacion = seguimiento.evaluaciones_dimension.first()
+        evaluacion.desempeno = 'proceso'
+        evaluacion.save()
+        self.assertCoincideConFilas()
+
+        # Mover un seguimiento (con sus evaluaciones) a otro mes y otro a otro niño
+        seguimientos[1].fecha = datetime.date(2025, 11, 3)
+        seguimientos[1].save()
+        seguimientos[2].nino = otro
+        seguimientos[2].save()
+        self.assertCoincideConFilas()
+
+        # Eliminar una evaluación, un seguimiento y el último del mes movido
+        seguimientos[3].evaluaciones_dimension.first().delete()
+        seguimientos[4].delete()
+        seguimientos[1].delete()
+        self.assertCoincideConFilas()
+        self.assertFalse(ResumenMensualSeguimiento.objects.filter(fecha_fin_mes=datetime.date(2025, 11, 30)).exists())
+
+    def test_desalineado_se_reconstruye_y_se_avisa(self):
+        seguimientos = [self._seguimiento(self.ninos[0], dia) for dia in range(1, 4)]
+        # Un update() masivo no dispara señales: el resumen deja de coincidir
+        ResumenMensualSeguimiento.objects.update(cantidad_seguimientos=1, histograma_emocional={})
+
+        with self.assertLogs('desarrollo.resumenes', level='WARNING') as registro:
+            seguimientos[0].delete()
+            seguimientos[1].delete()
+        self.assertIn('desalineado', registro.output[0])
+        self.assertCoincideConFilas()
+
+    def test_generador_avisa_si_el_resumen_no_coincide(self):
+        self._seguimiento(self.ninos[0], 1, valoracion=5)
+        self._seguimiento(self.ninos[0], 2, valoracion=5)
+        ResumenMensualSeguimiento.objects.update(cantidad_seguimientos=1, suma_valoraciones=1, cantidad_valoraciones=1)
+
+        evaluacion = DesarrolloNino(nino=self.ninos[0], fecha_fin_mes=FIN_OCTUBRE)
+        with self.assertLogs('desarrollo.services', level='WARNING'):
+            GeneradorEvaluacionMensual(evaluacion).run(save_instance=False)
+        self.assertEqual(evaluacion.logro_mes, 'Alto')
+
+    def test_comando_reconciliar(self):
+        for dia in range(1, 4):
+            self._seguimiento(self.ninos[0], dia, desempenos=[('Comunicativa', 'adecuado')])
+            self._seguimiento(self.ninos[1], dia, mes=9)
+        desarrollo = DesarrolloNino.objects.create(nino=self.ninos[0], fecha_fin_mes=FIN_OCTUBRE)
+        DesarrolloNino.objects.filter(id=desarrollo.id).update(estado_generacion='completado')
+
+        ResumenMensualSeguimiento.objects.filter(nino=self.ninos[0]).update(desempenos_por_dimension={})
+        ResumenMensualSeguimiento.objects.filter(nino=self.ninos[1]).delete()
+        ResumenMensualSeguimiento.objects.create(nino=self.ninos[1], fecha_fin_mes=FIN_OCTUBRE, cantidad_seguimientos=2)
+
+        salida = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 faltantes, 1 sobrantes y 1 con acumulados distintos'):
+            call_command('reconciliar_resumenes', solo_revisar=True, stdout=salida)
+        self.assertEqual(ResumenMensualSeguimiento.objects.count(), 2)
+
+        call_command('reconciliar_resumenes', stdout=salida)
+        self.assertCoincideConFilas()
+        desarrollo.refresh_from_db()
+        self.assertEqual(desarrollo.estado_generacion, 'pendiente')
+
+        call_command('reconciliar_resumenes', solo_revisar=True, stdout=salida)
+        self.assertIn('Todos los resúmenes coinciden', salida.getvalue())
+
+
+class ReencolarInformesTests(TestCase):
+    """Un cambio en los seguimientos devuelve a la cola los informes del mes y del mes siguiente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.planeacion, (cls.nino,) = crear_hogar(cantidad_ninos=1)
+        cls.seguimientos = [
+            crear_seguimiento(cls.nino, cls.planeacion, datetime.date(2025, 10, dia), valoracion=5)
+            for dia in range(1, 4)
+        ]
+        crear_seguimiento(cls.nino, cls.planeacion, datetime.date(2025, 11, 3), valoracion=5)
+
+    def test_todos_los_campos_se_regeneran_juntos(self):
+        from .tareas import procesar_pendientes
+
+        octubre = DesarrolloNino.objects.create(nino=self.nino, fecha_fin_mes=FIN_OCTUBRE)
+        noviembre = DesarrolloNino.objects.create(nino=self.nino, fecha_fin_mes=datetime.date(2025, 11, 30))
+        procesar_pendientes()
+        octubre.refresh_from_db()
+        self.assertEqual(octubre.logro_mes, 'Alto')
+        self.assertNotIn('emocional negativos', octubre.alertas_mes)
+
+        for seguimiento in self.seguimientos:
+            seguimiento.valoracion, seguimiento.estado_emocional = 1, 'triste'
+            seguimiento.save()
+        crear_seguimiento(self.nino, self.planeacion, datetime.date(2025, 10, 9), valoracion=1, estado='triste')
+
+        self.assertEqual(
+            set(DesarrolloNino.objects.values_list('estado_generacion', flat=True)), {'pendiente'}
+        )
+        procesar_pendientes()
+        octubre.refresh_from_db()
+        noviembre.refresh_from_db()
+        self.assertEqual(octubre.logro_mes, 'En Proceso')
+        self.assertIn('emocionales negativos en 4 ocasiones', octubre.alertas_mes)
+        self.assertEqual(noviembre.tendencia_valoracion, 'Avanza')
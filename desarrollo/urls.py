@@ -12,6 +12,7 @@ urlpatterns = [
     path('listado/', views.listar_desarrollos, name='listar_desarrollos'),
     path('ver/<int:id>/', views.ver_desarrollo, name='ver_desarrollo'),
     path('editar/<int:id>/', views.registrar_desarrollo, name='editar_desarrollo'),
+    path('estado/<int:id>/', views.estado_generacion, name='estado_generacion'),
     path('eliminar/<int:id>/', views.eliminar_desarrollo, name='eliminar_desarrollo'),
     path('eliminar-seleccionados/', views.eliminar_desarrollos_seleccionados, name='eliminar_desarrollos_seleccionados'),
     
@@ -4,18 +4,18 @@ from django.contrib import messages
 from .models import DesarrolloNino, SeguimientoDiario, EvaluacionDimension
 from planeaciones.models import Planeacion as PlaneacionModel
 from novedades.models import Novedad
-from core.models import Nino, HogarComunitario, Padre, MadreComunitaria
+from core.models import Nino
+from core import cache_pdf, pdf
+from core.fechas import filtro_mes, rango_mes
 from django.utils import timezone
 from datetime import datetime
 from django.db.models import Q
 from dateutil.relativedelta import relativedelta
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from io import BytesIO
+from django.http import JsonResponse
 from django.conf import settings
 import os
 from django.core.paginator import Paginator
+from core.paginacion import paginar
 from django.templatetags.static import static
 import calendar
 from django.views.decorators.http import require_POST
@@ -29,11 +29,13 @@ from pathlib import Path
 # -----------------------------------------------------------------
 @login_required
 def padre_ver_desarrollo(request, nino_id):
-    if request.user.rol.nombre_rol != 'padre':
+    if request.actor.nombre_rol != 'padre':
         return redirect('role_redirect')
 
+    padre = request.actor.padre
+    if padre is None:
+        return redirect('padre_dashboard')
     try:
-        padre = Padre.objects.get(usuario=request.user)
         # Obtener el niño específico y verificar que pertenece al padre
         nino = get_object_or_404(Nino, id=nino_id, padre=padre)
 
@@ -44,7 +46,7 @@ def padre_ver_desarrollo(request, nino_id):
         if mes_filtro:
             try:
                 year, month = map(int, mes_filtro.split('-'))
-                desarrollos_qs = desarrollos_qs.filter(fecha_fin_mes__year=year, fecha_fin_mes__month=month)
+                desarrollos_qs = desarrollos_qs.filter(**filtro_mes('fecha_fin_mes', year, month))
             except (ValueError, TypeError):
                 mes_filtro = ''
 
@@ -73,7 +75,7 @@ def padre_ver_desarrollo(request, nino_id):
             'desarrollos': desarrollos_paginados, # Se envía el objeto paginado
             'filtros': {'mes': mes_filtro}
         })
-    except (Padre.DoesNotExist, Nino.DoesNotExist):
+    except Nino.DoesNotExist:
         return redirect('padre_dashboard')
 
 # -----------------------------------------------------------------
@@ -81,14 +83,13 @@ def padre_ver_desarrollo(request, nino_id):
 # -----------------------------------------------------------------
 @login_required
 def listar_desarrollos(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
-    try:
-        hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         return render(request, 'madre/desarrollo_list.html', {'error': 'No tienes un hogar asignado.'})
 
-    desarrollos = DesarrolloNino.objects.filter(nino__hogar=hogar_madre).select_related('nino', 'nino__padre__usuario').order_by('-fecha_fin_mes')
+    desarrollos = DesarrolloNino.objects.filter(nino__hogar=hogar_madre).select_related('nino', 'nino__padre__usuario')
     ninos_del_hogar = Nino.objects.filter(hogar=hogar_madre)
 
     # --- Lógica de Filtrado Mejorada ---
@@ -108,14 +109,30 @@ def listar_desarrollos(request):
     if mes_filtro:
         try:
             year, month = map(int, mes_filtro.split('-'))
-            desarrollos = desarrollos.filter(fecha_fin_mes__year=year, fecha_fin_mes__month=month)
+            desarrollos = desarrollos.filter(**filtro_mes('fecha_fin_mes', year, month))
         except (ValueError, TypeError):
             pass
 
+    # --- Paginación por cursor: solo se cargan los 4 informes de la página ---
+    page_obj = paginar(request, desarrollos, ['-fecha_fin_mes'], por_pagina=4, conteo='estimado')
+
     # === LÓGICA DE DIFERENCIACIÓN DE CARDS ===
     hoy = timezone.now().date()
-    desarrollos_list = []
     from novedades.models import Novedad
+
+    # Novedades de los meses de la página en una sola consulta, agrupadas por (niño, año, mes)
+    desarrollos = page_obj.object_list
+    novedades_por_mes = {}
+    if desarrollos:
+        desde = min(d.fecha_fin_mes for d in desarrollos).replace(day=1)
+        ultimo = max(d.fecha_fin_mes for d in desarrollos)
+        for novedad in Novedad.objects.filter(
+            nino_id__in={d.nino_id for d in desarrollos},
+            fecha__gte=desde,
+            fecha__lt=rango_mes(ultimo.year, ultimo.month)[1],
+        ).order_by('fecha', 'id'):
+            novedades_por_mes.setdefault((novedad.nino_id, novedad.fecha.year, novedad.fecha.month), []).append(novedad)
+
     for desarrollo in desarrollos:
         logro = desarrollo.logro_mes
 
@@ -144,13 +161,11 @@ def listar_desarrollos(request):
         else:
             desarrollo.is_actual = False
 
-        # Obtener novedades del mes para el niño
-        novedades_qs = Novedad.objects.filter(
-            nino=desarrollo.nino,
-            fecha__year=desarrollo.fecha_fin_mes.year,
-            fecha__month=desarrollo.fecha_fin_mes.month
-        ).order_by('fecha')
-        if novedades_qs.exists():
+        # Novedades del mes para el niño
+        novedades_qs = novedades_por_mes.get(
+            (desarrollo.nino_id, desarrollo.fecha_fin_mes.year, desarrollo.fecha_fin_mes.month), []
+        )
+        if novedades_qs:
             novedades_html = []
             for novedad in novedades_qs:
                 tipo = novedad.get_tipo_display() if hasattr(novedad, 'get_tipo_display') else novedad.tipo
@@ -163,12 +178,6 @@ def listar_desarrollos(request):
             desarrollo.novedades_mes = "".join(novedades_html)
         else:
             desarrollo.novedades_mes = ""
-        desarrollos_list.append(desarrollo)
-
-    # --- Paginación ---
-    paginator = Paginator(desarrollos_list, 4)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
 
     filtros = {
         'nino': nino_id_filtro,
@@ -177,6 +186,7 @@ def listar_desarrollos(request):
 
     return render(request, 'madre/desarrollo_list.html', {
         'desarrollos': page_obj,
+        'hay_generacion_en_curso': any(d.generacion_en_curso for d in page_obj),
         'ninos': ninos_del_hogar,
         'nino_id_filtro': nino_id_filtro,
         'mes_filtro': mes_filtro,
@@ -186,12 +196,11 @@ def listar_desarrollos(request):
 
 @login_required
 def generar_evaluacion_mensual(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
-    try:
-        hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         messages.error(request, "No tienes un hogar comunitario asignado.")
         return redirect('madre_dashboard')
 
@@ -220,11 +229,11 @@ def generar_evaluacion_mensual(request):
             messages.warning(request, f"Ya existe una evaluación para {nino.nombres} en el mes seleccionado.")
             return redirect(reverse('desarrollo:listar_desarrollos') + f'?nino={nino_id}')
 
-        # Crear la instancia. El método save() llamará al servicio de generación automática.
+        # Crear la instancia. El método save() la deja 'pendiente' y encola la generación automática.
         try:
             nino = Nino.objects.get(id=nino_id)
             evaluacion = DesarrolloNino.objects.create(nino=nino, fecha_fin_mes=fecha_fin_mes)
-            messages.success(request, f"Evaluación para {nino.nombres} del mes de {mes_str} generada exitosamente.")
+            messages.success(request, f"La evaluación para {nino.nombres} del mes de {mes_str} se está generando. Estará lista en unos segundos.")
             return redirect('desarrollo:ver_desarrollo', id=evaluacion.id)
         except Exception as e:
             messages.error(request, f"Ocurrió un error al generar la evaluación: {e}")
@@ -238,16 +247,16 @@ def generar_evaluacion_mensual(request):
 
 @login_required
 def ver_desarrollo(request, id):
-    if request.user.rol.nombre_rol not in ['madre_comunitaria', 'padre']:
+    if request.actor.nombre_rol not in ['madre_comunitaria', 'padre']:
         return redirect('role_redirect')
 
     desarrollo = get_object_or_404(DesarrolloNino, id=id)
 
     # --- Lógica de Seguridad (sin cambios) ---
-    if request.user.rol.nombre_rol == 'madre_comunitaria':
+    if request.actor.nombre_rol == 'madre_comunitaria':
         if desarrollo.nino.hogar.madre.usuario != request.user:
             return redirect('desarrollo:listar_desarrollos')
-    elif request.user.rol.nombre_rol == 'padre':
+    elif request.actor.nombre_rol == 'padre':
         if desarrollo.nino.padre.usuario != request.user:
             return redirect('padre_dashboard')
     
@@ -258,9 +267,24 @@ def ver_desarrollo(request, id):
     return redirect(reverse('desarrollo:registrar_desarrollo') + f'?nino={desarrollo.nino.id}&mes={mes_str}')
 
 
+@login_required
+def estado_generacion(request, id):
+    """Estado de la generación automática; el formulario lo consulta mientras está bloqueado."""
+    if request.actor.nombre_rol != 'madre_comunitaria':
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
+        return JsonResponse({'error': 'No tienes un hogar asignado'}, status=404)
+    desarrollo = get_object_or_404(DesarrolloNino, id=id, nino__hogar=hogar_madre)
+    return JsonResponse({
+        'estado': desarrollo.estado_generacion,
+        'en_curso': desarrollo.generacion_en_curso,
+    })
+
+
 @login_required
 def eliminar_desarrollo(request, id):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
     desarrollo = get_object_or_404(DesarrolloNino, id=id)
@@ -280,7 +304,7 @@ def eliminar_desarrollos_seleccionados(request):
     """
     Vista para eliminar múltiples registros de desarrollo seleccionados mediante checkboxes.
     """
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, "No tienes permiso para realizar esta acción.")
         return redirect('role_redirect')
 
@@ -312,12 +336,11 @@ def eliminar_desarrollos_seleccionados(request):
 
 @login_required
 def generar_reporte(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
-    try:
-        hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         return render(request, 'madre/reporte_form.html', {'error': 'No tienes un hogar asignado.'})
 
     ninos_del_hogar = Nino.objects.filter(hogar=hogar_madre)
@@ -368,11 +391,8 @@ def reporte_resumen(request, nino_id):
 
     # Asegurarse de que la madre solo pueda ver niños de su hogar
     if not request.user.is_staff:
-        try:
-            hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-            if nino.hogar != hogar_madre:
-                return redirect('gestion_ninos')
-        except HogarComunitario.DoesNotExist:
+        hogar_madre = request.actor.hogar
+        if hogar_madre is None or nino.hogar_id != hogar_madre.id:
             return redirect('gestion_ninos')
 
     # --- Lógica de Filtrado ---
@@ -472,34 +492,28 @@ def generar_reporte_pdf(request, nino_id):
         'hogar_comunitario': nino.hogar,
         'usuario_generador': f"{request.user.nombres} {request.user.apellidos}".strip() or request.user.documento,
     }
-    template = get_template(template_path)
-    html = template.render(context)
-
-    # Generar PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="reporte_{nino.nombres}_{nino.apellidos}.pdf"'
-    
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    
-    if pisa_status.err:
-        return HttpResponse('Error generando PDF. <pre>' + html + '</pre>')
-
-    return response
+    return pdf.respuesta_pdf(
+        request, template_path, context, f"reporte_{nino.nombres}_{nino.apellidos}.pdf",
+        disposicion='inline', mensaje_error='Error generando PDF.',
+    )
 
 @login_required
 def generar_certificado_desarrollo_pdf(request, desarrollo_id):
     """
     Genera un certificado en PDF para un registro de desarrollo específico.
     """
-    desarrollo = get_object_or_404(DesarrolloNino, id=desarrollo_id)
+    desarrollo = get_object_or_404(
+        DesarrolloNino.objects.select_related('nino__padre__usuario', 'nino__hogar__madre__usuario'),
+        id=desarrollo_id,
+    )
     nino = desarrollo.nino
 
     # --- Lógica de Seguridad ---
-    if request.user.rol.nombre_rol == 'madre_comunitaria':
+    if request.actor.nombre_rol == 'madre_comunitaria':
         if nino.hogar.madre.usuario != request.user:
             messages.error(request, "No tienes permiso para generar este certificado.")
             return redirect('desarrollo:listar_desarrollos')
-    elif request.user.rol.nombre_rol == 'padre':
+    elif request.actor.nombre_rol == 'padre':
         if nino.padre.usuario != request.user:
             messages.error(request, "No tienes permiso para ver este certificado.")
             return redirect('padre_dashboard')
@@ -565,35 +579,31 @@ def generar_certificado_desarrollo_pdf(request, desarrollo_id):
         'logo_url': logo_path,  # Se pasa la ruta del sistema de archivos
         'fondo_url': fondo_url, # Se pasa la ruta del sistema de archivos
         'nombre_mes': nombre_mes, # Se añade el nombre del mes al contexto
-        'fecha_emision': timezone.now(),
     }
-    template = get_template(template_path)
-    html = template.render(context)
 
-    # --- Generar PDF ---
-    response = HttpResponse(content_type='application/pdf')
+    # --- Generar PDF (o servirlo desde la caché en disco si nada cambió) ---
     # Con 'inline' se abre en el navegador, con 'attachment' se descarga.
-    response['Content-Disposition'] = f'inline; filename="certificado_{nino.nombres}_{desarrollo.fecha_fin_mes.strftime("%Y-%m")}.pdf"'
-    
-    # Al pasar rutas de archivo absolutas, ya no necesitamos un 'link_callback'.
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    
-    if pisa_status.err:
-        return HttpResponse('Error al generar el certificado en PDF. <pre>' + html + '</pre>')
-
-    return response
+    return cache_pdf.respuesta_pdf_cacheada(
+        request, template_path, lambda clave: context,
+        f"certificado_{nino.nombres}_{desarrollo.fecha_fin_mes.strftime('%Y-%m')}.pdf",
+        grupo=cache_pdf.grupo_nino(nino.id), nombre=f"desarrollo-{desarrollo.id}",
+        versiones=[
+            desarrollo.fecha_actualizacion, nino.fecha_actualizacion,
+            nino.hogar.fecha_actualizacion, nino.hogar.madre.usuario.fecha_actualizacion,
+        ],
+        disposicion='inline', mensaje_error='Error al generar el certificado en PDF.',
+    )
 
 # -----------------------------------------------------------------
 # CRUD SEGUIMIENTO DIARIO PARA MADRE COMUNITARIA
 # -----------------------------------------------------------------
 @login_required
 def registrar_seguimiento_diario(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
-    try:
-        hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         return render(request, 'madre/seguimiento_diario_form.html', {'error': 'No tienes un hogar asignado.'})
 
     # --- Lógica para guardar el formulario (POST) ---
@@ -750,12 +760,11 @@ def registrar_seguimiento_diario(request):
 
 @login_required
 def listar_seguimientos(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
-    try:
-        hogar_madre = HogarComunitario.objects.get(madre__usuario=request.user)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         return render(request, 'madre/seguimiento_diario_list.html', {'error': 'No tienes un hogar asignado.'})
 
     nino_id_filtro = request.GET.get('nino')
@@ -767,7 +776,7 @@ def listar_seguimientos(request):
         nino__hogar=hogar_madre
     ).select_related(
         'nino', 'planeacion'
-    ).prefetch_related('evaluaciones_dimension').order_by('-fecha')
+    ).prefetch_related('evaluaciones_dimension__dimension')
 
     # Si se especifica un niño, se convierte en el filtro principal
     if nino_id_filtro:
@@ -788,10 +797,8 @@ def listar_seguimientos(request):
         # Si no hay fecha, no se filtra por fecha, mostrando todos los seguimientos del niño (si aplica)
         fecha_str = None
 
-    # --- Paginación ---
-    paginator = Paginator(seguimientos_query, 3) # Mostrar 6 seguimientos por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # --- Paginación por cursor (3 seguimientos por página) ---
+    page_obj = paginar(request, seguimientos_query, ['-fecha'], por_pagina=3, conteo='estimado')
     
     filtros = {
         'nino': nino_id_filtro,
@@ -808,7 +815,7 @@ def listar_seguimientos(request):
 
 @login_required
 def editar_seguimiento_diario(request, id):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
     seguimiento = get_object_or_404(SeguimientoDiario, id=id)
@@ -873,7 +880,7 @@ def editar_seguimiento_diario(request, id):
 
 @login_required
 def eliminar_seguimiento(request, id):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('role_redirect')
 
     seguimiento = get_object_or_404(SeguimientoDiario, id=id)
@@ -898,7 +905,7 @@ def eliminar_seguimientos_lote(request):
     """
     Vista para eliminar múltiples registros de seguimiento diario seleccionados.
     """
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         messages.error(request, "No tienes permiso para realizar esta acción.")
         return redirect('role_redirect')
 
@@ -923,12 +930,10 @@ def eliminar_seguimientos_lote(request):
 
 @login_required
 def registrar_desarrollo(request):
-    if request.user.rol.nombre_rol != 'madre_comunitaria':
+    if request.actor.nombre_rol != 'madre_comunitaria':
         return redirect('home')
-    try:
-        madre_comunitaria = MadreComunitaria.objects.get(usuario=request.user)
-        hogar_madre = HogarComunitario.objects.get(madre=madre_comunitaria)
-    except HogarComunitario.DoesNotExist:
+    hogar_madre = request.actor.hogar
+    if hogar_madre is None:
         messages.error(request, 'No tienes un hogar asignado.')
         return redirect('home')
     
@@ -958,10 +963,16 @@ def registrar_desarrollo(request):
         # Usamos 'nino_hidden' como indicador de que estamos en el paso 2.
         if 'nino_hidden' in request.POST:
             from .services import GeneradorEvaluacionMensual
+            from .resumenes import reencolar_informes
 
             # Si hay ID, es una ACTUALIZACIÓN.
             if desarrollo_id:
                 desarrollo = get_object_or_404(DesarrolloNino, id=desarrollo_id, nino=nino)
+                if desarrollo.generacion_en_curso:
+                    # El formulario está bloqueado mientras el worker genera; guardar ahora
+                    # mezclaría las ediciones con el texto que está por escribir.
+                    messages.warning(request, 'El informe todavía se está generando. Espera a que termine para editarlo.')
+                    return redirect('desarrollo:ver_desarrollo', id=desarrollo.id)
                 # Actualizar solo los campos manuales y los editables
                 desarrollo.evaluacion_cognitiva = request.POST.get('evaluacion_cognitiva', '')
                 desarrollo.evaluacion_comunicativa = request.POST.get('evaluacion_comunicativa', '')
@@ -979,8 +990,7 @@ def registrar_desarrollo(request):
                 # Analizar seguimientos del mes para alertas generales
                 seguimientos_mes = SeguimientoDiario.objects.filter(
                     nino=nino,
-                    fecha__year=fecha_fin_mes.year,
-                    fecha__month=fecha_fin_mes.month
+                    **filtro_mes('fecha', fecha_fin_mes.year, fecha_fin_mes.month)
                 )
                 alertas_generales = []
                 # Bajón de rendimiento: comparar promedio con mes anterior
@@ -991,8 +1001,7 @@ def registrar_desarrollo(request):
                     mes_anterior = fecha_fin_mes - relativedelta(months=1)
                     seguimientos_anteriores = SeguimientoDiario.objects.filter(
                         nino=nino,
-                        fecha__year=mes_anterior.year,
-                        fecha__month=mes_anterior.month
+                        **filtro_mes('fecha', mes_anterior.year, mes_anterior.month)
                     )
                     valoraciones_anteriores = [s.valoracion for s in seguimientos_anteriores if s.valoracion is not None]
                     if valoraciones_anteriores:
@@ -1021,9 +1030,10 @@ def registrar_desarrollo(request):
                     messages.warning(request, f'Ya existe un registro para {nino.nombres} en este mes.')
                     return redirect(reverse('desarrollo:listar_desarrollos') + f'?nino={nino.id}')
                 
-                # 1. Crear la instancia y guardarla. Esto ejecuta el generador automático.
-                desarrollo = DesarrolloNino.objects.create(nino=nino, fecha_fin_mes=fecha_fin_mes)
-                desarrollo.refresh_from_db() # Recargamos para tener los datos generados
+                # 1. Crear la instancia EN MEMORIA y generar los datos automáticos.
+                #    No se usa la generación diferida porque el worker sobreescribiría tus ediciones.
+                desarrollo = DesarrolloNino(nino=nino, fecha_fin_mes=fecha_fin_mes)
+                GeneradorEvaluacionMensual(desarrollo).run(save_instance=False)
                 
                 # 2. Actualizar la instancia con los datos del formulario (tus ediciones).
                 #    Esto sobreescribe los valores automáticos con tus valores.
@@ -1039,22 +1049,20 @@ def registrar_desarrollo(request):
                 desarrollo.observaciones_adicionales = request.POST.get('observaciones_adicionales', '')
                 desarrollo.recomendaciones_personales = request.POST.get('recomendaciones_personales', '')
                 
-                # 3. Guardar los cambios finales sin volver a ejecutar el generador.
+                # 3. Guardar una sola vez sin encolar el generador.
                 desarrollo.save(run_generator=False)
                 messages.success(request, f'El registro para {nino.nombres} se guardó exitosamente.')
 
-            # Recalcular tendencia del mes siguiente en ambos casos (crear/actualizar)
-            fecha_mes_siguiente = desarrollo.fecha_fin_mes + relativedelta(months=1)
-            desarrollo_siguiente = DesarrolloNino.objects.filter(nino=nino, fecha_fin_mes__year=fecha_mes_siguiente.year, fecha_fin_mes__month=fecha_mes_siguiente.month).first()
-            if desarrollo_siguiente:
-                GeneradorEvaluacionMensual(desarrollo_siguiente).run(only_tendencia=True)
+            # El informe del mes siguiente (si existe) usa este como referencia de
+            # tendencia: vuelve a la cola en ambos casos (crear/actualizar).
+            reencolar_informes(nino.id, desarrollo.fecha_fin_mes, incluir_mes=False)
 
             return redirect(reverse('desarrollo:listar_desarrollos') + f'?nino={nino.id}')
 
         # --- ACCIÓN: GENERAR (Sin Guardar) ---
         else:
             # Validaciones antes de generar
-            if not SeguimientoDiario.objects.filter(nino=nino, fecha__year=fecha_fin_mes.year, fecha__month=fecha_fin_mes.month).exists():
+            if not SeguimientoDiario.objects.filter(nino=nino, **filtro_mes('fecha', fecha_fin_mes.year, fecha_fin_mes.month)).exists():
                 messages.error(request, f'No se puede generar el informe para {nino.nombres} porque no tiene seguimientos diarios registrados en ese mes.')
                 return redirect(reverse('desarrollo:listar_desarrollos') + f'?nino={nino.id}')
 
@@ -1073,8 +1081,8 @@ def registrar_desarrollo(request):
             generador.run(save_instance=False) # Método modificado para no guardar
 
             # Contadores para la vista previa
-            seguimientos_count = generador.seguimientos_mes.count()
-            novedades_count = generador.novedades_mes.count()
+            seguimientos_count = len(generador.seguimientos_mes)
+            novedades_count = len(generador.novedades_mes)
 
             # Renderizar el formulario con los datos generados, listo para ser guardado
             return render(request, 'madre/desarrollo_form.html', {
@@ -1105,20 +1113,17 @@ def registrar_desarrollo(request):
             # Contadores para la vista de edición.
             seguimientos_mes_count = SeguimientoDiario.objects.filter( 
                 nino=desarrollo_existente.nino, 
-                fecha__year=fecha_fin_mes.year, 
-                fecha__month=fecha_fin_mes.month
+                **filtro_mes('fecha', fecha_fin_mes.year, fecha_fin_mes.month)
             ).count()
             novedades_mes_count = Novedad.objects.filter(
                 nino=desarrollo_existente.nino, 
-                fecha__year=fecha_fin_mes.year, 
-                fecha__month=fecha_fin_mes.month
+                **filtro_mes('fecha', fecha_fin_mes.year, fecha_fin_mes.month)
             ).count()
             
             # --- CORRECCIÓN: Cargar las novedades para la vista previa en modo edición ---
             alertas_novedades = Novedad.objects.filter(
                 nino=desarrollo_existente.nino,
-                fecha__year=fecha_fin_mes.year,
-                fecha__month=fecha_fin_mes.month
+                **filtro_mes('fecha', fecha_fin_mes.year, fecha_fin_mes.month)
             ).order_by('fecha')
 
             # Renderizar el formulario con el registro existente para edición
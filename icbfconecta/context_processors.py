@@ -1,3 +1,8 @@
+from functools import partial
+
+from notifications import services as notificaciones
+
+
 def user_context(request):
     """
     Añade información del usuario al contexto de todos los templates.
@@ -12,9 +17,13 @@ def user_context(request):
         # Añadimos el nombre y la foto de perfil al contexto
         context['nombre_madre'] = nombre_completo
 
-        # 💡 CORRECCIÓN: Añadir la URL de la foto de perfil correcta para la madre.
-        # La foto está en el perfil de la madre (madre_profile), no directamente en el usuario.
-        if hasattr(request.user, 'madre_profile') and request.user.madre_profile.foto_madre:
-            context['foto_perfil_url'] = request.user.madre_profile.foto_madre.url
+        # La foto está en el perfil de la madre; request.actor la trae de la caché (core.actor)
+        actor = getattr(request, 'actor', None)
+        if actor is not None and actor.foto_url:
+            context['foto_perfil_url'] = actor.foto_url
+
+        # 🔔 Contador de la campana: la plantilla lo evalúa solo si lo muestra
+        # y sale de la caché del servicio de notificaciones.
+        context['notif_count'] = partial(notificaciones.contar_no_leidas, request.user)
 
     return context
@@ -56,10 +56,12 @@ AUTH_USER_MODEL = 'core.Usuario'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.presupuesto_consultas.PresupuestoConsultasMiddleware',  # solo con DEBUG o CONSULTAS_INSTRUMENTAR
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.actor.ActorMiddleware',  # request.actor: rol, perfil y hogar del usuario (en caché)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,14 +89,151 @@ WSGI_APPLICATION = 'icbfconecta.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# El motor se elige con variables de entorno (o en .env):
+#   DB_ENGINE=postgresql   producción. Varios hogares registrando asistencia a la vez
+#                          no quedan en fila detrás del único bloqueo de escritura de SQLite.
+#       DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#       DB_CONN_MAX_AGE    segundos que se reutiliza cada conexión (def. 60)
+#       DB_POOL=1          pool de conexiones de psycopg 3 en lugar de conexiones persistentes
+#       DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT   tamaño del pool y espera por conexión (s)
+#   DB_ENGINE=sqlite       (por defecto) desarrollo local, en modo WAL.
+#       DB_NAME            ruta del archivo (def. db.sqlite3)
+# Las pruebas usan el motor configurado: DB_ENGINE=postgresql python manage.py test.
+# python manage.py probar_motores las ejecuta en SQLite y luego en PostgreSQL.
+
+def _entero_entorno(nombre, por_defecto):
+    return int(os.environ.get(nombre) or por_defecto)
+
+
+def _booleano_entorno(nombre):
+    return os.environ.get(nombre, '').strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').strip().lower()
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    _opciones_postgres = {'connect_timeout': _entero_entorno('DB_CONNECT_TIMEOUT', 5)}
+    if _booleano_entorno('DB_POOL'):
+        _opciones_postgres['pool'] = {
+            'min_size': _entero_entorno('DB_POOL_MIN', 2),
+            'max_size': _entero_entorno('DB_POOL_MAX', 10),
+            'timeout': _entero_entorno('DB_POOL_TIMEOUT', 10),
+        }
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'icbfconecta'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Con pool, Django exige CONN_MAX_AGE = 0: la conexión vuelve al pool en cada petición
+            'CONN_MAX_AGE': 0 if 'pool' in _opciones_postgres else _entero_entorno('DB_CONN_MAX_AGE', 60),
+            # Revisa la conexión antes de reutilizarla; con pool, Django lo pasa como 'check' del pool
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': _opciones_postgres,
+            # La búsqueda quita las tildes con translate(): la base de pruebas también en UTF8
+            'TEST': {'CHARSET': 'UTF8', 'TEMPLATE': 'template0'},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Las transacciones toman el bloqueo de escritura al empezar (IMMEDIATE) y
+                # esperan hasta 'timeout' segundos en vez de fallar con "database is locked"
+                # a mitad de camino.
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# PRAGMA que core.pragmas aplica a cada conexión SQLite nueva.
+# WAL: las lecturas no esperan a la escritura en curso.
+SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+#   DB_SQLITE_AJUSTES=1    además memoria para páginas y mapeo del archivo (despliegues regionales):
+#       DB_SQLITE_MMAP_MB  archivo mapeado en memoria (def. 256)
+#       DB_SQLITE_CACHE_MB caché de páginas por conexión (def. 64)
+#       DB_SQLITE_BUSY_MS  espera máxima por el bloqueo de escritura (def. 20000)
+if _booleano_entorno('DB_SQLITE_AJUSTES'):
+    SQLITE_PRAGMAS.update({
+        'mmap_size': _entero_entorno('DB_SQLITE_MMAP_MB', 256) * 1024 * 1024,
+        'cache_size': -_entero_entorno('DB_SQLITE_CACHE_MB', 64) * 1024,  # negativo: en KiB
+        'busy_timeout': _entero_entorno('DB_SQLITE_BUSY_MS', 20000),
+        'temp_store': 'MEMORY',
+    })
+
+# Caché (actor, contador y versión de notificaciones, dashboard y calendario del padre).
+# Debe ser compartida por todos los procesos: las señales la invalidan solo en el
+# proceso que guardó, así que una caché local dejaría datos viejos en los demás.
+#   CACHE_REDIS_URL=redis://host:6379/0       Redis (requiere el paquete redis)
+#   CACHE_MEMCACHED=host:11211[,host:11211]   Memcached (requiere el paquete pymemcache)
+#   (ninguna de las dos)                      respaldo: tabla 'cache_icbf' de la base de
+#                                             datos (la crea la migración 0003 de notifications).
+#       Cada lectura de la caché es entonces una consulta SQL y el flujo SSE de
+#       notificaciones responde una vez por conexión; ver core/caches.py.
+#       CACHE_MAX_ENTRADAS                    entradas antes de podar la tabla (def. 10000)
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
+    }
+elif os.environ.get('CACHE_MEMCACHED'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['CACHE_MEMCACHED'].split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_icbf',
+            'OPTIONS': {'MAX_ENTRIES': _entero_entorno('CACHE_MAX_ENTRADAS', 10000)},
+        }
     }
+
+# Presupuesto de consultas por petición (core.presupuesto_consultas). El middleware
+# solo se activa con DEBUG o con DB_INSTRUMENTAR=1; reporta en el log las vistas
+# que se pasan y las sentencias repetidas (N+1).
+CONSULTAS_INSTRUMENTAR = DEBUG or _booleano_entorno('DB_INSTRUMENTAR')
+CONSULTAS_PRESUPUESTO_DEFECTO = 30
+CONSULTAS_PRESUPUESTOS = {
+    'madre_dashboard': 20,
+    'padre_dashboard': 10,
+    'calendario_padres': 10,
+    'listar_ninos': 10,
+    'asistencia_form': 12,
+    'historial_asistencia': 10,
+    'desarrollo:listar_desarrollos': 10,
+    'desarrollo:listar_seguimientos': 12,
+    'correos:enviar': 8,
+    'buscar': 6,
+}
+# Con el respaldo DatabaseCache (sin Redis ni Memcached) las vistas que leen y
+# llenan la caché suman esas sentencias a su cuenta.
+CONSULTAS_PRESUPUESTOS_CACHE_BD = {
+    'padre_dashboard': 14,
+    'calendario_padres': 22,
+    'asistencia_form': 14,
 }
 
+# Caché en disco de certificados PDF (core.cache_pdf). Cambiar PDF_CACHE_VERSION en
+# un despliegue descarta los PDF guardados (p. ej. si cambian estilos o imágenes).
+PDF_CACHE_VERSION = os.environ.get('PDF_CACHE_VERSION', '1')
+
+# Listados paginados por cursor (core.paginacion): con conteo 'estimado' se cuentan
+# como mucho estas filas; por encima se muestra una estimación.
+PAGINACION_TOPE_CONTEO = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
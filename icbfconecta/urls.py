@@ -13,7 +13,7 @@ from core.forms import CustomAuthForm
 from django.conf import settings   
 from django.conf.urls.static import static
 from django.urls import path
-from core.views import calendario_padres, obtener_info
+from core.views import calendario_padres, calendario_feed, obtener_info
 
 
 
@@ -56,6 +56,7 @@ urlpatterns = [
     path('padre/desarrollo/<int:nino_id>/', views.padre_ver_desarrollo, name='padre_ver_desarrollo'),
     path('padre/calendario/', calendario_padres, name='calendario_padres'),
     path('padre/calendario/info/', obtener_info, name='obtener_info'),
+    path('padre/calendario/feed/', calendario_feed, name='calendario_feed'),
 
     # --- Gestión de Perfil de Usuario ---
     path('perfil/cambiar-contrasena/', views.cambiar_contrasena, name='cambiar_contrasena'),
@@ -78,6 +79,9 @@ urlpatterns = [
     path('reportes/administradores/excel/', views.reporte_administradores_excel, name='reporte_administradores_excel'),
     path('reportes/madres/excel/', views.reporte_madres_excel, name='reporte_madres_excel'),
     path('reportes/hogares/excel/', views.reporte_hogares_excel, name='reporte_hogares_excel'),
+    path('reportes/administradores/csv/', views.reporte_administradores_csv, name='reporte_administradores_csv'),
+    path('reportes/madres/csv/', views.reporte_madres_csv, name='reporte_madres_csv'),
+    path('reportes/hogares/csv/', views.reporte_hogares_csv, name='reporte_hogares_csv'),
 
     # --- CRUD Administradores ---
     path('administradores/', views.listar_administradores, name='listar_administradores'),
@@ -98,10 +102,12 @@ urlpatterns = [
     path('ninos/<int:id>/eliminar/', views.eliminar_nino, name='eliminar_nino'),
     path('ninos/subir-documentos/', views.subir_documentos_nino, name='subir_documentos_nino'),
     path('gestion-ninos/', views.gestion_ninos, name='gestion_ninos'),
+    path('buscar/', views.buscar, name='buscar'),  # búsqueda de texto en el hogar de la madre
      path('ninos/<int:nino_id>/reporte_pdf/', views.reporte_matricula_nino_pdf, name='reporte_matricula_nino_pdf'),
      path('ninos/<int:nino_id>/certificado/', views.certificado_matricula_pdf, name='certificado_matricula_pdf'),
      path('ninos/reporte-general-hogar/', views.reporte_general_hogar_pdf, name='reporte_general_hogar'),
      path('ninos/reporte/', views.generar_reporte_ninos, name='generar_reporte_ninos'),
+     path('pdf/<str:token>/', views.descargar_pdf, name='descargar_pdf'),
 
     # --- URLs de Desarrollo (Ahora en su propia app) ---
     path('desarrollo/', include('desarrollo.urls')),
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationArchive
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("title", "level", "created_at", "read")
     list_filter = ("level", "read")
     search_fields = ("title", "message")
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "day", "total", "grave_count", "warning_count", "info_count")
+    date_hierarchy = "day"
@@ -0,0 +1,126 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from notifications import retencion, services
+from notifications.models import Notification, NotificationArchive
+
+USUARIOS = 10
+DIAS_HISTORIA = 400
+CLAVES_DEDUP = 20
+
+
+def _medir(funcion, repeticiones):
+    """Mediana en milisegundos de ``repeticiones`` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tiempos), 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del listado de notificaciones, la deduplicación y el conteo de no "
+        "leídas a medida que crece el historial, antes y después de compactar. Trabaja en "
+        "una base de datos de prueba temporal; no toca los datos reales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='1000,5000,20000', help="Notificaciones por usuario, separadas por coma.")
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--salida', help="Ruta de un archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, **options):
+        tamanos = [int(t) for t in options['tamanos'].split(',') if t.strip()]
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            resultados = [self._escenario(tamano, options['repeticiones']) for tamano in tamanos]
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        self.stdout.write(f"{'historial':>10} {'fase':>9} {'filas':>8} {'página':>9} {'pág. 2':>9} {'dedup':>9} {'no leídas':>10}  (ms)")
+        for resultado in resultados:
+            for fase in ('antes', 'despues'):
+                m = resultado[fase]
+                self.stdout.write(
+                    f"{resultado['por_usuario']:>10} {fase:>9} {m['filas']:>8} {m['pagina']:>9} "
+                    f"{m['pagina_2']:>9} {m['dedup']:>9} {m['no_leidas']:>10}"
+                )
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"📄 Resultados guardados en {options['salida']}"))
+
+    def _escenario(self, por_usuario, repeticiones):
+        Notification.objects.all().delete()
+        NotificationArchive.objects.all().delete()
+        get_user_model().objects.all().delete()
+
+        usuarios = [
+            get_user_model().objects.create(
+                documento=900000 + i, nombres=f"Bench {i}", apellidos="Notificaciones", correo=f"bench{i}@example.com",
+            )
+            for i in range(USUARIOS)
+        ]
+        self._poblar(usuarios, por_usuario)
+        usuario = usuarios[0]
+
+        def medir_fase():
+            _, cursor = services.pagina(usuario)
+            claves = [services.construir(usuario, '', '', dedup_key=services.clave_ausencias(i)) for i in range(CLAVES_DEDUP)]
+            return {
+                'filas': Notification.objects.count(),
+                'pagina': _medir(lambda: services.pagina(usuario), repeticiones),
+                'pagina_2': _medir(lambda: services.pagina(usuario, antes=cursor), repeticiones),
+                'dedup': _medir(lambda: services._ya_notificadas(claves), repeticiones),
+                'no_leidas': _medir(lambda: Notification.objects.filter(recipient=usuario, read=False).count(), repeticiones),
+            }
+
+        antes = medir_fase()
+        inicio = time.perf_counter()
+        movidas = retencion.compactar()
+        podadas, _ = retencion.podar()
+        duracion = round(time.perf_counter() - inicio, 3)
+        despues = medir_fase()
+        self.stdout.write(f"· {por_usuario} por usuario: {movidas} compactadas y {podadas} podadas en {duracion} s")
+        return {
+            'por_usuario': por_usuario,
+            'compactadas': movidas,
+            'podadas': podadas,
+            'segundos_compactacion': duracion,
+            'antes': antes,
+            'despues': despues,
+        }
+
+    def _poblar(self, usuarios, por_usuario):
+        """Historial repartido en DIAS_HISTORIA días: lo reciente sin leer, lo antiguo casi todo leído."""
+        rnd = random.Random(por_usuario)
+        ahora = timezone.now()
+        niveles = ['info', 'info', 'warning', 'grave']
+        for usuario in usuarios:
+            edades = sorted((rnd.random() * DIAS_HISTORIA for _ in range(por_usuario)), reverse=True)
+            creadas = Notification.objects.bulk_create([
+                Notification(
+                    recipient=usuario,
+                    title=f"Ausencias críticas: Niño {i % 50}",
+                    message="Generada por benchmark_notificaciones.",
+                    level=rnd.choice(niveles),
+                    read=edad > 7 or rnd.random() < 0.5,
+                    dedup_key=services.clave_ausencias(i % 50),
+                )
+                for i, edad in enumerate(edades)
+            ], batch_size=2000)
+            # auto_now_add ignora el valor dado al crear: la antigüedad se asigna después
+            for notificacion, edad in zip(creadas, edades):
+                notificacion.created_at = ahora - timedelta(days=edad)
+            Notification.objects.bulk_update(creadas, ['created_at'], batch_size=1000)
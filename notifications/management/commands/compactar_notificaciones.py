@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notifications import retencion
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta las notificaciones leídas antiguas en resúmenes diarios por usuario "
+        "(NotificationArchive) y poda lo que supera la retención. Pensado para ejecutarse "
+        "a diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help="Compacta las leídas con más de estos días (def. NOTIFICACIONES_DIAS_COMPACTAR o 30).")
+        parser.add_argument('--retencion', type=int, help="Borra lo que tenga más de estos días (def. NOTIFICACIONES_DIAS_RETENCION o 365).")
+        parser.add_argument('--lote', type=int, default=retencion.TAMANO_LOTE, help="Notificaciones por transacción.")
+        parser.add_argument('--sin-podar', action='store_true', dest='sin_podar', help="Solo compacta, no borra nada por antigüedad.")
+
+    def handle(self, *args, **options):
+        ahora = timezone.now()
+        limite_compactar = retencion.limite_compactar(ahora)
+        limite_retencion = retencion.limite_retencion(ahora)
+        if options['dias'] is not None:
+            limite_compactar = ahora - timedelta(days=options['dias'])
+        if options['retencion'] is not None:
+            limite_retencion = ahora - timedelta(days=options['retencion'])
+        if not options['sin_podar'] and limite_retencion > limite_compactar:
+            raise CommandError("La retención debe ser mayor o igual a los días de compactación.")
+
+        movidas = retencion.compactar(limite_compactar, lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"🗜️ {movidas} notificaciones leídas compactadas en el archivo."))
+        if options['sin_podar']:
+            return
+        notificaciones, resumenes = retencion.podar(limite_retencion, lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 {notificaciones} notificaciones y {resumenes} resúmenes diarios eliminados por antigüedad."
+        ))
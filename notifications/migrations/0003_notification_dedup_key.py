@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:20
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat
+
+
+def asignar_claves(apps, schema_editor):
+    """Da clave de deduplicación a las notificaciones existentes de novedades y ausencias."""
+    Notification = apps.get_model('notifications', 'Notification')
+    object_id = Cast('object_id', models.CharField())
+    Notification.objects.filter(
+        content_type__app_label='novedades', content_type__model='novedad', object_id__isnull=False,
+    ).update(dedup_key=Concat(models.Value('novedad-'), object_id))
+    Notification.objects.filter(
+        content_type__app_label='core', content_type__model='nino', object_id__isnull=False,
+        title__startswith='Ausencias críticas:',
+    ).update(dedup_key=Concat(models.Value('ausencias-nino-'), object_id))
+
+
+def crear_tabla_cache(apps, schema_editor):
+    """Crea la tabla de la caché compartida (DatabaseCache); no hace nada con Redis o si ya existe."""
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_alter_notification_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedup_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'read', '-created_at'], name='notificatio_recipie_b41e6c_idx'),
+        ),
+        migrations.RunPython(asignar_claves, migrations.RunPython.noop),
+        migrations.RunPython(crear_tabla_cache, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,8 @@ class Notification(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
+    # Identifica el evento (p. ej. 'ausencias-nino-12'): no se repite mientras haya una sin leer
+    dedup_key = models.CharField(max_length=100, blank=True, default="", db_index=True)
 
     recipient = models.ForeignKey(
         User,
@@ -36,6 +38,30 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["recipient", "read", "-created_at"])]
 
     def __str__(self):
         return f"{self.title} ({self.level})"
+
+
+class NotificationArchive(models.Model):
+    """Resumen diario de las notificaciones leídas ya compactadas (ver notifications.retencion)."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="notifications_archived"
+    )
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    grave_count = models.PositiveIntegerField(default=0)
+    warning_count = models.PositiveIntegerField(default=0)
+    info_count = models.PositiveIntegerField(default=0)
+    sample_titles = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day"]
+        unique_together = ("recipient", "day")
+
+    def __str__(self):
+        return f"{self.recipient} {self.day}: {self.total}"
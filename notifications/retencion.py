@@ -0,0 +1,120 @@
+"""
+Retención de notificaciones.
+
+- ``compactar`` agrupa las notificaciones leídas más antiguas que
+  ``NOTIFICACIONES_DIAS_COMPACTAR`` en un ``NotificationArchive`` por usuario y
+  día (totales por nivel y algunos títulos de muestra) y las borra de
+  ``Notification``. Trabaja por lotes de ids, cada uno en su transacción, así
+  que puede interrumpirse y retomarse sin duplicar conteos.
+- ``podar`` borra las notificaciones (leídas o no) y los resúmenes más antiguos
+  que ``NOTIFICACIONES_DIAS_RETENCION``.
+
+Con la tabla ``Notification`` acotada a lo reciente, el listado por cursor y la
+deduplicación de ``services`` trabajan sobre un índice pequeño. Se ejecuta con
+el comando ``compactar_notificaciones``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+TAMANO_LOTE = 2000
+MAX_TITULOS_MUESTRA = 5
+CAMPO_POR_NIVEL = {'grave': 'grave_count', 'warning': 'warning_count', 'info': 'info_count'}
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def limite_compactar(ahora=None):
+    return (ahora or timezone.now()) - timedelta(days=_config('NOTIFICACIONES_DIAS_COMPACTAR', 30))
+
+
+def limite_retencion(ahora=None):
+    return (ahora or timezone.now()) - timedelta(days=_config('NOTIFICACIONES_DIAS_RETENCION', 365))
+
+
+def _compactar_lote(ids):
+    """Suma un lote de notificaciones a sus resúmenes diarios y las borra. Devuelve cuántas movió."""
+    grupos = {}
+    for recipient_id, creada, level, title in (
+        Notification.objects.filter(id__in=ids).order_by('id')
+        .values_list('recipient_id', 'created_at', 'level', 'title')
+    ):
+        grupo = grupos.setdefault((recipient_id, timezone.localdate(creada)), {
+            'total': 0, 'grave_count': 0, 'warning_count': 0, 'info_count': 0, 'titulos': [],
+        })
+        grupo['total'] += 1
+        grupo[CAMPO_POR_NIVEL.get(level, 'info_count')] += 1
+        if len(grupo['titulos']) < MAX_TITULOS_MUESTRA and title not in grupo['titulos']:
+            grupo['titulos'].append(title)
+
+    existentes = {
+        (archivo.recipient_id, archivo.day): archivo
+        for archivo in NotificationArchive.objects.select_for_update().filter(
+            recipient_id__in={recipient_id for recipient_id, _ in grupos},
+            day__in={dia for _, dia in grupos},
+        )
+    }
+    nuevos, actualizados = [], []
+    for (recipient_id, dia), grupo in grupos.items():
+        archivo = existentes.get((recipient_id, dia))
+        if archivo is None:
+            archivo = NotificationArchive(recipient_id=recipient_id, day=dia, sample_titles=[])
+            nuevos.append(archivo)
+        else:
+            archivo.updated_at = timezone.now()  # bulk_update no aplica auto_now
+            actualizados.append(archivo)
+        for campo in ('total', 'grave_count', 'warning_count', 'info_count'):
+            setattr(archivo, campo, getattr(archivo, campo) + grupo[campo])
+        for titulo in grupo['titulos']:
+            if len(archivo.sample_titles) >= MAX_TITULOS_MUESTRA:
+                break
+            if titulo not in archivo.sample_titles:
+                archivo.sample_titles.append(titulo)
+
+    NotificationArchive.objects.bulk_create(nuevos)
+    NotificationArchive.objects.bulk_update(
+        actualizados, ['total', 'grave_count', 'warning_count', 'info_count', 'sample_titles', 'updated_at'],
+    )
+    Notification.objects.filter(id__in=ids).delete()
+    return sum(grupo['total'] for grupo in grupos.values())
+
+
+def compactar(antes=None, lote=TAMANO_LOTE):
+    """Mueve al archivo las notificaciones leídas creadas antes de ``antes``. Devuelve cuántas movió."""
+    antes = antes or limite_compactar()
+    movidas = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(read=True, recipient__isnull=False, created_at__lt=antes)
+            .order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return movidas
+        with transaction.atomic():
+            movidas += _compactar_lote(ids)
+
+
+def podar(antes=None, lote=TAMANO_LOTE):
+    """
+    Borra lo anterior a ``antes``: notificaciones de cualquier estado y
+    resúmenes del archivo. Devuelve (notificaciones, resúmenes) borrados.
+    """
+    antes = antes or limite_retencion()
+    notificaciones = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(created_at__lt=antes).order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            break
+        # delete() dispara post_delete: las no leídas invalidan el contador de su usuario
+        with transaction.atomic():
+            notificaciones += Notification.objects.filter(id__in=ids).delete()[0]
+    resumenes, _ = NotificationArchive.objects.filter(day__lt=timezone.localdate(antes)).delete()
+    return notificaciones, resumenes
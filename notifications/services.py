@@ -0,0 +1,219 @@
+"""
+Creación y lectura de notificaciones.
+
+- ``notificar_lote`` (y ``notificar`` para una sola) crea las notificaciones
+  con ``bulk_create``. Las que traen ``dedup_key`` no se repiten mientras el
+  destinatario tenga una sin leer con la misma clave: se comprueba con una
+  sola consulta por lote sobre la columna indexada.
+- El número de no leídas de cada usuario vive en la caché compartida
+  (``notif:no_leidas:<id>``): con Redis o Memcached la campana de la barra no
+  consulta la base de datos mientras el contador esté en caché (con el respaldo
+  DatabaseCache la lectura es una consulta a la tabla de la caché en lugar del
+  conteo; ver core/caches.py). Al crear o marcar como
+  leídas se descarta (una vez confirmada la transacción) y la siguiente
+  lectura lo recalcula con el índice: ``incr`` no es atómico en DatabaseCache
+  y dos procesos sumando a la vez perderían un cambio.
+- Los cambios hechos por fuera del servicio (admin, shell) borran el contador
+  mediante las señales de ``notifications.signals``; la siguiente lectura lo
+  recalcula con el índice (recipient, read, created_at).
+- Cada cambio renueva además una versión por usuario (``notif:version:<id>``)
+  que los flujos SSE (``notifications.views.notificaciones_stream``) comparan
+  para consultar la base de datos solo cuando hay algo nuevo.
+- ``pagina`` lista con paginación por cursor (id descendente), sin OFFSET.
+
+Configuración (settings, opcional):
+    NOTIFICACIONES_CACHE_SEGUNDOS  vigencia del contador y la versión en caché (def. 3600)
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Notification
+
+PREFIJO_CONTADOR = 'notif:no_leidas:'
+PREFIJO_VERSION = 'notif:version:'
+LIMITE_PAGINA = 20
+LIMITE_MAXIMO_PAGINA = 100
+
+
+def _config(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def clave_contador(usuario_id):
+    return f"{PREFIJO_CONTADOR}{usuario_id}"
+
+
+def clave_version(usuario_id):
+    return f"{PREFIJO_VERSION}{usuario_id}"
+
+
+def clave_ausencias(nino_id):
+    return f"ausencias-nino-{nino_id}"
+
+
+def clave_novedad(novedad_id):
+    return f"novedad-{novedad_id}"
+
+
+# -----------------------------------------------------------------
+# 🔢 Contador de no leídas
+# -----------------------------------------------------------------
+def contar_no_leidas(usuario):
+    """Notificaciones sin leer de ``usuario``; solo consulta si el contador no está en caché."""
+    if usuario is None or not usuario.is_authenticated:
+        return 0
+    clave = clave_contador(usuario.pk)
+    total = cache.get(clave)
+    if total is None:
+        total = Notification.objects.filter(recipient=usuario, read=False).count()
+        cache.set(clave, total, _config('NOTIFICACIONES_CACHE_SEGUNDOS', 3600))
+    return max(total, 0)
+
+
+def nueva_version(usuario_id):
+    """Renueva la versión del usuario (despierta sus flujos SSE) y la devuelve."""
+    version = uuid.uuid4().hex
+    cache.set(clave_version(usuario_id), version, _config('NOTIFICACIONES_CACHE_SEGUNDOS', 3600))
+    return version
+
+
+def _ajustar_contadores(cambios):
+    """Descarta los contadores de ``{usuario_id: +-n}`` cuando la transacción se confirma."""
+    cambios = {usuario_id: n for usuario_id, n in cambios.items() if usuario_id and n}
+
+    def aplicar():
+        cache.delete_many([clave_contador(usuario_id) for usuario_id in cambios])
+        for usuario_id in cambios:
+            nueva_version(usuario_id)
+
+    if cambios:
+        transaction.on_commit(aplicar)
+
+
+def invalidar_contador(usuario_id):
+    def aplicar():
+        cache.delete(clave_contador(usuario_id))
+        nueva_version(usuario_id)
+
+    transaction.on_commit(aplicar)
+
+
+# -----------------------------------------------------------------
+# 🔔 Crear
+# -----------------------------------------------------------------
+def _ya_notificadas(notificaciones):
+    """Pares (recipient_id, dedup_key) que ya tienen una notificación sin leer."""
+    pares = {(n.recipient_id, n.dedup_key) for n in notificaciones if n.dedup_key}
+    if not pares:
+        return set()
+    return set(
+        Notification.objects.filter(
+            read=False,
+            recipient_id__in={usuario_id for usuario_id, _ in pares},
+            dedup_key__in={clave for _, clave in pares},
+        ).values_list('recipient_id', 'dedup_key')
+    )
+
+
+def notificar_lote(notificaciones):
+    """
+    Guarda las ``Notification`` (sin guardar) que no estén repetidas y devuelve las creadas.
+    Dentro del mismo lote tampoco se repite un par (destinatario, dedup_key).
+    """
+    vistas = _ya_notificadas(notificaciones)
+    nuevas = []
+    for notificacion in notificaciones:
+        par = (notificacion.recipient_id, notificacion.dedup_key)
+        if notificacion.dedup_key:
+            if par in vistas:
+                continue
+            vistas.add(par)
+        nuevas.append(notificacion)
+    if not nuevas:
+        return []
+
+    creadas = Notification.objects.bulk_create(nuevas)
+    cambios = {}
+    for notificacion in creadas:
+        cambios[notificacion.recipient_id] = cambios.get(notificacion.recipient_id, 0) + 1
+    _ajustar_contadores(cambios)
+    return creadas
+
+
+def construir(recipient, title, message, level='info', relacionado=None, dedup_key=''):
+    """``Notification`` sin guardar, lista para ``notificar_lote``."""
+    notificacion = Notification(
+        recipient=recipient, title=title, message=message, level=level, dedup_key=dedup_key,
+    )
+    if relacionado is not None:
+        notificacion.content_type = ContentType.objects.get_for_model(relacionado)
+        notificacion.object_id = relacionado.pk
+    return notificacion
+
+
+def notificar(recipient, title, message, level='info', relacionado=None, dedup_key=''):
+    """Crea una notificación; devuelve ``None`` si ya había una sin leer con la misma clave."""
+    creadas = notificar_lote([construir(recipient, title, message, level, relacionado, dedup_key)])
+    return creadas[0] if creadas else None
+
+
+# -----------------------------------------------------------------
+# ✅ Marcar como leídas
+# -----------------------------------------------------------------
+def marcar_leidas(usuario, ids=None):
+    """Marca como leídas las notificaciones de ``usuario`` (todas o solo ``ids``). Devuelve cuántas."""
+    filtro = Q(recipient=usuario, read=False)
+    if ids is not None:
+        filtro &= Q(id__in=ids)
+    actualizadas = Notification.objects.filter(filtro).update(read=True)
+    _ajustar_contadores({usuario.pk: -actualizadas})
+    return actualizadas
+
+
+# -----------------------------------------------------------------
+# 📄 Listar
+# -----------------------------------------------------------------
+def serializar(notificacion):
+    return {
+        'id': notificacion.id,
+        'title': notificacion.title,
+        'message': notificacion.message,
+        'level': notificacion.level,
+        'read': notificacion.read,
+        'created_at': notificacion.created_at.isoformat(),
+    }
+
+
+def pagina(usuario, antes=None, limite=LIMITE_PAGINA, solo_no_leidas=False):
+    """
+    Notificaciones de ``usuario`` de la más reciente a la más antigua, desde el
+    cursor ``antes`` (id de la última ya mostrada). Devuelve (lista, siguiente
+    cursor o ``None`` si no hay más).
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+    notificaciones = Notification.objects.filter(recipient=usuario)
+    if solo_no_leidas:
+        notificaciones = notificaciones.filter(read=False)
+    if antes is not None:
+        notificaciones = notificaciones.filter(id__lt=antes)
+    filas = list(notificaciones.order_by('-id')[:limite + 1])
+    if len(filas) > limite:
+        return filas[:limite], filas[limite - 1].id
+    return filas, None
+
+
+def nuevas_desde(usuario_id, ultimo_id, limite=LIMITE_MAXIMO_PAGINA):
+    """Notificaciones del usuario con id mayor que ``ultimo_id``, en orden de llegada."""
+    return list(
+        Notification.objects.filter(recipient_id=usuario_id, id__gt=ultimo_id).order_by('id')[:limite]
+    )
+
+
+def ultimo_id(usuario_id):
+    ultima = Notification.objects.filter(recipient_id=usuario_id).order_by('-id').values_list('id', flat=True).first()
+    return ultima or 0
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Notification
+from . import services
+
+
+# El servicio crea y marca con bulk_create/update (sin señales) y ajusta el
+# contador él mismo; cualquier otro cambio (admin, shell) lo invalida.
+@receiver(post_save, sender=Notification)
+def invalidar_contador_no_leidas(sender, instance, raw=False, **kwargs):
+    if raw or not instance.recipient_id:
+        return
+    services.invalidar_contador(instance.recipient_id)
+
+
+# Borrar una notificación leída (compactación, admin) no cambia el contador.
+@receiver(post_delete, sender=Notification)
+def invalidar_contador_al_borrar(sender, instance, **kwargs):
+    if instance.read or not instance.recipient_id:
+        return
+    services.invalidar_contador(instance.recipient_id)
@@ -1,3 +1,46 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import Rol, Usuario
+
+from . import services
+
+
+class FlujoNotificacionesTests(TestCase):
+    """El flujo SSE solo queda abierto cuando la caché no es la base de datos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.get_or_create(nombre_rol='padre')[0]
+        cls.usuario = Usuario.objects.create(documento=1, nombres='Pedro', apellidos='Padre', correo='padre@prueba.co', rol=rol)
+        services.notificar(cls.usuario, 'Primera', 'Hola')
+
+    async def _leer(self, abierto):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('notificaciones_stream'), {'desde': 0})
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        # El flujo abierto es un generador asíncrono; la pasada única, una lista
+        self.assertEqual(respuesta.is_async, abierto)
+        if abierto:
+            return b''.join([parte async for parte in respuesta.streaming_content]).decode()
+        return b''.join(respuesta.streaming_content).decode()
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_icbf',
+    }})
+    async def test_con_cache_en_base_de_datos_responde_una_pasada(self):
+        # Sin bucle: la duración del flujo no interviene
+        with self.settings(NOTIFICACIONES_SSE_DURACION=3600):
+            texto = await self._leer(abierto=False)
+        self.assertTrue(texto.startswith('retry: '))
+        self.assertIn('event: notificacion', texto)
+        self.assertIn('"no_leidas": 1', texto)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        NOTIFICACIONES_SSE_DURACION=1, NOTIFICACIONES_SSE_INTERVALO=1,
+    )
+    async def test_con_cache_en_memoria_queda_abierto(self):
+        texto = await self._leer(abierto=True)
+        self.assertTrue(texto.startswith('retry: '))
+        self.assertEqual(texto.count('event: notificacion'), 1)
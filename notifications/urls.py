@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('marcar-todo-leido/', views.marcar_todo_leido, name='marcar_todo_leido'),
+    path('lista/', views.notificaciones_json, name='notificaciones_json'),
+    path('stream/', views.notificaciones_stream, name='notificaciones_stream'),
 ]
@@ -1,22 +1,145 @@
-from django.shortcuts import render
-# Create your views here.
-from django.http import JsonResponse
-from .models import Notification
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from core import caches
+
+from . import services
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
 
 @login_required
 def marcar_todo_leido(request):
     if request.method == "POST":
-        Notification.objects.filter(recipient=request.user, read=False).update(read=True)
+        services.marcar_leidas(request.user)
         return JsonResponse({"success": True})
     return JsonResponse({"success": False})
 
 
 @login_required
 def notificaciones_list(request):
-    # Filtrar solo las notificaciones del usuario logueado
-    notificaciones = Notification.objects.filter(recipient=request.user).order_by('-created_at')
+    # Filtrar solo las notificaciones del usuario logueado (una página por cursor)
+    notificaciones, siguiente = services.pagina(request.user, antes=_entero(request.GET.get('antes')))
 
     return render(request, 'notificaciones/list.html', {
-        'notificaciones': notificaciones
+        'notificaciones': notificaciones,
+        'siguiente': siguiente,
     })
+
+
+@login_required
+@require_GET
+def notificaciones_json(request):
+    """
+    Lista paginada por cursor: ``?antes=<id>`` continúa después de la última
+    notificación recibida; ``siguiente`` es el cursor de la próxima página.
+    """
+    notificaciones, siguiente = services.pagina(
+        request.user,
+        antes=_entero(request.GET.get('antes')),
+        limite=_entero(request.GET.get('limite')) or services.LIMITE_PAGINA,
+        solo_no_leidas=request.GET.get('no_leidas') == '1',
+    )
+    return JsonResponse({
+        'notificaciones': [services.serializar(n) for n in notificaciones],
+        'siguiente': siguiente,
+        'no_leidas': services.contar_no_leidas(request.user),
+    })
+
+
+# -----------------------------------------------------------------
+# 📡 Flujo SSE de notificaciones
+# -----------------------------------------------------------------
+# Bajo ASGI y con Redis o Memcached la conexión queda abierta hasta
+# NOTIFICACIONES_SSE_DURACION y revisa cada NOTIFICACIONES_SSE_INTERVALO la
+# versión en caché del usuario: solo consulta la base de datos cuando cambió.
+# Con el respaldo DatabaseCache esa revisión sería ella misma una consulta por
+# intervalo y conexión, así que, igual que bajo WSGI (runserver), se responde
+# una sola pasada y el navegador se reconecta tras NOTIFICACIONES_SSE_REINTENTO_MS
+# (sondeo largo), sin dejar ocupado un hilo del servidor.
+SEGUNDOS_LATIDO = 15
+
+
+def _evento(nombre, datos, id_evento=None):
+    lineas = [f"id: {id_evento}"] if id_evento is not None else []
+    lineas += [f"event: {nombre}", f"data: {json.dumps(datos)}"]
+    return "\n".join(lineas) + "\n\n"
+
+
+def _reintento():
+    return f"retry: {getattr(settings, 'NOTIFICACIONES_SSE_REINTENTO_MS', 15000)}\n\n"
+
+
+def _pasada(usuario, ultimo_id):
+    """Eventos de las notificaciones nuevas y del contador. Devuelve (texto, último id)."""
+    partes = []
+    for notificacion in services.nuevas_desde(usuario.pk, ultimo_id):
+        partes.append(_evento('notificacion', services.serializar(notificacion), notificacion.id))
+        ultimo_id = notificacion.id
+    partes.append(_evento('contador', {'no_leidas': services.contar_no_leidas(usuario)}, ultimo_id))
+    return "".join(partes), ultimo_id
+
+
+async def _flujo(usuario, ultimo_id):
+    intervalo = getattr(settings, 'NOTIFICACIONES_SSE_INTERVALO', 2)
+    duracion = getattr(settings, 'NOTIFICACIONES_SSE_DURACION', 300)
+    clave = services.clave_version(usuario.pk)
+    pasada = sync_to_async(_pasada)
+
+    yield _reintento()
+    version_vista = None
+    espera = silencio = 0
+    while espera < duracion:
+        version = await cache.aget(clave)
+        if version is None:
+            version = await sync_to_async(services.nueva_version)(usuario.pk)
+        if version != version_vista:
+            texto, ultimo_id = await pasada(usuario, ultimo_id)
+            version_vista = version
+            silencio = 0
+            yield texto
+        elif silencio >= SEGUNDOS_LATIDO:
+            silencio = 0
+            yield ": latido\n\n"  # mantiene viva la conexión a través de proxies
+        await asyncio.sleep(intervalo)
+        espera += intervalo
+        silencio += intervalo
+
+
+@login_required
+@require_GET
+async def notificaciones_stream(request):
+    """
+    ``text/event-stream`` con eventos ``notificacion`` (una por notificación
+    nueva) y ``contador`` (no leídas). Retoma desde el encabezado
+    ``Last-Event-ID`` que el navegador envía al reconectarse, o desde ``?desde=``.
+    """
+    usuario = await request.auser()
+    ultimo_id = _entero(request.headers.get('Last-Event-ID')) or _entero(request.GET.get('desde'))
+    if ultimo_id is None:
+        ultimo_id = await sync_to_async(services.ultimo_id)(usuario.pk)
+
+    if isinstance(request, ASGIRequest) and not caches.en_base_de_datos():
+        contenido = _flujo(usuario, ultimo_id)
+    else:
+        texto, _ = await sync_to_async(_pasada)(usuario, ultimo_id)
+        contenido = [_reintento(), texto]
+
+    response = StreamingHttpResponse(contenido, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no acumular el flujo
+    return response
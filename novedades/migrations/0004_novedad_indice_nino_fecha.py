@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_asistencia_sin_indice_nino'),
+        ('novedades', '0003_novedad_usuario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='novedad',
+            index=models.Index(fields=['nino', 'fecha'], name='novedades_n_nino_id_83c55c_idx'),
+        ),
+    ]
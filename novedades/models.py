@@ -47,6 +47,10 @@ class Novedad(models.Model):
         }
         return prioridades.get(self.tipo, 1)
 
+    class Meta:
+        # Historial y rangos de fecha por niño (calendario, dashboard, informes del mes)
+        indexes = [models.Index(fields=['nino', 'fecha'])]
+
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('novedades:detalle', args=[str(self.id)])
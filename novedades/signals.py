@@ -1,8 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.contrib.contenttypes.models import ContentType
 from .models import Novedad
-from notifications.models import Notification
+from notifications import services as notificaciones
+from core import busqueda, calendario_padre, dashboard_padre, snapshots
 
 @receiver(post_save, sender=Novedad)
 def crear_notificacion(sender, instance, created, **kwargs):
@@ -14,11 +14,45 @@ def crear_notificacion(sender, instance, created, **kwargs):
         elif prioridad >= 3:
             level = "warning"
 
-        Notification.objects.create(
+        notificaciones.notificar(
+            instance.usuario,
             title=f"Novedad registrada: {instance.nino}",
             message=instance.descripcion,
             level=level,
-            recipient=instance.usuario,
-            content_type=ContentType.objects.get_for_model(instance),
-            object_id=instance.id,
+            relacionado=instance,
+            dedup_key=notificaciones.clave_novedad(instance.id),
         )
+
+
+@receiver(post_save, sender=Novedad)
+@receiver(post_delete, sender=Novedad)
+def actualizar_snapshot_novedades(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    hogar_id = type(instance.nino).objects.filter(id=instance.nino_id).values_list('hogar_id', flat=True).first()
+    if hogar_id:
+        snapshots.actualizar_novedades(hogar_id)
+
+
+@receiver(post_save, sender=Novedad)
+@receiver(post_delete, sender=Novedad)
+def invalidar_caches_padre(sender, instance, raw=False, created=True, **kwargs):
+    # post_delete no envía 'created': un borrado, como un alta, solo toca su mes
+    if raw:
+        return
+    dashboard_padre.invalidar_ninos([instance.nino_id])
+    calendario_padre.invalidar_registro(
+        calendario_padre.padres_de_ninos([instance.nino_id]), instance.fecha, solo_mes=created
+    )
+
+
+@receiver(post_save, sender=Novedad)
+def indexar_novedad_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    busqueda.indexar('novedad', [instance.id])
+
+
+@receiver(post_delete, sender=Novedad)
+def quitar_novedad_busqueda(sender, instance, **kwargs):
+    busqueda.quitar('novedad', [instance.id])
@@ -3,7 +3,8 @@ from .models import Novedad
 from .forms import NovedadForm
 from django.db.models import Q
 from datetime import datetime
-from core.models import Nino, Asistencia, HogarComunitario
+from core.models import Nino, Asistencia
+from core import busqueda, pdf, snapshots
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from core.views import rol_requerido
@@ -14,8 +15,7 @@ from django.utils.dateparse import parse_date
 @login_required
 @rol_requerido('madre_comunitaria')
 def novedades_list(request):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     ninos_madre = Nino.objects.filter(hogar=hogar_madre)
 
     query = request.GET.get('q')
@@ -24,15 +24,10 @@ def novedades_list(request):
 
     novedades = Novedad.objects.select_related('nino').filter(nino__in=ninos_madre).order_by('-fecha')
 
-    # Filtro por texto
+    # Filtro por texto: índice de búsqueda (nombre del niño, tipo, clase, descripción...)
     if query:
-        filtros = (
-            Q(nino__nombres__icontains=query) |
-            Q(nino__apellidos__icontains=query) |
-            Q(tipo__icontains=query) |
-            Q(descripcion__icontains=query) |
-            Q(clase__icontains=query)
-        )
+        encontradas = busqueda.buscar([hogar_madre.id] if hogar_madre else [], query, tipos=['novedad'], limite=None)
+        filtros = Q(id__in=[documento.objeto_id for documento in encontradas])
         try:
             fecha_busqueda = datetime.strptime(query, "%d/%m/%Y").date()
             filtros |= Q(fecha=fecha_busqueda)
@@ -60,8 +55,7 @@ def novedades_list(request):
 @login_required
 @rol_requerido('madre_comunitaria')
 def novedades_create(request):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
 
     form = NovedadForm(request.POST or None)
     form.fields['nino'].queryset = Nino.objects.filter(hogar=hogar_madre)
@@ -77,8 +71,7 @@ def novedades_create(request):
 @login_required
 @rol_requerido('madre_comunitaria')
 def novedades_edit(request, pk):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
 
     novedad = get_object_or_404(Novedad, pk=pk, nino__hogar=hogar_madre)
     form = NovedadForm(request.POST or None, instance=novedad)
@@ -108,15 +101,15 @@ def justificar_ausencia(request, novedad_id):
     novedad = get_object_or_404(Novedad, id=novedad_id)
     novedad.ausencia_justificada = True
     novedad.save()
-    Asistencia.objects.filter(nino=novedad.nino, fecha=novedad.fecha).update(estado="Justificado")
+    if Asistencia.objects.filter(nino=novedad.nino, fecha=novedad.fecha).update(estado="Justificado"):
+        snapshots.actualizar_nino(novedad.nino_id)  # update() no dispara señales
     return redirect('novedades:novedades_list')  # corregido
 
 
 @login_required
 @rol_requerido('madre_comunitaria')
 def nueva_novedad(request):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     nino_id = request.GET.get('nino_id')
     fecha = request.GET.get('fecha')
 
@@ -136,6 +129,8 @@ def nueva_novedad(request):
                 updated = Asistencia.objects.filter(nino_id=nino_id, fecha=fecha).update(estado="Justificado")
                 if not updated:
                     Asistencia.objects.create(nino_id=nino_id, fecha=fecha, estado="Justificado")
+                else:
+                    snapshots.actualizar_nino(nino_id)  # update() no dispara señales
                 messages.success(request, "Novedad registrada y ausencia justificada.")
             return redirect('novedades:novedades_list')
     else:
@@ -149,20 +144,13 @@ def nueva_novedad(request):
 @login_required
 @rol_requerido('madre_comunitaria')
 def detalle_novedad(request, novedad_id):
-    madre_profile = request.user.madre_profile
-    hogar_madre = HogarComunitario.objects.filter(madre=madre_profile).first()
+    hogar_madre = request.actor.hogar
     novedad = get_object_or_404(Novedad, id=novedad_id, nino__hogar=hogar_madre)
     return render(request, 'novedades/detalle.html', {'novedad': novedad})
 
 
-from django.template.loader import get_template
-from django.http import HttpResponse
-from xhtml2pdf import pisa
 from novedades.models import Novedad
 
-from django.template.loader import get_template
-from django.http import HttpResponse
-from xhtml2pdf import pisa
 from django.shortcuts import get_object_or_404
 from core.views import rol_requerido
 from django.contrib.auth.decorators import login_required
@@ -177,11 +165,4 @@ def novedades_pdf(request, novedad_id):
         'novedad': novedad,
     }
 
-    template = get_template("novedades/novedades_pdf.html")  # <-- plural
-    html = template.render(context)
-
-    response = HttpResponse(content_type="application/pdf")
-    response['Content-Disposition'] = f'attachment; filename="novedad_{novedad.id}.pdf"'
-
-    pisa.CreatePDF(html, dest=response)
-    return response
+    return pdf.respuesta_pdf(request, "novedades/novedades_pdf.html", context, f"novedad_{novedad.id}.pdf")  # <-- plural
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planeaciones', '0005_dimension_planeacion_dimensiones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='planeacion',
+            index=models.Index(fields=['madre', 'fecha'], name='planeacione_madre_i_2cc498_idx'),
+        ),
+    ]
@@ -22,6 +22,10 @@ class Planeacion(models.Model):
     situaciones_presentadas = models.TextField()
     dimensiones = models.ManyToManyField(Dimension, blank=True)
 
+    class Meta:
+        # Listados y calendarios de la madre por rango de fechas
+        indexes = [models.Index(fields=['madre', 'fecha'])]
+
     def __str__(self):
         return f"{self.nombre_experiencia} - {self.fecha}"
 
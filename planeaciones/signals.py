@@ -1,6 +1,7 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
-from .models import Dimension
+from core import busqueda, calendario_padre
+from .models import Dimension, Planeacion
 
 @receiver(post_migrate)
 def crear_dimensiones_predeterminadas(sender, **kwargs):
@@ -16,3 +17,26 @@ def crear_dimensiones_predeterminadas(sender, **kwargs):
 
     for nombre in dimensiones:
         Dimension.objects.get_or_create(nombre=nombre)
+
+
+@receiver(post_save, sender=Planeacion)
+@receiver(post_delete, sender=Planeacion)
+def invalidar_calendario_padres(sender, instance, raw=False, created=True, **kwargs):
+    # Los padres ven las planeaciones de la madre del hogar de sus hijos
+    if raw:
+        return
+    calendario_padre.invalidar_registro(
+        calendario_padre.padres_de_madre(instance.madre_id), instance.fecha, solo_mes=created
+    )
+
+
+@receiver(post_save, sender=Planeacion)
+def indexar_planeacion_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    busqueda.indexar('planeacion', [instance.id])
+
+
+@receiver(post_delete, sender=Planeacion)
+def quitar_planeacion_busqueda(sender, instance, **kwargs):
+    busqueda.quitar('planeacion', [instance.id])
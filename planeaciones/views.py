@@ -2,14 +2,32 @@ from django.contrib.auth.decorators import login_required
 from .models import Documentacion, Planeacion
 from .forms import DocumentacionForm, PlaneacionForm
 from django.shortcuts import render, redirect, get_object_or_404
-from django.template.loader import get_template
-from django.http import HttpResponse
-from xhtml2pdf import pisa
 from django.contrib import messages
 from reportlab.pdfgen import canvas
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-
+from django.db.models import Max, Min
+from core import pdf
+from core.fechas import q_mes_en_anios
+from core.paginacion import paginar
+
+
+
+def _filtrar_mes(planeaciones, mes):
+    """
+    Planeaciones del mes ``mes`` (1-12) de cualquier año. En lugar de
+    ``fecha__month`` se arma un rango por año entre la primera y la última
+    planeación, para que la consulta use el índice (madre, fecha).
+    """
+    try:
+        mes = int(mes)
+    except (TypeError, ValueError):
+        return planeaciones
+    if not 1 <= mes <= 12:
+        return planeaciones.none()
+    extremos = planeaciones.aggregate(desde=Min('fecha'), hasta=Max('fecha'))
+    if extremos['desde'] is None:
+        return planeaciones
+    return planeaciones.filter(q_mes_en_anios('fecha', mes, extremos['desde'].year, extremos['hasta'].year))
 
 
 #Holaaaaa amiguitos de youtu :D
@@ -18,14 +36,9 @@ def lista_planeaciones(request):
     madre = request.user
     mes = request.GET.get('mes')  # filtro por mes
 
-    if mes:
-        planeaciones = Planeacion.objects.filter(madre=madre, fecha__month=mes).order_by('-fecha')
-    else:
-        planeaciones = Planeacion.objects.filter(madre=madre).order_by('-fecha')
- # ------ PAGINACIÓN ------
-    paginator = Paginator(planeaciones, 4)  # 4 planeaciones por página
-    page_number = request.GET.get('page')
-    planeaciones = paginator.get_page(page_number)
+    planeaciones = _filtrar_mes(Planeacion.objects.filter(madre=madre), mes)
+ # ------ PAGINACIÓN (por cursor sobre el índice madre, fecha) ------
+    planeaciones = paginar(request, planeaciones, ['-fecha'], por_pagina=4, conteo='estimado')
     # -------------------------
 
     # Lista de meses para la barra de búsqueda
@@ -137,17 +150,11 @@ def eliminar_planeacion(request, id):
     return render(request, 'planeaciones/eliminar_planeacion.html', {'planeacion': planeacion})
 
 # Función genérica para generar PDF desde HTML
-def generar_pdf(template_path, context):
-    template = get_template(template_path)
-    html = template.render(context)
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = "inline; filename=reporte.pdf"
-
-    pisa_status = pisa.CreatePDF(html, dest=response, encoding='UTF-8')
-    if pisa_status.err:
-        return HttpResponse("Error al generar PDF")
-    return response
+def generar_pdf(request, template_path, context):
+    return pdf.respuesta_pdf(
+        request, template_path, context, "reporte.pdf",
+        disposicion="inline", mensaje_error="Error al generar PDF",
+    )
 
 
 # --- REPORTES ---
@@ -162,7 +169,7 @@ def reporte_planeacion_pdf(request, id):
         "BASE_URL": request.build_absolute_uri('/'),
     }
     template_path = "planeaciones/reporte_individual.html"  # tu template individual
-    return generar_pdf(template_path, context)
+    return generar_pdf(request, template_path, context)
 
 
 @login_required
@@ -182,7 +189,7 @@ def reporte_todas_pdf(request):
     }
 
     template_path = "planeaciones/reporte_todas.html"
-    return generar_pdf(template_path, context)
+    return generar_pdf(request, template_path, context)
 
 
 @login_required
@@ -190,11 +197,7 @@ def reporte_mes_pdf(request):
     madre = request.user
     mes = request.GET.get("mes")
 
-    planeaciones = Planeacion.objects.filter(madre=madre)
-    if mes:
-        planeaciones = planeaciones.filter(fecha__month=mes)
-
-    planeaciones = planeaciones.order_by('-fecha')
+    planeaciones = _filtrar_mes(Planeacion.objects.filter(madre=madre), mes).order_by('-fecha')
 
     # Construir rutas absolutas de imágenes
     for p in planeaciones:
@@ -209,7 +212,7 @@ def reporte_mes_pdf(request):
     }
 
     template_path = "planeaciones/reporte_todas.html"
-    return generar_pdf(template_path, context)
+    return generar_pdf(request, template_path, context)
 
 
 @login_required